@@ -4,26 +4,333 @@ IBM Mainframe API Server with s3270 Integration
 Provides real 3270 terminal emulation using s3270
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
 import os
+import json
 import uuid
 import subprocess
 import time
 import sys
 import re
+import atexit
+import logging
+import logging.handlers
+import queue
+import hashlib
+import hmac
+import cProfile
+import zlib
+import tempfile
+import threading
+import shutil
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
-from typing import Dict, Optional, List, Tuple
+from typing import Callable, Dict, Optional, List, Tuple
+
+from job_history import (
+    FRESH_SUBMIT_SECONDS,
+    JobRuntimeHistory,
+    fixed_poll_schedule,
+    job_name_of,
+    polling_savings,
+    predictive_poll_schedule,
+)
+from job_status_cache import JobStatusCache
+from catalog_cache import CATALOG_TTL, DatasetCatalogCache, split_member
+from profiler import DEFAULT_SAMPLING_INTERVAL, MAX_PROFILE_REQUESTS, MAX_SAMPLING_SECONDS, Profiler
+from step_cache import StepPolicy, StepResultCache
+from workflow_runs import WorkflowCheckpoints, has_references, resolve_references, step_artifacts
+from workqueue import FINAL_STATES, HOST_CONCURRENCY_OVERRIDES, USER_CONCURRENCY, WorkerPool, WorkQueue, host_limit
+from terminal_models import (
+    BASE_PAGE_LINES,
+    MODEL_PROBE_SECONDS,
+    OVERSIZE_ENV,
+    TerminalModelRegistry,
+    candidate_models,
+    page_budget,
+    parse_oversize,
+    parse_screen_size,
+)
+from copybook import CopybookError, compile_copybook, load_copybook
+from columnar import DEFAULT_BATCH_RECORDS, scan_file
+from ebcdic import RecordCodec
+from filecomp import DIFF_SAMPLE_SIZE, SORT_RUN_RECORDS, FileComparer
+from reccount import (
+    MAX_RECCOUNT_DATASETS,
+    RECCOUNT_JOB_CLASS,
+    RECCOUNT_MSGCLASS,
+    build_reccount_jcl,
+    invalid_datasets,
+    normalize_dataset,
+    parse_reccount_output,
+)
+from expectations import EXPECTATION_SAMPLE_SIZE, ExpectationError, check_file, compile_expectations
+from datagen import MAX_GENERATE_RECORDS, DataGenError, generate_file
+from fileconv import ConversionError, iter_convert, iter_reverse, output_format_of, run_to_completion
+from preflight import validate_upload
+from rexxbatch import (
+    BATCH_COMPLETE_MARKER,
+    BATCH_DCB,
+    BATCH_EXEC,
+    BATCH_FAILED_MARKER,
+    BatchError,
+    encode_operations,
+    exec_dataset,
+    exec_hash,
+    parse_batch_result,
+    request_datasets,
+)
+from datasets import (
+    BULK_ACTIONS,
+    COMMANDS as DATASET_COMMANDS,
+    DatasetRequestError,
+    free_command,
+    listcat_command,
+    normalize_items,
+    parse_listcat,
+    parse_result,
+)
+from navigation import NAVIGATION_MAX_STEPS, TARGET_STATES, identify_screen, screen_matches, shortest_path
+from splitupload import (
+    CONCAT_JOB_CLASS,
+    CONCAT_MSGCLASS,
+    MAX_SPLIT_PARTS,
+    SPLIT_PART_ATTEMPTS,
+    build_concat_jcl,
+    part_count,
+    part_datasets,
+    parse_concat_output,
+    space_cylinders,
+    split_ranges,
+    write_parts,
+)
 
 app = Flask(__name__)
 CORS(app, resources={r"/api/*": {"origins": "*"}})
 
+# Log level for the backend logger (DEBUG also dumps full screens)
+LOG_LEVEL = os.environ.get('MAINFRAME_LOG_LEVEL', 'INFO').upper()
+
+logger = logging.getLogger('mainframe')
+
+
+class EventFormatter(logging.Formatter):
+    """Formatter that appends per-event fields (session_id, host, step, wait_ms) as key=value pairs"""
+
+    EVENT_FIELDS = ('session_id', 'host', 'step', 'wait_ms')
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = [
+            f"{name}={getattr(record, name)}"
+            for name in self.EVENT_FIELDS
+            if getattr(record, name, None) is not None
+        ]
+        if not fields:
+            return line
+        # Keep multi-line screen dumps readable by putting the fields on the first line
+        first, sep, rest = line.partition('\n')
+        return f"{first} | {' '.join(fields)}{sep}{rest}"
+
+
+def configure_logging() -> logging.handlers.QueueListener:
+    """
+    Configure the backend logger once.
+    Request threads only enqueue records; a background listener thread does the
+    formatting and the (possibly slow) console I/O.
+    """
+    # Never fail on characters the console code page cannot represent
+    if hasattr(sys.stdout, 'reconfigure'):
+        sys.stdout.reconfigure(errors='backslashreplace')
+
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(EventFormatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+
+    log_queue: queue.Queue = queue.Queue(-1)
+    listener = logging.handlers.QueueListener(log_queue, console_handler, respect_handler_level=True)
+
+    logger.handlers.clear()
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
+    logger.propagate = False
+
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+log_listener = configure_logging()
+
+# Project root (parent of the backend directory)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Local state kept across restarts (job history, queues, caches)
+STATE_DIR = os.path.join(PROJECT_ROOT, 'backend', 'state')
+
 # Global sessions storage
 sessions = {}
 
+# Records decoded for a copybook compile preview
+COPYBOOK_PREVIEW_RECORDS = 5
+
+
+# Where FileComp difference reports are written
+FILECOMP_REPORT_DIR = os.path.join(PROJECT_ROOT, 'downloads', 'filecomp')
+
+
+def resolve_project_path(path: str) -> str:
+    """Resolve a relative local path from the project root (not the working directory)"""
+    return path if os.path.isabs(path) else os.path.join(PROJECT_ROOT, path)
+
+
+def project_relative(path: str) -> str:
+    """Path relative to the project root when inside it, else the absolute path"""
+    relative = os.path.relpath(path, PROJECT_ROOT)
+    return path if relative.startswith('..') else relative
+
+
+def transfer_dcb_options(dcb: Dict) -> str:
+    """IND$FILE allocation options (Recfm/Lrecl/Blksize) for the s3270 Transfer action"""
+    recfm = str(dcb.get('recfm') or '').upper()
+    options = ""
+    if recfm:
+        options += ",Recfm=" + {'F': 'fixed', 'V': 'variable', 'U': 'undefined'}.get(recfm[0], 'default')
+    if dcb.get('lrecl'):
+        options += f",Lrecl={int(dcb['lrecl'])}"
+    if dcb.get('blksize'):
+        options += f",Blksize={int(dcb['blksize'])}"
+    if dcb.get('space'):
+        primary, secondary = dcb['space']
+        options += f",Allocation=cylinders,PrimarySpace={int(primary)},SecondarySpace={int(secondary)}"
+    return options
+
+
+def invalid_dcb(dcb) -> Optional[str]:
+    """Why a request's DCB cannot be used (None when absent or well-formed)"""
+    if not dcb:
+        return None
+    if not isinstance(dcb, dict):
+        return "dcb must be an object with recfm, lrecl and blksize"
+    if dcb.get('recfm') is not None and not isinstance(dcb['recfm'], str):
+        return "dcb recfm must be a string such as FB or VB"
+    for key in ('lrecl', 'blksize'):
+        value = dcb.get(key)
+        if value not in (None, '') and (isinstance(value, bool) or not str(value).strip().isdigit()):
+            return f"dcb {key} must be a whole number"
+    space = dcb.get('space')
+    if space and (not isinstance(space, (list, tuple)) or len(space) != 2
+                  or not all(isinstance(value, int) and not isinstance(value, bool) for value in space)):
+        return "dcb space must be [primary, secondary] cylinders"
+    return None
+
+
+def parse_field_list(value) -> List[str]:
+    """Field names from a JSON list or a comma-separated string"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    return [str(name).strip() for name in value if str(name).strip()]
+
+# Past job runtimes used to schedule status polls
+job_history = JobRuntimeHistory(os.path.join(STATE_DIR, 'job_history.sqlite3'))
+
+# Terminal model each host accepted (shared with job history's state directory)
+terminal_models = TerminalModelRegistry(os.path.join(STATE_DIR, 'terminal_models.sqlite3'))
+
+# Job output read by default, in lines: what 50 screens held on each family's original model
+# (3278-2 on TK5 with 22 lines a page, 3279-4 elsewhere with 41), whatever model is negotiated now
+JOB_OUTPUT_MAX_LINES = {'3278': 50 * BASE_PAGE_LINES, '3279': 50 * (43 - (24 - BASE_PAGE_LINES))}
+
+# Users per bulk login request, logins in flight overall and per host (TK5 keeps its queue limit)
+MAX_BULK_LOGINS = 100
+BULK_LOGIN_WORKERS = 8
+BULK_LOGIN_PER_HOST = 4
+
+# Approximate duration of one STATUS poll (Clear + STATUS + Enter and its sleeps)
+STATUS_POLL_SECONDS = 4.0
+
+# Job states reported by the TSO STATUS command, most specific first
+JOB_STATES = [
+    'OUTPUT QUEUE',
+    'INPUT QUEUE',
+    'ACTIVE',
+    'PRINT QUEUE',
+    'EXECUTING',
+    'WAITING',
+    'HELD'
+]
+
+# Job status results shared by all sessions and workflows
+job_status_cache = JobStatusCache()
+
+# Dataset existence, attributes and members per host, shared by all sessions
+dataset_catalog = DatasetCatalogCache()
+
+# TSO verbs (and abbreviations) that only read; any other raw command may allocate, delete,
+# rename, edit or submit, so it drops the host's catalog entries
+READ_ONLY_TSO_VERBS = ('LISTDS', 'LISTD', 'LISTCAT', 'LISTC', 'LISTALC', 'LISTA', 'STATUS', 'ST', 'TIME', 'HELP', 'H')
+
+
+def command_changes_datasets(command: str) -> bool:
+    """Whether a raw command may change datasets on the host (anything but a read-only TSO verb)"""
+    words = command.upper().split()
+    if words[:1] == ['TSO']:
+        words = words[1:]
+    return bool(words) and words[0] not in READ_ONLY_TSO_VERBS
+
+# JES job ids (JOB00123, or J0123456 once numbers pass 99999) and how long output cached under one stays valid
+JES_JOB_ID_PATTERN = re.compile(r'\b(JOB\d{5}|J\d{7})\b', re.IGNORECASE)
+JOB_OUTPUT_CACHE_TTL = 3600.0
+
+# Steps whose result can be reused; any step not listed always runs
+STEP_CACHE_POLICIES = {
+    'fileconv': StepPolicy(input_files=('copybook_path', 'data_path'), output_files=('output_path',)),
+    'reverse': StepPolicy(input_files=('copybook_path', 'input_path'), output_files=('output_path',)),
+    # Output of a job is final once it shows a condition code; only a JES job id names one job
+    # (a job name is reused by reruns) and ids wrap on small systems, so entries also expire
+    'joboutput': StepPolicy(output_files=('output_path',), ttl=JOB_OUTPUT_CACHE_TTL,
+                            cache_if=lambda result: result.get('cond_code') is not None,
+                            params_if=lambda params: bool(JES_JOB_ID_PATTERN.search(str(params.get('job_identifier') or '')))),
+    # Counts hold until a change through this backend (raw commands included) touches the host, or the catalog TTL passes
+    'reccount': StepPolicy(host_state=True, ttl=CATALOG_TTL),
+}
+
+step_cache = StepResultCache(resolve_path=resolve_project_path)
+
+
+def memoized_step(step: str, params: Dict, compute: Callable[[], Dict], host: Optional[str] = None) -> Dict:
+    """
+    Result of a step from the step cache, else computed and stored. Host-dependent results are
+    stored under the host state after the step ran (cacheable steps never change their own inputs).
+    """
+    policy = STEP_CACHE_POLICIES.get(step)
+    if policy is None or (policy.params_if is not None and not policy.params_if(params)):
+        return compute()
+
+    cached = step_cache.get(step_cache.key(step, params, policy, host, dataset_catalog.generation(host) if host else None))
+    if cached is not None:
+        return dict(cached, cached=True)
+
+    result = compute()
+    step_cache.put(step_cache.key(step, params, policy, host, dataset_catalog.generation(host) if host else None),
+                   result, policy)
+    return result
+
 # Session timeout in seconds (30 minutes)
 SESSION_TIMEOUT = 1800
 
+# Number of actions kept in each session's flight recorder
+FLIGHT_RECORDER_SIZE = 50
+
+# Maximum number of JCL datasets accepted by one batch submission
+MAX_BATCH_SUBMIT = 100
+
+# TSO SUB confirmation, e.g. "JOB HERC01A(JOB00123) SUBMITTED"
+JOB_SUBMITTED_PATTERN = re.compile(r'JOB\s+(.+?)\s+SUBMITTED', re.IGNORECASE)
+
 def cleanup_expired_sessions():
     """Remove expired sessions"""
     current_time = datetime.now()
@@ -38,12 +345,12 @@ def cleanup_expired_sessions():
 
     for session_id in expired_sessions:
         try:
-            print(f"Cleaning up expired session: {session_id}")
+            logger.info("Cleaning up expired session", extra={'session_id': session_id})
             session = sessions[session_id]['session']
             session.disconnect()
             del sessions[session_id]
         except Exception as e:
-            print(f"Error cleaning up session {session_id}: {e}")
+            logger.error(f"Error cleaning up session: {e}", extra={'session_id': session_id})
 
     return len(expired_sessions)
 
@@ -52,6 +359,54 @@ def update_session_access(session_id: str):
     if session_id in sessions:
         sessions[session_id]['last_accessed'] = datetime.now()
 
+class FlightRecorder:
+    """
+    Fixed-size ring buffer of the last actions performed on a session.
+    Each entry keeps a timestamp, the action, a hash of the screen, the screen
+    compressed with zlib and the wait time. Consecutive identical screens share
+    one compressed snapshot so polling loops stay cheap.
+    """
+
+    def __init__(self, size: int = FLIGHT_RECORDER_SIZE):
+        self.entries = deque(maxlen=size)
+        self._last_hash: Optional[str] = None
+        self._last_snapshot: bytes = b""
+
+    def record(self, action: str, screen: str, wait_time: Optional[float] = None):
+        """Append an action to the ring buffer (oldest entries are dropped)"""
+        screen_hash = hashlib.blake2b(screen.encode('utf-8', errors='replace'), digest_size=8).hexdigest()
+        if screen_hash != self._last_hash:
+            self._last_hash = screen_hash
+            self._last_snapshot = zlib.compress(screen.encode('utf-8', errors='replace'), 1)
+
+        self.entries.append((
+            time.time(),
+            action,
+            screen_hash,
+            self._last_snapshot,
+            int(wait_time * 1000) if wait_time is not None else None
+        ))
+
+    @property
+    def last_hash(self) -> Optional[str]:
+        return self._last_hash
+
+    def dump(self, include_screens: bool = True) -> List[Dict]:
+        """Return the recorded actions, oldest first"""
+        dumped = []
+        for timestamp, action, screen_hash, snapshot, wait_ms in list(self.entries):
+            entry = {
+                "timestamp": datetime.fromtimestamp(timestamp).isoformat(),
+                "action": action,
+                "screen_hash": screen_hash,
+                "wait_ms": wait_ms
+            }
+            if include_screens:
+                entry["screen_content"] = zlib.decompress(snapshot).decode('utf-8', errors='replace')
+            dumped.append(entry)
+        return dumped
+
+
 class S3270Session:
     """s3270 session handler for IBM mainframe connections"""
 
@@ -62,13 +417,55 @@ class S3270Session:
         self.is_connected = False
         self.is_logged_in = False
         self.login_type = 'standard'  # 'standard' or 'tso'
+        self.username: Optional[str] = None
         self.created_at = datetime.now()
         self.process = None
         self.screen_buffer = ""
         self.last_command = ""
+        self.recorder = FlightRecorder()
+        # Content hash -> host dataset of REXX execs already uploaded in this session
+        self.uploaded_execs: Dict[str, str] = {}
+        # Negotiated terminal model and screen size (rows/columns as currently used by the host)
+        self.terminal: Dict = {"model": None, "rows": 24, "columns": 80}
+
+    def _log_event(
+        self,
+        level: int,
+        message: str,
+        step: Optional[str] = None,
+        wait_time: Optional[float] = None,
+        screen: Optional[str] = None
+    ):
+        """
+        Log a session event with structured fields.
+        Screen dumps are only attached at DEBUG level or for warnings/errors.
+        """
+        if not logger.isEnabledFor(level):
+            return
+
+        if screen is not None and (level >= logging.WARNING or logger.isEnabledFor(logging.DEBUG)):
+            message = f"{message}\n{screen}"
+
+        logger.log(level, message, extra={
+            'session_id': self.session_id,
+            'host': f"{self.host}:{self.port}" if self.host else None,
+            'step': step,
+            'wait_ms': int(wait_time * 1000) if wait_time is not None else None
+        })
+
+    def _recorder_reference(self, step: str, screen: str) -> Dict[str, str]:
+        """Record a failing screen and return a reference to it for the JSON response"""
+        self.recorder.record(f'failed:{step}', screen)
+        return {
+            "recorder": f"/api/sessions/{self.session_id}/recorder",
+            "screen_hash": self.recorder.last_hash
+        }
 
-    def connect(self, host: str, port: int = 23) -> Tuple[bool, str]:
-        """Connect to mainframe using s3270"""
+    def connect(self, host: str, port: int = 23, oversize: Optional[str] = None) -> Tuple[bool, str]:
+        """
+        Connect to mainframe using s3270 with the largest terminal model the host accepts.
+        Models are tried largest first; one the host drops right away is remembered as rejected.
+        """
         try:
             # Determine s3270 executable path based on OS
             s3270_paths = [
@@ -82,65 +479,111 @@ class S3270Session:
             s3270_exe = next((path for path in s3270_paths if os.path.exists(path)), "s3270")
 
             # Configure s3270 parameters based on target system
-            if host == 'localhost' and port == 3270:
-                # TK5/Hercules specific configuration
-                s3270_cmd = [
-                    s3270_exe,
-                    '-model', '3278-2',   # Use older 3278 model for TK5
-                    '-script',            # Enable scripting mode
-                    '-connecttimeout', '180',  # 3 minutes timeout for TK5
-                    '-codepage', 'cp037', # Use EBCDIC code page
-                    f'{host}:{port}'
-                ]
+            tk5 = host == 'localhost' and port == 3270
+            if tk5:
+                # TK5/Hercules specific configuration: older 3278 models, EBCDIC code page
+                family = '3278'
+                extra_options = ['-connecttimeout', '180', '-codepage', 'cp037']  # 3 minutes timeout for TK5
             else:
                 # Standard configuration for modern systems like pub400
-                s3270_cmd = [
-                    s3270_exe,
-                    '-model', '3279-4',  # 3270 model 4 (43x80)
-                    '-script',           # Enable scripting mode
-                    '-connecttimeout', '180',  # 3 minutes timeout for slow connections
-                    f'{host}:{port}'
-                ]
+                family = '3279'
+                extra_options = ['-connecttimeout', '180']  # 3 minutes timeout for slow connections
 
-            self.process = subprocess.Popen(
-                s3270_cmd,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                encoding='utf-8',
-                errors='replace',  # Replace unencodable characters
-                bufsize=0
+            host_key = f"{host}:{port}"
+            candidates = terminal_models.ordered_candidates(
+                host_key, candidate_models(family, parse_oversize(oversize or os.environ.get(OVERSIZE_ENV)))
             )
+            known = terminal_models.accepted(host_key)
+            dropped: List[str] = []
+            stderr_output = ""
+
+            for index, candidate in enumerate(candidates):
+                s3270_cmd = [s3270_exe] + candidate["options"] + ['-script'] + extra_options + [f'{host}:{port}']
+
+                self.process = subprocess.Popen(
+                    s3270_cmd,
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                    encoding='utf-8',
+                    errors='replace',  # Replace unencodable characters
+                    bufsize=0
+                )
 
-            # Wait for connection to establish with intelligent waiting
-            connect_start = time.time()
-            print(f"\n[CONNECTION] Starting connection to {host}:{port} at {datetime.now().strftime('%H:%M:%S.%f')[:-3]}")
+                # Wait for connection to establish with intelligent waiting
+                connect_start = time.time()
+                logger.info(f"Starting connection (model {candidate['model']})",
+                            extra={'session_id': self.session_id, 'host': host_key})
 
-            # Initial short delay to let connection start
-            time.sleep(1.0)
+                # Initial short delay to let connection start
+                time.sleep(1.0)
 
-            # Check if process is still running (successful connection)
-            if self.process.poll() is None:
-                self.host = host
-                self.port = port
-                self.is_connected = True
+                probe = index + 1 < len(candidates) and not (known and known["model"] == candidate["model"])
+                if probe and self._model_dropped(connect_start):
+                    # Host refused the terminal type: try the next smaller model
+                    stderr_output = self._stop_process()
+                    dropped.append(candidate["model"])
+                    continue
 
-                # Use intelligent wait for initial screen with appropriate timeout
-                timeout = 60 if host == 'localhost' and port == 3270 else 30
-                success, initial_screen, wait_time = self._wait_for_screen_ready(timeout=timeout, poll_interval=0.5)
+                # Check if process is still running (successful connection)
+                if self.process.poll() is None:
+                    self.host = host
+                    self.port = port
+                    self.is_connected = True
+                    for model in dropped:
+                        terminal_models.reject(host_key, model)
 
-                connect_elapsed = time.time() - connect_start
-                print(f"[CONNECTION] Successfully connected | Screen ready: {wait_time:.2f}s | Total: {connect_elapsed:.2f}s\n")
+                    # Use intelligent wait for initial screen with appropriate timeout
+                    timeout = 60 if tk5 else 30
+                    success, initial_screen, wait_time = self._wait_for_screen_ready(timeout=timeout, poll_interval=0.5)
 
-                return True, f"Successfully connected to {host}:{port} using s3270 (took {connect_elapsed:.2f}s)"
-            else:
+                    self.terminal = {"model": candidate["model"], "max_rows": candidate["rows"], "max_columns": candidate["columns"]}
+                    self.refresh_screen_size()
+                    terminal_models.accept(host_key, candidate["model"], candidate["rows"], candidate["columns"])
+
+                    connect_elapsed = time.time() - connect_start
+                    self._log_event(logging.INFO, f"Connected as {candidate['model']} (total {connect_elapsed:.2f}s)",
+                                    step='connect', wait_time=wait_time)
+
+                    return True, (f"Successfully connected to {host}:{port} using s3270 as {candidate['model']} "
+                                  f"(took {connect_elapsed:.2f}s)")
                 stderr_output = self.process.stderr.read()
-                return False, f"Connection failed: {stderr_output}"
+
+            return False, f"Connection failed: {stderr_output}"
 
         except Exception as e:
             return False, f"Connection error: {str(e)}"
 
+    def _model_dropped(self, started: float) -> bool:
+        """True when the host closed the connection during the model probe window"""
+        while time.time() - started < MODEL_PROBE_SECONDS:
+            if self.process.poll() is not None:
+                return True
+            state = self._send_command('Query(ConnectionState)', timeout=5)
+            if state["status"] == "ok" and 'not-connected' in state["data"]:
+                return True
+            time.sleep(0.5)
+        return False
+
+    def _stop_process(self) -> str:
+        """End the s3270 process of a failed connection attempt and return its stderr"""
+        if self.process.poll() is None:
+            self.process.terminate()
+        try:
+            _, stderr_output = self.process.communicate(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            stderr_output = ""
+        return stderr_output or ""
+
+    def refresh_screen_size(self) -> Dict:
+        """Current screen geometry as s3270 reports it (the host switches to the alternate size when it uses it)"""
+        size = parse_screen_size(self._send_command('Query(ScreenCurSize)', timeout=5).get("data", ""))
+        if size:
+            self.terminal["rows"], self.terminal["columns"] = size
+        return self.terminal
+
     def _send_command(self, command: str, timeout: int = 30) -> Dict[str, str]:
         """Send command to s3270 process and get response"""
         if not self.process or self.process.poll() is not None:
@@ -188,8 +631,11 @@ class S3270Session:
         except Exception as e:
             return {"status": "error", "data": f"Command error: {str(e)}"}
 
-    def _execute_command(self, command: str, timeout: int = 30) -> str:
+    def _execute_command(self, command: str, timeout: int = 30, redact: bool = False) -> str:
         """Execute a command and return just the data"""
+        if command != 'Ascii':
+            # Record the action against the last screen seen; never record secrets
+            self.recorder.record('String(***)' if redact else command, self.screen_buffer)
         result = self._send_command(command, timeout)
         if result["status"] == "error":
             return f"Error: {result['data']}"
@@ -198,6 +644,7 @@ class S3270Session:
     def get_screen_text(self) -> str:
         """Get current screen content as text"""
         screen_content = self._execute_command('Ascii')
+        self.screen_buffer = screen_content
         return screen_content
 
     def _wait_for_screen_ready(self, timeout: float = 10.0, poll_interval: float = 0.5) -> Tuple[bool, str, float]:
@@ -217,6 +664,7 @@ class S3270Session:
                 stable_count += 1
                 if stable_count >= required_stable_checks:
                     elapsed = time.time() - start_time
+                    self.recorder.record('wait_ready', current_screen, elapsed)
                     return True, current_screen, elapsed
             else:
                 stable_count = 0
@@ -226,6 +674,7 @@ class S3270Session:
 
         # Timeout reached
         elapsed = time.time() - start_time
+        self.recorder.record('wait_ready_timeout', last_screen, elapsed)
         return False, last_screen, elapsed
 
     def _wait_for_screen_content(self, expected_content: str, timeout: float = 10.0, poll_interval: float = 0.5, case_sensitive: bool = False) -> Tuple[bool, str, float]:
@@ -242,37 +691,132 @@ class S3270Session:
             if case_sensitive:
                 if expected_content in screen:
                     elapsed = time.time() - start_time
+                    self.recorder.record(f'wait_for:{expected_content}', screen, elapsed)
                     return True, screen, elapsed
             else:
                 if expected_content.upper() in screen.upper():
                     elapsed = time.time() - start_time
+                    self.recorder.record(f'wait_for:{expected_content}', screen, elapsed)
                     return True, screen, elapsed
 
             time.sleep(poll_interval)
 
         # Timeout reached
         elapsed = time.time() - start_time
+        self.recorder.record(f'wait_for_timeout:{expected_content}', screen, elapsed)
         return False, screen, elapsed
 
-    def ensure_ready_prompt(self, max_attempts: int = 5, wait_seconds: float = 2.0) -> Tuple[bool, str]:
-        """Attempt to reach the READY prompt by issuing PF3 as needed"""
-        last_screen = ""
-        for _ in range(max_attempts):
+    def _wait_for_any_screen_content(self, markers: Tuple[str, ...], timeout: float = 10.0,
+                                     poll_interval: float = 0.5) -> Tuple[Optional[str], str, float]:
+        """
+        Wait until one of several markers appears on screen (case-insensitive)
+        Returns: (marker found or None on timeout, screen_content, elapsed_time)
+        """
+        start_time = time.time()
+        screen = ""
+
+        while time.time() - start_time < timeout:
             screen = self.get_screen_text()
-            last_screen = screen
-            if 'READY' in screen.upper():
-                return True, screen
-            self._execute_command('PF(3)')
-            time.sleep(wait_seconds)
-        return 'READY' in last_screen.upper(), last_screen
+            found = next((marker for marker in markers if marker.upper() in screen.upper()), None)
+            if found:
+                elapsed = time.time() - start_time
+                self.recorder.record(f'wait_for:{found}', screen, elapsed)
+                return found, screen, elapsed
+            time.sleep(poll_interval)
+
+        elapsed = time.time() - start_time
+        self.recorder.record(f"wait_for_timeout:{'|'.join(markers)}", screen, elapsed)
+        return None, screen, elapsed
+
+    def ensure_ready_prompt(self, max_attempts: int = 5, wait_seconds: float = 2.0) -> Tuple[bool, str]:
+        """Reach the READY prompt along the shortest known path (see navigate_to)"""
+        result = self.navigate_to('ready', max_steps=max_attempts, wait_seconds=wait_seconds)
+        return result["success"], result.get("screen_content", "")
+
+    def navigate_to(
+        self,
+        target: str,
+        params: Optional[Dict[str, str]] = None,
+        max_steps: int = NAVIGATION_MAX_STEPS,
+        wait_seconds: float = 5.0
+    ) -> Dict:
+        """
+        Move the session to a known screen state (see navigation.TARGET_STATES).
+        The current screen is identified, the fewest-keystroke path is planned and
+        its first transition run; this repeats until the target is reached, so an
+        unexpected screen along the way only costs a re-plan. A target state showing
+        another level or dataset than the params ask for is entered again (once).
+        """
+        started = time.time()
+        steps: List[Dict] = []
+        screen = self.get_screen_text()
+        state = identify_screen(screen)
+        reentered = False
+
+        while not (state == target and screen_matches(state, screen, params)) and len(steps) < max_steps:
+            reenter = state == target
+            if reenter and reentered:
+                break
+            reentered = reentered or reenter
+            path = shortest_path(state, target, params, reenter=reenter)
+            if not path:
+                message = ("Not logged in to TSO" if state == 'logon'
+                           else f"No known path from {state} to {target}")
+                self._log_event(logging.WARNING, message, step='navigate', screen=screen)
+                return {
+                    "success": False,
+                    "message": message,
+                    "state": state,
+                    "target": target,
+                    "steps": steps,
+                    "elapsed_ms": int((time.time() - started) * 1000),
+                    "screen_content": screen
+                }
+
+            transition = path[0]
+            for action in transition["actions"]:
+                self._execute_command(action)
+            _, screen, wait_time = self._wait_for_screen_ready(timeout=wait_seconds, poll_interval=0.2)
+            state = identify_screen(screen)
+            steps.append(dict(transition, reached=state, wait_ms=int(wait_time * 1000)))
+            self._log_event(logging.DEBUG, f"Navigate {transition['from']} -> {transition['to']} reached {state}",
+                            step='navigate', wait_time=wait_time)
+
+        elapsed = time.time() - started
+        reached = state == target and screen_matches(state, screen, params)
+        if reached:
+            message = f"At {target} after {len(steps)} step(s)"
+        elif state == target:
+            message = f"At {target}, but the screen does not show the requested {', '.join(sorted(params or {}))}"
+        else:
+            message = f"Could not reach {target} in {max_steps} step(s); stopped at {state}"
+        if not reached:
+            self._log_event(logging.WARNING, message, step='navigate', screen=screen)
+        return {
+            "success": reached,
+            "message": message,
+            "state": state,
+            "target": target,
+            "steps": steps,
+            "keystrokes": sum(len(step["actions"]) for step in steps),
+            "elapsed_ms": int(elapsed * 1000),
+            "screen_content": screen
+        }
 
     def check_job_status(
         self,
         job_identifier: str,
         max_attempts: int = 5,
-        wait_seconds: float = 5.0
+        wait_seconds: float = 5.0,
+        predictive: bool = True
     ) -> Dict:
-        """Poll job status from the READY prompt until OUTPUT QUEUE or attempts exhausted"""
+        """
+        Poll job status from the READY prompt until OUTPUT QUEUE or attempts exhausted
+
+        When runtime history exists for the job name on this host, polls are
+        scheduled around the expected completion time (see job_history);
+        otherwise they are spaced wait_seconds apart.
+        """
         if not self.is_connected:
             return {"success": False, "message": "Not connected to mainframe"}
 
@@ -283,6 +827,24 @@ class S3270Session:
         if not identifier:
             return {"success": False, "message": "Job identifier is required"}
 
+        host_key = f"{self.host}:{self.port}"
+        cache_key = (host_key, self.username, identifier.upper())
+
+        # A job in OUTPUT QUEUE never changes state again: answer without touching the host
+        final_status = job_status_cache.peek_final(cache_key)
+        if final_status:
+            return {
+                "success": True,
+                "message": f"Job {identifier} reached OUTPUT QUEUE",
+                "job_identifier": identifier,
+                "job_state": 'OUTPUT QUEUE',
+                "screen_content": final_status["screen_content"],
+                "attempts": 0,
+                "history": [],
+                "reached_output_queue": True,
+                "cache": "final"
+            }
+
         ready, ready_screen = self.ensure_ready_prompt()
         if not ready:
             return {
@@ -295,44 +857,76 @@ class S3270Session:
         reached_output_queue = False
         job_state: Optional[str] = None
 
-        for attempt in range(1, max_attempts + 1):
-            self._execute_command('Clear')
-            time.sleep(0.5)
-            self._execute_command(f'String("STATUS {identifier}")')
-            time.sleep(0.5)
-            self._execute_command('Enter')
-            time.sleep(3)
+        submitted_at = job_history.submitted_at(host_key, identifier)
+        estimate = job_history.estimate(host_key, job_name_of(identifier)) if predictive else None
+        poll_start = time.time()
+        elapsed_since_submit = poll_start - submitted_at if submitted_at else 0.0
 
-            screen_content = self.get_screen_text()
-            screen_upper = screen_content.upper()
+        if estimate:
+            schedule = predictive_poll_schedule(estimate, elapsed_since_submit, max_attempts, wait_seconds, STATUS_POLL_SECONDS)
+        else:
+            schedule = fixed_poll_schedule(max_attempts, wait_seconds, STATUS_POLL_SECONDS)
+
+        polling = {
+            "mode": "predictive" if estimate else "fixed",
+            "schedule_seconds": [round(offset, 1) for offset in schedule],
+            "history_samples": estimate["samples"] if estimate else 0,
+            "expected_runtime_seconds": round(estimate["expected_seconds"], 1) if estimate else None
+        }
+
+        previous_poll_at = 0.0
+        for attempt, offset in enumerate(schedule, start=1):
+            delay = poll_start + offset - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            poll_started_at = time.time() - poll_start
+
+            status, source = job_status_cache.get_or_fetch(
+                cache_key,
+                lambda: self._poll_job_status(identifier),
+                is_final=lambda value: value["job_state"] == 'OUTPUT QUEUE',
+                cacheable=lambda value: not value["screen_content"].startswith('Error:'),
+                fetched_after=previous_poll_at
+            )
+            previous_poll_at = time.time()
+            screen_content = status["screen_content"]
             status_history.append({
                 "attempt": str(attempt),
-                "screen_content": screen_content
+                "screen_content": screen_content,
+                "source": source
             })
 
-            if 'NOT FOUND' in screen_upper or 'UNKNOWN JOB' in screen_upper:
+            if status["not_found"]:
+                job_history.forget_submission(host_key, identifier)
                 return {
                     "success": False,
                     "message": f"Job {identifier} not found",
                     "screen_content": screen_content,
                     "attempts": attempt,
-                    "history": status_history
+                    "history": status_history,
+                    "polling": polling
                 }
 
-            known_states = [
-                'OUTPUT QUEUE',
-                'INPUT QUEUE',
-                'ACTIVE',
-                'PRINT QUEUE',
-                'EXECUTING',
-                'WAITING',
-                'HELD'
-            ]
-            job_state = next((state for state in known_states if state in screen_upper), job_state)
+            job_state = status["job_state"] or job_state
 
-            if 'OUTPUT QUEUE' in screen_upper:
+            if job_state == 'OUTPUT QUEUE':
                 reached_output_queue = True
-                job_state = 'OUTPUT QUEUE'
+
+                # Only a transition seen while polling gives a trustworthy runtime
+                if submitted_at and (attempt > 1 or elapsed_since_submit <= FRESH_SUBMIT_SECONDS):
+                    runtime = job_history.record_completion(host_key, identifier)
+                    polling["recorded_runtime_seconds"] = round(runtime, 1) if runtime is not None else None
+                else:
+                    job_history.forget_submission(host_key, identifier)
+
+                polls_saved, latency_saved_ms = polling_savings(poll_started_at, attempt, wait_seconds, STATUS_POLL_SECONDS)
+                polling.update({
+                    "polls_used": attempt,
+                    "detected_after_ms": int(poll_started_at * 1000),
+                    "polls_saved": polls_saved,
+                    "latency_saved_ms": latency_saved_ms
+                })
+
                 return {
                     "success": True,
                     "message": f"Job {identifier} reached OUTPUT QUEUE",
@@ -341,28 +935,50 @@ class S3270Session:
                     "screen_content": screen_content,
                     "attempts": attempt,
                     "history": status_history,
-                    "reached_output_queue": True
+                    "reached_output_queue": True,
+                    "polling": polling
                 }
 
-            if attempt < max_attempts:
-                time.sleep(wait_seconds)
+        polling["polls_used"] = len(schedule)
 
         return {
             "success": True,
             "message": f"Status polling completed for {identifier}",
             "job_identifier": identifier,
             "job_state": job_state or "UNKNOWN",
-            "attempts": max_attempts,
+            "attempts": len(schedule),
             "history": status_history,
-            "reached_output_queue": reached_output_queue
+            "reached_output_queue": reached_output_queue,
+            "polling": polling
+        }
+
+    def _poll_job_status(self, identifier: str) -> Dict:
+        """Run one Clear/STATUS/Enter cycle and parse the job state from the screen"""
+        self._execute_command('Clear')
+        time.sleep(0.5)
+        self._execute_command(f'String("STATUS {identifier}")')
+        time.sleep(0.5)
+        self._execute_command('Enter')
+        time.sleep(3)
+
+        screen_content = self.get_screen_text()
+        screen_upper = screen_content.upper()
+        return {
+            "screen_content": screen_content,
+            "job_state": next((state for state in JOB_STATES if state in screen_upper), None),
+            "not_found": 'NOT FOUND' in screen_upper or 'UNKNOWN JOB' in screen_upper
         }
 
     def get_job_output(
         self,
         job_identifier: str,
-        max_pages: int = 50
+        max_pages: Optional[int] = None
     ) -> Dict:
-        """Retrieve job output pages and persist them to disk"""
+        """
+        Retrieve job output pages and persist them to disk.
+        Without max_pages the pages read cover as many lines as the original model of the host
+        family showed in 50 screens, so larger models fetch fewer screens and smaller ones more.
+        """
         if not self.is_connected:
             return {"success": False, "message": "Not connected to mainframe"}
 
@@ -381,6 +997,10 @@ class S3270Session:
                 "screen_content": ready_screen
             }
 
+        family = (self.terminal.get("model") or '3279')[:4]
+        max_pages = max_pages or page_budget(JOB_OUTPUT_MAX_LINES.get(family, JOB_OUTPUT_MAX_LINES['3279']),
+                                             self.terminal.get("rows") or self.terminal.get("max_rows"))
+
         self._execute_command('Clear')
         time.sleep(0.5)
         self._execute_command(f'String("OUTPUT {identifier} KEEP")')
@@ -456,28 +1076,18 @@ class S3270Session:
 
             # Get current screen to see login prompt
             initial_screen = self.get_screen_text()
-            # Safe print with encoding handling
-            try:
-                print(f"DEBUG: Initial screen content:\n{initial_screen}")
-            except UnicodeEncodeError:
-                print("DEBUG: Initial screen content received (contains special characters)")
+            self._log_event(logging.DEBUG, "Initial login screen", step='login_initial', screen=initial_screen)
 
             # TSO-based login flow for IBM mainframes with intelligent waiting and performance logging
             if login_type == 'tso':
                 login_start_time = time.time()
-                print(f"\n{'='*60}")
-                print(f"[TSO LOGIN PERFORMANCE] Starting TSO login at {datetime.now().strftime('%H:%M:%S.%f')[:-3]}")
-                print(f"{'='*60}\n")
+                self._log_event(logging.INFO, "Starting TSO login", step='tso_login')
 
                 # Step 1: Get initial screen (no artificial delay needed)
                 step_start = time.time()
                 success, screen_1, wait_time = self._wait_for_screen_ready(timeout=5.0, poll_interval=0.3)
                 step_elapsed = time.time() - step_start
-                try:
-                    print(f"[STEP 1] Initial screen ready | Wait: {wait_time:.2f}s | Total: {step_elapsed:.2f}s")
-                    print(f"Screen preview: {screen_1[:200]}...")
-                except UnicodeEncodeError:
-                    print(f"[STEP 1] Initial screen ready | Wait: {wait_time:.2f}s | Total: {step_elapsed:.2f}s")
+                self._log_event(logging.INFO, f"Initial screen ready (total {step_elapsed:.2f}s)", step='tso_login_1', wait_time=wait_time, screen=screen_1)
 
                 # Step 2: Type TSO and press Enter
                 step_start = time.time()
@@ -488,11 +1098,7 @@ class S3270Session:
                 # Wait for TSO screen (intelligent wait instead of fixed 15s)
                 success, screen_2, wait_time = self._wait_for_screen_ready(timeout=20.0, poll_interval=0.5)
                 step_elapsed = time.time() - step_start
-                try:
-                    print(f"[STEP 2] TSO command sent, screen ready | Wait: {wait_time:.2f}s | Total: {step_elapsed:.2f}s")
-                    print(f"Screen preview: {screen_2[:200]}...")
-                except UnicodeEncodeError:
-                    print(f"[STEP 2] TSO command sent, screen ready | Wait: {wait_time:.2f}s | Total: {step_elapsed:.2f}s")
+                self._log_event(logging.INFO, f"TSO command sent, screen ready (total {step_elapsed:.2f}s)", step='tso_login_2', wait_time=wait_time, screen=screen_2)
 
                 # Step 3: Type username and press Enter
                 step_start = time.time()
@@ -503,11 +1109,7 @@ class S3270Session:
                 # Wait for username processing (intelligent wait instead of fixed 15s)
                 success, screen_3, wait_time = self._wait_for_screen_ready(timeout=20.0, poll_interval=0.5)
                 step_elapsed = time.time() - step_start
-                try:
-                    print(f"[STEP 3] Username sent, screen ready | Wait: {wait_time:.2f}s | Total: {step_elapsed:.2f}s")
-                    print(f"Screen preview: {screen_3[:200]}...")
-                except UnicodeEncodeError:
-                    print(f"[STEP 3] Username sent, screen ready | Wait: {wait_time:.2f}s | Total: {step_elapsed:.2f}s")
+                self._log_event(logging.INFO, f"Username sent, screen ready (total {step_elapsed:.2f}s)", step='tso_login_3', wait_time=wait_time, screen=screen_3)
 
                 # Check for username-related errors immediately after STEP 3
                 # This prevents password from being sent if username is already invalid
@@ -534,35 +1136,29 @@ class S3270Session:
                     else:
                         user_friendly_message = f"Username '{username}' authentication failed"
 
-                    print(f"[STEP 3] [ERROR] Username validation failed: {user_friendly_message}")
-                    sys.stdout.flush()
+                    self._log_event(logging.WARNING, f"Username validation failed: {user_friendly_message}", step='tso_login_3', screen=screen_3)
 
                     return {
                         "success": False,
                         "message": user_friendly_message,
-                        "screen_content": screen_3
+                        **self._recorder_reference('tso_login_3', screen_3)
                     }
 
                 # Step 4: Type password and press Enter
                 step_start = time.time()
-                self._execute_command(f'String("{password}")')
+                self._execute_command(f'String("{password}")', redact=True)
                 time.sleep(0.3)
                 self._execute_command('Enter')
 
                 # Wait for authentication (intelligent wait instead of fixed 20s)
                 success, screen_4, wait_time = self._wait_for_screen_ready(timeout=25.0, poll_interval=0.5)
                 step_elapsed = time.time() - step_start
-                try:
-                    print(f"[STEP 4] Password sent, authentication complete | Wait: {wait_time:.2f}s | Total: {step_elapsed:.2f}s")
-                    print(f"Screen preview: {screen_4[:200]}...")
-                except UnicodeEncodeError:
-                    print(f"[STEP 4] Password sent, authentication complete | Wait: {wait_time:.2f}s | Total: {step_elapsed:.2f}s")
+                self._log_event(logging.INFO, f"Password sent, authentication complete (total {step_elapsed:.2f}s)", step='tso_login_4', wait_time=wait_time, screen=screen_4)
                 
                 # Check for login rejection errors immediately after password
                 screen_4_upper = screen_4.upper()
                 if 'LOGON REJECTED' in screen_4_upper or 'ALREADY LOGGED ON' in screen_4_upper:
-                    print(f"[STEP 4] [ERROR] Login rejected - user already logged on or access denied")
-                    sys.stdout.flush()
+                    self._log_event(logging.WARNING, "Login rejected - user already logged on or access denied", step='tso_login_4', screen=screen_4)
 
                     rejection_line = next(
                         (ln.strip() for ln in screen_4.splitlines() if 'IKJ' in ln.upper() or 'LOGON' in ln.upper()),
@@ -575,7 +1171,7 @@ class S3270Session:
                     return {
                         "success": False,
                         "message": f"User {username} is already logged on elsewhere. {detailed_message}",
-                        "screen_content": screen_4
+                        **self._recorder_reference('tso_login_4', screen_4)
                     }
 
                 # Step 5: Press Enter (for /)
@@ -585,11 +1181,7 @@ class S3270Session:
                 # Wait for screen update (intelligent wait instead of fixed 10s)
                 success, screen_5, wait_time = self._wait_for_screen_ready(timeout=15.0, poll_interval=0.5)
                 step_elapsed = time.time() - step_start
-                try:
-                    print(f"[STEP 5] First Enter sent, screen ready | Wait: {wait_time:.2f}s | Total: {step_elapsed:.2f}s")
-                    print(f"Screen preview: {screen_5[:200]}...")
-                except UnicodeEncodeError:
-                    print(f"[STEP 5] First Enter sent, screen ready | Wait: {wait_time:.2f}s | Total: {step_elapsed:.2f}s")
+                self._log_event(logging.INFO, f"First Enter sent, screen ready (total {step_elapsed:.2f}s)", step='tso_login_5', wait_time=wait_time, screen=screen_5)
 
                 # Step 6: Press Enter again (final step - ends at READY prompt)
                 step_start = time.time()
@@ -598,29 +1190,14 @@ class S3270Session:
                 # Wait for READY prompt (intelligent wait instead of fixed 10s)
                 success, screen_6, wait_time = self._wait_for_screen_ready(timeout=15.0, poll_interval=0.5)
                 step_elapsed = time.time() - step_start
-                try:
-                    print(f"[STEP 6] Second Enter sent, READY prompt reached | Wait: {wait_time:.2f}s | Total: {step_elapsed:.2f}s")
-                    print(f"Screen preview: {screen_6[:200]}...")
-                    sys.stdout.flush()
-                except UnicodeEncodeError:
-                    print(f"[STEP 6] Second Enter sent, READY prompt reached | Wait: {wait_time:.2f}s | Total: {step_elapsed:.2f}s")
-                    sys.stdout.flush()
+                self._log_event(logging.INFO, f"Second Enter sent (total {step_elapsed:.2f}s)", step='tso_login_6', wait_time=wait_time, screen=screen_6)
 
                 # Verify READY prompt
-                if 'READY' in screen_6.upper():
-                    print(f"[STEP 6] [OK] READY prompt confirmed")
-                else:
-                    print(f"[STEP 6] [WARN] Warning: READY prompt not found in screen")
-                sys.stdout.flush()
+                if 'READY' not in screen_6.upper():
+                    self._log_event(logging.WARNING, "READY prompt not found after TSO login", step='tso_login_6', screen=screen_6)
 
-                # Print performance summary
                 total_login_time = time.time() - login_start_time
-                print(f"\n{'='*60}")
-                print(f"[TSO LOGIN PERFORMANCE SUMMARY]")
-                print(f"Total login time: {total_login_time:.2f}s (ends at READY prompt)")
-                print(f"Completed at: {datetime.now().strftime('%H:%M:%S.%f')[:-3]}")
-                print(f"{'='*60}\n")
-                sys.stdout.flush()
+                self._log_event(logging.INFO, f"TSO login sequence finished in {total_login_time:.2f}s", step='tso_login')
 
             # TK5 specific login handling
             elif self.host == 'localhost' and self.port == 3270:
@@ -635,13 +1212,10 @@ class S3270Session:
 
                 # Get intermediate screen
                 intermediate_screen = self.get_screen_text()
-                try:
-                    print(f"DEBUG: After username screen:\n{intermediate_screen}")
-                except UnicodeEncodeError:
-                    print("DEBUG: After username screen received")
+                self._log_event(logging.DEBUG, "Screen after username", step='tk5_login', screen=intermediate_screen)
 
                 # Type password
-                self._execute_command(f'String("{password}")')
+                self._execute_command(f'String("{password}")', redact=True)
                 time.sleep(1)
 
                 # Press Enter to submit password
@@ -662,7 +1236,7 @@ class S3270Session:
                 time.sleep(0.5)
 
                 # Type password
-                self._execute_command(f'String("{password}")')
+                self._execute_command(f'String("{password}")', redact=True)
                 time.sleep(0.5)
 
                 # Press Enter to submit login
@@ -671,10 +1245,7 @@ class S3270Session:
 
             # Get screen after login attempt
             login_result_screen = self.get_screen_text()
-            try:
-                print(f"DEBUG: Final login screen:\n{login_result_screen}")
-            except UnicodeEncodeError:
-                print("DEBUG: Final login screen received")
+            self._log_event(logging.DEBUG, "Final login screen", step='login_result', screen=login_result_screen)
 
             # Check for error/success indicators in screen content
             # NOTE: Check errors FIRST to avoid false positives
@@ -708,12 +1279,11 @@ class S3270Session:
                 detailed_message = (
                     rejection_line if rejection_line else 'User already logged on to the system.'
                 )
-                print(f"[LOGIN] Failed - User already logged on: {username}")
-                sys.stdout.flush()
+                self._log_event(logging.WARNING, f"Login failed - user {username} already logged on", step='login_result', screen=login_result_screen)
                 return {
                     "success": False,
                     "message": f"User {username} is already logged on elsewhere. {detailed_message}",
-                    "screen_content": login_result_screen
+                    **self._recorder_reference('login_result', login_result_screen)
                 }
 
             # Priority 2: Check for error indicators (BEFORE checking success)
@@ -723,23 +1293,25 @@ class S3270Session:
                     (ln.strip() for ln in login_result_screen.splitlines() if 'IKJ' in ln.upper() or any(err.upper() in ln.upper() for err in error_indicators)),
                     'Authentication failed'
                 )
-                print(f"[LOGIN] Failed - Error detected in screen: {error_line[:100]}")
-                sys.stdout.flush()
+                self._log_event(logging.WARNING, f"Login failed - error detected in screen: {error_line[:100]}", step='login_result', screen=login_result_screen)
                 return {
                     "success": False,
                     "message": f"Login failed - {error_line}",
-                    "screen_content": login_result_screen
+                    **self._recorder_reference('login_result', login_result_screen)
                 }
 
             # Priority 3: Check for success indicators
             if any(indicator in login_screen_upper for indicator in success_indicators):
                 self.is_logged_in = True
-                print(f"[LOGIN] Success - User {username} logged in successfully")
-                sys.stdout.flush()
+                self.username = username.upper()
+                # TSO switches to the alternate (model) size once logged on
+                self.refresh_screen_size()
+                self._log_event(logging.INFO, f"User {username} logged in successfully", step='login_result')
                 return {
                     "success": True,
                     "message": "Login successful",
-                    "screen_content": login_result_screen
+                    "screen_content": login_result_screen,
+                    "terminal": self.terminal
                 }
 
             # Priority 3.5: Check if we've returned to the initial login screen
@@ -750,25 +1322,21 @@ class S3270Session:
                 'APPLICATION REQUIRED. NO INSTALLATION DEFAULT'
             ]
             if all(indicator in login_screen_upper for indicator in initial_screen_indicators):
-                print(f"[LOGIN] Failed - Returned to initial login screen (credentials rejected)")
-                print(f"[LOGIN] This indicates authentication failed without explicit error message")
-                sys.stdout.flush()
+                self._log_event(logging.WARNING, "Login failed - returned to initial login screen (credentials rejected)", step='login_result', screen=login_result_screen)
                 return {
                     "success": False,
                     "message": f"Authentication failed - Invalid username or password",
-                    "screen_content": login_result_screen
+                    **self._recorder_reference('login_result', login_result_screen)
                 }
 
             # Priority 4: If we reach here, login failed
             # We must see explicit success indicators (READY, ISPF menu, etc.) to confirm success
             # Without these indicators, we cannot confirm authentication succeeded
-            print(f"[LOGIN] Failed - No success indicators found (no READY prompt or ISPF menu)")
-            print(f"[LOGIN] Authentication requires explicit success confirmation")
-            sys.stdout.flush()
+            self._log_event(logging.WARNING, "Login failed - no success indicators found (no READY prompt or ISPF menu)", step='login_result', screen=login_result_screen)
             return {
                 "success": False,
                 "message": "Login failed - No success confirmation received",
-                "screen_content": login_result_screen
+                **self._recorder_reference('login_result', login_result_screen)
             }
 
         except Exception as e:
@@ -835,8 +1403,21 @@ class S3270Session:
         except Exception as e:
             return {"success": False, "message": f"Function key error: {str(e)}"}
 
-    def send_file_to_mainframe(self, local_path: str, mainframe_dataset: str, transfer_mode: str = 'ascii', host_type: str = 'tso') -> Dict:
-        """Send file from local to Mainframe using the s3270 Transfer action."""
+    def _record_codec(self, copybook_path: str, code_page: str) -> RecordCodec:
+        """Copybook-aware EBCDIC codec for binary transfers (raises on a bad copybook or code page)"""
+        layout, _ = load_copybook(resolve_project_path(copybook_path))
+        return RecordCodec(layout, code_page)
+
+    def send_file_to_mainframe(self, local_path: str, mainframe_dataset: str, transfer_mode: str = 'ascii', host_type: str = 'tso',
+                               copybook_path: Optional[str] = None, code_page: str = 'cp037', local_framing: str = 'auto',
+                               dcb: Optional[Dict] = None, preflight: bool = True) -> Dict:
+        """
+        Send file from local to Mainframe using the s3270 Transfer action.
+        With transfer_mode 'binary' and a copybook, character fields are converted to EBCDIC
+        locally and packed/binary fields are sent byte for byte.
+        dcb ({"recfm", "lrecl", "blksize"}) sets the attributes of a newly allocated dataset.
+        With preflight, the file is checked against the DCB and copybook before the transfer starts.
+        """
         if not self.is_connected:
             return {"success": False, "message": "Not connected to mainframe"}
 
@@ -853,9 +1434,20 @@ class S3270Session:
         if not os.path.exists(abs_local_path):
             return {"success": False, "message": f"Local file not found: {abs_local_path}"}
 
-        # Verify we're at READY prompt (LoginISPF should leave us here)
-        print("Verifying READY prompt for Transfer command...")
+        # Reject a file that would fail or be truncated before spending minutes on the transfer
+        report = None
+        if preflight:
+            try:
+                layout = load_copybook(resolve_project_path(copybook_path))[0] if copybook_path else None
+                report = validate_upload(abs_local_path, dcb, layout, transfer_mode, code_page, local_framing)
+            except (OSError, CopybookError, LookupError, ValueError) as e:
+                return {"success": False, "message": f"Pre-flight validation failed: {e}"}
+            if not report["valid"]:
+                self._log_event(logging.WARNING, f"Pre-flight rejected {local_path}: {'; '.join(report['errors'])}", step='transfer_preflight')
+                return {"success": False, "message": f"Pre-flight validation failed: {'; '.join(report['errors'])}",
+                        "preflight": report}
 
+        # Verify we're at READY prompt (LoginISPF should leave us here)
         # Use Snap mechanism for consistent screen reading
         self._execute_command('Snap(Save)')
         snap_result = self._send_command('Snap(Ascii)')
@@ -863,40 +1455,80 @@ class S3270Session:
 
         # Check if we're at READY prompt
         if "READY" not in screen:
-            print("Error: Not at READY prompt, Transfer will fail")
-            print(f"Current screen preview: {screen[:200]}")
+            self._log_event(logging.WARNING, "Not at READY prompt, Transfer will fail", step='transfer', screen=screen)
             return {"success": False, "message": "Not at READY prompt. Please ensure you are logged in to TSO."}
 
-        # On Windows, s3270 (from wc3270) often expects forward slashes.
-        if sys.platform == "win32":
-            abs_local_path = abs_local_path.replace('\\', '/')
-
-        # Get local file size for reporting
-        local_file_size = os.path.getsize(abs_local_path)
-
-        # Construct the Transfer command
-        # Based on x3270 documentation: parameters are option=value format
-        # TSO dataset names need to be wrapped in single quotes for IND$FILE
-        # BufferSize: larger values give better performance (256-32768)
-        transfer_command = (
-            f"Transfer(Direction=send,LocalFile={abs_local_path},"
-            f"HostFile='{mainframe_dataset}',Host={host_type.lower()},Mode={transfer_mode.lower()},"
-            f"BufferSize=8192,Exist=replace)"
-        )
+        # Binary transfer of record data: convert character fields to EBCDIC locally
+        codec_stats = None
+        host_options = ""
+        transfer_path = abs_local_path
+        if transfer_mode.lower() == 'binary' and copybook_path:
+            try:
+                codec = self._record_codec(copybook_path, code_page)
+            except (OSError, CopybookError, LookupError) as e:
+                return {"success": False, "message": f"Cannot convert {local_path} for binary transfer: {e}"}
+            # The codec writes fixed records of the copybook length; a DCB may add to that but not contradict it
+            record_length = codec.layout.record_length
+            dcb = dict(dcb or {})
+            recfm = str(dcb.get('recfm') or 'F').upper()
+            if not recfm.startswith('F') or int(dcb.get('lrecl') or record_length) != record_length:
+                return {
+                    "success": False,
+                    "message": f"DCB RECFM={recfm} LRECL={dcb.get('lrecl')} conflicts with the copybook's "
+                               f"fixed {record_length}-byte records used for binary transfer"
+                }
+            dcb.update(recfm=recfm, lrecl=record_length)
+            try:
+                fd, transfer_path = tempfile.mkstemp(suffix='.ebcdic')
+                os.close(fd)
+                codec_stats = codec.to_host(abs_local_path, transfer_path, local_framing)
+            except (OSError, CopybookError, LookupError) as e:
+                if transfer_path != abs_local_path and os.path.exists(transfer_path):
+                    os.remove(transfer_path)
+                return {"success": False, "message": f"Cannot convert {local_path} for binary transfer: {e}"}
+            self._log_event(logging.INFO, f"Converted {codec_stats['records']} record(s) to {codec.code_page}", step='transfer_codec')
+        if dcb:
+            host_options = transfer_dcb_options(dcb)
+
+        try:
+            # On Windows, s3270 (from wc3270) often expects forward slashes.
+            if sys.platform == "win32":
+                transfer_path = transfer_path.replace('\\', '/')
+
+            # Get local file size for reporting
+            local_file_size = os.path.getsize(transfer_path)
+
+            # Construct the Transfer command
+            # Based on x3270 documentation: parameters are option=value format
+            # TSO dataset names need to be wrapped in single quotes for IND$FILE
+            # BufferSize: larger values give better performance (256-32768)
+            transfer_command = (
+                f"Transfer(Direction=send,LocalFile={transfer_path},"
+                f"HostFile='{mainframe_dataset}',Host={host_type.lower()},Mode={transfer_mode.lower()},"
+                f"BufferSize=8192,Exist=replace{host_options})"
+            )
 
-        print(f"Executing transfer command: {transfer_command}")
-        print(f"Uploading {local_file_size} bytes to {mainframe_dataset}")
+            self._log_event(logging.INFO, f"Uploading {local_file_size} bytes to {mainframe_dataset}: {transfer_command}", step='transfer_send')
 
-        # Execute the command using a longer timeout for file transfers
-        result = self._send_command(transfer_command, timeout=300)  # 5-minute timeout
+            # Execute the command using a longer timeout for file transfers
+            result = self._send_command(transfer_command, timeout=300)  # 5-minute timeout
+        finally:
+            if codec_stats is not None and os.path.exists(transfer_path):
+                os.remove(transfer_path)
 
         if result["status"] == "ok":
             # The data part of the response often contains transfer statistics
-            return {
+            dataset_catalog.invalidate(f"{self.host}:{self.port}", [mainframe_dataset])
+            response = {
                 "success": True,
                 "message": f"File transfer completed for {mainframe_dataset}.",
                 "details": f"Uploaded {local_file_size} bytes. {result.get('data', '')}"
             }
+            if codec_stats:
+                response["codec"] = dict(codec_stats, code_page=code_page.lower())
+            if report:
+                response["preflight"] = report
+            return response
         else:
             return {
                 "success": False,
@@ -904,14 +1536,17 @@ class S3270Session:
                 "details": result.get("data", "Unknown error.")
             }
 
-    def get_file_from_mainframe(self, mainframe_dataset: str, local_path: str, transfer_mode: str = 'ascii', host_type: str = 'tso') -> Dict:
-        """Get file from Mainframe to local using the s3270 Transfer action."""
+    def get_file_from_mainframe(self, mainframe_dataset: str, local_path: str, transfer_mode: str = 'ascii', host_type: str = 'tso',
+                                copybook_path: Optional[str] = None, code_page: str = 'cp037', local_framing: str = 'lines') -> Dict:
+        """
+        Get file from Mainframe to local using the s3270 Transfer action.
+        With transfer_mode 'binary' and a copybook, the EBCDIC records are converted locally
+        (character fields only), leaving packed/binary fields byte-exact.
+        """
         if not self.is_connected:
             return {"success": False, "message": "Not connected to mainframe"}
 
         # Verify we're at READY prompt (LoginISPF should leave us here)
-        print("Verifying READY prompt for Transfer command...")
-
         # Use Snap mechanism for consistent screen reading
         self._execute_command('Snap(Save)')
         snap_result = self._send_command('Snap(Ascii)')
@@ -919,8 +1554,7 @@ class S3270Session:
 
         # Check if we're at READY prompt
         if "READY" not in screen:
-            print("Error: Not at READY prompt, Transfer will fail")
-            print(f"Current screen preview: {screen[:200]}")
+            self._log_event(logging.WARNING, "Not at READY prompt, Transfer will fail", step='transfer', screen=screen)
             return {"success": False, "message": "Not at READY prompt. Please ensure you are logged in to TSO."}
 
         # Resolve local_path relative to project root (not current working directory)
@@ -938,34 +1572,56 @@ class S3270Session:
         if local_dir and not os.path.exists(local_dir):
             os.makedirs(local_dir)
 
-        # On Windows, s3270 might need forward slashes
-        if sys.platform == "win32":
-            abs_local_path = abs_local_path.replace('\\', '/')
-
-        # Construct the Transfer command
-        # Based on x3270 documentation: parameters are option=value format
-        # TSO dataset names need to be wrapped in single quotes for IND$FILE
-        # BufferSize: larger values give better performance (256-32768)
-        transfer_command = (
-            f"Transfer(Direction=receive,HostFile='{mainframe_dataset}',"
-            f"LocalFile={abs_local_path},Host={host_type.lower()},Mode={transfer_mode.lower()},"
-            f"BufferSize=8192,Exist=replace)"
-        )
+        codec = None
+        transfer_path = abs_local_path
+        if transfer_mode.lower() == 'binary' and copybook_path:
+            try:
+                codec = self._record_codec(copybook_path, code_page)
+            except (OSError, CopybookError, LookupError) as e:
+                return {"success": False, "message": f"Cannot convert {mainframe_dataset} after binary transfer: {e}"}
+            fd, transfer_path = tempfile.mkstemp(suffix='.ebcdic')
+            os.close(fd)
+
+        codec_stats = None
+        try:
+            # On Windows, s3270 might need forward slashes
+            if sys.platform == "win32":
+                transfer_path = transfer_path.replace('\\', '/')
+
+            # Construct the Transfer command
+            # Based on x3270 documentation: parameters are option=value format
+            # TSO dataset names need to be wrapped in single quotes for IND$FILE
+            # BufferSize: larger values give better performance (256-32768)
+            transfer_command = (
+                f"Transfer(Direction=receive,HostFile='{mainframe_dataset}',"
+                f"LocalFile={transfer_path},Host={host_type.lower()},Mode={transfer_mode.lower()},"
+                f"BufferSize=8192,Exist=replace)"
+            )
 
-        print(f"Executing transfer command: {transfer_command}")
+            self._log_event(logging.INFO, f"Downloading {mainframe_dataset}: {transfer_command}", step='transfer_receive')
 
-        # Execute the command with a longer timeout
-        result = self._send_command(transfer_command, timeout=300)  # 5-minute timeout
+            # Execute the command with a longer timeout
+            result = self._send_command(transfer_command, timeout=300)  # 5-minute timeout
+
+            if codec and result["status"] == "ok" and os.path.exists(transfer_path):
+                codec_stats = codec.to_local(transfer_path, abs_local_path, local_framing)
+                self._log_event(logging.INFO, f"Converted {codec_stats['records']} record(s) from {codec.code_page}", step='transfer_codec')
+        finally:
+            if codec and os.path.exists(transfer_path):
+                os.remove(transfer_path)
 
         if result["status"] == "ok":
             # Verify file was actually downloaded
             if os.path.exists(abs_local_path):
                 file_size = os.path.getsize(abs_local_path)
-                return {
+                response = {
                     "success": True,
                     "message": f"File successfully retrieved from {mainframe_dataset} to {abs_local_path}",
                     "details": f"File size: {file_size} bytes. {result.get('data', '')}"
                 }
+                if codec_stats:
+                    response["codec"] = dict(codec_stats, code_page=code_page.lower())
+                return response
             else:
                 return {
                     "success": False,
@@ -979,174 +1635,727 @@ class S3270Session:
                 "details": result.get("data", "Unknown error.")
             }
 
-    def submit_jcl(self, jcl_dataset_name: str) -> Dict:
-        """
-        Submit JCL job using TSO SUB command from READY prompt
-
-        Args:
-            jcl_dataset_name: JCL dataset name WITHOUT quotes (e.g., 'HERC01.TEST.JCL(MYJOB)')
+    def _upload_text(self, text: str, mainframe_dataset: str, dcb: Dict) -> Dict:
+        """Write text to a temporary file and upload it (ascii) to a dataset"""
+        fd, path = tempfile.mkstemp(suffix='.txt')
+        try:
+            with os.fdopen(fd, 'w', encoding='ascii', errors='replace') as text_file:
+                text_file.write(text)
+            return self.send_file_to_mainframe(path, mainframe_dataset, 'ascii', 'tso', dcb=dcb, preflight=False)
+        finally:
+            os.remove(path)
 
-        Returns:
-            {"success": bool, "message": str, "job_id": str, "screen_content": str}
+    def count_records(
+        self,
+        datasets: List[str],
+        jcl_dataset: Optional[str] = None,
+        job_class: str = RECCOUNT_JOB_CLASS,
+        msgclass: str = RECCOUNT_MSGCLASS,
+        max_attempts: int = 10,
+        wait_seconds: float = 5.0,
+        max_pages: Optional[int] = None
+    ) -> Dict:
+        """
+        Count records of host datasets without downloading them: upload a generated
+        IDCAMS job, submit it, wait for OUTPUT QUEUE and parse the counts from its output
         """
         if not self.is_connected:
             return {"success": False, "message": "Not connected to mainframe"}
 
-        if not self.is_logged_in:
+        if not self.is_logged_in or not self.username:
             return {"success": False, "message": "Not logged in to mainframe"}
 
-        try:
-            # Get current screen to see where we are
-            initial_screen = self.get_screen_text()
-            try:
-                print(f"\n{'='*60}")
-                print(f"[JCL SUBMIT DEBUG] Step 0 - Initial screen state:")
-                print(f"{'='*60}")
-                print(initial_screen)
-                print(f"{'='*60}\n")
-                sys.stdout.flush()
-            except UnicodeEncodeError:
-                print("[JCL SUBMIT DEBUG] Step 0 - Initial screen received (unicode error)")
-                sys.stdout.flush()
+        datasets = [normalize_dataset(name) for name in datasets]
+        invalid = invalid_datasets(datasets)
+        if not datasets or invalid or len(datasets) > MAX_RECCOUNT_DATASETS:
+            return {"success": False, "message": f"Invalid dataset list: {', '.join(invalid) or len(datasets)}"}
 
-            # Step 1: Verify we're at READY prompt (LoginISPF should leave us here)
-            initial_upper = initial_screen.upper()
-            if 'READY' not in initial_upper:
-                print("[JCL SUBMIT DEBUG] [FAIL] READY prompt not found at start")
-                print(f"[JCL SUBMIT DEBUG] Screen indicators: ISPF={('ISPF' in initial_upper)}, READY={('READY' in initial_upper)}, MENU={('MENU' in initial_upper)}")
-                sys.stdout.flush()
-                return {
-                    "success": False,
-                    "message": "Not at READY prompt. Please ensure you are logged in to TSO.",
-                    "screen_content": initial_screen
-                }
+        jcl_dataset = normalize_dataset(jcl_dataset or f"{self.username}.RECCOUNT.JCL")
+        jcl_text = build_reccount_jcl(self.username, datasets, job_class, msgclass)
 
-            print("[JCL SUBMIT DEBUG] [OK] READY prompt confirmed, proceeding with SUB command...")
-            sys.stdout.flush()
+        upload = self._upload_text(jcl_text, jcl_dataset, {"recfm": "FB", "lrecl": 80, "blksize": 3120})
 
-            # Step 2: Type SUB command with JCL dataset name
-            sub_command = f"sub '{jcl_dataset_name}'"
-            print(f"[JCL SUBMIT DEBUG] Typing command: {sub_command}")
-            sys.stdout.flush()
-            self._execute_command(f'String("{sub_command}")')
-            time.sleep(0.5)
+        if not upload.get('success'):
+            return {"success": False, "message": f"Failed to upload count job to {jcl_dataset}: {upload.get('message')}",
+                    "details": upload.get('details')}
 
-            # Step 3: Press Enter to submit the JCL
-            print("[JCL SUBMIT DEBUG] Pressing Enter to submit JCL...")
-            sys.stdout.flush()
-            self._execute_command('Enter')
+        submit = self.submit_jcl(jcl_dataset)
+        if not submit.get('success') or submit.get('job_id') in (None, 'Unknown'):
+            return {"success": False, "message": f"Failed to submit count job: {submit.get('message')}"}
+        job_id = submit['job_id']
 
-            # Use intelligent wait instead of fixed sleep
-            success, screen_3, wait_time = self._wait_for_screen_ready(timeout=10.0, poll_interval=0.5)
+        status = self.check_job_status(job_id, max_attempts, wait_seconds)
+        if not status.get('reached_output_queue'):
+            return {"success": False, "message": f"Count job {job_id} did not finish: {status.get('message')}",
+                    "job_id": job_id}
 
-            try:
-                print(f"\n{'='*60}")
-                print(f"[JCL SUBMIT DEBUG] Step 3 - After submission (wait: {wait_time:.2f}s):")
-                print(f"{'='*60}")
-                print(screen_3)
-                print(f"{'='*60}\n")
-                sys.stdout.flush()
-            except UnicodeEncodeError:
-                print(f"[JCL SUBMIT DEBUG] Step 3 - After submission screen received (wait: {wait_time:.2f}s, unicode error)")
-                sys.stdout.flush()
+        output = self.get_job_output(job_id, max_pages)
+        if not output.get('success'):
+            return {"success": False, "message": f"Could not read output of {job_id}: {output.get('message')}",
+                    "job_id": job_id}
 
-            # Check for success indicators
-            screen_3_upper = screen_3.upper()
+        with open(resolve_project_path(output['output_path']), 'r', encoding='utf-8', errors='ignore') as output_file:
+            counts = parse_reccount_output(output_file.read(), datasets)
 
-            # Look for job submission confirmation
-            if 'SUBMITTED' in screen_3_upper and 'JOB' in screen_3_upper:
-                # Extract job ID - match anything between "JOB " and " SUBMITTED"
-                job_id = "Unknown"
-                import re
-                job_match = re.search(r'JOB\s+(.+?)\s+SUBMITTED', screen_3, re.IGNORECASE)
-                if job_match:
-                    job_id = job_match.group(1).strip()
+        counted = [entry for entry in counts if entry['success']]
+        self._log_event(logging.INFO, f"Counted {len(counted)}/{len(datasets)} dataset(s) with job {job_id}", step='reccount')
+        return {
+            "success": len(counted) == len(datasets),
+            "message": f"Counted records for {len(counted)} of {len(datasets)} dataset(s)",
+            "job_id": job_id,
+            "cond_code": output.get('cond_code'),
+            "counts": counts,
+            "total_records": sum(entry['records'] for entry in counted),
+            "output_path": output['output_path']
+        }
 
-                print(f"[JCL SUBMIT DEBUG] [OK] Job submitted successfully: {job_id}")
-                sys.stdout.flush()
+    def send_file_split(
+        self,
+        local_path: str,
+        mainframe_dataset: str,
+        helpers: Optional[List['S3270Session']] = None,
+        parts: Optional[int] = None,
+        transfer_mode: str = 'ascii',
+        host_type: str = 'tso',
+        copybook_path: Optional[str] = None,
+        code_page: str = 'cp037',
+        local_framing: str = 'auto',
+        dcb: Optional[Dict] = None,
+        job_class: str = CONCAT_JOB_CLASS,
+        msgclass: str = CONCAT_MSGCLASS,
+        max_attempts: int = 10,
+        wait_seconds: float = 5.0
+    ) -> Dict:
+        """
+        Upload a large file as parts sent in parallel over this session and the helper
+        sessions, then assemble the target with a generated IEBGENER job.
+        A failed part is retried on its own (up to SPLIT_PART_ATTEMPTS transfers).
+        """
+        if not self.is_connected:
+            return {"success": False, "message": "Not connected to mainframe"}
 
-                return {
-                    "success": True,
-                    "message": f"JCL job submitted successfully",
-                    "job_id": job_id,
-                    "screen_content": screen_3
-                }
-            elif 'ERROR' in screen_3_upper or 'INVALID' in screen_3_upper or 'FAILED' in screen_3_upper or 'NOT FOUND' in screen_3_upper:
-                print(f"[JCL SUBMIT DEBUG] [FAIL] Submission failed - error detected in screen")
-                sys.stdout.flush()
-                return {
-                    "success": False,
-                    "message": "JCL submission failed - check screen content for errors",
-                    "screen_content": screen_3
-                }
-            else:
-                print(f"[JCL SUBMIT DEBUG] [FAIL] Submission result unclear")
-                print(f"[JCL SUBMIT DEBUG] Screen contains: SUBMITTED={('SUBMITTED' in screen_3_upper)}, JOB={('JOB' in screen_3_upper)}, READY={('READY' in screen_3_upper)}")
-                sys.stdout.flush()
-                return {
-                    "success": False,
-                    "message": f"JCL submission for '{jcl_dataset_name}' result unclear - Screen: {screen_3[:150]}...",
-                    "screen_content": screen_3,
-                    "jcl_dataset": jcl_dataset_name
-                }
+        if not self.is_logged_in or not self.username:
+            return {"success": False, "message": "Not logged in to mainframe"}
 
-        except Exception as e:
-            return {"success": False, "message": f"JCL submission error: {str(e)}"}
+        # Part datasets live under this session's user id, so helpers must be the same user
+        workers = [self] + [helper for helper in helpers or [] if helper is not self]
+        foreign = [helper.session_id for helper in workers
+                   if not helper.is_logged_in or (helper.username or '').upper() != self.username.upper()]
+        if foreign:
+            return {"success": False, "message": f"Helper session(s) not logged in as {self.username}: {', '.join(foreign)}"}
 
-    def logout(self) -> Dict:
-        """Logout from mainframe (F3 + LOGOFF sequence for TSO login)"""
-        if not self.is_connected:
-            return {"success": False, "message": "Not connected to mainframe"}
+        abs_local_path = resolve_project_path(local_path)
+        if not os.path.exists(abs_local_path):
+            return {"success": False, "message": f"Local file not found: {abs_local_path}"}
 
+        mainframe_dataset = normalize_dataset(mainframe_dataset)
+        started = time.time()
         try:
-            # TSO login type - use F3/LOGOFF sequence
-            if self.login_type == 'tso':
-                # Get screen before logout
-                screen_before = self.get_screen_text()
+            layout = load_copybook(resolve_project_path(copybook_path))[0] if copybook_path else None
+            report = validate_upload(abs_local_path, dcb, layout, transfer_mode, code_page, local_framing)
+            if not report["valid"]:
+                return {"success": False, "message": f"Pre-flight validation failed: {'; '.join(report['errors'])}",
+                        "preflight": report}
+
+            size = os.path.getsize(abs_local_path)
+            lrecl = int(dcb['lrecl']) if dcb and dcb.get('lrecl') else None
+            binary_records = transfer_mode.lower() == 'binary' and not copybook_path
+            ranges, framing = split_ranges(abs_local_path, part_count(size, len(workers), parts), lrecl,
+                                           'fixed' if binary_records else local_framing, layout)
+        except (OSError, CopybookError, LookupError, ValueError) as e:
+            return {"success": False, "message": f"Cannot split {local_path}: {e}"}
+
+        if len(ranges) <= 1:
+            # Nothing to parallelize: one ordinary transfer
+            return self.send_file_to_mainframe(local_path, mainframe_dataset, transfer_mode, host_type,
+                                               copybook_path, code_page, framing, dcb, preflight=False)
+
+        names = part_datasets(self.username, mainframe_dataset, len(ranges))
+        part_dcb = dict(dcb or {}, space=space_cylinders(max(end - start for start, end in ranges)))
+        pending: queue.Queue = queue.Queue()
+        for index in range(len(ranges)):
+            pending.put((index, 1))
+        results: List[Optional[Dict]] = [None] * len(ranges)
+
+        # Parts not yet uploaded or out of attempts, and sessions still taking parts
+        progress = {"outstanding": len(ranges), "active": len(workers)}
+        settled = threading.Condition()
+
+        def upload(worker: 'S3270Session', part_paths: List[str]):
+            consecutive_failures = 0
+            while True:
+                with settled:
+                    while pending.empty() and progress["outstanding"]:
+                        settled.wait()
+                    # Stop once every part is settled; a session that keeps failing leaves retries to the others
+                    if not progress["outstanding"] or (consecutive_failures >= 2 and progress["active"] > 1):
+                        progress["active"] -= 1
+                        settled.notify_all()
+                        return
+                    index, attempt = pending.get_nowait()
+                transfer_started = time.time()
                 try:
-                    print(f"DEBUG: Logout Step 0 - Before logout:\n{screen_before}")
-                    sys.stdout.flush()
-                except UnicodeEncodeError:
-                    print("DEBUG: Logout Step 0 - Before logout screen received")
-                    sys.stdout.flush()
+                    result = worker.send_file_to_mainframe(part_paths[index], names[index], transfer_mode, host_type,
+                                                           copybook_path, code_page, framing, part_dcb, preflight=False)
+                except Exception as e:
+                    result = {"success": False, "message": f"Transfer error: {str(e)}"}
+                entry = {"part": index + 1, "dataset": names[index], "session_id": worker.session_id,
+                         "bytes": ranges[index][1] - ranges[index][0], "attempts": attempt,
+                         "success": bool(result.get('success')), "message": result.get('message'),
+                         "elapsed_ms": int((time.time() - transfer_started) * 1000)}
+                results[index] = entry
+                if entry["success"]:
+                    consecutive_failures = 0
+                else:
+                    consecutive_failures += 1
+                    worker._log_event(logging.WARNING, f"Part {index + 1} attempt {attempt} failed: {result.get('message')}", step='split_upload')
+                with settled:
+                    if entry["success"] or attempt >= SPLIT_PART_ATTEMPTS:
+                        progress["outstanding"] -= 1
+                    else:
+                        pending.put((index, attempt + 1))
+                    settled.notify_all()
 
-                # Step 1: Press F3
-                self._execute_command('PF(3)')
-                time.sleep(3)  # Wait for screen to update
+        part_dir = tempfile.mkdtemp(prefix='splitupl_')
+        try:
+            part_paths = write_parts(abs_local_path, ranges, part_dir)
+            with ThreadPoolExecutor(max_workers=len(workers)) as pool:
+                for future in [pool.submit(upload, worker, part_paths) for worker in workers]:
+                    future.result()
+        finally:
+            shutil.rmtree(part_dir, ignore_errors=True)
+
+        sent = [entry for entry in results if entry and entry["success"]]
+        upload_ms = int((time.time() - started) * 1000)
+        if len(sent) < len(ranges):
+            self._delete_datasets([entry["dataset"] for entry in sent])
+            return {"success": False, "message": f"{len(ranges) - len(sent)} of {len(ranges)} part(s) could not be uploaded",
+                    "parts": [entry or {"part": index + 1, "dataset": names[index], "success": False, "attempts": 0,
+                                        "message": "Not attempted"} for index, entry in enumerate(results)],
+                    "upload_ms": upload_ms, "preflight": report}
+
+        jcl_dataset = f"{self.username.upper()}.SPLITUPL.JCL"
+        upload = self._upload_text(build_concat_jcl(self.username, names, mainframe_dataset, size, dcb, job_class, msgclass),
+                                   jcl_dataset, {"recfm": "FB", "lrecl": 80, "blksize": 3120})
+
+        response = {"parts": results, "upload_ms": upload_ms, "preflight": report}
+        if not upload.get('success'):
+            self._delete_datasets(names)
+            return dict(response, success=False, message=f"Failed to upload concatenation job to {jcl_dataset}: {upload.get('message')}")
+
+        submit = self.submit_jcl(jcl_dataset)
+        if not submit.get('success') or submit.get('job_id') in (None, 'Unknown'):
+            self._delete_datasets(names)
+            return dict(response, success=False, message=f"Failed to submit concatenation job: {submit.get('message')}")
+        job_id = submit['job_id']
+
+        status = self.check_job_status(job_id, max_attempts, wait_seconds)
+        if not status.get('reached_output_queue'):
+            # The job may still run and delete the parts itself; leave them in place
+            return dict(response, success=False, job_id=job_id,
+                        message=f"Concatenation job {job_id} did not finish: {status.get('message')}")
+
+        output = self.get_job_output(job_id)
+        if not output.get('success'):
+            return dict(response, success=False, job_id=job_id,
+                        message=f"Could not read output of {job_id}: {output.get('message')}")
+
+        with open(resolve_project_path(output['output_path']), 'r', encoding='utf-8', errors='ignore') as output_file:
+            outcome = parse_concat_output(output_file.read())
+        dataset_catalog.invalidate(f"{self.host}:{self.port}", [mainframe_dataset] + names)
+
+        elapsed = time.time() - started
+        self._log_event(logging.INFO, f"Split upload of {size} bytes in {len(ranges)} part(s) over {len(workers)} session(s): "
+                                      f"{outcome['message']}", step='split_upload')
+        return dict(
+            response,
+            success=outcome["success"],
+            message=(f"Uploaded {size} bytes to {mainframe_dataset} in {len(ranges)} part(s) over {len(workers)} session(s) "
+                     f"in {elapsed:.1f}s" if outcome["success"]
+                     else f"Concatenation job {job_id} failed: {outcome['message']}; parts kept as {names[0]}..{names[-1]}"),
+            job_id=job_id,
+            cond_code=outcome["cond_code"],
+            output_path=output['output_path'],
+            bytes=size,
+            sessions=len(workers),
+            elapsed_ms=int(elapsed * 1000)
+        )
 
-                # Get screen after F3
-                screen_1 = self.get_screen_text()
-                try:
-                    print(f"DEBUG: Logout Step 1 - After F3 screen:\n{screen_1}")
-                    sys.stdout.flush()
-                except UnicodeEncodeError:
-                    print("DEBUG: Logout Step 1 - After F3 screen received")
-                    sys.stdout.flush()
+    def _delete_datasets(self, datasets: List[str]):
+        """Best-effort TSO DELETE of temporary datasets from the READY prompt"""
+        for dataset in datasets:
+            result = self.send_command(f"DELETE '{dataset}'")
+            if not result.get('success'):
+                self._log_event(logging.WARNING, f"Could not delete {dataset}: {result.get('message')}", step='split_cleanup')
+        dataset_catalog.invalidate(f"{self.host}:{self.port}", datasets)
 
-                # Check if READY appears
-                if 'READY' in screen_1.upper():
-                    # Step 2: Type LOGOFF and press Enter
-                    self._execute_command('String("LOGOFF")')
-                    time.sleep(0.5)
-                    self._execute_command('Enter')
-                    time.sleep(3)  # Wait for screen to update
+    def run_batch(self, operations: List[Dict], timeout: float = 120.0) -> Dict:
+        """
+        Run a list of host operations (alloc, delete, exists, listds, count, submit,
+        status, tso) with one TSO EXEC of the MFBATCH REXX exec. The exec is uploaded
+        once per session and content hash; requests and results travel as datasets.
+        """
+        if not self.is_connected:
+            return {"success": False, "message": "Not connected to mainframe"}
 
-                    # Get final screen
-                    screen_2 = self.get_screen_text()
-                    try:
-                        print(f"DEBUG: Logout Step 2 - After LOGOFF screen:\n{screen_2}")
-                        sys.stdout.flush()
-                    except UnicodeEncodeError:
-                        print("DEBUG: Logout Step 2 - After LOGOFF screen received")
-                        sys.stdout.flush()
+        if not self.is_logged_in or not self.username:
+            return {"success": False, "message": "Not logged in to mainframe"}
 
-                    self.is_logged_in = False
-                    return {
-                        "success": True,
-                        "message": "Logout successful",
+        try:
+            request_text = encode_operations(operations)
+        except BatchError as e:
+            return {"success": False, "message": str(e)}
+
+        started = time.time()
+        digest = exec_hash()
+        exec_name = self.uploaded_execs.get(digest)
+        exec_uploaded = exec_name is None
+        if exec_uploaded:
+            exec_name = exec_dataset(self.username)
+            upload = self._upload_text(BATCH_EXEC, exec_name, BATCH_DCB)
+            if not upload.get('success'):
+                return {"success": False, "message": f"Failed to upload batch exec to {exec_name}: {upload.get('message')}"}
+            self.uploaded_execs[digest] = exec_name
+
+        datasets = request_datasets(self.username)
+        upload = self._upload_text(request_text, datasets['request'], BATCH_DCB)
+        if not upload.get('success'):
+            return {"success": False, "message": f"Failed to upload batch request to {datasets['request']}: {upload.get('message')}"}
+
+        ready, screen = self.ensure_ready_prompt()
+        if not ready:
+            return {"success": False, "message": "Unable to reach READY prompt", **self._recorder_reference('batch_exec', screen)}
+
+        self._execute_command('Clear')
+        command = f"EXEC '{exec_name}' '{datasets['request']} {datasets['result']}'"
+        self._execute_command(f'String("{command}")')
+        self._execute_command('Enter')
+        marker, screen, wait_time = self._wait_for_any_screen_content(
+            (BATCH_COMPLETE_MARKER, BATCH_FAILED_MARKER), timeout=timeout, poll_interval=0.5)
+        if marker != BATCH_COMPLETE_MARKER:
+            self._log_event(logging.WARNING, "Batch exec did not complete", step='batch_exec', wait_time=wait_time, screen=screen)
+            if marker == BATCH_FAILED_MARKER or 'NOT FOUND' in screen.upper():
+                # The exec dataset may have been deleted on the host; upload it again next time
+                self.uploaded_execs.pop(digest, None)
+            self.ensure_ready_prompt()
+            self._delete_datasets([datasets['request']])
+            message = ("Batch exec could not read its request or write its result" if marker
+                       else f"Batch exec did not complete within {timeout:.0f}s")
+            return {"success": False, "message": message, **self._recorder_reference('batch_exec', screen)}
+
+        self.ensure_ready_prompt()
+        fd, result_path = tempfile.mkstemp(suffix='.txt')
+        os.close(fd)
+        try:
+            download = self.get_file_from_mainframe(datasets['result'], result_path, 'ascii')
+            if not download.get('success'):
+                return {"success": False, "message": f"Failed to read batch result {datasets['result']}: {download.get('message')}"}
+            with open(result_path, 'r', encoding='utf-8', errors='replace') as result_file:
+                results = parse_batch_result(result_file.read(), operations)
+        finally:
+            os.remove(result_path)
+            # Every run has its own request and result datasets; remove both with one DELETE
+            self.send_command(f"DELETE ('{datasets['request']}' '{datasets['result']}')")
+
+        for entry in results:
+            if entry["values"].get("job_id"):
+                job_history.record_submission(f"{self.host}:{self.port}", entry["values"]["job_id"])
+
+        host_key = f"{self.host}:{self.port}"
+        if any(operation['op'] in ('submit', 'tso') for operation in operations):
+            dataset_catalog.invalidate_host(host_key)
+        else:
+            dataset_catalog.invalidate(host_key, [operation['dataset'] for operation in operations
+                                                  if operation['op'] in ('alloc', 'delete')])
+
+        failed = [entry for entry in results if not entry["success"]]
+        elapsed = time.time() - started
+        self._log_event(logging.INFO, f"Batch of {len(results)} operation(s) ran in {elapsed:.2f}s ({len(failed)} failed)",
+                        step='batch_exec', wait_time=wait_time)
+        return {
+            "success": not failed,
+            "message": f"Ran {len(results)} operation(s) in one exchange; {len(failed)} failed",
+            "results": results,
+            "exec_dataset": exec_name,
+            "exec_uploaded": exec_uploaded,
+            "elapsed_ms": int(elapsed * 1000)
+        }
+
+    def _run_tso_command(self, command: str, timeout: float = 30.0) -> Tuple[bool, str, float]:
+        """
+        Type one TSO command at READY and collect its line-mode output until the next
+        READY, paging through *** prompts. Returns (completed, output, elapsed).
+        """
+        started = time.time()
+        pages: List[str] = []
+        self._execute_command('Clear')
+        self._execute_command(f'String("{command}")')
+        self._execute_command('Enter')
+
+        screen = ""
+        while time.time() - started < timeout:
+            screen = self.get_screen_text()
+            lines = [line.strip() for line in screen.splitlines() if line.strip()]
+            if lines and lines[-1].upper() == 'READY':
+                pages.append(screen)
+                elapsed = time.time() - started
+                self.recorder.record(f'tso:{command.split()[0]}', screen, elapsed)
+                return True, "\n".join(pages), elapsed
+            if lines and lines[-1].endswith('***'):
+                pages.append(screen)
+                self._execute_command('Enter')
+                continue
+            time.sleep(0.2)
+
+        pages.append(screen)
+        elapsed = time.time() - started
+        self.recorder.record(f'tso_timeout:{command.split()[0]}', screen, elapsed)
+        return False, "\n".join(pages), elapsed
+
+    def bulk_datasets(self, items: List[Dict], missing_ok: bool = True, stop_on_error: bool = False) -> Dict:
+        """
+        Allocate, delete or list many datasets (items from datasets.normalize_items):
+        commands are issued back to back, each as soon as the previous READY appears.
+        Allocations are released with one FREE at the end.
+        """
+        if not self.is_connected:
+            return {"success": False, "message": "Not connected to mainframe"}
+
+        if not self.is_logged_in:
+            return {"success": False, "message": "Not logged in to mainframe"}
+
+        ready, screen = self.ensure_ready_prompt()
+        if not ready:
+            return {"success": False, "message": "Unable to reach READY prompt", **self._recorder_reference('bulk_datasets', screen)}
+
+        started = time.time()
+        rows: List[Dict] = []
+        for item in items:
+            completed, output, elapsed = self._run_tso_command(DATASET_COMMANDS[item["action"]](item))
+            row = parse_result(item, output, missing_ok)
+            if not completed:
+                row.update(success=False, status='timeout', message="No READY after the command")
+            row["elapsed_ms"] = int(elapsed * 1000)
+            rows.append(row)
+            if not completed:
+                # Without READY the next command cannot be typed
+                self._log_event(logging.WARNING, f"Bulk {item['action']} of {item['dataset']} timed out", step='bulk_datasets', screen=output)
+                break
+            if stop_on_error and not row["success"]:
+                break
+
+        self._remember_datasets(rows)
+        allocated = [row["dataset"] for row in rows if row["status"] == 'allocated']
+        if allocated:
+            self._run_tso_command(free_command(allocated))
+
+        failed = [row for row in rows if not row["success"]]
+        skipped = len(items) - len(rows)
+        elapsed = time.time() - started
+        self._log_event(logging.INFO, f"Bulk dataset request: {len(rows)} command(s) in {elapsed:.2f}s, {len(failed)} failed",
+                        step='bulk_datasets')
+        return {
+            "success": not failed and not skipped,
+            "message": f"Processed {len(rows)} of {len(items)} dataset(s) in {elapsed:.2f}s; {len(failed)} failed",
+            "rows": rows,
+            "failed": len(failed),
+            "skipped": skipped,
+            "elapsed_ms": int(elapsed * 1000)
+        }
+
+    def _remember_datasets(self, rows: List[Dict]):
+        """Feed bulk dataset rows into the catalog cache (changes invalidate, listings store)"""
+        host_key = f"{self.host}:{self.port}"
+        dataset_catalog.invalidate(host_key, [row["dataset"] for row in rows if row["action"] in ('allocate', 'delete')])
+        for row in rows:
+            if row["action"] == 'listds' and row["status"] in ('found', 'not_found'):
+                attributes = {key: row[key] for key in ('recfm', 'lrecl', 'blksize', 'dsorg', 'volumes') if key in row}
+                dataset_catalog.store(host_key, row["dataset"], row["status"] == 'found', attributes, row.get("members"))
+
+    def lookup_datasets(self, names: List[str], members: bool = False, refresh: bool = False) -> Dict:
+        """
+        Existence and attributes (and member lists) of datasets, answered from the
+        catalog cache where possible; misses are listed with LISTDS and cached
+        """
+        host_key = f"{self.host}:{self.port}"
+        answers: Dict[str, Dict] = {}
+        # Datasets to list on the host, and whether their member list is needed (always for a member name)
+        missing: Dict[str, bool] = {}
+        for name in names:
+            cached = None if refresh else dataset_catalog.lookup(host_key, name, need_attributes=True, need_members=members)
+            if cached is not None:
+                answers[name] = dict(cached, source='cache')
+            else:
+                dataset, member = split_member(name)
+                missing[dataset] = missing.get(dataset, False) or members or member is not None
+
+        if missing:
+            if not self.is_connected:
+                return {"success": False, "message": "Not connected to mainframe"}
+            ready, screen = self.ensure_ready_prompt()
+            if not ready:
+                return {"success": False, "message": "Unable to reach READY prompt", **self._recorder_reference('catalog_lookup', screen)}
+
+            rows = []
+            for dataset, with_members in missing.items():
+                item = {"action": "listds", "dataset": dataset, "members": with_members or None}
+                completed, output, _ = self._run_tso_command(DATASET_COMMANDS['listds'](item))
+                if not completed:
+                    return {"success": False, "message": f"No READY after LISTDS '{dataset}'"}
+                rows.append(parse_result(item, output, missing_ok=True))
+            self._remember_datasets(rows)
+
+            for name in names:
+                if name not in answers:
+                    found = dataset_catalog.lookup(host_key, name, need_attributes=True, need_members=members)
+                    answers[name] = dict(found, source='host') if found else {
+                        "name": name, "exists": None, "source": 'host', "message": "LISTDS gave no answer"}
+
+        return {
+            "success": True,
+            "message": f"{len(names)} dataset(s) looked up, "
+                       f"{sum(answer['source'] == 'cache' for answer in answers.values())} from cache",
+            "datasets": [answers[name] for name in names],
+            "host_lookups": len(missing)
+        }
+
+    def refresh_catalog(self, level: str, timeout: float = 60.0) -> Dict:
+        """Cache the complete list of datasets under a high-level qualifier with LISTCAT LEVEL"""
+        if not self.is_connected:
+            return {"success": False, "message": "Not connected to mainframe"}
+
+        ready, screen = self.ensure_ready_prompt()
+        if not ready:
+            return {"success": False, "message": "Unable to reach READY prompt", **self._recorder_reference('catalog_refresh', screen)}
+
+        level = normalize_dataset(level)
+        completed, output, elapsed = self._run_tso_command(listcat_command(level), timeout)
+        if not completed:
+            return {"success": False, "message": f"No READY after LISTCAT LEVEL({level})"}
+
+        names = parse_listcat(output)
+        dataset_catalog.store_level(f"{self.host}:{self.port}", level, names)
+        return {
+            "success": True,
+            "message": f"{len(names)} dataset(s) under {level}",
+            "level": level,
+            "datasets": names,
+            "elapsed_ms": int(elapsed * 1000)
+        }
+
+    def submit_jcl(self, jcl_dataset_name: str) -> Dict:
+        """
+        Submit JCL job using TSO SUB command from READY prompt
+
+        Args:
+            jcl_dataset_name: JCL dataset name WITHOUT quotes (e.g., 'HERC01.TEST.JCL(MYJOB)')
+
+        Returns:
+            {"success": bool, "message": str, "job_id": str, "screen_content": str}
+            Failures return "recorder" and "screen_hash" instead of "screen_content".
+        """
+        if not self.is_connected:
+            return {"success": False, "message": "Not connected to mainframe"}
+
+        if not self.is_logged_in:
+            return {"success": False, "message": "Not logged in to mainframe"}
+
+        try:
+            # Get current screen to see where we are
+            initial_screen = self.get_screen_text()
+            self._log_event(logging.DEBUG, "Initial screen before submit", step='submit_0', screen=initial_screen)
+
+            # Step 1: Verify we're at READY prompt (LoginISPF should leave us here)
+            initial_upper = initial_screen.upper()
+            if 'READY' not in initial_upper:
+                self._log_event(logging.WARNING, "READY prompt not found before submit", step='submit_0', screen=initial_screen)
+                return {
+                    "success": False,
+                    "message": "Not at READY prompt. Please ensure you are logged in to TSO.",
+                    **self._recorder_reference('submit_0', initial_screen)
+                }
+
+            # Step 2: Type SUB command with JCL dataset name
+            sub_command = f"sub '{jcl_dataset_name}'"
+            self._log_event(logging.INFO, f"Submitting: {sub_command}", step='submit_2')
+            self._execute_command(f'String("{sub_command}")')
+            time.sleep(0.5)
+
+            # Step 3: Press Enter to submit the JCL
+            self._execute_command('Enter')
+
+            # Use intelligent wait instead of fixed sleep
+            success, screen_3, wait_time = self._wait_for_screen_ready(timeout=10.0, poll_interval=0.5)
+            self._log_event(logging.DEBUG, "Screen after submission", step='submit_3', wait_time=wait_time, screen=screen_3)
+
+            # Check for success indicators
+            screen_3_upper = screen_3.upper()
+
+            # Look for job submission confirmation
+            if 'SUBMITTED' in screen_3_upper and 'JOB' in screen_3_upper:
+                # Extract job ID - match anything between "JOB " and " SUBMITTED"
+                job_id = "Unknown"
+                job_match = JOB_SUBMITTED_PATTERN.search(screen_3)
+                if job_match:
+                    job_id = job_match.group(1).strip()
+
+                self._log_event(logging.INFO, f"Job submitted: {job_id}", step='submit_3', wait_time=wait_time)
+                if job_match:
+                    job_history.record_submission(f"{self.host}:{self.port}", job_id)
+                # A job may create or delete any dataset
+                dataset_catalog.invalidate_host(f"{self.host}:{self.port}")
+
+                return {
+                    "success": True,
+                    "message": f"JCL job submitted successfully",
+                    "job_id": job_id,
+                    "screen_content": screen_3
+                }
+            elif 'ERROR' in screen_3_upper or 'INVALID' in screen_3_upper or 'FAILED' in screen_3_upper or 'NOT FOUND' in screen_3_upper:
+                self._log_event(logging.WARNING, "Submission failed - error detected in screen", step='submit_3', wait_time=wait_time, screen=screen_3)
+                return {
+                    "success": False,
+                    "message": "JCL submission failed - check the session recorder for the failing screen",
+                    **self._recorder_reference('submit_3', screen_3)
+                }
+            else:
+                self._log_event(logging.WARNING, "Submission result unclear", step='submit_3', wait_time=wait_time, screen=screen_3)
+                return {
+                    "success": False,
+                    "message": f"JCL submission for '{jcl_dataset_name}' result unclear - check the session recorder for the screen",
+                    **self._recorder_reference('submit_3', screen_3),
+                    "jcl_dataset": jcl_dataset_name
+                }
+
+        except Exception as e:
+            return {"success": False, "message": f"JCL submission error: {str(e)}"}
+
+    def submit_jcl_batch(self, jcl_dataset_names: List[str], stop_on_error: bool = False) -> Dict:
+        """
+        Submit several JCL datasets back to back from the READY prompt
+
+        The READY prompt is verified once. Each dataset is then submitted with
+        Clear + SUB + Enter, waiting only until the next READY appears, so every
+        screen holds exactly one SUBMITTED message to parse.
+
+        Returns:
+            {"success": bool, "message": str, "job_ids": [str], "results": [dict], ...}
+        """
+        if not self.is_connected:
+            return {"success": False, "message": "Not connected to mainframe"}
+
+        if not self.is_logged_in:
+            return {"success": False, "message": "Not logged in to mainframe"}
+
+        try:
+            initial_screen = self.get_screen_text()
+            if 'READY' not in initial_screen.upper():
+                self._log_event(logging.WARNING, "READY prompt not found before batch submit", step='submit_batch', screen=initial_screen)
+                return {
+                    "success": False,
+                    "message": "Not at READY prompt. Please ensure you are logged in to TSO.",
+                    **self._recorder_reference('submit_batch', initial_screen)
+                }
+
+            batch_start = time.time()
+            results: List[Dict] = []
+
+            for index, jcl_dataset_name in enumerate(jcl_dataset_names):
+                self._execute_command('Clear')
+                self._execute_command(f'String("sub \'{jcl_dataset_name}\'")')
+                self._execute_command('Enter')
+
+                ready, screen, wait_time = self._wait_for_screen_content('READY', timeout=10.0, poll_interval=0.2)
+                job_match = JOB_SUBMITTED_PATTERN.search(screen)
+
+                if job_match:
+                    job_id = job_match.group(1).strip()
+                    job_history.record_submission(f"{self.host}:{self.port}", job_id)
+                    self._log_event(logging.INFO, f"Job submitted: {job_id}", step=f'submit_batch_{index + 1}', wait_time=wait_time)
+                    results.append({
+                        "jcl_dataset": jcl_dataset_name,
+                        "success": True,
+                        "job_id": job_id,
+                        "wait_ms": int(wait_time * 1000)
+                    })
+                    continue
+
+                message = "Submission timed out waiting for READY" if not ready else "No JOB ... SUBMITTED message found"
+                self._log_event(logging.WARNING, f"Batch submission failed for {jcl_dataset_name}: {message}", step=f'submit_batch_{index + 1}', wait_time=wait_time, screen=screen)
+                results.append({
+                    "jcl_dataset": jcl_dataset_name,
+                    "success": False,
+                    "message": message,
+                    "wait_ms": int(wait_time * 1000),
+                    **self._recorder_reference(f'submit_batch_{index + 1}', screen)
+                })
+
+                if stop_on_error or not ready:
+                    # Without a READY prompt the following SUB commands cannot be typed
+                    break
+
+            job_ids = [result["job_id"] for result in results if result["success"]]
+            if job_ids:
+                dataset_catalog.invalidate_host(f"{self.host}:{self.port}")
+            failed = len(results) - len(job_ids)
+            skipped = len(jcl_dataset_names) - len(results)
+            batch_elapsed = time.time() - batch_start
+
+            return {
+                "success": failed == 0 and skipped == 0,
+                "message": f"Submitted {len(job_ids)} of {len(jcl_dataset_names)} JCL dataset(s) in {batch_elapsed:.2f}s",
+                "job_ids": job_ids,
+                "results": results,
+                "submitted": len(job_ids),
+                "failed": failed,
+                "skipped": skipped,
+                "elapsed_ms": int(batch_elapsed * 1000)
+            }
+
+        except Exception as e:
+            return {"success": False, "message": f"Batch JCL submission error: {str(e)}"}
+
+    def logout(self) -> Dict:
+        """Logout from mainframe (F3 + LOGOFF sequence for TSO login)"""
+        if not self.is_connected:
+            return {"success": False, "message": "Not connected to mainframe"}
+
+        try:
+            # TSO login type - use F3/LOGOFF sequence
+            if self.login_type == 'tso':
+                # Get screen before logout
+                screen_before = self.get_screen_text()
+                self._log_event(logging.DEBUG, "Screen before logout", step='logout_0', screen=screen_before)
+
+                # Step 1: Press F3
+                self._execute_command('PF(3)')
+                time.sleep(3)  # Wait for screen to update
+
+                # Get screen after F3
+                screen_1 = self.get_screen_text()
+                self._log_event(logging.DEBUG, "Screen after F3", step='logout_1', screen=screen_1)
+
+                # Check if READY appears
+                if 'READY' in screen_1.upper():
+                    # Step 2: Type LOGOFF and press Enter
+                    self._execute_command('String("LOGOFF")')
+                    time.sleep(0.5)
+                    self._execute_command('Enter')
+                    time.sleep(3)  # Wait for screen to update
+
+                    # Get final screen
+                    screen_2 = self.get_screen_text()
+                    self._log_event(logging.DEBUG, "Screen after LOGOFF", step='logout_2', screen=screen_2)
+
+                    self.is_logged_in = False
+                    self._log_event(logging.INFO, "Logout successful", step='logout_2')
+                    return {
+                        "success": True,
+                        "message": "Logout successful",
                         "screen_content": screen_2
                     }
                 else:
+                    self._log_event(logging.WARNING, "READY not found after F3", step='logout_1', screen=screen_1)
                     return {
                         "success": False,
                         "message": "READY not found after F3",
@@ -1185,6 +2394,210 @@ class S3270Session:
         except Exception as e:
             return False
 
+# Profiling routes are refused unless this token is configured and sent as X-Profile-Token
+PROFILE_TOKEN_ENV = 'DEBUG_PROFILE_TOKEN'
+
+profiler = Profiler()
+
+
+@app.before_request
+def start_request_profile():
+    """Profile this request with cProfile if a deterministic profile is waiting for its route"""
+    if not profiler.profiles or request.url_rule is None:
+        return
+    profile = profiler.claim_request(request.url_rule.rule)
+    if profile is None:
+        return
+    g.request_profile = (profile, cProfile.Profile(), time.time())
+    g.request_profile[1].enable()
+
+
+@app.teardown_request
+def finish_request_profile(error=None):
+    active = g.pop('request_profile', None)
+    if active is None:
+        return
+    profile, collector, started = active
+    collector.disable()
+    profiler.release_request()
+    profile.add_request(collector, time.time() - started)
+
+
+def profile_guard():
+    """Error response unless profiling is enabled and the request carries its token"""
+    token = os.environ.get(PROFILE_TOKEN_ENV)
+    if not token:
+        return jsonify({"success": False, "message": f"Profiling is disabled (set {PROFILE_TOKEN_ENV})"}), 403
+    if not hmac.compare_digest(request.headers.get('X-Profile-Token', ''), token):
+        return jsonify({"success": False, "message": "Invalid profile token"}), 403
+    return None
+
+
+# Session operations that can be queued: name -> (method, required params)
+QUEUE_OPERATIONS = {
+    'sendfile': ('send_file_to_mainframe', ('local_path', 'mainframe_dataset')),
+    'getfile': ('get_file_from_mainframe', ('mainframe_dataset', 'local_path')),
+    'submit': ('submit_jcl', ('jcl_dataset_name',)),
+    'submit_batch': ('submit_jcl_batch', ('jcl_dataset_names',)),
+    'jobstatus': ('check_job_status', ('job_identifier',)),
+    'joboutput': ('get_job_output', ('job_identifier',)),
+    'reccount': ('count_records', ('datasets',)),
+    'batch': ('run_batch', ('operations',)),
+    'datasets': ('bulk_datasets', ('items',)),
+    'catalog': ('lookup_datasets', ('names',)),
+    'command': ('send_command', ('command',)),
+    'navigate': ('navigate_to', ('target',)),
+}
+
+
+def queue_steps(payload: Dict) -> List[Dict]:
+    """Steps of a queue item: a workflow's list, or the single operation"""
+    return payload.get('steps') or [{"op": payload.get('op'), "params": payload.get('params') or {}}]
+
+
+def invalid_queue_steps(steps: List[Dict]) -> List[str]:
+    problems = []
+    for number, step in enumerate(steps, start=1):
+        if not isinstance(step, dict) or step.get('op') not in QUEUE_OPERATIONS:
+            problems.append(f"step {number}: op must be one of {', '.join(QUEUE_OPERATIONS)}")
+            continue
+        params = step.get('params') or {}
+        missing = [name for name in QUEUE_OPERATIONS[step['op']][1] if name not in params] if isinstance(params, dict) else []
+        if not isinstance(params, dict) or missing:
+            problems.append(f"step {number} ({step['op']}): params need {', '.join(missing) or 'to be an object'}")
+            continue
+        # Params that use an earlier step's results are checked once they are resolved
+        if not has_references(params):
+            try:
+                queue_call_params(step['op'], params)
+            except ValueError as e:
+                problems.append(f"step {number} ({step['op']}): {str(e)}")
+    return problems
+
+
+def queue_call_params(op: str, params: Dict) -> Dict:
+    """
+    Keyword arguments for the session method of a queued step, checked and normalized the
+    way the operation's route does it (raises ValueError with the route's message)
+    """
+    call_params = dict(params)
+    if op == 'sendfile':
+        problem = invalid_dcb(call_params.get('dcb'))
+        if problem:
+            raise ValueError(problem)
+    elif op == 'catalog':
+        names = [name.strip().strip("'").upper() for name in parse_field_list(call_params['names'])]
+        invalid = invalid_datasets(names)
+        if not names or invalid:
+            raise ValueError(f"Invalid dataset name(s): {', '.join(invalid) or 'none given'}")
+        call_params['names'] = names
+    elif op == 'reccount':
+        datasets = [normalize_dataset(name) for name in parse_field_list(call_params['datasets'])]
+        if not datasets:
+            raise ValueError("datasets must name at least one dataset")
+        if len(datasets) > MAX_RECCOUNT_DATASETS:
+            raise ValueError(f"At most {MAX_RECCOUNT_DATASETS} datasets can be counted per request")
+        invalid = invalid_datasets(datasets)
+        if invalid:
+            raise ValueError(f"Invalid dataset name(s): {', '.join(invalid)}")
+        call_params['datasets'] = datasets
+    elif op == 'submit_batch':
+        names = call_params['jcl_dataset_names']
+        if not isinstance(names, list) or not names:
+            raise ValueError("jcl_dataset_names must be a non-empty list")
+        if len(names) > MAX_BATCH_SUBMIT:
+            raise ValueError(f"At most {MAX_BATCH_SUBMIT} JCL datasets can be submitted per batch")
+        call_params['jcl_dataset_names'] = [str(name).strip() for name in names]
+    elif op == 'batch':
+        operations = call_params['operations']
+        if not isinstance(operations, list) or not all(isinstance(item, dict) for item in operations):
+            raise ValueError("operations must be a list of objects")
+        encode_operations(operations)
+    elif op == 'datasets':
+        items = call_params['items']
+        if isinstance(items, str):
+            items = parse_field_list(items)
+        action = call_params.pop('action', None)
+        if action and action not in BULK_ACTIONS:
+            raise ValueError(f"action must be one of {', '.join(BULK_ACTIONS)}")
+        defaults = call_params.pop('dcb', None) or {}
+        if not isinstance(items, list) or not isinstance(defaults, dict):
+            raise ValueError("items must be a list of names or objects and dcb an object")
+        call_params['items'] = normalize_items(action, items, defaults)
+    elif op == 'navigate':
+        if call_params['target'] not in TARGET_STATES:
+            raise ValueError(f"target must be one of {', '.join(TARGET_STATES)}")
+        if not isinstance(call_params.get('params') or {}, dict):
+            raise ValueError("params must be an object")
+    return call_params
+
+
+def resolve_queue_session(item: Dict) -> Optional[str]:
+    """The item's own session if alive, else a logged-in session of the same user on the same host"""
+    preferred = sessions.get(item.get("session_id") or '')
+    if preferred and preferred['session'].is_connected:
+        return item["session_id"]
+    for session_id, session_data in list(sessions.items()):
+        session = session_data['session']
+        if session.is_logged_in and f"{session.host}:{session.port}" == item["host"] and session.username == item["user"]:
+            return session_id
+    return None
+
+
+def run_queue_item(item: Dict) -> Dict:
+    """
+    Run the steps of a claimed item on its session, stopping at the first failure.
+    Every step is checkpointed; steps that succeeded in an earlier attempt are skipped.
+    """
+    if item["session_id"] not in sessions:
+        return {"success": False, "message": "Session ended before the item started"}
+    session = sessions[item["session_id"]]['session']
+    steps = queue_steps(item["payload"])
+    if item["payload"].get("resume_from"):
+        workflow_checkpoints.discard_from(item["id"], int(item["payload"]["resume_from"]))
+    done = workflow_checkpoints.completed(item["id"])
+    artifacts = {number: entry["artifacts"] for number, entry in done.items()}
+    started = time.time()
+    results = []
+    for number, step in enumerate(steps, start=1):
+        if number in done:
+            results.append(dict(done[number]["result"] or {}, op=step["op"], reused=True))
+            continue
+
+        update_session_access(item["session_id"])
+        method, _ = QUEUE_OPERATIONS[step["op"]]
+        step_started = time.time()
+        params = {}
+        try:
+            params = resolve_references(dict(step.get("params") or {}), artifacts)
+            call_params = queue_call_params(step["op"], params)
+            result = memoized_step(step["op"], params, lambda: getattr(session, method)(**call_params),
+                                   f"{session.host}:{session.port}")
+        except (TypeError, ValueError) as e:
+            result = {"success": False, "message": f"Invalid parameters for {step['op']}: {str(e)}"}
+        workflow_checkpoints.record(item["id"], number, step["op"], params, result, item["session_id"], step_started)
+        artifacts[number] = step_artifacts(params, result)
+        results.append(dict(result, op=step["op"]))
+        if not result.get("success"):
+            break
+
+    succeeded = len(results) == len(steps) and all(result.get("success") for result in results)
+    return {
+        "success": succeeded,
+        "message": f"{sum(1 for result in results if result.get('success'))} of {len(steps)} step(s) succeeded",
+        "steps": results,
+        "elapsed_ms": int((time.time() - started) * 1000)
+    }
+
+
+# Per-step results of queued workflows, for resume-from-failed-step
+workflow_checkpoints = WorkflowCheckpoints(os.path.join(STATE_DIR, 'workflow_runs.sqlite3'))
+
+# Workflow and operation requests shared by all users; survives restarts
+work_queue = WorkQueue(os.path.join(STATE_DIR, 'work_queue.sqlite3'))
+work_pool = WorkerPool(work_queue, resolve_queue_session, run_queue_item)
+
+
 # API Routes
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -1202,7 +2615,11 @@ def health_check():
         "success": True,
         "status": "healthy",
         "s3270_available": s3270_available,
-        "active_sessions": len(sessions)
+        "active_sessions": len(sessions),
+        "job_status_cache": job_status_cache.stats(),
+        "dataset_catalog": dataset_catalog.stats(),
+        "work_queue": work_queue.stats(),
+        "step_cache": step_cache.stats()
     })
 
 @app.route('/api/connect', methods=['POST'])
@@ -1212,9 +2629,9 @@ def connect_mainframe():
     try:
         cleaned = cleanup_expired_sessions()
         if cleaned > 0:
-            print(f"Auto-cleaned {cleaned} expired session(s) before new connection")
+            logger.info(f"Auto-cleaned {cleaned} expired session(s) before new connection")
     except Exception as e:
-        print(f"Error during auto-cleanup: {e}")
+        logger.error(f"Error during auto-cleanup: {e}")
 
     data = request.get_json()
     if not data or 'host' not in data:
@@ -1227,7 +2644,7 @@ def connect_mainframe():
     session_id = str(uuid.uuid4())
     session = S3270Session(session_id)
 
-    success, message = session.connect(host, port)
+    success, message = session.connect(host, port, data.get('oversize'))
     if success:
         sessions[session_id] = {
             'session': session,
@@ -1240,7 +2657,8 @@ def connect_mainframe():
             "session_id": session_id,
             "message": message,
             "host": host,
-            "port": port
+            "port": port,
+            "terminal": session.terminal
         })
     else:
         return jsonify({
@@ -1268,6 +2686,123 @@ def login_mainframe():
 
     return jsonify(result)
 
+@app.route('/api/login/bulk', methods=['POST'])
+def login_bulk():
+    """Connect and log in many users concurrently; returns a session id or failure reason per user"""
+    data = request.get_json()
+    users = data.get('users') if data else None
+    if not isinstance(users, list) or not users:
+        return jsonify({"success": False, "message": "users must list at least one {host, port, username, password}"}), 400
+    if len(users) > MAX_BULK_LOGINS:
+        return jsonify({"success": False, "message": f"At most {MAX_BULK_LOGINS} users can be logged in per request"}), 400
+
+    problems = []
+    entries = []
+    for number, user in enumerate(users, start=1):
+        if not isinstance(user, dict) or not all(user.get(key) for key in ('host', 'username', 'password')):
+            problems.append(f"{number}: host, username and password are required")
+            continue
+        login_type = user.get('login_type', data.get('login_type', 'standard'))
+        if login_type not in ('standard', 'tso'):
+            problems.append(f"{number}: login_type must be standard or tso")
+            continue
+        try:
+            port = int(user.get('port') or 23)
+        except (TypeError, ValueError):
+            problems.append(f"{number}: port must be a number")
+            continue
+        entries.append({"index": number, "host": user['host'], "port": port, "username": str(user['username']),
+                        "password": str(user['password']), "login_type": login_type})
+    if problems:
+        return jsonify({"success": False, "message": "; ".join(problems)}), 400
+
+    try:
+        per_host = max(1, int(data.get('per_host') or BULK_LOGIN_PER_HOST))
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "message": "per_host must be a number"}), 400
+
+    try:
+        cleaned = cleanup_expired_sessions()
+        if cleaned > 0:
+            logger.info(f"Auto-cleaned {cleaned} expired session(s) before bulk login")
+    except Exception as e:
+        logger.error(f"Error during auto-cleanup: {e}")
+
+    # Entries waiting per host (hosts in order of first appearance) and how many each may run at once
+    waiting: Dict[str, deque] = {}
+    for entry in entries:
+        waiting.setdefault(f"{entry['host']}:{entry['port']}", deque()).append(entry)
+    limits = {host_key: min(per_host, HOST_CONCURRENCY_OVERRIDES.get(host_key, per_host)) for host_key in waiting}
+
+    def log_in(entry: Dict, queued: float) -> Dict:
+        row = {"index": entry["index"], "host": entry["host"], "port": entry["port"],
+               "username": entry["username"].upper(), "success": False}
+        started = time.time()
+        session_id = str(uuid.uuid4())
+        session = S3270Session(session_id)
+        try:
+            connected, message = session.connect(entry["host"], entry["port"])
+            connected_at = time.time()
+            if connected:
+                result = session.login(entry["username"], entry["password"], entry["login_type"])
+                message = result.get("message", message)
+                if result.get("success"):
+                    sessions[session_id] = {
+                        'session': session,
+                        'created_at': datetime.now(),
+                        'last_accessed': datetime.now()
+                    }
+                    row.update(success=True, session_id=session_id, terminal=session.terminal)
+                else:
+                    session.disconnect()
+        except Exception as e:
+            connected_at = time.time()
+            message = f"Login error: {str(e)}"
+            session.disconnect()
+        finished = time.time()
+        row.update(message=message, timing={
+            "wait_ms": int((started - queued) * 1000),
+            "connect_ms": int((connected_at - started) * 1000),
+            "login_ms": int((finished - connected_at) * 1000),
+            "total_ms": int((finished - queued) * 1000)
+        })
+        return row
+
+    # Hand a worker only an entry whose host has a free slot, so a host with a low limit
+    # never holds workers that other hosts could use
+    started = time.time()
+    workers = min(BULK_LOGIN_WORKERS, len(entries))
+    in_flight = {host_key: 0 for host_key in waiting}
+    running = {}
+    by_index = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while waiting or running:
+            while len(running) < workers:
+                host_key = next((key for key in waiting if in_flight[key] < limits[key]), None)
+                if host_key is None:
+                    break
+                running[pool.submit(log_in, waiting[host_key].popleft(), started)] = host_key
+                in_flight[host_key] += 1
+                if not waiting[host_key]:
+                    del waiting[host_key]
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                in_flight[running.pop(future)] -= 1
+                row = future.result()
+                by_index[row["index"]] = row
+    rows = [by_index[entry["index"]] for entry in entries]
+    elapsed = time.time() - started
+
+    failed = [row for row in rows if not row["success"]]
+    logger.info(f"Bulk login: {len(rows) - len(failed)} of {len(rows)} user(s) logged in in {elapsed:.2f}s")
+    return jsonify({
+        "success": not failed,
+        "message": f"Logged in {len(rows) - len(failed)} of {len(rows)} user(s) in {elapsed:.2f}s",
+        "results": rows,
+        "failed": len(failed),
+        "elapsed_ms": int(elapsed * 1000)
+    })
+
 @app.route('/api/screen', methods=['GET'])
 def get_screen():
     """Get current screen content"""
@@ -1306,9 +2841,47 @@ def send_command():
         result = session.send_function_key(command)
     else:
         result = session.send_command(command)
+        if command_changes_datasets(command):
+            dataset_catalog.invalidate_host(f"{session.host}:{session.port}")
 
     return jsonify(result)
 
+@app.route('/api/navigate', methods=['POST'])
+def navigate():
+    """Identify the current screen and optionally move to a target state along the shortest path"""
+    data = request.get_json()
+    if not data or 'session_id' not in data:
+        return jsonify({"success": False, "message": "session_id is required"}), 400
+
+    session_id = data['session_id']
+    if session_id not in sessions:
+        return jsonify({"success": False, "message": "Invalid session"}), 404
+
+    target = data.get('target')
+    if target and target not in TARGET_STATES:
+        return jsonify({"success": False, "message": f"target must be one of {', '.join(TARGET_STATES)}"}), 400
+
+    params = data.get('params') or {}
+    if not isinstance(params, dict):
+        return jsonify({"success": False, "message": "params must be an object (e.g. {\"level\": \"HERC01.*\"})"}), 400
+
+    update_session_access(session_id)
+    session = sessions[session_id]['session']
+    if not session.is_connected:
+        return jsonify({"success": False, "message": "Not connected to mainframe"})
+
+    if not target:
+        screen = session.get_screen_text()
+        state = identify_screen(screen)
+        return jsonify({"success": True, "message": f"Current screen: {state}", "state": state, "screen_content": screen})
+
+    try:
+        max_steps = int(data.get('max_steps') or NAVIGATION_MAX_STEPS)
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "message": "max_steps must be a number"}), 400
+
+    return jsonify(session.navigate_to(target, params, max_steps))
+
 @app.route('/api/logout', methods=['POST'])
 def logout_mainframe():
     """Logout from mainframe"""
@@ -1353,6 +2926,7 @@ def list_sessions():
             'port': session.port,
             'connected': session.is_connected,
             'logged_in': session.is_logged_in,
+            'terminal': session.terminal,
             'created_at': session_data['created_at'].isoformat()
         })
 
@@ -1361,6 +2935,24 @@ def list_sessions():
         "sessions": session_list
     })
 
+@app.route('/api/sessions/<session_id>/recorder', methods=['GET'])
+def session_recorder(session_id):
+    """Dump the flight recorder (last actions and screens) of a session"""
+    if session_id not in sessions:
+        return jsonify({"success": False, "message": "Invalid session"}), 404
+
+    session = sessions[session_id]['session']
+    include_screens = request.args.get('screens', 'true').lower() != 'false'
+    entries = session.recorder.dump(include_screens)
+
+    return jsonify({
+        "success": True,
+        "session_id": session_id,
+        "capacity": session.recorder.entries.maxlen,
+        "count": len(entries),
+        "entries": entries
+    })
+
 @app.route('/api/sendfile', methods=['POST'])
 def send_file():
     """Send file from Windows to Mainframe"""
@@ -1372,6 +2964,10 @@ def send_file():
     if session_id not in sessions:
         return jsonify({"success": False, "message": "Invalid session"}), 404
 
+    problem = invalid_dcb(data.get('dcb'))
+    if problem:
+        return jsonify({"success": False, "message": problem}), 400
+
     update_session_access(session_id)
     local_path = data['local_path']
     mainframe_dataset = data['mainframe_dataset']
@@ -1379,7 +2975,67 @@ def send_file():
     host_type = data.get('host_type', 'tso')
 
     session = sessions[session_id]['session']
-    result = session.send_file_to_mainframe(local_path, mainframe_dataset, transfer_mode, host_type)
+    result = session.send_file_to_mainframe(
+        local_path, mainframe_dataset, transfer_mode, host_type,
+        data.get('copybook_path'), data.get('code_page', 'cp037'), data.get('local_framing', 'auto'),
+        data.get('dcb'), data.get('preflight', True)
+    )
+
+    return jsonify(result)
+
+@app.route('/api/sendfile/split', methods=['POST'])
+def send_file_split():
+    """Upload a large file in parts over several sessions and concatenate them on the host"""
+    data = request.get_json()
+    if not data or not all(key in data for key in ['session_id', 'local_path', 'mainframe_dataset']):
+        return jsonify({"success": False, "message": "session_id, local_path, and mainframe_dataset are required"}), 400
+
+    session_id = data['session_id']
+    helper_ids = parse_field_list(data.get('helper_session_ids') or [])
+    unknown = [item for item in [session_id] + helper_ids if item not in sessions]
+    if unknown:
+        return jsonify({"success": False, "message": f"Invalid session: {', '.join(unknown)}"}), 404
+
+    invalid = invalid_datasets([normalize_dataset(data['mainframe_dataset'])])
+    if invalid:
+        return jsonify({"success": False, "message": f"Invalid dataset name: {invalid[0]}"}), 400
+    problem = invalid_dcb(data.get('dcb'))
+    if problem:
+        return jsonify({"success": False, "message": problem}), 400
+
+    try:
+        parts = int(data['parts']) if data.get('parts') else None
+        max_attempts = int(data.get('max_attempts') or 10)
+        wait_seconds = float(data.get('wait_seconds') or 5.0)
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "message": "parts, max_attempts and wait_seconds must be numbers"}), 400
+
+    if parts is not None and not 1 <= parts <= MAX_SPLIT_PARTS:
+        return jsonify({"success": False, "message": f"parts must be between 1 and {MAX_SPLIT_PARTS}"}), 400
+
+    for item in [session_id] + helper_ids:
+        update_session_access(item)
+
+    session = sessions[session_id]['session']
+    result = session.send_file_split(
+        data['local_path'],
+        data['mainframe_dataset'],
+        [sessions[item]['session'] for item in helper_ids],
+        parts,
+        data.get('transfer_mode', 'ascii'),
+        data.get('host_type', 'tso'),
+        data.get('copybook_path'),
+        data.get('code_page', 'cp037'),
+        data.get('local_framing', 'auto'),
+        data.get('dcb'),
+        str(data.get('job_class') or CONCAT_JOB_CLASS).upper(),
+        str(data.get('msgclass') or CONCAT_MSGCLASS).upper(),
+        max_attempts,
+        wait_seconds
+    )
+
+    if result.get('job_id'):
+        sessions[session_id]['last_job_identifier'] = result['job_id']
 
     return jsonify(result)
 
@@ -1401,7 +3057,10 @@ def get_file():
     host_type = data.get('host_type', 'tso')
 
     session = sessions[session_id]['session']
-    result = session.get_file_from_mainframe(mainframe_dataset, local_path, transfer_mode, host_type)
+    result = session.get_file_from_mainframe(
+        mainframe_dataset, local_path, transfer_mode, host_type,
+        data.get('copybook_path'), data.get('code_page', 'cp037'), data.get('local_framing', 'lines')
+    )
 
     return jsonify(result)
 
@@ -1427,6 +3086,37 @@ def submit_jcl():
     return jsonify(result)
 
 
+@app.route('/api/submit_jcl/batch', methods=['POST'])
+def submit_jcl_batch():
+    """Submit a list of JCL datasets back to back on one session"""
+    data = request.get_json()
+    if not data or not all(key in data for key in ['session_id', 'jcl_dataset_names']):
+        return jsonify({"success": False, "message": "session_id and jcl_dataset_names are required"}), 400
+
+    jcl_dataset_names = data['jcl_dataset_names']
+    if not isinstance(jcl_dataset_names, list) or not jcl_dataset_names:
+        return jsonify({"success": False, "message": "jcl_dataset_names must be a non-empty list"}), 400
+
+    if len(jcl_dataset_names) > MAX_BATCH_SUBMIT:
+        return jsonify({"success": False, "message": f"At most {MAX_BATCH_SUBMIT} JCL datasets can be submitted per batch"}), 400
+
+    session_id = data['session_id']
+    if session_id not in sessions:
+        return jsonify({"success": False, "message": "Invalid session"}), 404
+
+    update_session_access(session_id)
+    session = sessions[session_id]['session']
+    result = session.submit_jcl_batch(
+        [str(name).strip() for name in jcl_dataset_names],
+        bool(data.get('stop_on_error', False))
+    )
+
+    if result.get('job_ids'):
+        sessions[session_id]['last_job_identifier'] = result['job_ids'][-1]
+
+    return jsonify(result)
+
+
 @app.route('/api/job_status', methods=['POST'])
 def job_status():
     """Poll job status until OUTPUT QUEUE or attempts exhausted"""
@@ -1455,8 +3145,10 @@ def job_status():
     except (TypeError, ValueError):
         wait_seconds = 5.0
 
+    predictive = data.get('predictive', True) is not False
+
     session = sessions[session_id]['session']
-    result = session.check_job_status(job_identifier, max_attempts, wait_seconds)
+    result = session.check_job_status(job_identifier, max_attempts, wait_seconds, predictive)
 
     if result.get('success'):
         sessions[session_id]['last_job_identifier'] = job_identifier
@@ -1488,12 +3180,13 @@ def job_output():
         return jsonify({"success": False, "message": "job_identifier is required"}), 400
 
     try:
-        max_pages = int(data.get('max_pages') or 50)
+        max_pages = int(data['max_pages']) if data.get('max_pages') else None
     except (TypeError, ValueError):
-        max_pages = 50
+        max_pages = None
 
     session = sessions[session_id]['session']
-    result = session.get_job_output(job_identifier, max_pages)
+    result = memoized_step('joboutput', {"job_identifier": job_identifier.strip().upper(), "max_pages": max_pages},
+                           lambda: session.get_job_output(job_identifier, max_pages), f"{session.host}:{session.port}")
 
     if result.get('success'):
         sessions[session_id]['last_job_identifier'] = job_identifier
@@ -1502,6 +3195,794 @@ def job_output():
 
     return jsonify(result)
 
+@app.route('/api/copybook/compile', methods=['POST'])
+def copybook_compile():
+    """Compile a copybook into a cached record layout, optionally decoding sample records"""
+    data = request.get_json()
+    if not data or not (data.get('copybook_path') or data.get('copybook_content')):
+        return jsonify({"success": False, "message": "copybook_path or copybook_content is required"}), 400
+
+    try:
+        if data.get('copybook_content'):
+            layout, cache_hit = compile_copybook(data['copybook_content'])
+        else:
+            copybook_path = resolve_project_path(data['copybook_path'])
+            if not os.path.exists(copybook_path):
+                return jsonify({"success": False, "message": f"Copybook not found: {copybook_path}"}), 404
+            layout, cache_hit = load_copybook(copybook_path)
+    except CopybookError as e:
+        return jsonify({"success": False, "message": f"Copybook error: {e}"}), 400
+
+    result = {
+        "success": True,
+        "message": f"Compiled {len(layout.data_fields)} field(s), record length {layout.record_length}",
+        "cache_hit": cache_hit,
+        "layout": layout.to_dict()
+    }
+
+    if data.get('sample_path'):
+        sample_path = resolve_project_path(data['sample_path'])
+        if not os.path.exists(sample_path):
+            return jsonify({"success": False, "message": f"Sample file not found: {sample_path}"}), 404
+
+        try:
+            max_records = int(data.get('max_records') or COPYBOOK_PREVIEW_RECORDS)
+        except (TypeError, ValueError):
+            max_records = COPYBOOK_PREVIEW_RECORDS
+
+        # Only read as many bytes as the preview needs (records may be newline-delimited)
+        with open(sample_path, 'rb') as sample_file:
+            sample = sample_file.read(max(1, max_records) * (layout.record_length + 2) * 2)
+
+        records = []
+        for record in layout.iter_decode(sample, data.get('encoding', 'latin-1'), data.get('framing', 'auto')):
+            if len(records) >= max_records:
+                break
+            records.append({key: str(value) if value is not None and not isinstance(value, (int, str)) else value
+                            for key, value in record.items()})
+        result["records"] = records
+
+    return jsonify(result)
+
+@app.route('/api/file/decode', methods=['POST'])
+def file_decode():
+    """Decode a whole fixed-length record file in column batches and summarize each field"""
+    data = request.get_json()
+    if not data or not all(key in data for key in ['copybook_path', 'data_path']):
+        return jsonify({"success": False, "message": "copybook_path and data_path are required"}), 400
+
+    copybook_path = resolve_project_path(data['copybook_path'])
+    data_path = resolve_project_path(data['data_path'])
+    for path in (copybook_path, data_path):
+        if not os.path.exists(path):
+            return jsonify({"success": False, "message": f"File not found: {path}"}), 404
+
+    try:
+        layout, _ = load_copybook(copybook_path)
+    except CopybookError as e:
+        return jsonify({"success": False, "message": f"Copybook error: {e}"}), 400
+
+    try:
+        batch_records = int(data.get('batch_records') or DEFAULT_BATCH_RECORDS)
+        sample_records = int(data.get('max_records') or COPYBOOK_PREVIEW_RECORDS)
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "message": "batch_records and max_records must be integers"}), 400
+
+    started = time.time()
+    try:
+        result = scan_file(
+            data_path,
+            layout,
+            data.get('encoding', 'latin-1'),
+            data.get('framing', 'auto'),
+            max(1, batch_records),
+            max(0, sample_records)
+        )
+    except (LookupError, ValueError) as e:
+        return jsonify({"success": False, "message": f"Decode error: {e}"}), 400
+
+    elapsed = time.time() - started
+    result.update({
+        "success": True,
+        "message": f"Decoded {result['record_count']} record(s) in {elapsed:.2f}s",
+        "record_length": layout.record_length,
+        "elapsed_ms": int(elapsed * 1000),
+        "records_per_second": int(result['record_count'] / elapsed) if elapsed > 0 else None
+    })
+    return jsonify(result)
+
+def conversion_response(events, started: float, output_path: str, stream: bool, verb: str,
+                        step: Optional[str] = None, params: Optional[Dict] = None):
+    """
+    Run a conversion generator as one JSON result or as a stream of NDJSON progress events.
+    With a step name the result is memoized: unchanged inputs return the earlier result without converting.
+    """
+    policy = STEP_CACHE_POLICIES.get(step)
+    key = step_cache.key(step, params, policy) if policy else None
+    cached = step_cache.get(key)
+    if cached is not None:
+        cached = dict(cached, cached=True)
+        if not stream:
+            return jsonify(cached)
+        return Response(json.dumps({"type": "result", **cached}) + '\n', mimetype='application/x-ndjson')
+
+    def finish(result: Dict) -> Dict:
+        result = {key: value for key, value in result.items() if key != 'type'}
+        elapsed = time.time() - started
+        result.update({
+            "success": True,
+            "message": f"{verb} {result['records']} record(s) in {elapsed:.2f}s",
+            "output_path": project_relative(output_path),
+            "elapsed_ms": int(elapsed * 1000)
+        })
+        if policy:
+            step_cache.put(key, result, policy)
+        return result
+
+    if not stream:
+        try:
+            return jsonify(finish(run_to_completion(events)))
+        except (ConversionError, CopybookError) as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+        except (OSError, LookupError, ValueError) as e:
+            return jsonify({"success": False, "message": f"Conversion failed: {e}"}), 500
+
+    def generate():
+        try:
+            for event in events:
+                if event.get('type') == 'result':
+                    event = {"type": "result", **finish(event)}
+                yield json.dumps(event) + '\n'
+        except (OSError, LookupError, ValueError) as e:
+            yield json.dumps({"type": "error", "success": False, "message": f"Conversion failed: {e}"}) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/api/file/convert', methods=['POST'])
+def file_convert():
+    """Convert a fixed-length record file to XLSX, CSV or Parquet in constant memory"""
+    data = request.get_json()
+    if not data or not all(key in data for key in ['copybook_path', 'data_path', 'output_path']):
+        return jsonify({"success": False, "message": "copybook_path, data_path and output_path are required"}), 400
+
+    copybook_path = resolve_project_path(data['copybook_path'])
+    data_path = resolve_project_path(data['data_path'])
+    for path in (copybook_path, data_path):
+        if not os.path.exists(path):
+            return jsonify({"success": False, "message": f"File not found: {path}"}), 404
+
+    output_path = resolve_project_path(data['output_path'])
+    try:
+        layout, _ = load_copybook(copybook_path)
+        output_format = output_format_of(output_path, data.get('format'))
+    except (CopybookError, ConversionError) as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    events = iter_convert(data_path, layout, output_path, output_format,
+                          data.get('encoding', 'latin-1'), data.get('framing', 'auto'))
+    params = {"copybook_path": copybook_path, "data_path": data_path, "output_path": output_path,
+              "format": output_format, "encoding": data.get('encoding', 'latin-1'), "framing": data.get('framing', 'auto')}
+    return conversion_response(events, time.time(), output_path, bool(data.get('stream')), "Converted", 'fileconv', params)
+
+@app.route('/api/file/reverse-convert', methods=['POST'])
+def file_reverse_convert():
+    """Convert an XLSX, CSV or Parquet file back to fixed-length records in constant memory"""
+    data = request.get_json()
+    if not data or not all(key in data for key in ['copybook_path', 'input_path', 'output_path']):
+        return jsonify({"success": False, "message": "copybook_path, input_path and output_path are required"}), 400
+
+    copybook_path = resolve_project_path(data['copybook_path'])
+    input_path = resolve_project_path(data['input_path'])
+    for path in (copybook_path, input_path):
+        if not os.path.exists(path):
+            return jsonify({"success": False, "message": f"File not found: {path}"}), 404
+
+    output_format = data.get('output_format', 'fixed')
+    if output_format not in ('fixed', 'csv', 'lines', 'crlf'):
+        return jsonify({"success": False, "message": "output_format must be fixed, lines, crlf or csv"}), 400
+
+    try:
+        layout, _ = load_copybook(copybook_path)
+        input_format = output_format_of(input_path, data.get('input_format'))
+    except (CopybookError, ConversionError) as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    output_path = resolve_project_path(data['output_path'])
+    events = iter_reverse(input_path, layout, output_path, input_format, output_format, data.get('encoding', 'latin-1'))
+    params = {"copybook_path": copybook_path, "input_path": input_path, "output_path": output_path,
+              "input_format": input_format, "output_format": output_format, "encoding": data.get('encoding', 'latin-1')}
+    return conversion_response(events, time.time(), output_path, bool(data.get('stream')), "Converted", 'reverse', params)
+
+@app.route('/api/file/validate', methods=['POST'])
+def file_validate():
+    """Pre-flight check of a local file against a DCB and (optionally) a copybook, without uploading it"""
+    data = request.get_json()
+    if not data or 'local_path' not in data:
+        return jsonify({"success": False, "message": "local_path is required"}), 400
+
+    local_path = resolve_project_path(data['local_path'])
+    if not os.path.exists(local_path):
+        return jsonify({"success": False, "message": f"File not found: {local_path}"}), 404
+
+    dcb = data.get('dcb') or {}
+    problem = invalid_dcb(dcb)
+    if problem:
+        return jsonify({"success": False, "message": problem}), 400
+
+    started = time.time()
+    try:
+        layout = load_copybook(resolve_project_path(data['copybook_path']))[0] if data.get('copybook_path') else None
+        report = validate_upload(local_path, dcb, layout, data.get('transfer_mode', 'ascii'),
+                                 data.get('code_page', 'cp037'), data.get('framing', 'auto'))
+    except (OSError, CopybookError, LookupError, ValueError) as e:
+        return jsonify({"success": False, "message": f"Pre-flight validation failed: {e}"}), 400
+
+    report.update({
+        "success": True,
+        "message": (f"{report['records']} record(s) passed pre-flight validation" if report["valid"]
+                    else f"Pre-flight validation failed: {'; '.join(report['errors'])}"),
+        "elapsed_ms": int((time.time() - started) * 1000)
+    })
+    return jsonify(report)
+
+@app.route('/api/filecomp', methods=['POST'])
+def filecomp():
+    """Compare two record files sharing a copybook, by key or by position"""
+    data = request.get_json()
+    if not data or not all(key in data for key in ['copybook_path', 'file1_path', 'file2_path']):
+        return jsonify({"success": False, "message": "copybook_path, file1_path and file2_path are required"}), 400
+
+    paths = {key: resolve_project_path(data[key]) for key in ['copybook_path', 'file1_path', 'file2_path']}
+    for path in paths.values():
+        if not os.path.exists(path):
+            return jsonify({"success": False, "message": f"File not found: {path}"}), 404
+
+    try:
+        sample_size = int(data.get('max_differences') or DIFF_SAMPLE_SIZE)
+        run_records = int(data.get('sort_run_records') or SORT_RUN_RECORDS)
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "message": "max_differences and sort_run_records must be integers"}), 400
+
+    if data.get('report_path'):
+        report_path = resolve_project_path(data['report_path'])
+    else:
+        report_name = f"filecomp_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}.jsonl"
+        report_path = os.path.join(FILECOMP_REPORT_DIR, report_name)
+
+    try:
+        layout, _ = load_copybook(paths['copybook_path'])
+        comparer = FileComparer(
+            layout,
+            parse_field_list(data.get('key_fields')),
+            parse_field_list(data.get('ignore_fields')),
+            data.get('encoding', 'latin-1'),
+            data.get('framing', 'auto'),
+            run_records
+        )
+    except CopybookError as e:
+        return jsonify({"success": False, "message": f"Copybook error: {e}"}), 400
+    except KeyError as e:
+        return jsonify({"success": False, "message": str(e.args[0])}), 400
+
+    started = time.time()
+    try:
+        summary = comparer.compare(paths['file1_path'], paths['file2_path'], report_path, max(0, sample_size))
+    except (OSError, LookupError) as e:
+        logger.error(f"FileComp failed: {e}")
+        return jsonify({"success": False, "message": f"File comparison failed: {e}"}), 500
+
+    elapsed = time.time() - started
+    summary.update({
+        "success": True,
+        "message": (
+            f"Compared {summary['records_file1']} and {summary['records_file2']} record(s): "
+            f"{summary['identical']} identical, {summary['changed']} changed, "
+            f"{summary['only_in_file1']} only in file 1, {summary['only_in_file2']} only in file 2"
+        ),
+        "files_match": summary['differences'] == 0,
+        "report_path": project_relative(report_path),
+        "elapsed_ms": int(elapsed * 1000)
+    })
+    return jsonify(summary)
+
+@app.route('/api/filecomp/check', methods=['POST'])
+def filecomp_check():
+    """Check that named fields of a record file hold expected values"""
+    data = request.get_json()
+    if not data or not all(key in data for key in ['copybook_path', 'file_path', 'conditions']):
+        return jsonify({"success": False, "message": "copybook_path, file_path and conditions are required"}), 400
+
+    if not isinstance(data['conditions'], list) or not all(isinstance(item, dict) for item in data['conditions']):
+        return jsonify({"success": False, "message": "conditions must be a list of objects"}), 400
+
+    copybook_path = resolve_project_path(data['copybook_path'])
+    file_path = resolve_project_path(data['file_path'])
+    for path in (copybook_path, file_path):
+        if not os.path.exists(path):
+            return jsonify({"success": False, "message": f"File not found: {path}"}), 404
+
+    try:
+        sample_size = int(data.get('max_samples') or EXPECTATION_SAMPLE_SIZE)
+    except (TypeError, ValueError):
+        sample_size = EXPECTATION_SAMPLE_SIZE
+
+    try:
+        layout, _ = load_copybook(copybook_path)
+        expectations = compile_expectations(layout, data['conditions'])
+    except (CopybookError, ExpectationError) as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    started = time.time()
+    try:
+        result = check_file(
+            file_path, layout, expectations,
+            data.get('encoding', 'latin-1'), data.get('framing', 'auto'),
+            sample_size=max(0, sample_size)
+        )
+    except (OSError, LookupError) as e:
+        return jsonify({"success": False, "message": f"Expectation check failed: {e}"}), 500
+
+    violations = sum(condition['violations'] for condition in result['conditions'])
+    result.update({
+        "success": True,
+        "message": (
+            f"Checked {result['records']} record(s) against {len(expectations)} condition(s): "
+            f"{result['failed_records']} record(s) with {violations} violation(s)"
+        ),
+        "all_passed": result['failed_records'] == 0,
+        "elapsed_ms": int((time.time() - started) * 1000)
+    })
+    return jsonify(result)
+
+@app.route('/api/datagen', methods=['POST'])
+def datagen():
+    """Generate a fixed-length record file from a copybook and per-field value rules"""
+    data = request.get_json()
+    if not data or not all(key in data for key in ['copybook_path', 'output_path', 'records']):
+        return jsonify({"success": False, "message": "copybook_path, output_path and records are required"}), 400
+
+    rules = data.get('rules') or []
+    if not isinstance(rules, list) or not all(isinstance(item, dict) for item in rules):
+        return jsonify({"success": False, "message": "rules must be a list of objects"}), 400
+
+    try:
+        records = int(data['records'])
+        seed = int(data.get('seed') or 0)
+        workers = int(data['workers']) if data.get('workers') else None
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "message": "records, seed and workers must be integers"}), 400
+
+    if not 0 <= records <= MAX_GENERATE_RECORDS:
+        return jsonify({"success": False, "message": f"records must be between 0 and {MAX_GENERATE_RECORDS}"}), 400
+
+    copybook_path = resolve_project_path(data['copybook_path'])
+    if not os.path.exists(copybook_path):
+        return jsonify({"success": False, "message": f"File not found: {copybook_path}"}), 404
+
+    with open(copybook_path, 'r', encoding='utf-8', errors='replace') as copybook_file:
+        copybook_text = copybook_file.read()
+    output_path = resolve_project_path(data['output_path'])
+
+    started = time.time()
+    try:
+        result = generate_file(copybook_text, rules, output_path, records, seed,
+                               data.get('framing', 'lines'), workers)
+    except (CopybookError, DataGenError) as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    except OSError as e:
+        return jsonify({"success": False, "message": f"Data generation failed: {e}"}), 500
+
+    elapsed = time.time() - started
+    result.update({
+        "success": True,
+        "message": f"Generated {records} record(s) in {elapsed:.2f}s",
+        "output_path": project_relative(output_path),
+        "elapsed_ms": int(elapsed * 1000),
+        "records_per_second": int(records / elapsed) if elapsed > 0 else None
+    })
+    return jsonify(result)
+
+@app.route('/api/batch', methods=['POST'])
+def run_batch():
+    """Run several host operations with one TSO EXEC of the batch REXX exec"""
+    data = request.get_json()
+    if not data or not all(key in data for key in ['session_id', 'operations']):
+        return jsonify({"success": False, "message": "session_id and operations are required"}), 400
+
+    operations = data['operations']
+    if not isinstance(operations, list) or not all(isinstance(item, dict) for item in operations):
+        return jsonify({"success": False, "message": "operations must be a list of objects"}), 400
+
+    try:
+        encode_operations(operations)
+        timeout = float(data.get('timeout') or 120.0)
+    except BatchError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "message": "timeout must be a number"}), 400
+
+    session_id = data['session_id']
+    if session_id not in sessions:
+        return jsonify({"success": False, "message": "Invalid session"}), 404
+
+    update_session_access(session_id)
+    session = sessions[session_id]['session']
+    return jsonify(session.run_batch(operations, timeout))
+
+@app.route('/api/datasets/bulk', methods=['POST'])
+def datasets_bulk():
+    """Allocate, delete or LISTDS many datasets in one call"""
+    data = request.get_json()
+    if not data or not all(key in data for key in ['session_id', 'datasets']):
+        return jsonify({"success": False, "message": "session_id and datasets are required"}), 400
+
+    datasets = data['datasets']
+    if isinstance(datasets, str):
+        datasets = parse_field_list(datasets)
+    if not isinstance(datasets, list) or not all(isinstance(item, (str, dict)) for item in datasets):
+        return jsonify({"success": False, "message": "datasets must be a list of names or objects"}), 400
+
+    action = data.get('action')
+    if action and action not in BULK_ACTIONS:
+        return jsonify({"success": False, "message": f"action must be one of {', '.join(BULK_ACTIONS)}"}), 400
+
+    defaults = data.get('dcb') or {}
+    if not isinstance(defaults, dict):
+        return jsonify({"success": False, "message": "dcb must be an object"}), 400
+
+    try:
+        items = normalize_items(action, datasets, defaults)
+    except DatasetRequestError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    session_id = data['session_id']
+    if session_id not in sessions:
+        return jsonify({"success": False, "message": "Invalid session"}), 404
+
+    update_session_access(session_id)
+    session = sessions[session_id]['session']
+    return jsonify(session.bulk_datasets(items, bool(data.get('missing_ok', True)), bool(data.get('stop_on_error', False))))
+
+@app.route('/api/catalog/lookup', methods=['POST'])
+def catalog_lookup():
+    """Existence, attributes and members of datasets from the per-host catalog cache"""
+    data = request.get_json()
+    if not data or not all(key in data for key in ['session_id', 'datasets']):
+        return jsonify({"success": False, "message": "session_id and datasets are required"}), 400
+
+    names = [name.strip().strip("'").upper() for name in parse_field_list(data['datasets'])]
+    invalid = invalid_datasets(names)
+    if not names or invalid:
+        return jsonify({"success": False, "message": f"Invalid dataset name(s): {', '.join(invalid) or 'none given'}"}), 400
+
+    session_id = data['session_id']
+    if session_id not in sessions:
+        return jsonify({"success": False, "message": "Invalid session"}), 404
+
+    update_session_access(session_id)
+    session = sessions[session_id]['session']
+    return jsonify(session.lookup_datasets(names, bool(data.get('members')), bool(data.get('refresh'))))
+
+@app.route('/api/catalog/refresh', methods=['POST'])
+def catalog_refresh():
+    """Cache every dataset name under a level with LISTCAT"""
+    data = request.get_json()
+    if not data or not all(key in data for key in ['session_id', 'level']):
+        return jsonify({"success": False, "message": "session_id and level are required"}), 400
+
+    if invalid_datasets([normalize_dataset(data['level'])]):
+        return jsonify({"success": False, "message": f"Invalid level: {data['level']}"}), 400
+
+    session_id = data['session_id']
+    if session_id not in sessions:
+        return jsonify({"success": False, "message": "Invalid session"}), 404
+
+    update_session_access(session_id)
+    session = sessions[session_id]['session']
+    return jsonify(session.refresh_catalog(data['level']))
+
+@app.route('/api/catalog/invalidate', methods=['POST'])
+def catalog_invalidate():
+    """Drop cached catalog entries for some datasets, or for the whole host of a session"""
+    data = request.get_json()
+    if not data or 'session_id' not in data:
+        return jsonify({"success": False, "message": "session_id is required"}), 400
+
+    session_id = data['session_id']
+    if session_id not in sessions:
+        return jsonify({"success": False, "message": "Invalid session"}), 404
+
+    update_session_access(session_id)
+    session = sessions[session_id]['session']
+    host_key = f"{session.host}:{session.port}"
+    names = parse_field_list(data.get('datasets') or [])
+    if names:
+        dataset_catalog.invalidate(host_key, names)
+    else:
+        dataset_catalog.invalidate_host(host_key)
+    return jsonify({"success": True, "message": f"Invalidated {len(names) or 'all'} catalog entr{'y' if len(names) == 1 else 'ies'} for {host_key}"})
+
+@app.route('/api/queue', methods=['POST'])
+def queue_submit():
+    """Queue an operation or a workflow (list of operations) to run under host and user admission limits"""
+    data = request.get_json()
+    if not data or 'session_id' not in data:
+        return jsonify({"success": False, "message": "session_id is required"}), 400
+
+    kind = 'workflow' if data.get('steps') else 'operation'
+    steps = queue_steps(data)
+    problems = invalid_queue_steps(steps)
+    if problems:
+        return jsonify({"success": False, "message": "; ".join(problems)}), 400
+
+    session_id = data['session_id']
+    if session_id not in sessions:
+        return jsonify({"success": False, "message": "Invalid session"}), 404
+
+    update_session_access(session_id)
+    session = sessions[session_id]['session']
+    if not session.is_logged_in:
+        return jsonify({"success": False, "message": "Not logged in to mainframe"})
+
+    item_id = work_queue.enqueue(kind, f"{session.host}:{session.port}", session.username, session_id, {"steps": steps})
+    work_pool.start()
+    work_pool.notify()
+    item = work_queue.get(item_id)
+    return jsonify({
+        "success": True,
+        "message": f"Queued {kind} {item_id}",
+        "item_id": item_id,
+        "run_id": item_id,
+        "status": item["status"],
+        **work_queue.position(item)
+    })
+
+@app.route('/api/queue', methods=['GET'])
+def queue_list():
+    """Queued and running items (optionally for one host or user), with positions and limits"""
+    work_pool.start()
+    include_finished = request.args.get('finished', 'false').lower() == 'true'
+    items = work_queue.items(request.args.get('host'), request.args.get('user'), include_finished)
+    listed = [dict({key: item[key] for key in ('id', 'kind', 'host', 'user', 'session_id', 'status',
+                                                'enqueued_at', 'started_at', 'finished_at', 'attempts')},
+                   **work_queue.position(item)) for item in items]
+    return jsonify({
+        "success": True,
+        "items": listed,
+        "limits": {"user": USER_CONCURRENCY, "hosts": {host: host_limit(host) for host in sorted({item["host"] for item in items})}},
+        "stats": work_queue.stats()
+    })
+
+@app.route('/api/queue/<item_id>', methods=['GET'])
+def queue_status(item_id):
+    """Status, queue position, ETA and (once finished) result of a queued item"""
+    work_pool.start()
+    item = work_queue.get(item_id)
+    if item is None:
+        return jsonify({"success": False, "message": "Unknown queue item"}), 404
+
+    response = {key: item[key] for key in ('kind', 'host', 'user', 'session_id', 'status', 'enqueued_at',
+                                           'started_at', 'finished_at', 'attempts', 'result')}
+    response.update(work_queue.position(item))
+    if item["status"] == 'queued' and resolve_queue_session(item) is None:
+        response["waiting_for_session"] = True
+    return jsonify(dict(response, success=True, item_id=item_id, final=item["status"] in FINAL_STATES,
+                        message=f"Item is {item['status']}"))
+
+@app.route('/api/queue/<item_id>/cancel', methods=['POST'])
+def queue_cancel(item_id):
+    """Cancel a queued item that has not started"""
+    if work_queue.get(item_id) is None:
+        return jsonify({"success": False, "message": "Unknown queue item"}), 404
+    if not work_queue.cancel(item_id):
+        return jsonify({"success": False, "message": "Only queued items can be cancelled"}), 409
+    return jsonify({"success": True, "message": f"Cancelled {item_id}"})
+
+@app.route('/api/workflow/<run_id>', methods=['GET'])
+def workflow_run(run_id):
+    """A queued workflow run with its step checkpoints (results, job ids, transferred files, session)"""
+    item = work_queue.get(run_id)
+    if item is None:
+        return jsonify({"success": False, "message": "Unknown workflow run"}), 404
+
+    steps = queue_steps(item["payload"])
+    return jsonify({
+        "success": True,
+        "message": f"Run is {item['status']}",
+        "run_id": run_id,
+        "status": item["status"],
+        "session_id": item["session_id"],
+        "total_steps": len(steps),
+        "next_step": workflow_checkpoints.first_incomplete(run_id, len(steps)),
+        "checkpoints": workflow_checkpoints.steps(run_id),
+        **work_queue.position(item)
+    })
+
+@app.route('/api/workflow/<run_id>/resume', methods=['POST'])
+def workflow_resume(run_id):
+    """
+    Queue a failed run again from its failed step (or from_step), reusing the checkpoints
+    of the steps before it and, while it is still connected, the session that ran them.
+    Only runs submitted through /api/queue are checkpointed; the browser's
+    FunctionExecutor.executeWorkflow still runs steps itself and restarts from step 1.
+    """
+    data = request.get_json(silent=True) or {}
+    item = work_queue.get(run_id)
+    if item is None:
+        return jsonify({"success": False, "message": "Unknown workflow run"}), 404
+    if item["status"] not in ('failed', 'cancelled'):
+        return jsonify({"success": False, "message": f"Only failed or cancelled runs can be resumed (run is {item['status']})"}), 409
+
+    steps = queue_steps(item["payload"])
+    resume_at = workflow_checkpoints.first_incomplete(run_id, len(steps)) or len(steps)
+    if data.get('from_step'):
+        try:
+            resume_at = int(data['from_step'])
+        except (TypeError, ValueError):
+            return jsonify({"success": False, "message": "from_step must be a step number"}), 400
+        if not 1 <= resume_at <= len(steps):
+            return jsonify({"success": False, "message": f"from_step must be between 1 and {len(steps)}"}), 400
+
+    # Corrected params for the step being resumed (e.g. a fixed dataset name)
+    if data.get('params') is not None:
+        if not isinstance(data['params'], dict):
+            return jsonify({"success": False, "message": "params must be an object"}), 400
+        steps[resume_at - 1] = dict(steps[resume_at - 1], params=data['params'])
+        problems = invalid_queue_steps(steps)
+        if problems:
+            return jsonify({"success": False, "message": "; ".join(problems)}), 400
+
+    session_id = data.get('session_id')
+    if session_id and session_id not in sessions:
+        return jsonify({"success": False, "message": "Invalid session"}), 404
+
+    # The worker drops the checkpoints from resume_at on when it picks the run up, so a requeue
+    # that loses a race leaves them untouched
+    if not work_queue.requeue(run_id, {"steps": steps, "resume_from": resume_at}, session_id):
+        return jsonify({"success": False, "message": "Run changed state; try again"}), 409
+    work_pool.start()
+    work_pool.notify()
+
+    item = work_queue.get(run_id)
+    lease = item["session_id"] if item["session_id"] in sessions else None
+    return jsonify({
+        "success": True,
+        "message": f"Resuming run {run_id} at step {resume_at} of {len(steps)}",
+        "run_id": run_id,
+        "resume_step": resume_at,
+        "reused_steps": resume_at - 1,
+        "session_id": lease,
+        "waiting_for_session": resolve_queue_session(item) is None,
+        **work_queue.position(item)
+    })
+
+@app.route('/api/reccount', methods=['POST'])
+def record_count():
+    """Count records of one or more host datasets with a generated IDCAMS job"""
+    data = request.get_json()
+    if not data or not all(key in data for key in ['session_id', 'datasets']):
+        return jsonify({"success": False, "message": "session_id and datasets are required"}), 400
+
+    datasets = [normalize_dataset(name) for name in parse_field_list(data['datasets'])]
+    if not datasets:
+        return jsonify({"success": False, "message": "datasets must name at least one dataset"}), 400
+
+    if len(datasets) > MAX_RECCOUNT_DATASETS:
+        return jsonify({"success": False, "message": f"At most {MAX_RECCOUNT_DATASETS} datasets can be counted per request"}), 400
+
+    invalid = invalid_datasets(datasets)
+    if invalid:
+        return jsonify({"success": False, "message": f"Invalid dataset name(s): {', '.join(invalid)}"}), 400
+
+    session_id = data['session_id']
+    if session_id not in sessions:
+        return jsonify({"success": False, "message": "Invalid session"}), 404
+
+    try:
+        max_attempts = int(data.get('max_attempts') or 10)
+        wait_seconds = float(data.get('wait_seconds') or 5.0)
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "message": "max_attempts and wait_seconds must be numbers"}), 400
+
+    update_session_access(session_id)
+    session = sessions[session_id]['session']
+    result = memoized_step('reccount', {"datasets": datasets}, lambda: session.count_records(
+        datasets,
+        data.get('jcl_dataset'),
+        str(data.get('job_class') or RECCOUNT_JOB_CLASS).upper(),
+        str(data.get('msgclass') or RECCOUNT_MSGCLASS).upper(),
+        max_attempts,
+        wait_seconds
+    ), f"{session.host}:{session.port}")
+
+    if result.get('job_id'):
+        sessions[session_id]['last_job_identifier'] = result['job_id']
+
+    return jsonify(result)
+
+@app.route('/api/debug/profile', methods=['POST'])
+def debug_profile_start():
+    """
+    Start profiling: deterministic (cProfile) for the next `requests` requests to `route`,
+    or sampling of live threads for `seconds` (optionally only stacks inside `route`'s handler)
+    """
+    denied = profile_guard()
+    if denied:
+        return denied
+
+    data = request.get_json(silent=True) or {}
+    mode = data.get('mode', 'deterministic')
+    route = data.get('route')
+    function = None
+    if route:
+        rule = next((rule for rule in app.url_map.iter_rules() if rule.rule == route), None)
+        if rule is None:
+            return jsonify({"success": False, "message": f"Unknown route: {route}"}), 400
+        function = app.view_functions[rule.endpoint].__name__
+
+    try:
+        if mode == 'deterministic':
+            if not route:
+                return jsonify({"success": False, "message": "route is required for deterministic profiling"}), 400
+            count = int(data.get('requests') or 1)
+            if not 1 <= count <= MAX_PROFILE_REQUESTS:
+                return jsonify({"success": False, "message": f"requests must be between 1 and {MAX_PROFILE_REQUESTS}"}), 400
+            profile = profiler.start_deterministic(route, count)
+        elif mode == 'sampling':
+            seconds = float(data.get('seconds') or 10)
+            interval = float(data['interval_ms']) / 1000 if data.get('interval_ms') else DEFAULT_SAMPLING_INTERVAL
+            if not 0 < seconds <= MAX_SAMPLING_SECONDS or not 0.001 <= interval <= 1:
+                return jsonify({"success": False, "message": f"seconds must be in (0, {int(MAX_SAMPLING_SECONDS)}] "
+                                                            f"and interval_ms between 1 and 1000"}), 400
+            profile = profiler.start_sampling(seconds, interval, route, function)
+        else:
+            return jsonify({"success": False, "message": "mode must be deterministic or sampling"}), 400
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "message": "requests, seconds and interval_ms must be numbers"}), 400
+
+    return jsonify(dict(profile.summary(), success=True, message=f"Profiling started ({mode})"))
+
+@app.route('/api/debug/profile', methods=['GET'])
+def debug_profile_list():
+    """Active and recent profiles"""
+    denied = profile_guard()
+    if denied:
+        return denied
+    return jsonify({"success": True, "profiles": profiler.list()})
+
+@app.route('/api/debug/profile/<profile_id>', methods=['GET'])
+def debug_profile_result(profile_id):
+    """
+    Profile result: format=json (summary, time breakdown, top functions), pstats (text),
+    collapsed (flame graph stacks) or prof (binary stats for pstats/snakeviz)
+    """
+    denied = profile_guard()
+    if denied:
+        return denied
+
+    profile = profiler.get(profile_id)
+    if profile is None:
+        return jsonify({"success": False, "message": "Unknown profile"}), 404
+
+    output_format = request.args.get('format', 'json')
+    if output_format == 'pstats':
+        return Response(profile.pstats_text(request.args.get('sort', 'cumulative')), mimetype='text/plain')
+    if output_format == 'collapsed':
+        return Response(profile.collapsed(), mimetype='text/plain')
+    if output_format == 'prof':
+        return Response(profile.prof_bytes(), mimetype='application/octet-stream',
+                        headers={"Content-Disposition": f"attachment; filename=profile-{profile_id[:8]}.prof"})
+    if output_format != 'json':
+        return jsonify({"success": False, "message": "format must be json, pstats, collapsed or prof"}), 400
+
+    return jsonify(dict(
+        profile.summary(),
+        success=True,
+        message=f"Profile is {'done' if profile.done else 'running'}",
+        breakdown=profile.breakdown(),
+        top=profile.top()
+    ))
+
 @app.route('/api/cleanup', methods=['POST'])
 def cleanup_all_sessions():
     """Cleanup all sessions - useful for debugging and resetting"""
@@ -1515,7 +3996,7 @@ def cleanup_all_sessions():
             del sessions[session_id]
             count += 1
         except Exception as e:
-            print(f"Error cleaning up session {session_id}: {e}")
+            logger.error(f"Error cleaning up session: {e}", extra={'session_id': session_id})
 
     return jsonify({
         "success": True,
@@ -1524,7 +4005,7 @@ def cleanup_all_sessions():
     })
 
 if __name__ == '__main__':
-    print("Starting IBM Mainframe API Server with s3270...")
+    logger.info("Starting IBM Mainframe API Server with s3270...")
 
     # Find s3270 executable
     s3270_paths = [
@@ -1534,8 +4015,11 @@ if __name__ == '__main__':
         "/usr/local/bin/s3270"
     ]
     s3270_path = next((path for path in s3270_paths if os.path.exists(path)), "s3270 (in PATH)")
-    print(f"s3270 path: {s3270_path}")
-    print("Session auto-cleanup: Enabled (runs on every new connection)")
+    logger.info(f"s3270 path: {s3270_path}")
+    logger.info("Session auto-cleanup: Enabled (runs on every new connection)")
+
+    # Resume draining work queued before the last shutdown
+    work_pool.start()
 
     # Run Flask app
     app.run(host='0.0.0.0', port=5001, debug=True)
\ No newline at end of file
@@ -0,0 +1,154 @@
+"""
+Dataset Catalog Cache
+Per-host cache of dataset existence, attributes and member lists, filled from
+LISTCAT LEVEL listings and LISTDS output. Entries expire by TTL and are
+invalidated by transfers, submits and deletes made through the backend.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+# Seconds a dataset entry or level listing stays fresh
+CATALOG_TTL = 300.0
+
+# Seconds a "not found" answer stays fresh (datasets appear more often than they vanish)
+CATALOG_MISSING_TTL = 30.0
+
+# Upper bound on cached dataset entries (least recently stored evicted first)
+CATALOG_CACHE_SIZE = 5000
+
+
+def split_member(name: str) -> Tuple[str, Optional[str]]:
+    """'A.B(MEM)' -> ('A.B', 'MEM'); 'A.B' -> ('A.B', None)"""
+    name = name.strip().strip("'").upper()
+    if name.endswith(')') and '(' in name:
+        dataset, member = name[:-1].split('(', 1)
+        return dataset, member
+    return name, None
+
+
+class DatasetCatalogCache:
+    """
+    Dataset entries keyed by (host, dataset name) plus LISTCAT level listings keyed by
+    (host, level). A fresh listing answers "does X exist" for every name under its level.
+    """
+
+    def __init__(self, ttl_seconds: float = CATALOG_TTL, missing_ttl_seconds: float = CATALOG_MISSING_TTL,
+                 max_entries: int = CATALOG_CACHE_SIZE):
+        self.ttl_seconds = ttl_seconds
+        self.missing_ttl_seconds = missing_ttl_seconds
+        self.max_entries = max_entries
+        self._datasets: "OrderedDict[Hashable, Tuple[Dict, float]]" = OrderedDict()
+        self._levels: Dict[Hashable, Tuple[frozenset, float]] = {}
+        # Bumped on every invalidation of a host; results derived from host datasets key on it
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _fresh_dataset(self, host: str, dataset: str) -> Optional[Dict]:
+        """Fresh entry for a dataset (caller holds the lock)"""
+        cached = self._datasets.get((host, dataset))
+        if cached is None:
+            return None
+        entry, stored_at = cached
+        ttl = self.ttl_seconds if entry.get("exists") else self.missing_ttl_seconds
+        return entry if time.time() - stored_at < ttl else None
+
+    def _listed(self, host: str, dataset: str) -> Optional[bool]:
+        """Existence according to a fresh level listing covering the dataset, else None"""
+        now = time.time()
+        for (listed_host, level), (names, stored_at) in self._levels.items():
+            if listed_host == host and now - stored_at < self.ttl_seconds and dataset.startswith(level + '.'):
+                return dataset in names
+        return None
+
+    def lookup(self, host: str, name: str, need_attributes: bool = False, need_members: bool = False) -> Optional[Dict]:
+        """
+        Cached answer for a dataset or member, or None when the host must be asked.
+        The answer has "exists" and, when known, "attributes" and "members".
+        """
+        dataset, member = split_member(name)
+        need_members = need_members or member is not None
+        with self._lock:
+            entry = self._fresh_dataset(host, dataset)
+            if entry is None:
+                listed = self._listed(host, dataset)
+                if listed is not None and (not listed or not (need_attributes or need_members)):
+                    entry = {"dataset": dataset, "exists": listed, "attributes": None, "members": None}
+
+            usable = entry is not None and (
+                not entry["exists"]
+                or ((not need_attributes or entry.get("attributes") is not None)
+                    and (not need_members or entry.get("members") is not None))
+            )
+            if not usable:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        answer = dict(entry, name=name.strip().strip("'").upper())
+        if member is not None:
+            answer["member"] = member
+            answer["exists"] = bool(entry["exists"]) and member in (entry.get("members") or [])
+        return answer
+
+    def store(self, host: str, dataset: str, exists: bool, attributes: Optional[Dict] = None,
+              members: Optional[List[str]] = None):
+        """Record what the host said about one dataset"""
+        dataset = split_member(dataset)[0]
+        entry = {"dataset": dataset, "exists": exists, "attributes": attributes if exists else None,
+                 "members": sorted(members) if exists and members is not None else None}
+        with self._lock:
+            previous = self._fresh_dataset(host, dataset)
+            # Keep a member list learned earlier if this answer did not ask for one
+            if previous and exists and entry["members"] is None:
+                entry["members"] = previous.get("members")
+            self._datasets[(host, dataset)] = (entry, time.time())
+            self._datasets.move_to_end((host, dataset))
+            while len(self._datasets) > self.max_entries:
+                self._datasets.popitem(last=False)
+
+    def store_level(self, host: str, level: str, names: Iterable[str]):
+        """Record a complete LISTCAT LEVEL listing"""
+        level = level.strip().strip("'").upper()
+        with self._lock:
+            self._levels[(host, level)] = (frozenset(name.upper() for name in names), time.time())
+
+    def invalidate(self, host: str, names: Iterable[str]):
+        """Forget datasets (and the level listings that cover them) after a change on the host"""
+        datasets = {split_member(name)[0] for name in names}
+        if not datasets:
+            return
+        with self._lock:
+            self._generations[host] = self._generations.get(host, 0) + 1
+            for dataset in datasets:
+                self._datasets.pop((host, dataset), None)
+            for key in [key for key in self._levels
+                        if key[0] == host and any(dataset.startswith(key[1] + '.') for dataset in datasets)]:
+                del self._levels[key]
+
+    def invalidate_host(self, host: str):
+        """Forget everything about a host (e.g. after a job that may create or delete anything)"""
+        with self._lock:
+            self._generations[host] = self._generations.get(host, 0) + 1
+            for key in [key for key in self._datasets if key[0] == host]:
+                del self._datasets[key]
+            for key in [key for key in self._levels if key[0] == host]:
+                del self._levels[key]
+
+    def generation(self, host: str) -> int:
+        """Counter of changes made to the host's datasets through this backend"""
+        with self._lock:
+            return self._generations.get(host, 0)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "datasets": len(self._datasets),
+                "levels": len(self._levels),
+                "hits": self.hits,
+                "misses": self.misses
+            }
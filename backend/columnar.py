@@ -0,0 +1,389 @@
+"""
+Columnar Record Decoding
+Memory-maps fixed-length record files and decodes them column by column with
+NumPy, yielding batches of typed columns instead of per-record dicts
+"""
+
+import mmap
+import os
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from copybook import CopybookField, RecordLayout, detect_framing, field_decoder, record_stride
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:  # pragma: no cover - the struct decoder in copybook.py is used instead
+    np = None
+    NUMPY_AVAILABLE = False
+
+# Records per yielded batch
+DEFAULT_BATCH_RECORDS = 65536
+
+# Widest integer column decoded in bulk (int64 holds 18 decimal digits)
+MAX_VECTOR_DIGITS = 18
+
+_digit_tables: Dict[str, Tuple] = {}
+_codepoint_tables: Dict[str, Optional[object]] = {}
+
+
+def _tables(encoding: str):
+    """Byte -> digit / overpunch / sign / blank lookup tables for an encoding"""
+    tables = _digit_tables.get(encoding)
+    if tables is not None:
+        return tables
+
+    digit = np.full(256, -1, dtype=np.int8)
+    last_digit = np.full(256, -1, dtype=np.int8)
+    last_negative = np.zeros(256, dtype=bool)
+    sign = np.zeros(256, dtype=np.int8)
+    blank = np.zeros(256, dtype=bool)
+
+    for byte in range(256):
+        char = bytes([byte]).decode(encoding, errors='replace')
+        if char in '0123456789':
+            digit[byte] = last_digit[byte] = int(char)
+        elif char in '{ABCDEFGHI':
+            last_digit[byte] = '{ABCDEFGHI'.index(char)
+        elif char in '}JKLMNOPQR':
+            last_digit[byte] = '}JKLMNOPQR'.index(char)
+            last_negative[byte] = True
+        elif char == '+':
+            sign[byte] = 1
+        elif char == '-':
+            sign[byte] = -1
+        if char == ' ' or byte == 0:
+            blank[byte] = True
+
+    tables = (digit, last_digit, last_negative, sign, blank)
+    _digit_tables[encoding] = tables
+    return tables
+
+
+class ColumnBatch:
+    """
+    A batch of decoded records stored as columns.
+    Numeric columns are int64 (float64 when the PIC has implied decimals);
+    `nulls` marks blank values and `invalid` marks values that could not be decoded.
+    """
+
+    def __init__(self, start: int, count: int, columns: Dict, nulls: Dict, invalid: Dict):
+        self.start = start
+        self.count = count
+        self.columns = columns
+        self.nulls = nulls
+        self.invalid = invalid
+
+    def row(self, index: int) -> Dict[str, object]:
+        """One record of the batch as a dict (blank or invalid values become None)"""
+        return {
+            name: None if self.nulls[name][index] or self.invalid[name][index] else values[index].item()
+            for name, values in self.columns.items()
+        }
+
+    def rows(self) -> Iterator[Dict[str, object]]:
+        """Records of the batch as dicts (blank or invalid values become None)"""
+        names = list(self.columns)
+        missing = {name: self.nulls[name] | self.invalid[name] for name in names}
+        for index in range(self.count):
+            yield {
+                name: None if missing[name][index] else self.columns[name][index].item()
+                for name in names
+            }
+
+
+def _codepoints(encoding: str):
+    """Byte -> Unicode code point table for single-byte encodings (None for multi-byte ones)"""
+    if encoding not in _codepoint_tables:
+        try:
+            chars = bytes(range(256)).decode(encoding)
+        except UnicodeDecodeError:
+            chars = ''
+        _codepoint_tables[encoding] = (
+            np.array([ord(char) for char in chars], dtype=np.uint32) if len(chars) == 256 else None
+        )
+    return _codepoint_tables[encoding]
+
+
+def _text_column(block, field: CopybookField, encoding: str, trim: bool):
+    column = block[:, field.offset:field.end]
+    table = _codepoints(encoding)
+
+    if table is None:
+        raw = np.ascontiguousarray(column).view(f'S{field.length}')[:, 0]
+        values = np.char.decode(raw, encoding, errors='replace')
+        if trim:
+            values = np.char.strip(values)
+        return values, values == '', np.zeros(len(values), dtype=bool)
+
+    # Translate to code points and view the rows as fixed-width unicode strings;
+    # trailing blanks become NULs, which numpy drops from 'U' values
+    codepoints = table[column]
+    if trim:
+        blanks = codepoints == 32
+        codepoints[np.logical_and.accumulate(blanks[:, ::-1], axis=1)[:, ::-1]] = 0
+    values = codepoints.view(f'U{field.length}')[:, 0]
+    if trim:
+        leading = np.flatnonzero(blanks[:, 0] & (codepoints[:, 0] != 0))
+        if len(leading):
+            values[leading] = np.char.lstrip(values[leading])
+    return values, values == '', np.zeros(len(values), dtype=bool)
+
+
+def _digits_to_int(digits):
+    powers = 10 ** np.arange(digits.shape[1] - 1, -1, -1, dtype=np.int64)
+    return (digits.astype(np.int64) * powers).sum(axis=1)
+
+
+def _zoned_column(block, field: CopybookField, encoding: str):
+    digit, last_digit, last_negative, sign, blank = _tables(encoding)
+    column = block[:, field.offset:field.end]
+
+    negative = np.zeros(len(column), dtype=bool)
+    body = column
+    if field.sign_separate == 'leading':
+        negative = sign[column[:, 0]] < 0
+        body = column[:, 1:]
+    elif field.sign_separate == 'trailing':
+        negative = sign[column[:, -1]] < 0
+        body = column[:, :-1]
+
+    digits = digit[body]
+    if field.signed and not field.sign_separate:
+        digits[:, -1] = last_digit[body[:, -1]]
+        negative = last_negative[body[:, -1]]
+
+    blanks = blank[body]
+    nulls = blanks.all(axis=1)
+    # Leading blanks are treated as zeros ("   42" is 42)
+    leading = np.logical_and.accumulate(blanks, axis=1)
+    digits[leading] = 0
+
+    valid = (digits >= 0).all(axis=1)
+    values = _digits_to_int(np.where(digits >= 0, digits, 0))
+    values = np.where(negative, -values, values)
+    return values, nulls, ~valid & ~nulls
+
+
+def _packed_column(block, field: CopybookField):
+    column = block[:, field.offset:field.end]
+    high = column >> 4
+    low = column & 0x0F
+
+    digits = np.empty((len(column), field.length * 2 - 1), dtype=np.uint8)
+    digits[:, 0::2] = high
+    digits[:, 1::2] = low[:, :-1]
+    sign = low[:, -1]
+
+    nulls = np.isin(column, (0x00, 0x40, 0x20)).all(axis=1)
+    valid = (digits <= 9).all(axis=1) & (sign >= 0x0A)
+    values = _digits_to_int(np.where(digits <= 9, digits, 0))
+    values = np.where((sign == 0x0D) | (sign == 0x0B), -values, values)
+    return values, nulls, ~valid & ~nulls
+
+
+def _binary_column(block, field: CopybookField):
+    dtype = np.dtype(f">{'i' if field.signed else 'u'}{field.length}")
+    values = np.ascontiguousarray(block[:, field.offset:field.end]).view(dtype)[:, 0]
+    empty = np.zeros(len(values), dtype=bool)
+    return values.astype(np.int64 if field.signed or field.length < 8 else np.uint64), empty, empty
+
+
+def _scalar_column(block, field: CopybookField, encoding: str, rows: Optional[List[int]] = None):
+    """Decode a column (or selected rows of it) one value at a time"""
+    decode = field_decoder(field, encoding)
+    indexes = range(len(block)) if rows is None else rows
+    return [decode(bytes(block[index, field.offset:field.end])) for index in indexes]
+
+
+def _numeric_column(block, field: CopybookField, encoding: str):
+    if field.kind == 'binary':
+        values, nulls, invalid = _binary_column(block, field)
+    elif field.kind == 'float' or field.digits > MAX_VECTOR_DIGITS:
+        decoded = _scalar_column(block, field, encoding)
+        nulls = np.array([value is None for value in decoded], dtype=bool)
+        invalid = np.array([isinstance(value, str) for value in decoded], dtype=bool)
+        values = np.array([float(value) if value is not None and not isinstance(value, str) else 0.0
+                           for value in decoded], dtype=np.float64)
+        return values, nulls, invalid
+    elif field.kind == 'packed':
+        values, nulls, invalid = _packed_column(block, field)
+    else:
+        values, nulls, invalid = _zoned_column(block, field, encoding)
+
+        # Rare layouts the vector path rejects (e.g. left-justified digits) get a scalar second look
+        retry = np.flatnonzero(invalid)
+        if len(retry):
+            for index, value in zip(retry, _scalar_column(block, field, encoding, retry.tolist())):
+                if isinstance(value, int) or (value is not None and not isinstance(value, str)):
+                    values[index] = int(value.scaleb(field.scale)) if field.scale else value
+                    invalid[index] = False
+
+    if field.scale:
+        values = values / float(10 ** field.scale)
+    return values, nulls, invalid
+
+
+def decode_block(block, layout: RecordLayout, start: int, encoding: str = 'latin-1',
+                 fields: Optional[List[CopybookField]] = None, trim: bool = True) -> ColumnBatch:
+    """Decode a 2-D uint8 block (one row per record) into a ColumnBatch"""
+    columns: Dict = {}
+    nulls: Dict = {}
+    invalid: Dict = {}
+
+    for field in fields if fields is not None else layout.data_fields:
+        if field.is_numeric:
+            values, field_nulls, field_invalid = _numeric_column(block, field, encoding)
+        else:
+            values, field_nulls, field_invalid = _text_column(block, field, encoding, trim)
+        columns[field.name] = values
+        nulls[field.name] = field_nulls
+        invalid[field.name] = field_invalid
+
+    return ColumnBatch(start, len(block), columns, nulls, invalid)
+
+
+@contextmanager
+def mapped_file(path: str):
+    """Read-only memory map of a file (an empty bytes object for empty files)"""
+    if os.path.getsize(path) == 0:
+        yield b''
+        return
+    with open(path, 'rb') as data_file:
+        mapped = mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield mapped
+        finally:
+            mapped.close()
+
+
+def _pad(record, record_length: int, pad_byte: int):
+    row = np.full(record_length, pad_byte, dtype=np.uint8)
+    row[:min(len(record), record_length)] = np.frombuffer(record, dtype=np.uint8)[:record_length]
+    return row
+
+
+def iter_blocks(data, layout: RecordLayout, batch_records: int = DEFAULT_BATCH_RECORDS,
+                framing: str = 'auto', pad_byte: int = 0x20) -> Iterator[Tuple[int, object]]:
+    """
+    Yield (first_record_index, uint8 block) pairs. Evenly strided data is viewed in
+    place as an (n, stride) array; irregular line lengths are copied into padded blocks.
+    """
+    view = memoryview(data)
+    if framing == 'auto':
+        framing = detect_framing(view, layout.record_length)
+
+    stride = record_stride(view, layout.record_length, framing)
+    if stride:
+        count = len(view) // stride
+        matrix = np.frombuffer(data, dtype=np.uint8, count=count * stride).reshape(count, stride)
+        for start in range(0, count, batch_records):
+            yield start, matrix[start:start + batch_records]
+
+        tail = bytes(view[count * stride:]).rstrip(b'\r\n')
+        if tail.strip():
+            yield count, _pad(tail, max(stride, layout.record_length), pad_byte).reshape(1, -1)
+        return
+
+    block = np.full((batch_records, layout.record_length), pad_byte, dtype=np.uint8)
+    filled = 0
+    start = 0
+    for record in layout.iter_records(view, framing):
+        row = np.frombuffer(record, dtype=np.uint8)[:layout.record_length]
+        block[filled, :len(row)] = row
+        block[filled, len(row):] = pad_byte
+        filled += 1
+        if filled == batch_records:
+            yield start, block.copy()
+            start += filled
+            filled = 0
+    if filled:
+        yield start, block[:filled].copy()
+
+
+def iter_column_batches(path: str, layout: RecordLayout, batch_records: int = DEFAULT_BATCH_RECORDS,
+                        encoding: str = 'latin-1', framing: str = 'auto',
+                        field_names: Optional[List[str]] = None, trim: bool = True) -> Iterator[ColumnBatch]:
+    """Memory-map a record file and yield decoded column batches"""
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError("numpy is required for columnar decoding")
+
+    fields = None
+    if field_names:
+        fields = []
+        for name in field_names:
+            field = layout.find_field(name)
+            if field is None:
+                raise KeyError(f"Field not found in copybook: {name}")
+            fields.append(field)
+
+    pad_byte = ' '.encode(encoding)[0]
+    with mapped_file(path) as data:
+        blocks = iter_blocks(data, layout, batch_records, framing, pad_byte)
+        try:
+            for start, block in blocks:
+                batch = decode_block(block, layout, start, encoding, fields, trim)
+                del block
+                yield batch
+        finally:
+            # Release the views on the map before it is closed
+            blocks.close()
+
+
+def scan_file(path: str, layout: RecordLayout, encoding: str = 'latin-1', framing: str = 'auto',
+              batch_records: int = DEFAULT_BATCH_RECORDS, sample_records: int = 5) -> Dict:
+    """Decode a whole file and summarize each column (nulls, invalid values, numeric range)"""
+    summary = {
+        field.name: {"name": field.name, "display_name": field.display_name, "kind": field.kind,
+                     "nulls": 0, "invalid": 0, "min": None, "max": None}
+        for field in layout.data_fields
+    }
+    sample: List[Dict[str, object]] = []
+    records = 0
+    batches = 0
+
+    def widen(stats: Dict, low, high):
+        stats["min"] = low if stats["min"] is None else min(stats["min"], low)
+        stats["max"] = high if stats["max"] is None else max(stats["max"], high)
+
+    if NUMPY_AVAILABLE:
+        for batch in iter_column_batches(path, layout, batch_records, encoding, framing):
+            batches += 1
+            records += batch.count
+            if len(sample) < sample_records:
+                for row in batch.rows():
+                    if len(sample) >= sample_records:
+                        break
+                    sample.append(row)
+            for field in layout.data_fields:
+                stats = summary[field.name]
+                nulls, invalid = batch.nulls[field.name], batch.invalid[field.name]
+                stats["nulls"] += int(nulls.sum())
+                stats["invalid"] += int(invalid.sum())
+                present = batch.columns[field.name][~(nulls | invalid)]
+                if field.is_numeric and len(present):
+                    widen(stats, present.min().item(), present.max().item())
+    else:
+        with mapped_file(path) as data:
+            for row in layout.iter_decode(memoryview(data), encoding, framing):
+                records += 1
+                if len(sample) < sample_records:
+                    sample.append(row)
+                for field in layout.data_fields:
+                    stats, value = summary[field.name], row.get(field.name)
+                    if value is None or value == '':
+                        stats["nulls"] += 1
+                    elif field.is_numeric and isinstance(value, str):
+                        stats["invalid"] += 1
+                    elif field.is_numeric:
+                        widen(stats, float(value) if field.scale else value, float(value) if field.scale else value)
+        batches = 1 if records else 0
+
+    return {
+        "engine": "numpy" if NUMPY_AVAILABLE else "struct",
+        "record_count": records,
+        "batches": batches,
+        "fields": list(summary.values()),
+        "sample": sample
+    }
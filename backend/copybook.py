@@ -0,0 +1,722 @@
+"""
+COBOL Copybook Engine
+Compiles a copybook once into a cached record layout and decodes fixed-length
+records in bulk (DISPLAY, zoned, COMP-3 packed, COMP binary, OCCURS, REDEFINES)
+"""
+
+import hashlib
+import os
+import re
+import struct
+import threading
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+# Number of compiled layouts kept in memory
+LAYOUT_CACHE_SIZE = 64
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+# Trailing overpunch characters for signed zoned decimal (ASCII view of the last byte)
+_OVERPUNCH_POSITIVE = {ch: str(digit) for digit, ch in enumerate('{ABCDEFGHI')}
+_OVERPUNCH_NEGATIVE = {ch: str(digit) for digit, ch in enumerate('}JKLMNOPQR')}
+
+# struct codes for binary (COMP/COMP-4/COMP-5/BINARY) storage sizes
+_BINARY_CODES = {(2, True): 'h', (2, False): 'H', (4, True): 'i', (4, False): 'I', (8, True): 'q', (8, False): 'Q'}
+
+_BINARY_USAGES = {'COMP', 'COMP-4', 'COMP-5', 'BINARY', 'COMPUTATIONAL', 'COMPUTATIONAL-4', 'COMPUTATIONAL-5'}
+_PACKED_USAGES = {'COMP-3', 'PACKED-DECIMAL', 'COMPUTATIONAL-3'}
+_FLOAT_USAGES = {'COMP-1': 4, 'COMP-2': 8, 'COMPUTATIONAL-1': 4, 'COMPUTATIONAL-2': 8}
+_USAGE_WORDS = _BINARY_USAGES | _PACKED_USAGES | set(_FLOAT_USAGES) | {'DISPLAY'}
+
+_STATEMENT_END = re.compile(r'\.(?=\s|$)')
+_PIC_REPEAT = re.compile(r'(.)\((\d+)\)')
+
+
+class CopybookError(ValueError):
+    """Raised when a copybook cannot be parsed or compiled"""
+
+
+def display_name(raw_name: str) -> str:
+    """
+    Readable field name, matching the frontend copybook parser:
+    I-POLICY-ID -> Policy Id
+    """
+    if raw_name == 'FILLER':
+        return raw_name
+    name = re.sub(r'^I-', '', raw_name)
+    return ' '.join(word[:1] + word[1:].lower() for word in name.split('-'))
+
+
+class CopybookField:
+    """An elementary item of a compiled record layout"""
+
+    def __init__(
+        self,
+        name: str,
+        level: int,
+        offset: int,
+        length: int,
+        kind: str,
+        usage: str,
+        digits: int = 0,
+        scale: int = 0,
+        signed: bool = False,
+        sign_separate: Optional[str] = None,
+        redefined: bool = False,
+        path: str = ''
+    ):
+        self.name = name
+        self.level = level
+        self.offset = offset
+        self.length = length
+        # 'alphanumeric', 'edited', 'zoned', 'packed', 'binary' or 'float'
+        self.kind = kind
+        self.usage = usage
+        self.digits = digits
+        self.scale = scale
+        self.signed = signed
+        # 'leading' or 'trailing' when the sign occupies its own byte
+        self.sign_separate = sign_separate
+        # True when the field lives under a REDEFINES (alternate view of the bytes)
+        self.redefined = redefined
+        self.path = path
+        self.display_name = display_name(name.split('(')[0]) + name[len(name.split('(')[0]):]
+
+    @property
+    def end(self) -> int:
+        return self.offset + self.length
+
+    @property
+    def is_filler(self) -> bool:
+        return self.name.startswith('FILLER')
+
+    @property
+    def is_numeric(self) -> bool:
+        return self.kind in ('zoned', 'packed', 'binary', 'float')
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "display_name": self.display_name,
+            "path": self.path,
+            "level": self.level,
+            "offset": self.offset,
+            "length": self.length,
+            "kind": self.kind,
+            "usage": self.usage,
+            "digits": self.digits,
+            "scale": self.scale,
+            "signed": self.signed,
+            "sign_separate": self.sign_separate,
+            "redefined": self.redefined
+        }
+
+
+class _Item:
+    """Parsed copybook entry (group or elementary) before layout"""
+
+    def __init__(self, level: int, name: str, line: int):
+        self.level = level
+        self.name = name
+        self.line = line
+        self.pic: Optional[str] = None
+        self.usage: Optional[str] = None
+        self.occurs = 1
+        self.redefines: Optional[str] = None
+        self.sign: Optional[str] = None
+        self.sign_separate = False
+        self.children: List['_Item'] = []
+
+
+def _strip_source(text: str) -> List[Tuple[int, str]]:
+    """Remove comments and sequence areas; return (line_number, code) pairs"""
+    lines = []
+    for number, line in enumerate(text.splitlines(), start=1):
+        # Fixed-format sequence area (columns 1-6) and identification area (73-80)
+        if len(line) > 6 and line[:6].strip().isdigit() and line[6] in ' *-/':
+            if line[6] in '*/':
+                continue
+            line = line[7:72]
+        code = line.split('*>', 1)[0]
+        if code.strip().startswith('*'):
+            continue
+        if code.strip():
+            lines.append((number, code))
+    return lines
+
+
+def _parse_statements(text: str) -> List[Tuple[int, List[str]]]:
+    """Split the copybook into period-terminated statements of tokens"""
+    statements: List[Tuple[int, List[str]]] = []
+    pending: List[str] = []
+    start_line = 0
+
+    for number, code in _strip_source(text):
+        parts = _STATEMENT_END.split(code)
+        for index, part in enumerate(parts):
+            tokens = part.split()
+            if tokens and not pending:
+                start_line = number
+            pending.extend(tokens)
+            if index < len(parts) - 1 and pending:
+                statements.append((start_line, pending))
+                pending = []
+
+    if pending:
+        statements.append((start_line, pending))
+    return statements
+
+
+def _parse_item(line: int, tokens: List[str]) -> Optional[_Item]:
+    """Parse one statement into an _Item (None for 66/88 levels)"""
+    if not tokens[0].isdigit():
+        raise CopybookError(f"Line {line}: expected a level number, got '{tokens[0]}'")
+
+    level = int(tokens[0])
+    if level in (66, 88):
+        return None
+
+    index = 1
+    name = 'FILLER'
+    if index < len(tokens) and tokens[index].upper() not in ('PIC', 'PICTURE', 'REDEFINES', 'OCCURS', 'USAGE') \
+            and tokens[index].upper() not in _USAGE_WORDS:
+        name = tokens[index].upper()
+        index += 1
+
+    item = _Item(level, name, line)
+    upper = [token.upper() for token in tokens]
+
+    while index < len(tokens):
+        word = upper[index]
+        if word in ('PIC', 'PICTURE'):
+            index += 1
+            if index < len(tokens) and upper[index] == 'IS':
+                index += 1
+            if index >= len(tokens):
+                raise CopybookError(f"Line {line}: PIC clause without a picture string")
+            item.pic = upper[index]
+        elif word == 'USAGE':
+            if index + 1 < len(tokens) and upper[index + 1] == 'IS':
+                index += 1
+            index += 1
+            if index < len(tokens):
+                item.usage = upper[index]
+        elif word in _USAGE_WORDS:
+            item.usage = word
+        elif word == 'REDEFINES':
+            index += 1
+            if index >= len(tokens):
+                raise CopybookError(f"Line {line}: REDEFINES without a target")
+            item.redefines = upper[index]
+        elif word == 'OCCURS':
+            index += 1
+            if index >= len(tokens) or not tokens[index].isdigit():
+                raise CopybookError(f"Line {line}: OCCURS without a count")
+            item.occurs = int(tokens[index])
+            # OCCURS n TO m DEPENDING ON: lay out the maximum
+            if index + 2 < len(tokens) and upper[index + 1] == 'TO' and tokens[index + 2].isdigit():
+                index += 2
+                item.occurs = int(tokens[index])
+        elif word == 'SIGN':
+            item.sign = 'trailing'
+        elif word in ('LEADING', 'TRAILING') and index > 0 and upper[index - 1] in ('SIGN', 'IS'):
+            item.sign = word.lower()
+        elif word == 'SEPARATE':
+            item.sign_separate = True
+        elif word == 'VALUE' or word == 'VALUES':
+            break
+        index += 1
+
+    if item.sign_separate and item.sign is None:
+        item.sign = 'trailing'
+    return item
+
+
+def _build_tree(statements: List[Tuple[int, List[str]]]) -> List[_Item]:
+    """Nest items by level number; returns the top-level records"""
+    roots: List[_Item] = []
+    stack: List[_Item] = []
+
+    for line, tokens in statements:
+        item = _parse_item(line, tokens)
+        if item is None:
+            continue
+        while stack and stack[-1].level >= item.level:
+            stack.pop()
+        if stack:
+            if stack[-1].pic is not None:
+                raise CopybookError(f"Line {item.line}: elementary item {stack[-1].name} cannot have subordinate items")
+            stack[-1].children.append(item)
+        else:
+            roots.append(item)
+        stack.append(item)
+
+    if not roots:
+        raise CopybookError("No valid field definitions found in copybook. Please check the copybook format.")
+    return roots
+
+
+def _analyze_picture(item: _Item, usage: str) -> Dict:
+    """Work out kind, storage length, digits, scale and sign of an elementary item"""
+    pic = item.pic or ''
+    expanded = _PIC_REPEAT.sub(lambda match: match.group(1) * int(match.group(2)), pic)
+
+    sign_separate = item.sign if item.sign_separate else None
+    leading_sign = expanded[:1] in ('+', '-') and set(expanded[1:]) <= set('9V')
+    if leading_sign:
+        sign_separate = 'leading'
+        expanded = expanded[1:]
+    elif expanded[-1:] in ('+', '-') and set(expanded[:-1]) <= set('9V'):
+        sign_separate = 'trailing'
+        expanded = expanded[:-1]
+
+    signed = expanded.startswith('S') or sign_separate is not None
+    body = expanded.lstrip('S')
+
+    if usage in _FLOAT_USAGES:
+        return {"kind": "float", "length": _FLOAT_USAGES[usage], "digits": 0, "scale": 0, "signed": True, "sign_separate": None}
+
+    if not body:
+        raise CopybookError(f"Line {item.line}: PIC clause missing for {item.name}")
+
+    if set(body) <= set('9VP'):
+        integer_part, _, fraction = body.partition('V')
+        digits = integer_part.count('9') + fraction.count('9')
+        scale = fraction.count('9')
+        if usage in _PACKED_USAGES:
+            return {"kind": "packed", "length": digits // 2 + 1, "digits": digits, "scale": scale,
+                    "signed": signed, "sign_separate": None}
+        if usage in _BINARY_USAGES:
+            length = 2 if digits <= 4 else 4 if digits <= 9 else 8
+            return {"kind": "binary", "length": length, "digits": digits, "scale": scale,
+                    "signed": signed, "sign_separate": None}
+        return {"kind": "zoned", "length": digits + (1 if sign_separate else 0), "digits": digits,
+                "scale": scale, "signed": signed, "sign_separate": sign_separate}
+
+    if set(body) <= set('XA9'):
+        return {"kind": "alphanumeric", "length": len(body), "digits": 0, "scale": 0, "signed": False, "sign_separate": None}
+
+    # Numeric-edited or otherwise formatted pictures are kept as text
+    edited = body.replace('CR', 'cr').replace('DB', 'db')
+    return {"kind": "edited", "length": len(edited.replace('V', '')), "digits": 0, "scale": 0,
+            "signed": False, "sign_separate": None}
+
+
+class RecordLayout:
+    """
+    Compiled record layout: flattened elementary fields with byte offsets, plus a
+    struct-based bulk decoder for the primary (non-REDEFINES) fields
+    """
+
+    def __init__(self, name: str, fields: List[CopybookField], record_length: int, digest: str):
+        self.name = name
+        self.fields = fields
+        self.record_length = record_length
+        self.digest = digest
+        self.primary_fields = [field for field in fields if not field.redefined]
+        self.redefined_fields = [field for field in fields if field.redefined]
+        self.data_fields = [field for field in self.primary_fields if not field.is_filler]
+        self._decoders: Dict[Tuple[str, int, bool], Tuple[struct.Struct, List[Tuple[str, Optional[Callable]]]]] = {}
+        self._decoders_lock = threading.Lock()
+
+    def find_field(self, name: str) -> Optional[CopybookField]:
+        """Look up a field by COBOL name or display name (case-insensitive)"""
+        wanted = name.strip().upper()
+        for field in self.fields:
+            if field.name == wanted or field.display_name.upper() == wanted or field.path.upper() == wanted:
+                return field
+        return None
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "record_length": self.record_length,
+            "digest": self.digest,
+            "field_count": len(self.data_fields),
+            "fields": [field.to_dict() for field in self.fields]
+        }
+
+    def _bulk_decoder(self, encoding: str, stride: int, trim: bool):
+        """struct format covering one record (plus separator bytes) and per-field converters"""
+        key = (encoding, stride, trim)
+        with self._decoders_lock:
+            cached = self._decoders.get(key)
+            if cached:
+                return cached
+
+            format_parts = ['>']
+            converters: List[Tuple[str, Optional[Callable]]] = []
+            position = 0
+            for field in sorted(self.primary_fields, key=lambda f: f.offset):
+                if field.offset > position:
+                    format_parts.append(f'{field.offset - position}x')
+                if field.is_filler:
+                    format_parts.append(f'{field.length}x')
+                elif field.kind == 'binary' and (field.length, field.signed) in _BINARY_CODES:
+                    format_parts.append(_BINARY_CODES[(field.length, field.signed)])
+                    converters.append((field.name, _scale_converter(field.scale)))
+                else:
+                    format_parts.append(f'{field.length}s')
+                    converters.append((field.name, field_decoder(field, encoding, trim)))
+                position = field.offset + field.length
+            if stride > position:
+                format_parts.append(f'{stride - position}x')
+
+            compiled = (struct.Struct(''.join(format_parts)), converters)
+            self._decoders[key] = compiled
+            return compiled
+
+    def decode_record(self, record: Buffer, encoding: str = 'latin-1', trim: bool = True,
+                      include_redefines: bool = False) -> Dict[str, object]:
+        """Decode one record; short records are padded with spaces"""
+        record = bytes(record)
+        if len(record) < self.record_length:
+            record = record + (' '.encode(encoding) * (self.record_length - len(record)))
+        values: Dict[str, object] = {}
+        fields = self.fields if include_redefines else self.data_fields
+        for field in fields:
+            if field.is_filler:
+                continue
+            values[field.name] = field_decoder(field, encoding, trim)(record[field.offset:field.end])
+        return values
+
+    def iter_records(self, data: Buffer, framing: str = 'auto') -> Iterator[memoryview]:
+        """Yield zero-copy record slices ('fixed' = back to back, 'lines' = newline-delimited)"""
+        view = memoryview(data)
+        if framing == 'auto':
+            framing = detect_framing(view, self.record_length)
+
+        if framing == 'fixed':
+            for start in range(0, len(view) - self.record_length + 1, self.record_length):
+                yield view[start:start + self.record_length]
+            return
+
+        start = 0
+        raw = _searchable(view)
+        while start < len(raw):
+            end = raw.find(b'\n', start)
+            if end < 0:
+                end = len(raw)
+            line_end = end - 1 if end > start and raw[end - 1:end] == b'\r' else end
+            if line_end > start:
+                yield view[start:line_end]
+            start = end + 1
+
+    def iter_decode(self, data: Buffer, encoding: str = 'latin-1', framing: str = 'auto',
+                    trim: bool = True) -> Iterator[Dict[str, object]]:
+        """
+        Bulk-decode records. Evenly strided data (fixed-length or lines of equal
+        width) goes through struct.iter_unpack; anything else is decoded per record.
+        """
+        view = memoryview(data)
+        if framing == 'auto':
+            framing = detect_framing(view, self.record_length)
+
+        stride = record_stride(view, self.record_length, framing)
+        if stride:
+            decoder, converters = self._bulk_decoder(encoding, stride, trim)
+            whole = (len(view) // stride) * stride
+            for values in decoder.iter_unpack(view[:whole]):
+                yield {name: convert(value) if convert else value
+                       for (name, convert), value in zip(converters, values)}
+            tail = bytes(view[whole:]).rstrip(b'\r\n')
+            if tail.strip():
+                yield self.decode_record(tail, encoding, trim)
+            return
+
+        for record in self.iter_records(view, framing):
+            yield self.decode_record(record, encoding, trim)
+
+
+def _searchable(view: memoryview):
+    """Object supporting find() and slicing over the whole view (bytes or mmap), without copying"""
+    if len(view) == view.nbytes and hasattr(view.obj, 'find') and len(view.obj) == len(view):
+        return view.obj
+    return bytes(view)
+
+
+def detect_framing(view: memoryview, record_length: int) -> str:
+    """
+    'lines' if the data is newline-delimited, else 'fixed'.
+    A newline byte alone proves nothing (a COMP field may hold 10): records of the copybook
+    width must end in LF or CRLF at a consistent stride, and a size that is a whole number
+    of records means fixed. Only data fitting neither is judged by newlines in its first records.
+    """
+    size = len(view)
+    probe = bytes(view[:max(record_length, 1) * 2 + 2])
+    if record_length <= 0:
+        return 'lines' if b'\n' in probe else 'fixed'
+
+    raw = _searchable(view)
+    for terminator in (b'\n', b'\r\n'):
+        stride = record_length + len(terminator)
+        record_count = size // stride
+        # The last line may lack its terminator
+        if record_count == 0 or size % stride not in (0, record_length):
+            continue
+        samples = {0, record_count - 1, record_count // 2, record_count // 3}
+        if all(raw[index * stride + record_length:(index + 1) * stride] == terminator for index in samples):
+            return 'lines'
+
+    if size % record_length == 0:
+        return 'fixed'
+    return 'lines' if b'\n' in probe else 'fixed'
+
+
+def record_stride(view: memoryview, record_length: int, framing: str) -> Optional[int]:
+    """
+    Byte distance between records when every record has the same width, else None.
+    For 'lines' the first line fixes the width and a sample of later lines is checked.
+    """
+    if framing == 'fixed':
+        return record_length if record_length and len(view) >= record_length else None
+
+    raw = _searchable(view)
+    first_newline = raw.find(b'\n')
+    if first_newline < record_length:
+        return None
+
+    stride = first_newline + 1
+    total = len(raw)
+    # The last line may lack its newline; the bulk path decodes it separately
+    record_count = total // stride
+    if record_count == 0:
+        return None
+    samples = {0, record_count - 1, record_count // 2, record_count // 3}
+    for index in samples:
+        if raw[index * stride + stride - 1:index * stride + stride] != b'\n':
+            return None
+    return stride
+
+
+def _scale_converter(scale: int) -> Optional[Callable]:
+    if not scale:
+        return None
+    return lambda value: Decimal(value).scaleb(-scale)
+
+
+def _decode_packed(raw: bytes, scale: int) -> Optional[Union[int, Decimal, str]]:
+    hex_digits = raw.hex()
+    digits, sign = hex_digits[:-1], hex_digits[-1:]
+    if not digits.isdigit():
+        # Spaces or low-values in an unused packed field
+        return None if raw.strip(b'\x00 \x40') == b'' else hex_digits.upper()
+    value = int(digits)
+    if sign in ('d', 'b'):
+        value = -value
+    return Decimal(value).scaleb(-scale) if scale else value
+
+
+def _decode_zoned(text: str, field: CopybookField) -> Optional[Union[int, Decimal, str]]:
+    stripped = text.strip()
+    if not stripped:
+        return None
+
+    negative = False
+    if field.sign_separate == 'leading' and stripped[0] in '+-':
+        negative, stripped = stripped[0] == '-', stripped[1:]
+    elif field.sign_separate == 'trailing' and stripped[-1] in '+-':
+        negative, stripped = stripped[-1] == '-', stripped[:-1]
+    elif stripped[-1] in _OVERPUNCH_NEGATIVE:
+        negative, stripped = True, stripped[:-1] + _OVERPUNCH_NEGATIVE[stripped[-1]]
+    elif stripped[-1] in _OVERPUNCH_POSITIVE:
+        stripped = stripped[:-1] + _OVERPUNCH_POSITIVE[stripped[-1]]
+    elif stripped[0] in '+-':
+        negative, stripped = stripped[0] == '-', stripped[1:]
+
+    if not stripped.isdigit():
+        return text.strip()
+
+    value = -int(stripped) if negative else int(stripped)
+    return Decimal(value).scaleb(-field.scale) if field.scale else value
+
+
+def _decode_ibm_float(raw: bytes) -> Optional[float]:
+    """IBM hexadecimal floating point (COMP-1 / COMP-2)"""
+    if not any(raw):
+        return 0.0
+    first = raw[0]
+    sign = -1.0 if first & 0x80 else 1.0
+    exponent = (first & 0x7F) - 64
+    fraction = int.from_bytes(raw[1:], 'big') / float(1 << (8 * (len(raw) - 1)))
+    return sign * fraction * (16.0 ** exponent)
+
+
+def field_decoder(field: CopybookField, encoding: str = 'latin-1', trim: bool = True) -> Callable[[bytes], object]:
+    """Converter from the raw bytes of a field to a Python value"""
+    if field.kind == 'packed':
+        return lambda raw: _decode_packed(bytes(raw), field.scale)
+    if field.kind == 'binary':
+        scale = field.scale
+        signed = field.signed
+        if scale:
+            return lambda raw: Decimal(int.from_bytes(raw, 'big', signed=signed)).scaleb(-scale)
+        return lambda raw: int.from_bytes(raw, 'big', signed=signed)
+    if field.kind == 'float':
+        return lambda raw: _decode_ibm_float(bytes(raw))
+    if field.kind == 'zoned':
+        return lambda raw: _decode_zoned(bytes(raw).decode(encoding, errors='replace'), field)
+    if trim:
+        return lambda raw: bytes(raw).decode(encoding, errors='replace').strip()
+    return lambda raw: bytes(raw).decode(encoding, errors='replace')
+
+
+def _layout_items(
+    items: List[_Item],
+    offset: int,
+    inherited_usage: Optional[str],
+    redefined: bool,
+    prefix: str,
+    suffix: str,
+    fields: List[CopybookField]
+) -> int:
+    """Lay out sibling items starting at offset; returns the offset after the last one"""
+    position = offset
+    starts: Dict[str, Tuple[int, int]] = {}
+    end = offset
+
+    for item in items:
+        item_redefined = redefined
+        start = position
+        if item.redefines:
+            if item.redefines not in starts:
+                raise CopybookError(f"Line {item.line}: {item.name} REDEFINES unknown item {item.redefines}")
+            start = starts[item.redefines][0]
+            item_redefined = True
+
+        usage = item.usage or inherited_usage or 'DISPLAY'
+        size = _item_size(item, usage)
+        for occurrence in range(item.occurs):
+            occurrence_suffix = suffix
+            if item.occurs > 1:
+                occurrence_suffix = f"{suffix[:-1]},{occurrence + 1})" if suffix else f"({occurrence + 1})"
+            occurrence_start = start + occurrence * size
+            path = f"{prefix}.{item.name}" if prefix else item.name
+            if item.children:
+                _layout_items(item.children, occurrence_start, usage, item_redefined, path, occurrence_suffix, fields)
+            else:
+                info = _analyze_picture(item, usage)
+                fields.append(CopybookField(
+                    name=f"{item.name}{occurrence_suffix}",
+                    level=item.level,
+                    offset=occurrence_start,
+                    length=info["length"],
+                    kind=info["kind"],
+                    usage=usage,
+                    digits=info["digits"],
+                    scale=info["scale"],
+                    signed=info["signed"],
+                    sign_separate=info["sign_separate"],
+                    redefined=item_redefined,
+                    path=f"{path}{occurrence_suffix}"
+                ))
+
+        item_end = start + size * item.occurs
+        starts[item.name] = (start, item_end)
+        end = max(end, item_end)
+        position = end if item.redefines else item_end
+        position = max(position, end)
+
+    return end
+
+
+def _item_size(item: _Item, usage: str) -> int:
+    """Storage size of one occurrence of an item"""
+    if not item.children:
+        return _analyze_picture(item, usage)["length"]
+
+    position = 0
+    end = 0
+    starts: Dict[str, int] = {}
+    for child in item.children:
+        child_usage = child.usage or usage
+        size = _item_size(child, child_usage) * child.occurs
+        start = starts.get(child.redefines, position) if child.redefines else position
+        starts[child.name] = start
+        end = max(end, start + size)
+        position = end
+    return end
+
+
+def _unique_names(fields: List[CopybookField]):
+    """Qualify duplicate field names with their parent group"""
+    counts: Dict[str, int] = {}
+    for field in fields:
+        counts[field.name] = counts.get(field.name, 0) + 1
+    for field in fields:
+        if counts[field.name] > 1 and not field.is_filler:
+            parts = field.path.split('.')
+            field.name = '.'.join(parts[-2:]) if len(parts) > 1 else field.name
+
+
+def compile_layout(copybook_text: str) -> RecordLayout:
+    """Parse and lay out a copybook (uncached)"""
+    if not copybook_text or not copybook_text.strip():
+        raise CopybookError('Copybook content is empty or invalid')
+
+    roots = _build_tree(_parse_statements(copybook_text))
+    fields: List[CopybookField] = []
+
+    # A copybook may be a single record, a list of loose fields, or several
+    # 01 records describing alternate record types over the same bytes
+    record_length = 0
+    for index, root in enumerate(roots):
+        is_record = root.level == 1 or root.children
+        items = root.children if is_record and root.children else [root]
+        prefix = root.name if is_record and root.children else ''
+        if root.level == 1 or index == 0:
+            end = _layout_items(items, 0, root.usage, index > 0 and root.level == 1, prefix, '', fields)
+        else:
+            end = _layout_items(items, record_length, root.usage, False, prefix, '', fields)
+        record_length = max(record_length, end)
+
+    if not fields:
+        raise CopybookError("No valid field definitions found in copybook. Please check the copybook format.")
+
+    _unique_names(fields)
+    digest = hashlib.sha1(copybook_text.encode('utf-8')).hexdigest()
+    name = roots[0].name if roots[0].children else 'RECORD'
+    return RecordLayout(name, fields, record_length, digest)
+
+
+_layout_cache: "OrderedDict[str, RecordLayout]" = OrderedDict()
+_file_digests: Dict[Tuple[str, float, int], str] = {}
+_cache_lock = threading.Lock()
+
+
+def compile_copybook(copybook_text: str) -> Tuple[RecordLayout, bool]:
+    """Compile a copybook, reusing the cached layout for identical text. Returns (layout, cache_hit)."""
+    digest = hashlib.sha1(copybook_text.encode('utf-8')).hexdigest()
+    with _cache_lock:
+        layout = _layout_cache.get(digest)
+        if layout is not None:
+            _layout_cache.move_to_end(digest)
+            return layout, True
+
+    layout = compile_layout(copybook_text)
+    with _cache_lock:
+        _layout_cache[digest] = layout
+        while len(_layout_cache) > LAYOUT_CACHE_SIZE:
+            _layout_cache.popitem(last=False)
+    return layout, False
+
+
+def load_copybook(path: str) -> Tuple[RecordLayout, bool]:
+    """Compile the copybook at path; unchanged files are served from the cache without re-reading"""
+    stat = os.stat(path)
+    file_key = (os.path.abspath(path), stat.st_mtime, stat.st_size)
+    with _cache_lock:
+        digest = _file_digests.get(file_key)
+        layout = _layout_cache.get(digest) if digest else None
+        if layout is not None:
+            _layout_cache.move_to_end(digest)
+            return layout, True
+
+    with open(path, 'r', encoding='utf-8', errors='replace') as copybook_file:
+        text = copybook_file.read()
+    layout, cache_hit = compile_copybook(text)
+    with _cache_lock:
+        _file_digests[file_key] = layout.digest
+    return layout, cache_hit
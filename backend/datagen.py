@@ -0,0 +1,475 @@
+"""
+Test Data Generation
+Builds fixed-length records from a copybook and per-field value rules
+(sequences, ranges, dates, choices, distributions) and streams them to disk.
+Large files are generated in shards by a process pool; each shard is seeded
+from (seed, shard number), so a request always produces the same file no
+matter how many workers run it.
+"""
+
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from columnar import NUMPY_AVAILABLE, np
+from copybook import CopybookField, RecordLayout, compile_copybook
+
+# Records built in memory at a time inside a shard
+GENERATE_CHUNK_RECORDS = 65536
+
+# Records per shard (the unit of work and of seeding)
+GENERATE_SHARD_RECORDS = 1000000
+
+# Largest file a single request may generate
+MAX_GENERATE_RECORDS = 100000000
+
+# Worker processes used for multi-shard files
+MAX_GENERATE_WORKERS = min(8, os.cpu_count() or 1)
+
+RULE_TYPES = ('constant', 'sequence', 'range', 'choice', 'date', 'normal', 'blank')
+
+_NEWLINES = {'lines': b'\n', 'crlf': b'\r\n', 'fixed': b''}
+_DATE_TOKENS = ('YYYY', 'YY', 'MM', 'DD')
+_SEQUENCE_START = re.compile(r'^(\D*)(\d*)$')
+
+
+class DataGenError(ValueError):
+    """Raised when a value rule cannot be applied to the layout"""
+
+
+class FieldRule:
+    """A compiled value rule for one field"""
+
+    def __init__(self, field: CopybookField, kind: str, **params):
+        self.field = field
+        self.kind = kind
+        self.params = params
+
+    def describe(self) -> Dict:
+        return {"field": self.field.name, "type": self.kind,
+                **{key: value for key, value in self.params.items() if not key.startswith('_')}}
+
+    def values(self, rng, first: int, count: int):
+        """
+        Values for records first..first+count-1: scaled int64 for numeric fields,
+        float64 for COMP-1/COMP-2, uint8 byte matrices for alphanumeric fields
+        """
+        field = self.field
+        params = self.params
+
+        if self.kind == 'sequence':
+            numbers = params['start'] + params['step'] * np.arange(first, first + count, dtype=np.int64)
+            return self._numbers(numbers, count)
+        if self.kind == 'range':
+            if field.kind == 'float':
+                return rng.uniform(float(params['min']), float(params['max']), size=count)
+            numbers = rng.integers(params['_low'], params['_high'], size=count, endpoint=True)
+            return self._numbers(numbers, count, scaled=True)
+        if self.kind == 'normal':
+            numbers = rng.normal(params['mean'], params['stddev'], size=count)
+            if params.get('min') is not None or params.get('max') is not None:
+                numbers = np.clip(numbers, params.get('min'), params.get('max'))
+            if field.kind == 'float':
+                return numbers
+            return self._numbers(np.rint(numbers * 10 ** field.scale).astype(np.int64), count, scaled=True)
+        if self.kind == 'choice':
+            picks = rng.choice(len(params['_encoded']), size=count, p=params.get('_weights'))
+            return params['_encoded'][picks]
+        if self.kind == 'date':
+            days = rng.integers(params['_low'], params['_high'], size=count, endpoint=True)
+            return _format_dates(days, params['format'], field, count)
+        if self.kind == 'blank':
+            return np.full((count, field.length), 0x20, dtype=np.uint8)
+        return np.broadcast_to(params['_encoded'], (count,) + params['_encoded'].shape[1:])
+
+    def check_records(self, records: int):
+        """Raise if a sequence would run past the digits its field holds (it would wrap and repeat keys)"""
+        if self.kind != 'sequence' or records <= 0:
+            return
+        field, params = self.field, self.params
+        ends = (params['start'], params['start'] + params['step'] * (records - 1))
+        if field.is_numeric and field.kind != 'float' and field.digits:
+            limit = 10 ** (field.digits - field.scale) - 1
+            lowest = -limit if field.signed else 0
+        elif not field.is_numeric:
+            limit, lowest = 10 ** params['width'] - 1, 0
+        else:
+            return
+        if max(ends) > limit or min(ends) < lowest:
+            hint = 'widen the field' if field.is_numeric else 'widen the field or shorten the prefix'
+            raise DataGenError(f"{field.name}: a sequence from {ends[0]} to {ends[1]} does not fit "
+                               f"(values {lowest}..{limit}); {hint}")
+
+    def _numbers(self, numbers, count: int, scaled: bool = False):
+        """Integer values as the field's representation (digits with a prefix for alphanumeric fields)"""
+        field = self.field
+        if field.kind == 'float':
+            return numbers / 10 ** field.scale if scaled else numbers.astype(np.float64)
+        if field.is_numeric:
+            return numbers if scaled else numbers * 10 ** field.scale
+        prefix = self.params.get('prefix', '').encode('latin-1')
+        width = self.params.get('width') or field.length - len(prefix)
+        block = np.full((count, field.length), 0x20, dtype=np.uint8)
+        block[:, :len(prefix)] = np.frombuffer(prefix, dtype=np.uint8)
+        block[:, len(prefix):len(prefix) + width] = _digit_matrix(np.abs(numbers), width)
+        return block
+
+
+# Rule compilation ---------------------------------------------------------
+
+def _number(field: CopybookField, value, label: str) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise DataGenError(f"{field.name}: {label} must be a number, got '{value}'")
+
+
+def _parse_date(field: CopybookField, value) -> int:
+    """Days since 1970-01-01 for 'YYYY-MM-DD' or 'YYYYMMDD'"""
+    text = str(value).strip().replace('-', '').replace('/', '')
+    try:
+        return (date(int(text[:4]), int(text[4:6]), int(text[6:8])) - date(1970, 1, 1)).days
+    except (ValueError, IndexError):
+        raise DataGenError(f"{field.name}: invalid date '{value}' (expected YYYY-MM-DD)")
+
+
+def _encode_text(field: CopybookField, items: List[str]):
+    """Alphanumeric values as a (len(items), field.length) byte matrix padded with spaces"""
+    block = np.full((len(items), field.length), 0x20, dtype=np.uint8)
+    for index, item in enumerate(items):
+        raw = str(item).encode('latin-1', errors='replace')[:field.length]
+        block[index, :len(raw)] = np.frombuffer(raw, dtype=np.uint8)
+    return block
+
+
+def _choice_values(field: CopybookField, items: List):
+    if field.kind == 'float':
+        return np.array([_number(field, item, 'choice') for item in items], dtype=np.float64)
+    if field.is_numeric:
+        return np.array([int(round(_number(field, item, 'choice') * 10 ** field.scale)) for item in items],
+                        dtype=np.int64)
+    return _encode_text(field, items)
+
+
+def build_rule(field: CopybookField, kind: str, params: Optional[Dict] = None) -> FieldRule:
+    """Validate a rule and precompute what its value generator needs"""
+    params = dict(params or {})
+    if kind not in RULE_TYPES:
+        raise DataGenError(f"Unknown rule type '{kind}' (expected one of {', '.join(RULE_TYPES)})")
+    if field.kind == 'float' and kind == 'date':
+        raise DataGenError(f"{field.name}: date rules need a display or integer field")
+
+    scale = 10 ** field.scale
+    if kind == 'sequence':
+        start = params.get('start', 1)
+        prefix = params.get('prefix', '')
+        if isinstance(start, str) and not field.is_numeric:
+            # 'POL0001' numbers from 1 after the prefix 'POL', four digits wide
+            match = _SEQUENCE_START.match(start.strip())
+            if match:
+                prefix, start = match.group(1) or prefix, match.group(2) or 1
+                params.setdefault('width', len(match.group(2)) or None)
+        params.update(start=int(_number(field, start, 'start')), step=int(_number(field, params.get('step', 1), 'step')),
+                      prefix=str(prefix))
+        if not field.is_numeric:
+            room = field.length - len(params['prefix'])
+            if room <= 0:
+                raise DataGenError(f"{field.name}: prefix leaves no room for the sequence number")
+            params['width'] = min(int(params.get('width') or room), room)
+    elif kind == 'range':
+        low = _number(field, params.get('min'), 'min')
+        high = _number(field, params.get('max'), 'max')
+        if low > high:
+            raise DataGenError(f"{field.name}: min is greater than max")
+        params.update(_low=int(round(low * scale)), _high=int(round(high * scale)))
+    elif kind == 'normal':
+        params.update(mean=_number(field, params.get('mean', 0), 'mean'),
+                      stddev=abs(_number(field, params.get('stddev', 1), 'stddev')))
+        for bound in ('min', 'max'):
+            if params.get(bound) is not None:
+                params[bound] = _number(field, params[bound], bound)
+    elif kind == 'choice':
+        items = params.get('values')
+        if isinstance(items, str):
+            items = items.split('|')
+        if not items:
+            raise DataGenError(f"{field.name}: choice needs values")
+        params['values'] = list(items)
+        params['_encoded'] = _choice_values(field, params['values'])
+        weights = params.get('weights')
+        if weights:
+            if len(weights) != len(items):
+                raise DataGenError(f"{field.name}: weights must match values")
+            total = float(sum(float(weight) for weight in weights))
+            params['_weights'] = [float(weight) / total for weight in weights]
+    elif kind == 'date':
+        params['_low'] = _parse_date(field, params.get('start', '2000-01-01'))
+        params['_high'] = _parse_date(field, params.get('end', params.get('start', '2000-01-01')))
+        if params['_low'] > params['_high']:
+            raise DataGenError(f"{field.name}: start date is after end date")
+        default_format = 'YYYY-MM-DD' if not field.is_numeric and field.length >= 10 else 'YYYYMMDD'
+        params['format'] = str(params.get('format') or default_format).upper()
+        width = len(params['format'])
+        if width > field.length:
+            raise DataGenError(f"{field.name}: date format {params['format']} is wider than the field")
+    elif kind == 'constant':
+        params['_encoded'] = _choice_values(field, [params.get('value', '')])
+
+    return FieldRule(field, kind, **params)
+
+
+def parse_rule(field: CopybookField, text: str) -> FieldRule:
+    """
+    Compile a CreateFile-style value:
+    'seq:1' / 'seq:POL0001,10' (sequence, optional step), '1..100' (uniform range),
+    'A|B|C' (choice), 'date:2024-01-01..2024-12-31' or 'date:...:DD/MM/YYYY',
+    'normal:500,50' (mean, stddev), 'BLANK', anything else is a constant
+    """
+    value = text.strip()
+    lower = value.lower()
+
+    if value.upper() in ('BLANK', 'SPACES'):
+        return build_rule(field, 'blank')
+    if lower.startswith('seq:') or lower == 'seq':
+        start, _, step = value[4:].partition(',')
+        return build_rule(field, 'sequence', {"start": start.strip() or 1, "step": step.strip() or 1})
+    if lower.startswith('date:'):
+        span, _, date_format = value[5:].partition(':')
+        start, _, end = span.partition('..')
+        return build_rule(field, 'date', {"start": start, "end": end or start, "format": date_format or None})
+    if lower.startswith('normal:'):
+        mean, _, stddev = value[7:].partition(',')
+        return build_rule(field, 'normal', {"mean": mean, "stddev": stddev or 1})
+    if '..' in value:
+        low, high = value.split('..', 1)
+        return build_rule(field, 'range', {"min": low.strip(), "max": high.strip()})
+    if '|' in value:
+        return build_rule(field, 'choice', {"values": value.split('|')})
+    return build_rule(field, 'constant', {"value": value})
+
+
+def compile_rules(layout: RecordLayout, rules: List[Dict]) -> Dict[str, FieldRule]:
+    """
+    Compile rules given either as {"field", "value"} (CreateFile syntax)
+    or as {"field", "type", ...parameters}
+    """
+    compiled: Dict[str, FieldRule] = {}
+    for rule in rules:
+        name = str(rule.get('field') or '').strip()
+        if not name:
+            raise DataGenError("Each rule needs a field")
+        field = layout.find_field(name)
+        if field is None:
+            raise DataGenError(f"Field not found in copybook: {name}")
+        if field.redefined:
+            raise DataGenError(f"{field.name} redefines another field; set the redefined field instead")
+
+        if 'type' in rule:
+            params = {key: value for key, value in rule.items() if key not in ('field', 'type')}
+            compiled[field.name] = build_rule(field, str(rule['type']).lower(), params)
+        else:
+            compiled[field.name] = parse_rule(field, str(rule.get('value', '')))
+    return compiled
+
+
+# Encoding -----------------------------------------------------------------
+
+def _digit_matrix(values, width: int):
+    """Non-negative integers as zero-padded ASCII digit columns (high-order digits dropped)"""
+    values = values.astype(np.int64)
+    digits = np.empty((len(values), width), dtype=np.uint8)
+    for column in range(width - 1, -1, -1):
+        values, digit = np.divmod(values, 10)
+        digits[:, column] = digit + 0x30
+    return digits
+
+
+def _format_dates(days, date_format: str, field: CopybookField, count: int):
+    stamps = days.astype('datetime64[D]')
+    years = stamps.astype('datetime64[Y]').astype(np.int64) + 1970
+    months = stamps.astype('datetime64[M]').astype(np.int64) % 12 + 1
+    day_of_month = (stamps - stamps.astype('datetime64[M]')).astype(np.int64) + 1
+    parts = {'YYYY': (years, 4), 'YY': (years % 100, 2), 'MM': (months, 2), 'DD': (day_of_month, 2)}
+
+    if field.is_numeric:
+        # PIC 9(8) dates: the digits of the format read as a number
+        number = np.zeros(count, dtype=np.int64)
+        for token in _tokenize_date_format(date_format):
+            if token in parts:
+                values, width = parts[token]
+                number = number * 10 ** width + values
+        return number * 10 ** field.scale
+
+    block = np.full((count, field.length), 0x20, dtype=np.uint8)
+    position = 0
+    for token in _tokenize_date_format(date_format):
+        if token in parts:
+            values, width = parts[token]
+            block[:, position:position + width] = _digit_matrix(values, width)
+        else:
+            width = len(token)
+            block[:, position:position + width] = np.frombuffer(token.encode('latin-1'), dtype=np.uint8)
+        position += width
+    return block
+
+
+def _tokenize_date_format(date_format: str) -> List[str]:
+    tokens = []
+    position = 0
+    while position < len(date_format):
+        token = next((token for token in _DATE_TOKENS if date_format.startswith(token, position)), date_format[position])
+        tokens.append(token)
+        position += len(token)
+    return tokens
+
+
+def _encode_zoned(values, field: CopybookField):
+    width = field.length - (1 if field.sign_separate else 0)
+    digits = _digit_matrix(np.abs(values), width)
+    negative = values < 0
+    if field.sign_separate:
+        sign = np.where(negative, ord('-'), ord('+')).astype(np.uint8)[:, None]
+        return np.hstack([sign, digits] if field.sign_separate == 'leading' else [digits, sign])
+    if field.signed and negative.any():
+        # Trailing overpunch for negatives ('}' = -0, 'J' = -1 ... 'R' = -9)
+        overpunch = np.frombuffer(b'}JKLMNOPQR', dtype=np.uint8)
+        digits[negative, -1] = overpunch[digits[negative, -1] - 0x30]
+    return digits
+
+
+def _encode_packed(values, field: CopybookField):
+    nibbles = _digit_matrix(np.abs(values), field.length * 2 - 1) - 0x30
+    sign = np.where(values < 0, 0x0D, 0x0C if field.signed else 0x0F).astype(np.uint8)
+    nibbles = np.hstack([nibbles, sign[:, None]])
+    return (nibbles[:, 0::2] << 4) | nibbles[:, 1::2]
+
+
+def _encode_binary(values, field: CopybookField):
+    dtype = np.dtype(f">{'i' if field.signed else 'u'}{field.length}")
+    return values.astype(dtype).view(np.uint8).reshape(len(values), field.length)
+
+
+def _encode_ibm_float(values, field: CopybookField):
+    """IEEE doubles as IBM hexadecimal floating point (COMP-1 / COMP-2)"""
+    magnitude = np.abs(values)
+    nonzero = magnitude > 0
+    exponent = np.zeros(len(values), dtype=np.int64)
+    exponent[nonzero] = np.floor(np.log2(magnitude[nonzero]) / 4).astype(np.int64) + 1
+    fraction = np.where(nonzero, magnitude / np.power(16.0, exponent), 0.0)
+    mantissa_bits = 8 * (field.length - 1)
+    mantissa = np.minimum(np.floor(np.ldexp(fraction, mantissa_bits)), 2.0 ** mantissa_bits - 1).astype('>u8')
+
+    out = np.zeros((len(values), field.length), dtype=np.uint8)
+    out[:, 0] = np.where(nonzero, ((exponent + 64) & 0x7F) | np.where(values < 0, 0x80, 0), 0)
+    out[:, 1:] = mantissa.view(np.uint8).reshape(len(values), 8)[:, 8 - (field.length - 1):]
+    return out
+
+
+def encode_column(field: CopybookField, values):
+    """A field's values as a (count, field.length) byte matrix in the local representation"""
+    if values.ndim == 2:
+        return values
+    if field.kind == 'packed':
+        return _encode_packed(values, field)
+    if field.kind == 'binary':
+        return _encode_binary(values, field)
+    if field.kind == 'float':
+        return _encode_ibm_float(values.astype(np.float64), field)
+    return _encode_zoned(values, field)
+
+
+def _default_rule(field: CopybookField) -> FieldRule:
+    if field.is_numeric:
+        return build_rule(field, 'constant', {"value": 0})
+    return build_rule(field, 'blank')
+
+
+# Generation ---------------------------------------------------------------
+
+def build_block(layout: RecordLayout, rules: Dict[str, FieldRule], rng, first: int, count: int,
+                newline: bytes = b''):
+    """(count, record_length + len(newline)) byte matrix of records first..first+count-1"""
+    block = np.full((count, layout.record_length + len(newline)), 0x20, dtype=np.uint8)
+    if newline:
+        block[:, layout.record_length:] = np.frombuffer(newline, dtype=np.uint8)
+    for field in layout.primary_fields:
+        if field.is_filler:
+            continue
+        rule = rules.get(field.name) or _default_rule(field)
+        block[:, field.offset:field.end] = encode_column(field, rule.values(rng, first, count))
+    return block
+
+
+def _shard_rng(seed: int, shard: int):
+    return np.random.default_rng(np.random.SeedSequence([seed, shard]))
+
+
+def _write_shard(copybook_text: str, rules: List[Dict], output_path: str, seed: int,
+                 shard: int, first: int, count: int, newline: bytes) -> int:
+    """Generate one shard into its slot of the preallocated output file"""
+    layout, _ = compile_copybook(copybook_text)
+    compiled = compile_rules(layout, rules)
+    rng = _shard_rng(seed, shard)
+    stride = layout.record_length + len(newline)
+
+    with open(output_path, 'r+b') as target:
+        target.seek(first * stride)
+        for start in range(first, first + count, GENERATE_CHUNK_RECORDS):
+            records = min(GENERATE_CHUNK_RECORDS, first + count - start)
+            target.write(build_block(layout, compiled, rng, start, records, newline).tobytes())
+    return count
+
+
+def generate_file(copybook_text: str, rules: List[Dict], output_path: str, records: int,
+                  seed: int = 0, framing: str = 'lines', workers: Optional[int] = None) -> Dict:
+    """Generate a record file; shards run in a process pool when there is more than one"""
+    if not NUMPY_AVAILABLE:
+        raise DataGenError("Test data generation requires numpy")
+    if framing not in _NEWLINES:
+        raise DataGenError(f"Unknown framing '{framing}' (expected one of {', '.join(_NEWLINES)})")
+    if not 0 <= records <= MAX_GENERATE_RECORDS:
+        raise DataGenError(f"records must be between 0 and {MAX_GENERATE_RECORDS}")
+
+    layout, _ = compile_copybook(copybook_text)
+    compiled = compile_rules(layout, rules)
+    for rule in compiled.values():
+        rule.check_records(records)
+    newline = _NEWLINES[framing]
+    stride = layout.record_length + len(newline)
+
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with open(output_path, 'wb') as target:
+        target.truncate(records * stride)
+
+    shards: List[Tuple[int, int, int]] = [
+        (shard, first, min(GENERATE_SHARD_RECORDS, records - first))
+        for shard, first in enumerate(range(0, records, GENERATE_SHARD_RECORDS))
+    ]
+    workers = max(1, min(workers or MAX_GENERATE_WORKERS, len(shards) or 1))
+
+    if workers == 1:
+        for shard, first, count in shards:
+            _write_shard(copybook_text, rules, output_path, seed, shard, first, count, newline)
+    else:
+        # Spawned, not forked: a fork inside the threaded server could copy a lock another thread holds
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            futures = [pool.submit(_write_shard, copybook_text, rules, output_path, seed, shard, first, count, newline)
+                       for shard, first, count in shards]
+            for future in futures:
+                future.result()
+
+    return {
+        "records": records,
+        "record_length": layout.record_length,
+        "bytes": os.path.getsize(output_path),
+        "shards": len(shards),
+        "workers": workers,
+        "seed": seed,
+        "framing": framing,
+        "rules": [rule.describe() for rule in compiled.values()]
+    }
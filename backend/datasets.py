@@ -0,0 +1,230 @@
+"""
+Bulk Dataset Commands
+Builds TSO ALLOCATE / DELETE / LISTDS commands for many datasets (DCB checked
+with the same rules as dcbValidator.ts) and parses their line-mode output
+into structured rows with precompiled patterns
+"""
+
+import re
+from typing import Dict, List, Tuple, Union
+
+from reccount import invalid_datasets, normalize_dataset
+
+# Datasets per bulk request
+MAX_BULK_DATASETS = 200
+
+BULK_ACTIONS = ('allocate', 'delete', 'listds')
+
+# Same list as VALID_RECFM in src/utils/dcbValidator.ts
+VALID_RECFM = ('F', 'FB', 'FBA', 'FBM', 'FBS', 'V', 'VB', 'VBA', 'VBM', 'VBS', 'U')
+
+MAX_DCB_LENGTH = 32760
+
+# Half-track blocking limit on 3390 DASD
+HALF_TRACK_BLKSIZE = 27920
+
+# Attributes used when an allocate item leaves them out (BLKSIZE is derived from RECFM/LRECL)
+DEFAULT_ALLOCATION = {
+    "recfm": "FB",
+    "lrecl": 80,
+    "blksize": None,
+    "dsorg": "PS",
+    "primary": 5,
+    "secondary": 5,
+    "space_unit": "TRACKS",
+    "directory": 10
+}
+
+SPACE_UNITS = ('TRACKS', 'CYLINDERS')
+
+_MESSAGE = re.compile(r'\b((?:IKJ|IDC|IGD|IEF)\d{4,5}[A-Z])\s+(.*)')
+_DELETED = re.compile(r'IDC05(?:49|50)I\s+ENTRY\s+\(\w\)\s+(\S+)\s+DELETED', re.IGNORECASE)
+_NOT_FOUND = re.compile(r'(IDC3012I.*NOT\s+FOUND|NOT\s+IN\s+CATALOG|NOT\s+FOUND)', re.IGNORECASE)
+_LISTDS_ATTRIBUTES = re.compile(r'--RECFM-LRECL-BLKSIZE-DSORG\s*\n\s*(\S+)\s+(\S+)\s+(\S+)\s+(\S+)', re.IGNORECASE)
+_LISTDS_MEMBERS = re.compile(r'--MEMBERS--\s*\n(.*?)(?:^\s*READY\s*$|^\s*--|\Z)', re.IGNORECASE | re.MULTILINE | re.DOTALL)
+_LISTCAT_ENTRY = re.compile(r'^\s*(NONVSAM|CLUSTER|GDG|ALIAS)\s+-+\s+(\S+)', re.IGNORECASE | re.MULTILINE)
+_LISTDS_VOLUMES = re.compile(r'--VOLUMES--\s*\n(.*?)(?:^\s*READY\s*$|^\s*--|\Z)', re.IGNORECASE | re.MULTILINE | re.DOTALL)
+
+
+class DatasetRequestError(ValueError):
+    """Raised when a bulk request has invalid dataset names or DCB attributes"""
+
+
+def validate_dcb(dcb: Dict) -> Tuple[List[str], List[str]]:
+    """Errors and warnings for RECFM/LRECL/BLKSIZE, mirroring validateDCB in dcbValidator.ts"""
+    errors: List[str] = []
+    warnings: List[str] = []
+    recfm = str(dcb.get('recfm') or '').upper()
+    lrecl = dcb.get('lrecl')
+    blksize = dcb.get('blksize')
+
+    if recfm and recfm not in VALID_RECFM:
+        errors.append(f"Invalid RECFM '{recfm}'. Valid values: {', '.join(VALID_RECFM)}")
+    for name, value in (('LRECL', lrecl), ('BLKSIZE', blksize)):
+        if value is None:
+            continue
+        if value <= 0:
+            errors.append(f"{name} must be greater than 0 (got {value})")
+        if value > MAX_DCB_LENGTH:
+            errors.append(f"{name} cannot exceed {MAX_DCB_LENGTH} (got {value})")
+
+    if recfm and lrecl and blksize:
+        if recfm.startswith('F'):
+            if blksize < lrecl:
+                errors.append(f"BLKSIZE ({blksize}) must be >= LRECL ({lrecl}) for fixed format")
+            if 'B' in recfm and blksize % lrecl != 0:
+                warnings.append(f"BLKSIZE ({blksize}) is not a multiple of LRECL ({lrecl}). "
+                                f"This may cause inefficient space utilization.")
+        elif recfm.startswith('V') and blksize < lrecl + 4:
+            errors.append(f"BLKSIZE ({blksize}) must be at least LRECL + 4 ({lrecl + 4}) for variable format")
+
+    if blksize and blksize < 4096:
+        warnings.append(f"BLKSIZE ({blksize}) is less than 4096. Consider using larger block size for better performance.")
+    if blksize and 27920 < blksize < 32760:
+        warnings.append(f"BLKSIZE ({blksize}) is not optimized. Consider using half-track (27920) or full-track (32760) blocking.")
+    return errors, warnings
+
+
+def default_blksize(recfm: str, lrecl: int) -> int:
+    """Largest half-track block for the record format (unblocked F uses LRECL)"""
+    if recfm.startswith('F'):
+        return max(lrecl, HALF_TRACK_BLKSIZE // lrecl * lrecl) if 'B' in recfm and lrecl > 0 else lrecl
+    return max(lrecl + 4, HALF_TRACK_BLKSIZE)
+
+
+def normalize_items(action: str, items: List[Union[str, Dict]], defaults: Dict = None) -> List[Dict]:
+    """
+    One dict per dataset with its action and (for allocate) complete attributes;
+    every problem in the request is collected before raising
+    """
+    if not items:
+        raise DatasetRequestError("datasets must list at least one dataset")
+    if len(items) > MAX_BULK_DATASETS:
+        raise DatasetRequestError(f"At most {MAX_BULK_DATASETS} datasets can be handled per request")
+
+    problems: List[str] = []
+    normalized: List[Dict] = []
+    for number, item in enumerate(items, start=1):
+        entry = {"dataset": item} if isinstance(item, str) else dict(item)
+        entry["action"] = str(entry.get('action') or action or '').lower()
+        entry["dataset"] = normalize_dataset(str(entry.get('dataset') or ''))
+        if entry["action"] not in BULK_ACTIONS:
+            problems.append(f"{number}: unknown action '{entry['action']}' (expected one of {', '.join(BULK_ACTIONS)})")
+            continue
+        if invalid_datasets([entry["dataset"]]) or '(' in entry["dataset"]:
+            problems.append(f"{number}: invalid dataset name '{entry['dataset']}'")
+            continue
+
+        if entry["action"] == 'allocate':
+            merged = dict(DEFAULT_ALLOCATION, **(defaults or {}))
+            merged.update({key: value for key, value in entry.items() if value not in (None, '')})
+            try:
+                for key in ('lrecl', 'primary', 'secondary', 'directory'):
+                    merged[key] = int(merged[key])
+                merged["recfm"] = str(merged["recfm"]).upper()
+                merged["blksize"] = int(merged["blksize"]) if merged.get("blksize") else default_blksize(merged["recfm"], merged["lrecl"])
+            except (TypeError, ValueError):
+                problems.append(f"{number} ({entry['dataset']}): lrecl, blksize, primary, secondary and directory must be integers")
+                continue
+            merged["dsorg"] = str(merged["dsorg"]).upper()
+            merged["space_unit"] = str(merged["space_unit"]).upper()
+            errors, warnings = validate_dcb(merged)
+            if merged["dsorg"] not in ('PS', 'PO'):
+                errors.append(f"DSORG must be PS or PO (got {merged['dsorg']})")
+            if merged["space_unit"] not in SPACE_UNITS:
+                errors.append(f"space_unit must be one of {', '.join(SPACE_UNITS)}")
+            if errors:
+                problems.extend(f"{number} ({entry['dataset']}): {error}" for error in errors)
+                continue
+            merged["warnings"] = warnings
+            entry = merged
+        normalized.append(entry)
+
+    if problems:
+        raise DatasetRequestError("; ".join(problems))
+    return normalized
+
+
+def allocate_command(item: Dict) -> str:
+    recfm = ' '.join(item["recfm"])
+    command = (f"ALLOCATE DATASET('{item['dataset']}') NEW CATALOG DSORG({item['dsorg']}) RECFM({recfm}) "
+               f"LRECL({item['lrecl']}) BLKSIZE({item['blksize']}) SPACE({item['primary']},{item['secondary']}) "
+               f"{item['space_unit']}")
+    if item["dsorg"] == 'PO':
+        command += f" DIR({item['directory']})"
+    return command
+
+
+def delete_command(item: Dict) -> str:
+    return f"DELETE '{item['dataset']}'"
+
+
+def listds_command(item: Dict) -> str:
+    return f"LISTDS '{item['dataset']}'" + (" MEMBERS" if item.get('members') else "")
+
+
+def listcat_command(level: str) -> str:
+    return f"LISTCAT LEVEL({level})"
+
+
+def parse_listcat(output: str) -> List[str]:
+    """Dataset names (NONVSAM, CLUSTER, GDG, ALIAS entries) from LISTCAT output"""
+    return sorted({match.group(2).upper() for match in _LISTCAT_ENTRY.finditer(output)})
+
+
+def free_command(datasets: List[str]) -> str:
+    """Release the allocations ALLOCATE leaves on the TSO session"""
+    return "FREE DATASET(" + ','.join(f"'{name}'" for name in datasets) + ")"
+
+
+COMMANDS = {'allocate': allocate_command, 'delete': delete_command, 'listds': listds_command}
+
+
+def _messages(output: str) -> List[str]:
+    return [f"{match.group(1)} {match.group(2).strip()}" for match in _MESSAGE.finditer(output)]
+
+
+def parse_result(item: Dict, output: str, missing_ok: bool = True) -> Dict:
+    """Structured row for one command's line-mode output"""
+    action, dataset = item["action"], item["dataset"]
+    messages = _messages(output)
+    row = {"dataset": dataset, "action": action}
+
+    if action == 'allocate':
+        # ALLOCATE is silent when it works; any IKJ/IGD message means it did not
+        failed = bool(messages) or 'NOT ALLOCATED' in output.upper()
+        row.update(success=not failed, status='failed' if failed else 'allocated',
+                   message=messages[0] if messages else ("Not allocated" if failed else "Allocated"))
+        if item.get("warnings"):
+            row["warnings"] = item["warnings"]
+        return row
+
+    if action == 'delete':
+        if any(match.group(1).upper() == dataset for match in _DELETED.finditer(output)):
+            row.update(success=True, status='deleted', message="Deleted")
+        elif _NOT_FOUND.search(output):
+            row.update(success=missing_ok, status='not_found', message=messages[0] if messages else "Not found")
+        else:
+            row.update(success=False, status='failed', message=messages[0] if messages else "No DELETED message")
+        return row
+
+    attributes = _LISTDS_ATTRIBUTES.search(output)
+    if attributes:
+        recfm, lrecl, blksize, dsorg = attributes.groups()
+        volumes = _LISTDS_VOLUMES.search(output)
+        row.update(
+            success=True, status='found', message="Listed",
+            recfm=recfm.upper(), dsorg=dsorg.upper(),
+            lrecl=int(lrecl) if lrecl.isdigit() else None,
+            blksize=int(blksize) if blksize.isdigit() else None,
+            volumes=volumes.group(1).split() if volumes else []
+        )
+        if item.get('members'):
+            members = _LISTDS_MEMBERS.search(output)
+            row["members"] = [line.split()[0].upper() for line in members.group(1).splitlines()
+                              if line.strip()] if members else []
+    elif _NOT_FOUND.search(output):
+        row.update(success=missing_ok, status='not_found', message=messages[0] if messages else "Not in catalog")
+    else:
+        row.update(success=False, status='failed', message=messages[0] if messages else "No LISTDS attributes found")
+    return row
@@ -0,0 +1,162 @@
+"""
+EBCDIC Record Codec
+Copybook-aware conversion between local ISO-8859-1 records and host EBCDIC
+(cp037 / cp1047) records for binary-mode transfers. Character fields are
+translated with 256-byte tables; COMP, COMP-3 and COMP-1/2 bytes are copied as is.
+"""
+
+import codecs
+import os
+from typing import Dict, List, Tuple
+
+from columnar import mapped_file
+from copybook import RecordLayout, detect_framing, record_stride
+
+# Records converted per chunk
+CODEC_CHUNK_RECORDS = 4096
+
+# Supported host code pages (cp1047 is cp037 with six characters moved)
+CODE_PAGES = ('cp037', 'cp1047')
+
+# Byte positions where IBM-1047 differs from IBM-037
+_CP1047_OVERRIDES = {0x5F: '^', 0xAD: '[', 0xB0: '\xac', 0xBA: '\xdd', 0xBB: '\xa8', 0xBD: ']'}
+
+_tables: Dict[str, Tuple[bytes, bytes]] = {}
+
+
+def translate_tables(code_page: str) -> Tuple[bytes, bytes]:
+    """(host -> local, local -> host) translate tables for a code page; local side is ISO-8859-1"""
+    code_page = code_page.lower()
+    if code_page in _tables:
+        return _tables[code_page]
+
+    if code_page == 'cp1047':
+        chars = list(bytes(range(256)).decode('cp037'))
+        for byte, char in _CP1047_OVERRIDES.items():
+            chars[byte] = char
+    else:
+        codecs.lookup(code_page)
+        chars = list(bytes(range(256)).decode(code_page, errors='replace'))
+
+    to_local = bytes(ord(char) if ord(char) < 256 else 0x3F for char in chars)
+    if sorted(to_local) != list(range(256)):
+        raise LookupError(f"{code_page} is not a single-byte EBCDIC code page covering ISO-8859-1")
+
+    to_host = bytearray(256)
+    for host_byte, local_byte in enumerate(to_local):
+        to_host[local_byte] = host_byte
+
+    _tables[code_page] = (to_local, bytes(to_host))
+    return _tables[code_page]
+
+
+def binary_columns(layout: RecordLayout) -> List[int]:
+    """Byte positions within a record that hold binary data (never translated)"""
+    columns = set()
+    for field in layout.primary_fields:
+        if field.kind in ('packed', 'binary', 'float'):
+            columns.update(range(field.offset, field.end))
+    return sorted(column for column in columns if column < layout.record_length)
+
+
+class RecordCodec:
+    """Converts whole record files between local and host representations in chunks"""
+
+    def __init__(self, layout: RecordLayout, code_page: str = 'cp037'):
+        self.layout = layout
+        self.code_page = code_page.lower()
+        self.to_local_table, self.to_host_table = translate_tables(self.code_page)
+        self.binary_columns = binary_columns(layout)
+
+    def _translate(self, chunk: bytes, table: bytes) -> bytearray:
+        """Translate a chunk of whole records, restoring the binary columns from the source"""
+        converted = bytearray(chunk.translate(table))
+        length = self.layout.record_length
+        for column in self.binary_columns:
+            converted[column::length] = chunk[column::length]
+        return converted
+
+    def _add_newlines(self, chunk: bytearray, newline: bytes) -> bytearray:
+        length = self.layout.record_length
+        count = len(chunk) // length
+        out = bytearray(count * (length + 1))
+        for column in range(length):
+            out[column::length + 1] = chunk[column::length]
+        out[length::length + 1] = newline * count
+        return out
+
+    def _iter_local_chunks(self, data, framing: str):
+        """Yield chunks of back-to-back records from local data (fixed or newline-delimited)"""
+        length = self.layout.record_length
+        with memoryview(data) as view:
+            if framing == 'auto':
+                framing = detect_framing(view, length)
+            stride = record_stride(view, length, framing) if framing == 'lines' else None
+
+        chunk_bytes = CODEC_CHUNK_RECORDS * length
+        if framing == 'fixed':
+            whole = (len(data) // length) * length
+            for start in range(0, whole, chunk_bytes):
+                yield data[start:min(start + chunk_bytes, whole)]
+            return
+
+        if stride:
+            # Equal-width lines: drop separators and padding with strided slice copies
+            count = len(data) // stride
+            for first in range(0, count, CODEC_CHUNK_RECORDS):
+                records = min(CODEC_CHUNK_RECORDS, count - first)
+                source = data[first * stride:(first + records) * stride]
+                chunk = bytearray(records * length)
+                for column in range(length):
+                    chunk[column::length] = source[column::stride]
+                yield bytes(chunk)
+            tail = data[count * stride:].rstrip(b'\r\n')
+            if tail.strip():
+                yield tail[:length].ljust(length)
+            return
+
+        chunk = bytearray()
+        with memoryview(data) as view:
+            for record in self.layout.iter_records(view, framing):
+                chunk += bytes(record[:length]).ljust(length)
+                if len(chunk) >= chunk_bytes:
+                    yield bytes(chunk)
+                    chunk = bytearray()
+        if chunk:
+            yield bytes(chunk)
+
+    def to_host(self, local_path: str, host_path: str, framing: str = 'auto') -> Dict:
+        """Write the EBCDIC form of a local record file (records back to back, RECFM=F)"""
+        records = 0
+        with mapped_file(local_path) as data, open(host_path, 'wb') as target:
+            for chunk in self._iter_local_chunks(data, framing):
+                target.write(self._translate(chunk, self.to_host_table))
+                records += len(chunk) // self.layout.record_length
+        return {"records": records, "record_length": self.layout.record_length, "bytes": os.path.getsize(host_path)}
+
+    def to_local(self, host_path: str, local_path: str, framing: str = 'lines') -> Dict:
+        """Write the local form of an EBCDIC record file ('lines' adds a newline after each record)"""
+        length = self.layout.record_length
+        chunk_bytes = CODEC_CHUNK_RECORDS * length
+        records = 0
+        buffer = bytearray(chunk_bytes)
+        view = memoryview(buffer)
+
+        with open(host_path, 'rb') as source, open(local_path, 'wb') as target:
+            while True:
+                size = source.readinto(buffer)
+                if not size:
+                    break
+                whole = (size // length) * length
+                if whole < size:
+                    # Short final record: pad with EBCDIC spaces
+                    whole += length
+                    view[size:whole] = b'\x40' * (whole - size)
+                chunk = bytes(view[:whole])
+                converted = self._translate(chunk, self.to_local_table)
+                if framing == 'lines':
+                    converted = self._add_newlines(converted, b'\n')
+                target.write(converted)
+                records += whole // length
+
+        return {"records": records, "record_length": length, "bytes": os.path.getsize(local_path)}
@@ -0,0 +1,257 @@
+"""
+Field Expectation Checks
+Compiles field conditions (equality, ranges, regex, not-null) against a
+copybook layout and evaluates them as vectorized masks over record batches
+"""
+
+import re
+from typing import Dict, List
+
+from columnar import DEFAULT_BATCH_RECORDS, NUMPY_AVAILABLE, iter_column_batches, mapped_file, np
+from copybook import CopybookField, RecordLayout
+
+# Offending records returned with the result
+EXPECTATION_SAMPLE_SIZE = 20
+
+OPERATORS = ('eq', 'ne', 'gt', 'ge', 'lt', 'le', 'in', 'range', 'regex', 'not_null', 'null')
+
+_COMPARISONS = (('>=', 'ge'), ('<=', 'le'), ('!=', 'ne'), ('<>', 'ne'), ('>', 'gt'), ('<', 'lt'), ('=', 'eq'))
+
+
+class ExpectationError(ValueError):
+    """Raised when a condition cannot be compiled against the layout"""
+
+
+class Expectation:
+    """A compiled condition on one field"""
+
+    def __init__(self, field: CopybookField, op: str, value=None, low=None, high=None, source: str = ''):
+        self.field = field
+        self.op = op
+        self.value = value
+        self.low = low
+        self.high = high
+        self.source = source
+        self.pattern = re.compile(value) if op == 'regex' else None
+
+    def describe(self) -> str:
+        if self.op == 'range':
+            return f"{self.field.name} between {_text(self.low)} and {_text(self.high)}"
+        if self.op in ('not_null', 'null'):
+            return f"{self.field.name} {self.op.replace('_', ' ')}"
+        if self.op == 'in':
+            return f"{self.field.name} in {'|'.join(_text(item) for item in sorted(self.value))}"
+        return f"{self.field.name} {self.op} {_text(self.value)}"
+
+    def test(self, value) -> bool:
+        """True when a decoded value satisfies the condition"""
+        if self.op == 'null':
+            return value is None or value == ''
+        if value is None or value == '' or (self.field.is_numeric and isinstance(value, str)):
+            return False
+        if self.op == 'not_null':
+            return True
+        if self.field.is_numeric:
+            value = float(value)
+        if self.op == 'eq':
+            return value == self.value
+        if self.op == 'ne':
+            return value != self.value
+        if self.op == 'gt':
+            return value > self.value
+        if self.op == 'ge':
+            return value >= self.value
+        if self.op == 'lt':
+            return value < self.value
+        if self.op == 'le':
+            return value <= self.value
+        if self.op == 'in':
+            return value in self.value
+        if self.op == 'range':
+            return self.low <= value <= self.high
+        return self.pattern.fullmatch(_text(value)) is not None
+
+    def violations(self, batch) -> "np.ndarray":
+        """Boolean mask of records in a ColumnBatch that violate the condition"""
+        name = self.field.name
+        values = batch.columns[name]
+        missing = batch.nulls[name] | batch.invalid[name]
+
+        if self.op == 'null':
+            return ~missing
+        if self.op == 'not_null':
+            return missing
+
+        if self.op == 'eq':
+            passed = values == self.value
+        elif self.op == 'ne':
+            passed = values != self.value
+        elif self.op == 'gt':
+            passed = values > self.value
+        elif self.op == 'ge':
+            passed = values >= self.value
+        elif self.op == 'lt':
+            passed = values < self.value
+        elif self.op == 'le':
+            passed = values <= self.value
+        elif self.op == 'in':
+            passed = np.isin(values, np.array(sorted(self.value), dtype=values.dtype))
+        elif self.op == 'range':
+            passed = (values >= self.low) & (values <= self.high)
+        else:
+            # Evaluate the regex once per distinct value
+            distinct, inverse = np.unique(values, return_inverse=True)
+            matches = np.array([self.pattern.fullmatch(_text(item.item())) is not None for item in distinct], dtype=bool)
+            passed = matches[inverse.reshape(-1)] if len(distinct) else np.zeros(len(values), dtype=bool)
+
+        return ~passed | missing
+
+
+def _text(value) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _typed(field: CopybookField, text: str):
+    text = text.strip()
+    if not field.is_numeric:
+        return text
+    try:
+        return float(text)
+    except ValueError:
+        raise ExpectationError(f"{field.name} is numeric; expected a number, got '{text}'")
+
+
+def parse_expectation(field: CopybookField, expected: str) -> Expectation:
+    """
+    Compile a FileComp2-style expected value:
+    'GOLD' (equals), '!=X', '>=100', '<5', '1..10' (range), 'GOLD|BLUE' (any of),
+    '/^POL\\d+$/' or 're:...' (regex), 'NOT NULL' / '*', 'NULL' / 'BLANK'
+    """
+    text = expected.strip()
+    upper = text.upper()
+
+    if upper in ('NOT NULL', 'NOTNULL', '*'):
+        return Expectation(field, 'not_null', source=text)
+    if upper in ('NULL', 'BLANK', 'EMPTY'):
+        return Expectation(field, 'null', source=text)
+    if len(text) >= 2 and text.startswith('/') and text.endswith('/'):
+        return build_expectation(field, 'regex', text[1:-1], source=text)
+    if text.lower().startswith('re:'):
+        return build_expectation(field, 'regex', text[3:], source=text)
+
+    for prefix, op in _COMPARISONS:
+        if text.startswith(prefix):
+            return build_expectation(field, op, text[len(prefix):], source=text)
+
+    if '..' in text:
+        low, high = text.split('..', 1)
+        return build_expectation(field, 'range', low=low, high=high, source=text)
+    if '|' in text:
+        return build_expectation(field, 'in', text.split('|'), source=text)
+    return build_expectation(field, 'eq', text, source=text)
+
+
+def build_expectation(field: CopybookField, op: str, value=None, low=None, high=None, source: str = '') -> Expectation:
+    """Validate an operator and convert its operands to the field's type"""
+    if op not in OPERATORS:
+        raise ExpectationError(f"Unknown operator '{op}' (expected one of {', '.join(OPERATORS)})")
+
+    if op == 'regex':
+        try:
+            re.compile(str(value))
+        except re.error as e:
+            raise ExpectationError(f"Invalid regex for {field.name}: {e}")
+        return Expectation(field, op, str(value), source=source)
+    if op == 'range':
+        if low is None or high is None:
+            raise ExpectationError(f"Range condition on {field.name} needs low and high")
+        return Expectation(field, op, low=_typed(field, str(low)), high=_typed(field, str(high)), source=source)
+    if op == 'in':
+        items = value if isinstance(value, list) else str(value).split('|')
+        return Expectation(field, op, {_typed(field, str(item)) for item in items}, source=source)
+    if op in ('not_null', 'null'):
+        return Expectation(field, op, source=source)
+    if value is None:
+        raise ExpectationError(f"Condition '{op}' on {field.name} needs a value")
+    return Expectation(field, op, _typed(field, str(value)), source=source)
+
+
+def compile_expectations(layout: RecordLayout, conditions: List[Dict]) -> List[Expectation]:
+    """
+    Compile conditions given either as {"field", "expected"} (expected-value syntax)
+    or as {"field", "op", "value" | "min"/"max"}
+    """
+    compiled = []
+    for condition in conditions:
+        name = str(condition.get('field') or '').strip()
+        if not name:
+            raise ExpectationError("Each condition needs a field")
+        field = layout.find_field(name)
+        if field is None:
+            raise ExpectationError(f"Field not found in copybook: {name}")
+
+        if 'op' in condition:
+            compiled.append(build_expectation(
+                field, str(condition['op']).lower(), condition.get('value'),
+                condition.get('min'), condition.get('max'), str(condition.get('value', ''))
+            ))
+        elif str(condition.get('expected', '')).strip():
+            compiled.append(parse_expectation(field, str(condition['expected'])))
+    if not compiled:
+        raise ExpectationError("No conditions to check")
+    return compiled
+
+
+def check_file(path: str, layout: RecordLayout, expectations: List[Expectation], encoding: str = 'latin-1',
+               framing: str = 'auto', batch_records: int = DEFAULT_BATCH_RECORDS,
+               sample_size: int = EXPECTATION_SAMPLE_SIZE) -> Dict:
+    """Evaluate every expectation over every record; return violation counts and a capped sample"""
+    counts = [0] * len(expectations)
+    sample: List[Dict] = []
+    records = 0
+    failed_records = 0
+
+    def add_sample(record_number: int, failed: List[int], row: Dict[str, object]):
+        sample.append({
+            "record": record_number,
+            "failed": [expectations[index].describe() for index in failed],
+            "values": row
+        })
+
+    if NUMPY_AVAILABLE:
+        for batch in iter_column_batches(path, layout, batch_records, encoding, framing):
+            records += batch.count
+            masks = [expectation.violations(batch) for expectation in expectations]
+            for index, mask in enumerate(masks):
+                counts[index] += int(mask.sum())
+            any_failed = np.logical_or.reduce(masks)
+            failed_records += int(any_failed.sum())
+            for row_index in np.flatnonzero(any_failed)[:max(0, sample_size - len(sample))]:
+                failed = [index for index, mask in enumerate(masks) if mask[row_index]]
+                add_sample(batch.start + int(row_index) + 1, failed, batch.row(int(row_index)))
+    else:
+        with mapped_file(path) as data:
+            for number, row in enumerate(layout.iter_decode(memoryview(data), encoding, framing), start=1):
+                records += 1
+                failed = [index for index, expectation in enumerate(expectations)
+                          if not expectation.test(row.get(expectation.field.name))]
+                for index in failed:
+                    counts[index] += 1
+                if failed:
+                    failed_records += 1
+                    if len(sample) < sample_size:
+                        add_sample(number, failed, {key: value if isinstance(value, (int, str)) or value is None else str(value)
+                                                    for key, value in row.items()})
+
+    return {
+        "records": records,
+        "failed_records": failed_records,
+        "conditions": [
+            {"field": expectation.field.name, "condition": expectation.describe(),
+             "expected": expectation.source, "violations": count, "passed": count == 0}
+            for expectation, count in zip(expectations, counts)
+        ],
+        "sample": sample
+    }
@@ -0,0 +1,267 @@
+"""
+FileComp Engine
+Compares two fixed-length record files that share a copybook. Records are
+matched by key (external merge sort with bounded memory) or by position,
+hashed first, and decoded field by field only when the hashes differ.
+Differences are streamed to a JSON Lines report.
+"""
+
+import hashlib
+import heapq
+import json
+import os
+import shutil
+import tempfile
+from itertools import zip_longest
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from columnar import mapped_file
+from copybook import CopybookField, RecordLayout, field_decoder
+
+# Records sorted in memory per run before spilling to disk
+SORT_RUN_RECORDS = 200000
+
+# Bytes read per run file while merging
+MERGE_READ_BYTES = 1 << 20
+
+# Differences returned inline with the summary (the report has all of them)
+DIFF_SAMPLE_SIZE = 20
+
+_DIGEST_SIZE = 8
+_RECNO_SIZE = 8
+
+
+def iter_fixed_records(path: str, layout: RecordLayout, framing: str = 'auto') -> Iterator[bytes]:
+    """Yield each record of a file as bytes padded or truncated to the record length"""
+    length = layout.record_length
+    pad = b' '
+    with mapped_file(path) as data:
+        with memoryview(data) as view:
+            for record in layout.iter_records(view, framing):
+                raw = bytes(record[:length])
+                record.release()
+                yield raw if len(raw) == length else raw.ljust(length, pad)
+
+
+class FileComparer:
+    """Compares two record files laid out by the same copybook"""
+
+    def __init__(self, layout: RecordLayout, key_fields: Optional[List[str]] = None,
+                 ignore_fields: Optional[List[str]] = None, encoding: str = 'latin-1',
+                 framing: str = 'auto', run_records: int = SORT_RUN_RECORDS):
+        self.layout = layout
+        self.encoding = encoding
+        self.framing = framing
+        self.run_records = max(1, run_records)
+        self.key_fields = [self._field(name) for name in key_fields or []]
+
+        ignored = {self._field(name).name for name in ignore_fields or []}
+        self.compared_fields = [field for field in layout.data_fields if field.name not in ignored]
+        self._compared_ranges = self._ranges(self.compared_fields)
+        self._decoders = [(field, field_decoder(field, encoding)) for field in self.compared_fields]
+        self._key_decoders = [(field, field_decoder(field, encoding)) for field in self.key_fields]
+        self.key_length = sum(field.length for field in self.key_fields)
+
+    def _field(self, name: str) -> CopybookField:
+        field = self.layout.find_field(name)
+        if field is None:
+            raise KeyError(f"Field not found in copybook: {name}")
+        return field
+
+    @staticmethod
+    def _ranges(fields: List[CopybookField]) -> List[Tuple[int, int]]:
+        """Byte ranges covered by fields, with adjacent ranges merged"""
+        ranges: List[Tuple[int, int]] = []
+        for field in sorted(fields, key=lambda f: f.offset):
+            if ranges and field.offset <= ranges[-1][1]:
+                ranges[-1] = (ranges[-1][0], max(ranges[-1][1], field.end))
+            else:
+                ranges.append((field.offset, field.end))
+        return ranges
+
+    def digest(self, record: bytes) -> bytes:
+        """Hash of the compared bytes of a record (FILLER and ignored fields excluded)"""
+        if len(self._compared_ranges) == 1:
+            start, end = self._compared_ranges[0]
+            return hashlib.blake2b(record[start:end], digest_size=_DIGEST_SIZE).digest()
+        hasher = hashlib.blake2b(digest_size=_DIGEST_SIZE)
+        for start, end in self._compared_ranges:
+            hasher.update(record[start:end])
+        return hasher.digest()
+
+    def key_of(self, record: bytes) -> bytes:
+        return b''.join(record[field.offset:field.end] for field in self.key_fields)
+
+    def display_key(self, record: bytes) -> Dict[str, object]:
+        return {field.name: _jsonable(decode(record[field.offset:field.end])) for field, decode in self._key_decoders}
+
+    def field_differences(self, expected: bytes, actual: bytes) -> List[Dict[str, object]]:
+        differences = []
+        for field, decode in self._decoders:
+            left = expected[field.offset:field.end]
+            right = actual[field.offset:field.end]
+            if left == right:
+                continue
+            left_value, right_value = decode(left), decode(right)
+            if left_value != right_value:
+                differences.append({"field": field.name, "expected": _jsonable(left_value), "actual": _jsonable(right_value)})
+        return differences
+
+    # Sorted (key, record number, digest, record) entries ------------------
+
+    def _entries(self, path: str) -> Iterator[bytes]:
+        for number, record in enumerate(iter_fixed_records(path, self.layout, self.framing), start=1):
+            yield self.key_of(record) + number.to_bytes(_RECNO_SIZE, 'big') + self.digest(record) + record
+
+    def _sorted_entries(self, path: str, work_dir: str, label: str, stats: Dict) -> Iterator[bytes]:
+        """External merge sort of a file's entries by key (record number breaks ties)"""
+        run_paths: List[str] = []
+        run: List[bytes] = []
+
+        for entry in self._entries(path):
+            run.append(entry)
+            if len(run) >= self.run_records:
+                run_paths.append(self._spill(run, work_dir, label, len(run_paths)))
+                run = []
+
+        stats["runs"] = len(run_paths) + (1 if run else 0)
+        if not run_paths:
+            run.sort()
+            return iter(run)
+
+        if run:
+            run_paths.append(self._spill(run, work_dir, label, len(run_paths)))
+        entry_size = self.key_length + _RECNO_SIZE + _DIGEST_SIZE + self.layout.record_length
+        return heapq.merge(*(_read_run(run_path, entry_size) for run_path in run_paths))
+
+    @staticmethod
+    def _spill(run: List[bytes], work_dir: str, label: str, index: int) -> str:
+        run.sort()
+        run_path = os.path.join(work_dir, f"{label}-{index:05d}.run")
+        with open(run_path, 'wb') as run_file:
+            run_file.writelines(run)
+        return run_path
+
+    def _split(self, entry: bytes) -> Tuple[bytes, int, bytes, bytes]:
+        key_end = self.key_length
+        recno_end = key_end + _RECNO_SIZE
+        digest_end = recno_end + _DIGEST_SIZE
+        return (entry[:key_end], int.from_bytes(entry[key_end:recno_end], 'big'),
+                entry[recno_end:digest_end], entry[digest_end:])
+
+    # Comparison -------------------------------------------------------------
+
+    def _pairs(self, path1: str, path2: str, work_dir: str, stats: Dict):
+        """Yield (record_number1, record1, digest1, record_number2, record2, digest2) with None for unmatched sides"""
+        if not self.key_fields:
+            records1 = iter_fixed_records(path1, self.layout, self.framing)
+            records2 = iter_fixed_records(path2, self.layout, self.framing)
+            for number, (left, right) in enumerate(zip_longest(records1, records2), start=1):
+                yield (number if left is not None else None, left, self.digest(left) if left is not None else None,
+                       number if right is not None else None, right, self.digest(right) if right is not None else None)
+            return
+
+        file1_stats: Dict = {}
+        file2_stats: Dict = {}
+        left_entries = self._sorted_entries(path1, work_dir, 'file1', file1_stats)
+        right_entries = self._sorted_entries(path2, work_dir, 'file2', file2_stats)
+        stats["sort"] = {"file1": file1_stats, "file2": file2_stats}
+
+        left = next(left_entries, None)
+        right = next(right_entries, None)
+        while left is not None or right is not None:
+            left_parts = self._split(left) if left is not None else None
+            right_parts = self._split(right) if right is not None else None
+            if right_parts is None or (left_parts is not None and left_parts[0] < right_parts[0]):
+                yield left_parts[1], left_parts[3], left_parts[2], None, None, None
+                left = next(left_entries, None)
+            elif left_parts is None or right_parts[0] < left_parts[0]:
+                yield None, None, None, right_parts[1], right_parts[3], right_parts[2]
+                right = next(right_entries, None)
+            else:
+                # Equal keys pair up in file order; duplicates beyond the shorter side are unmatched
+                yield left_parts[1], left_parts[3], left_parts[2], right_parts[1], right_parts[3], right_parts[2]
+                left = next(left_entries, None)
+                right = next(right_entries, None)
+
+    def compare(self, path1: str, path2: str, report_path: str, sample_size: int = DIFF_SAMPLE_SIZE) -> Dict:
+        """Compare two files, stream every difference to report_path and return summary counts"""
+        summary = {
+            "records_file1": 0,
+            "records_file2": 0,
+            "matched": 0,
+            "identical": 0,
+            "changed": 0,
+            "only_in_file1": 0,
+            "only_in_file2": 0,
+            "field_differences": {},
+            "mode": "keyed" if self.key_fields else "positional",
+            "key_fields": [field.name for field in self.key_fields]
+        }
+        sample: List[Dict] = []
+        field_counts: Dict[str, int] = {}
+
+        report_dir = os.path.dirname(report_path)
+        if report_dir:
+            os.makedirs(report_dir, exist_ok=True)
+
+        work_dir = tempfile.mkdtemp(prefix='filecomp-')
+        try:
+            with open(report_path, 'w', encoding='utf-8') as report:
+                for number1, record1, digest1, number2, record2, digest2 in self._pairs(path1, path2, work_dir, summary):
+                    if record1 is not None:
+                        summary["records_file1"] += 1
+                    if record2 is not None:
+                        summary["records_file2"] += 1
+
+                    if record1 is not None and record2 is not None:
+                        summary["matched"] += 1
+                        if digest1 == digest2:
+                            summary["identical"] += 1
+                            continue
+                        differences = self.field_differences(record1, record2)
+                        if not differences:
+                            # Same values, different bytes (e.g. blank vs zero-filled numerics)
+                            summary["identical"] += 1
+                            continue
+                        summary["changed"] += 1
+                        for difference in differences:
+                            field_counts[difference["field"]] = field_counts.get(difference["field"], 0) + 1
+                        item = {"type": "changed", "record_file1": number1, "record_file2": number2, "fields": differences}
+                    elif record1 is not None:
+                        summary["only_in_file1"] += 1
+                        item = {"type": "only_in_file1", "record_file1": number1}
+                    else:
+                        summary["only_in_file2"] += 1
+                        item = {"type": "only_in_file2", "record_file2": number2}
+
+                    if self.key_fields:
+                        item["key"] = self.display_key(record1 if record1 is not None else record2)
+                    report.write(json.dumps(item, ensure_ascii=False) + '\n')
+                    if len(sample) < sample_size:
+                        sample.append(item)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        summary["field_differences"] = dict(sorted(field_counts.items(), key=lambda item: -item[1]))
+        summary["differences"] = summary["changed"] + summary["only_in_file1"] + summary["only_in_file2"]
+        summary["sample"] = sample
+        return summary
+
+
+def _read_run(run_path: str, entry_size: int) -> Iterator[bytes]:
+    """Read fixed-size entries back from a sorted run file"""
+    chunk = max(1, MERGE_READ_BYTES // entry_size) * entry_size
+    with open(run_path, 'rb') as run_file:
+        while True:
+            block = run_file.read(chunk)
+            if not block:
+                return
+            for start in range(0, len(block), entry_size):
+                yield block[start:start + entry_size]
+
+
+def _jsonable(value):
+    if value is None or isinstance(value, (int, float, str)):
+        return value
+    return str(value)
@@ -0,0 +1,453 @@
+"""
+Streaming File Conversion
+Converts fixed-length record files to XLSX, CSV or Parquet batch by batch
+through the copybook decoder, and converts those formats back to fixed-length
+records, so memory use does not grow with the file. Both directions are
+generators that yield progress events and finish with a result event.
+"""
+
+import csv
+import os
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from columnar import DEFAULT_BATCH_RECORDS, NUMPY_AVAILABLE, iter_column_batches, mapped_file, np
+from copybook import CopybookField, RecordLayout, detect_framing
+from datagen import encode_column
+
+try:
+    import openpyxl
+    OPENPYXL_AVAILABLE = True
+except ImportError:  # pragma: no cover - XLSX conversion reports the missing package
+    openpyxl = None
+    OPENPYXL_AVAILABLE = False
+
+try:
+    import pyarrow
+    import pyarrow.parquet as parquet
+    PYARROW_AVAILABLE = True
+except ImportError:  # pragma: no cover - Parquet conversion reports the missing package
+    pyarrow = None
+    parquet = None
+    PYARROW_AVAILABLE = False
+
+CONVERT_FORMATS = ('xlsx', 'csv', 'parquet')
+
+# Records per batch for conversions (and between progress events)
+CONVERT_BATCH_RECORDS = DEFAULT_BATCH_RECORDS
+
+# Data rows per worksheet; XLSX sheets hold 1,048,576 rows including the header
+XLSX_SHEET_ROWS = 1048575
+
+_NEWLINES = {'lines': b'\n', 'crlf': b'\r\n', 'fixed': b''}
+
+
+class ConversionError(ValueError):
+    """Raised when a file cannot be converted"""
+
+
+def output_format_of(path: str, requested: Optional[str] = None) -> str:
+    """Conversion format from an explicit request or the file extension (default xlsx)"""
+    fmt = (requested or os.path.splitext(path)[1].lstrip('.') or 'xlsx').lower()
+    if fmt == 'xls':
+        fmt = 'xlsx'
+    if fmt not in CONVERT_FORMATS:
+        raise ConversionError(f"Unsupported format '{fmt}' (expected one of {', '.join(CONVERT_FORMATS)})")
+    if fmt == 'xlsx' and not OPENPYXL_AVAILABLE:
+        raise ConversionError("XLSX conversion requires openpyxl")
+    if fmt == 'parquet' and not PYARROW_AVAILABLE:
+        raise ConversionError("Parquet conversion requires pyarrow")
+    return fmt
+
+
+def _progress(records: int, done: int, total: int) -> Dict:
+    return {"type": "progress", "records": records,
+            "percent": round(min(100.0, 100.0 * done / total), 1) if total else 100.0}
+
+
+# Writers --------------------------------------------------------------------
+
+class _CsvWriter:
+    def __init__(self, path: str, fields: List[CopybookField]):
+        self.file = open(path, 'w', encoding='utf-8', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow([field.display_name for field in fields])
+        self.formats = [f"{{:.{field.scale}f}}" if field.scale and field.kind != 'float' else None for field in fields]
+
+    def write(self, columns: List[list]):
+        for column, fmt in zip(columns, self.formats):
+            if fmt:
+                column[:] = ['' if value is None else fmt.format(value) for value in column]
+        self.writer.writerows(zip(*columns))
+
+    def close(self) -> Dict:
+        self.file.close()
+        return {}
+
+
+class _XlsxWriter:
+    """Write-only workbook; rows stream to disk and a new sheet starts when one fills up"""
+
+    def __init__(self, path: str, fields: List[CopybookField]):
+        self.path = path
+        self.header = [field.display_name for field in fields]
+        self.workbook = openpyxl.Workbook(write_only=True)
+        self.sheets = 0
+        self.rows_in_sheet = XLSX_SHEET_ROWS
+        self.sheet = None
+
+    def write(self, columns: List[list]):
+        for row in zip(*columns):
+            if self.rows_in_sheet == XLSX_SHEET_ROWS:
+                self.sheets += 1
+                self.sheet = self.workbook.create_sheet('Data' if self.sheets == 1 else f'Data {self.sheets}')
+                self.sheet.append(self.header)
+                self.rows_in_sheet = 0
+            self.sheet.append(row)
+            self.rows_in_sheet += 1
+
+    def close(self) -> Dict:
+        if self.sheet is None:
+            self.workbook.create_sheet('Data').append(self.header)
+            self.sheets = 1
+        self.workbook.save(self.path)
+        return {"sheets": self.sheets}
+
+
+class _ParquetWriter:
+    def __init__(self, path: str, fields: List[CopybookField]):
+        self.names = [field.display_name for field in fields]
+        self.types = [
+            pyarrow.string() if not field.is_numeric
+            else pyarrow.int64() if field.kind != 'float' and not field.scale
+            else pyarrow.float64()
+            for field in fields
+        ]
+        self.writer = parquet.ParquetWriter(path, pyarrow.schema(list(zip(self.names, self.types))))
+        self.row_groups = 0
+
+    def write(self, columns: List[list]):
+        arrays = [pyarrow.array(column, type=arrow_type) for column, arrow_type in zip(columns, self.types)]
+        self.writer.write_table(pyarrow.Table.from_arrays(arrays, names=self.names))
+        self.row_groups += 1
+
+    def close(self) -> Dict:
+        self.writer.close()
+        return {"row_groups": self.row_groups}
+
+
+_WRITERS = {'csv': _CsvWriter, 'xlsx': _XlsxWriter, 'parquet': _ParquetWriter}
+
+
+# Fixed-length -> XLSX / CSV / Parquet -----------------------------------------
+
+def _plain(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _iter_column_lists(data_path: str, layout: RecordLayout, encoding: str, framing: str,
+                       batch_records: int) -> Iterator[Tuple[int, List[list], int]]:
+    """Yield (record count, one list per data field, invalid values) for each batch"""
+    fields = layout.data_fields
+    if NUMPY_AVAILABLE:
+        for batch in iter_column_batches(data_path, layout, batch_records, encoding, framing):
+            columns = []
+            invalid = 0
+            for field in fields:
+                values = batch.columns[field.name].tolist()
+                bad = batch.invalid[field.name]
+                invalid += int(bad.sum())
+                for index in np.flatnonzero(batch.nulls[field.name] | bad).tolist():
+                    values[index] = None
+                columns.append(values)
+            yield batch.count, columns, invalid
+        return
+
+    with mapped_file(data_path) as data:
+        rows: List[Dict] = []
+        for row in layout.iter_decode(memoryview(data), encoding, framing):
+            rows.append(row)
+            if len(rows) == batch_records:
+                yield len(rows), *_rows_to_columns(rows, fields)
+                rows = []
+        if rows:
+            yield len(rows), *_rows_to_columns(rows, fields)
+
+
+def _rows_to_columns(rows: List[Dict], fields: List[CopybookField]) -> Tuple[List[list], int]:
+    columns = []
+    invalid = 0
+    for field in fields:
+        column = [row.get(field.name) for row in rows]
+        if field.is_numeric:
+            # Undecodable numerics come back as their raw text
+            invalid += sum(1 for value in column if isinstance(value, str))
+            column = [None if isinstance(value, str) else _plain(value) for value in column]
+        columns.append(column)
+    return columns, invalid
+
+
+def iter_convert(data_path: str, layout: RecordLayout, output_path: str, output_format: str,
+                 encoding: str = 'latin-1', framing: str = 'auto',
+                 batch_records: int = CONVERT_BATCH_RECORDS) -> Iterator[Dict]:
+    """Convert a record file, yielding a progress event per batch and a final result event"""
+    output_format = output_format_of(output_path, output_format)
+    size = os.path.getsize(data_path)
+    with mapped_file(data_path) as data:
+        with memoryview(data) as view:
+            if framing == 'auto':
+                framing = detect_framing(view, layout.record_length)
+    estimated = size // max(1, layout.record_length + (1 if framing == 'lines' else 0))
+
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    writer = _WRITERS[output_format](output_path, layout.data_fields)
+    records = 0
+    invalid = 0
+    try:
+        for count, columns, bad in _iter_column_lists(data_path, layout, encoding, framing, batch_records):
+            writer.write(columns)
+            records += count
+            invalid += bad
+            yield _progress(records, records, max(estimated, records))
+    finally:
+        details = writer.close()
+
+    yield {
+        "type": "result",
+        "records": records,
+        "fields": len(layout.data_fields),
+        "invalid_values": invalid,
+        "format": output_format,
+        "bytes": os.path.getsize(output_path),
+        **details
+    }
+
+
+# XLSX / CSV / Parquet -> fixed-length -----------------------------------------
+
+def _read_csv(path: str, batch_records: int) -> Iterator[Tuple[List[str], List[tuple], int, int]]:
+    size = os.path.getsize(path)
+    consumed = [0]
+
+    def lines(source):
+        for line in source:
+            consumed[0] += len(line)
+            yield line
+
+    with open(path, 'r', encoding='utf-8-sig', newline='') as source:
+        reader = csv.reader(lines(source))
+        header = next(reader, None)
+        if header is None:
+            return
+        rows: List[tuple] = []
+        for row in reader:
+            if not any(row):
+                continue
+            rows.append(row)
+            if len(rows) == batch_records:
+                yield header, rows, consumed[0], size
+                rows = []
+        if rows:
+            yield header, rows, size, size
+
+
+def _read_xlsx(path: str, batch_records: int) -> Iterator[Tuple[List[str], List[tuple], int, int]]:
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        total = sum(sheet.max_row or 0 for sheet in workbook.worksheets)
+        done = 0
+        for sheet in workbook.worksheets:
+            rows_iter = sheet.iter_rows(values_only=True)
+            header = next(rows_iter, None)
+            if header is None:
+                continue
+            header = ['' if name is None else str(name) for name in header]
+            rows: List[tuple] = []
+            for row in rows_iter:
+                done += 1
+                if row is None or all(value is None for value in row):
+                    continue
+                rows.append(row)
+                if len(rows) == batch_records:
+                    yield header, rows, done, total
+                    rows = []
+            if rows:
+                yield header, rows, done, total
+    finally:
+        workbook.close()
+
+
+def _read_parquet(path: str, batch_records: int) -> Iterator[Tuple[List[str], List[tuple], int, int]]:
+    source = parquet.ParquetFile(path)
+    total = source.metadata.num_rows
+    done = 0
+    for batch in source.iter_batches(batch_size=batch_records):
+        done += batch.num_rows
+        columns = [column.to_pylist() for column in batch.columns]
+        yield list(batch.schema.names), list(zip(*columns)), done, total
+
+
+_READERS = {'csv': _read_csv, 'xlsx': _read_xlsx, 'parquet': _read_parquet}
+
+
+def _scaled(value, field: CopybookField) -> Optional[int]:
+    """A cell as an integer in units of the field's implied decimals (None when not a number)"""
+    if isinstance(value, bool):
+        return None
+    try:
+        if isinstance(value, float):
+            number = Decimal(repr(value))
+        elif isinstance(value, (int, Decimal)):
+            number = Decimal(value)
+        else:
+            number = Decimal(str(value).strip().replace(',', ''))
+        return int(number.scaleb(field.scale).to_integral_value())
+    except (InvalidOperation, ValueError):
+        return None
+
+
+def _float(value) -> float:
+    try:
+        return float(str(value).strip().replace(',', '')) if isinstance(value, str) else float(value)
+    except ValueError:
+        return 0.0
+
+
+def _limits(field: CopybookField) -> Tuple[int, int]:
+    """Smallest and largest scaled value a field can hold"""
+    if field.kind == 'binary':
+        bits = 8 * field.length
+        return (-(1 << (bits - 1)), (1 << (bits - 1)) - 1) if field.signed else (0, (1 << bits) - 1)
+    top = 10 ** field.digits - 1
+    return (-top if field.signed else 0, top)
+
+
+def _encode_rows(rows: List[tuple], positions: Dict[str, int], layout: RecordLayout,
+                 encoding: str, newline: bytes, invalid: Dict[str, int]) -> bytes:
+    count = len(rows)
+    length = layout.record_length
+    block = np.full((count, length + len(newline)), 0x20, dtype=np.uint8)
+    if newline:
+        block[:, length:] = np.frombuffer(newline, dtype=np.uint8)
+
+    for field in layout.primary_fields:
+        position = positions.get(field.name)
+        if field.is_filler or position is None:
+            if field.kind in ('binary', 'float'):
+                block[:, field.offset:field.end] = 0
+            continue
+        cells = [row[position] if position < len(row) else None for row in rows]
+
+        if not field.is_numeric:
+            text = b''.join(
+                ('' if cell is None else str(cell)).encode(encoding, errors='replace')[:field.length].ljust(field.length)
+                for cell in cells
+            )
+            block[:, field.offset:field.end] = np.frombuffer(text, dtype=np.uint8).reshape(count, field.length)
+            continue
+
+        blank = np.array([cell is None or (isinstance(cell, str) and not cell.strip()) for cell in cells], dtype=bool)
+        if field.kind == 'float':
+            values = np.array([0.0 if empty else _float(cell) for cell, empty in zip(cells, blank)], dtype=np.float64)
+        else:
+            low, high = _limits(field)
+            scaled = [0 if empty else _scaled(cell, field) for cell, empty in zip(cells, blank)]
+            bad = [value is None or not low <= value <= high for value in scaled]
+            if any(bad):
+                invalid[field.name] = invalid.get(field.name, 0) + sum(bad)
+                blank |= np.array(bad, dtype=bool)
+            values = np.array([0 if value is None or wrong else value for value, wrong in zip(scaled, bad)],
+                              dtype=np.int64)
+        column = encode_column(field, values)
+        if field.kind in ('zoned', 'packed'):
+            # Empty cells go back as blanks, which the decoder reads as null
+            column = np.where(blank[:, None], 0x20, column).astype(np.uint8)
+        block[:, field.offset:field.end] = column
+
+    return block.tobytes()
+
+
+def iter_reverse(input_path: str, layout: RecordLayout, output_path: str, input_format: Optional[str] = None,
+                 output_format: str = 'fixed', encoding: str = 'latin-1',
+                 batch_records: int = CONVERT_BATCH_RECORDS) -> Iterator[Dict]:
+    """
+    Convert an XLSX, CSV or Parquet file back to fixed-length records ('fixed' or 'crlf'/'lines'
+    framing) or to delimited text ('csv'); yields progress events and a final result event.
+    Columns are matched to fields by COBOL name, display name or path.
+    """
+    input_format = output_format_of(input_path, input_format)
+    if output_format not in ('fixed', 'csv', 'lines', 'crlf'):
+        raise ConversionError(f"Unsupported output format '{output_format}'")
+    if output_format != 'csv' and not NUMPY_AVAILABLE:
+        raise ConversionError("Conversion to fixed-length records requires numpy")
+    newline = _NEWLINES['lines' if output_format == 'fixed' else output_format] if output_format != 'csv' else b''
+
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    records = 0
+    invalid: Dict[str, int] = {}
+    matched: Dict[str, str] = {}
+    unmatched: List[str] = []
+    csv_writer = None
+    if output_format == 'csv':
+        target = open(output_path, 'w', encoding='utf-8', newline='')
+    else:
+        target = open(output_path, 'wb')
+    try:
+        for header, rows, done, total in _READERS[input_format](input_path, batch_records):
+            positions: Dict[str, int] = {}
+            for index, name in enumerate(header):
+                field = layout.find_field(name.strip()) if name else None
+                if field is None or field.is_filler:
+                    if name and name not in unmatched:
+                        unmatched.append(name)
+                    continue
+                positions.setdefault(field.name, index)
+                matched[field.name] = name
+            if not positions:
+                raise ConversionError("No column matches a copybook field")
+
+            if output_format == 'csv':
+                if csv_writer is None:
+                    csv_writer = csv.writer(target)
+                    csv_writer.writerow([field.display_name for field in layout.data_fields])
+                csv_writer.writerows(
+                    ['' if positions.get(field.name) is None or positions[field.name] >= len(row)
+                     or row[positions[field.name]] is None else row[positions[field.name]]
+                     for field in layout.data_fields]
+                    for row in rows
+                )
+            else:
+                target.write(_encode_rows(rows, positions, layout, encoding, newline, invalid))
+            records += len(rows)
+            yield _progress(records, done, total)
+    finally:
+        target.close()
+
+    yield {
+        "type": "result",
+        "records": records,
+        "fields": len(matched),
+        "matched_columns": matched,
+        "unmatched_columns": unmatched,
+        "invalid_values": invalid,
+        "format": 'csv' if output_format == 'csv' else 'fixed',
+        "record_length": layout.record_length,
+        "bytes": os.path.getsize(output_path)
+    }
+
+
+def run_to_completion(events: Iterator[Dict]) -> Dict:
+    """Drain a conversion generator and return its result event"""
+    result: Dict = {}
+    for event in events:
+        if event.get('type') == 'result':
+            result = event
+    return result
@@ -0,0 +1,223 @@
+"""
+Job Runtime History
+Persists past job runtimes (submit -> OUTPUT QUEUE) per job name and host,
+and turns them into a predictive status polling schedule
+"""
+
+import os
+import sqlite3
+import statistics
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Number of most recent runtimes used for a prediction
+HISTORY_WINDOW = 20
+
+# Only trust a completion seen on the first poll if the check started this soon after submit
+FRESH_SUBMIT_SECONDS = 60.0
+
+
+def job_name_of(job_identifier: str) -> str:
+    """Job name part of an identifier: 'HERC01A(JOB00123)' -> 'HERC01A'"""
+    return job_identifier.split('(', 1)[0].strip().upper()
+
+
+class JobRuntimeHistory:
+    """SQLite-backed store of job submissions and observed runtimes"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS job_submissions ("
+                " host TEXT NOT NULL, job_identifier TEXT NOT NULL, job_name TEXT NOT NULL,"
+                " submitted_at REAL NOT NULL, PRIMARY KEY (host, job_identifier))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS job_runtimes ("
+                " host TEXT NOT NULL, job_name TEXT NOT NULL, runtime_seconds REAL NOT NULL,"
+                " recorded_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_job_runtimes_lookup"
+                " ON job_runtimes (host, job_name, recorded_at)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Connection that commits on success and is always closed (sqlite3's own context manager only commits)"""
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def record_submission(self, host: str, job_identifier: str, submitted_at: Optional[float] = None):
+        """Remember when a job was submitted so its runtime can be measured later"""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO job_submissions VALUES (?, ?, ?, ?)",
+                (host, job_identifier.strip(), job_name_of(job_identifier), submitted_at or time.time())
+            )
+
+    def submitted_at(self, host: str, job_identifier: str) -> Optional[float]:
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT submitted_at FROM job_submissions WHERE host = ? AND job_identifier = ?",
+                (host, job_identifier.strip())
+            ).fetchone()
+        return row[0] if row else None
+
+    def record_completion(self, host: str, job_identifier: str, completed_at: Optional[float] = None) -> Optional[float]:
+        """
+        Record the runtime of a job that reached OUTPUT QUEUE.
+        Returns the runtime in seconds, or None if the submission was not tracked.
+        """
+        identifier = job_identifier.strip()
+        submitted_at = self.submitted_at(host, identifier)
+        if submitted_at is None:
+            return None
+
+        runtime = max(0.0, (completed_at or time.time()) - submitted_at)
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO job_runtimes VALUES (?, ?, ?, ?)",
+                (host, job_name_of(identifier), runtime, time.time())
+            )
+            conn.execute(
+                "DELETE FROM job_submissions WHERE host = ? AND job_identifier = ?",
+                (host, identifier)
+            )
+        return runtime
+
+    def forget_submission(self, host: str, job_identifier: str):
+        """Drop a tracked submission whose runtime cannot be measured reliably"""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "DELETE FROM job_submissions WHERE host = ? AND job_identifier = ?",
+                (host, job_identifier.strip())
+            )
+
+    def runtimes(self, host: str, job_name: str) -> List[float]:
+        """Most recent runtimes (seconds) for a job name on a host"""
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT runtime_seconds FROM job_runtimes WHERE host = ? AND job_name = ?"
+                " ORDER BY recorded_at DESC LIMIT ?",
+                (host, job_name.upper(), HISTORY_WINDOW)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def estimate(self, host: str, job_name: str) -> Optional[Dict[str, float]]:
+        """Expected runtime, spread and worst case from history, or None without history"""
+        runtimes = self.runtimes(host, job_name)
+        if not runtimes:
+            return None
+
+        ordered = sorted(runtimes)
+        expected = statistics.median(ordered)
+        if len(ordered) >= 4:
+            quartiles = statistics.quantiles(ordered, n=4)
+            spread = (quartiles[2] - quartiles[0]) / 2
+        else:
+            spread = (ordered[-1] - ordered[0]) / 2
+
+        return {
+            "samples": len(ordered),
+            "expected_seconds": expected,
+            "spread_seconds": spread,
+            "max_seconds": ordered[-1]
+        }
+
+
+def fixed_poll_schedule(max_attempts: int, wait_seconds: float, poll_seconds: float) -> List[float]:
+    """Offsets (seconds from start) of the classic fixed-interval schedule"""
+    return [attempt * (wait_seconds + poll_seconds) for attempt in range(max_attempts)]
+
+
+def predictive_poll_schedule(
+    estimate: Dict[str, float],
+    elapsed_since_submit: float,
+    max_attempts: int,
+    base_interval: float,
+    poll_seconds: float
+) -> List[float]:
+    """
+    Offsets (seconds from start) at which to poll, shaped by runtime history:
+    an early poll if completion is far away, a cluster of polls around the
+    expected completion, exponential backoff afterwards, and one final
+    confirmation poll past the worst case seen so far. Polls never run later
+    than the fixed schedule's worst case, so an outlier in the history cannot
+    hold a request for much longer than the caller asked for.
+    """
+    if max_attempts <= 0:
+        return []
+
+    # Start of the last poll of the fixed schedule with the same attempts
+    ceiling = (max_attempts - 1) * (base_interval + poll_seconds)
+    remaining = max(0.0, estimate["expected_seconds"] - elapsed_since_submit)
+    spread = max(estimate["spread_seconds"], poll_seconds)
+    min_gap = poll_seconds
+
+    offsets: List[float] = []
+
+    def add(offset: float):
+        offset = max(0.0, offset)
+        if offsets and offset < offsets[-1] + min_gap:
+            offset = offsets[-1] + min_gap
+        offsets.append(offset)
+
+    # Catch unknown or already finished jobs without waiting for the cluster
+    if remaining - spread > base_interval:
+        add(0.0)
+
+    # Cluster around the expected completion time
+    for offset in (remaining - spread, remaining, remaining + spread):
+        add(offset)
+
+    # Exponential backoff after the cluster, then one final confirmation
+    worst_case_remaining = max(0.0, estimate["max_seconds"] * 1.5 - elapsed_since_submit)
+    interval = max(base_interval, spread)
+    backoff: List[float] = []
+    next_offset = offsets[-1]
+    while len(offsets) + len(backoff) < max_attempts - 1:
+        next_offset += interval
+        backoff.append(next_offset)
+        interval *= 2
+
+    schedule = (offsets + backoff)[:max(1, max_attempts - 1)]
+    if max_attempts > 1:
+        schedule.append(max(schedule[-1] + interval, worst_case_remaining))
+
+    capped: List[float] = []
+    for offset in schedule:
+        offset = min(offset, ceiling)
+        if capped and offset < capped[-1] + min_gap:
+            break
+        capped.append(offset)
+    return capped
+
+
+def polling_savings(
+    detected_at: float,
+    polls_used: int,
+    wait_seconds: float,
+    poll_seconds: float
+) -> Tuple[int, int]:
+    """
+    Estimate polls and latency saved compared to the fixed schedule, assuming
+    the job finished just before it was detected.
+    Returns (polls_saved, latency_saved_ms).
+    """
+    period = wait_seconds + poll_seconds
+    fixed_polls = int(detected_at // period) + 1
+    fixed_detected_at = (fixed_polls - 1) * period
+    if fixed_detected_at < detected_at:
+        fixed_polls += 1
+        fixed_detected_at += period
+    return fixed_polls - polls_used, int((fixed_detected_at - detected_at) * 1000)
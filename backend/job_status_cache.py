@@ -0,0 +1,125 @@
+"""
+Shared Job Status Cache
+Caches job status results across sessions and workflows with a short TTL and
+coalesces concurrent queries for the same job into one host round-trip
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+# Seconds a non-final status stays fresh
+JOB_STATUS_TTL = 5.0
+
+# Upper bound on cached entries (final states are evicted oldest first)
+JOB_STATUS_CACHE_SIZE = 1000
+
+# Seconds a coalesced caller waits for the in-flight query
+IN_FLIGHT_WAIT_SECONDS = 60.0
+
+
+class _InFlight:
+    """A host query in progress that other callers can wait on"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value: Optional[Dict] = None
+
+
+class JobStatusCache:
+    """
+    Single-flight status cache keyed by (host, user, job identifier).
+    Entries marked final (e.g. OUTPUT QUEUE) never expire and are never queried again.
+    """
+
+    def __init__(self, ttl_seconds: float = JOB_STATUS_TTL, max_entries: int = JOB_STATUS_CACHE_SIZE):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[Dict, float, bool]]" = OrderedDict()
+        self._in_flight: Dict[Hashable, _InFlight] = {}
+        self._lock = threading.Lock()
+
+    def _fresh(self, key: Hashable, fetched_after: float = 0.0) -> Optional[Dict]:
+        """Cached value for key if final, or younger than the TTL and fetched after fetched_after (caller holds the lock)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, fetched_at, final = entry
+        if final or (time.time() - fetched_at < self.ttl_seconds and fetched_at > fetched_after):
+            return value
+        return None
+
+    def peek_final(self, key: Hashable) -> Optional[Dict]:
+        """Return the cached value only if the job already reached a final state"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[0] if entry and entry[2] else None
+
+    def get_or_fetch(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Dict],
+        is_final: Callable[[Dict], bool],
+        cacheable: Callable[[Dict], bool] = lambda value: True,
+        fetched_after: float = 0.0
+    ) -> Tuple[Dict, str]:
+        """
+        Return (value, source) where source is 'cache', 'coalesced' or 'host'.
+        Only one caller per key runs fetch at a time; the others wait for its result.
+        A polling caller passes the time of its previous poll as fetched_after so a
+        repeat poll is never answered with the status it already saw.
+        """
+        with self._lock:
+            cached = self._fresh(key, fetched_after)
+            if cached is not None:
+                return cached, 'cache'
+
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _InFlight()
+                self._in_flight[key] = flight
+
+        if not leader:
+            flight.event.wait(IN_FLIGHT_WAIT_SECONDS)
+            if flight.value is not None:
+                return flight.value, 'coalesced'
+            # The leader failed or timed out: query the host ourselves
+            return fetch(), 'host'
+
+        value: Optional[Dict] = None
+        try:
+            value = fetch()
+            return value, 'host'
+        finally:
+            with self._lock:
+                if value is not None and cacheable(value):
+                    self._store(key, value, is_final(value))
+                self._in_flight.pop(key, None)
+            flight.value = value
+            flight.event.set()
+
+    def _store(self, key: Hashable, value: Dict, final: bool):
+        """Store a value and evict expired or excess entries (caller holds the lock)"""
+        self._entries[key] = (value, time.time(), final)
+        self._entries.move_to_end(key)
+
+        now = time.time()
+        expired = [
+            cached_key for cached_key, (_, fetched_at, cached_final) in self._entries.items()
+            if not cached_final and now - fetched_at >= self.ttl_seconds
+        ]
+        for cached_key in expired:
+            del self._entries[cached_key]
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "final_entries": sum(1 for _, _, final in self._entries.values() if final),
+                "in_flight": len(self._in_flight)
+            }
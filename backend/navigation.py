@@ -0,0 +1,127 @@
+"""
+Screen Navigation Graph
+Known 3270 screen states recognized by screen signatures, connected by the
+s3270 actions that move between them, with a shortest-path planner so a
+session reaches READY or an ISPF panel in the fewest keystrokes
+"""
+
+import heapq
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Actions executed by one navigation request before giving up
+NAVIGATION_MAX_STEPS = 8
+
+UNKNOWN_STATE = 'unknown'
+
+# Identification order matters: ISPF panels before READY (a panel may echo "READY" in its log area)
+SCREEN_STATES: List[Tuple[str, List[str]]] = [
+    ('logon', [r'ENTER YOUR USERID', r'IKJ56700A\s+ENTER\s+USERID', r'LOGON\s*===>']),
+    ('dslist', [r'DSLIST\s+-\s+DATA\s+SETS\s+(MATCHING|ON\s+VOLUME)']),
+    ('dslist_entry', [r'DATA\s+SET\s+LIST\s+UTILITY']),
+    ('edit', [r'^\s*EDIT\s+\S+.*COLUMNS\s+\d+']),
+    ('sysout_browse', [r'SDSF\s+OUTPUT\s+DISPLAY', r'^\s*BROWSE\s+\S+.*LINE\s+\d+']),
+    ('ispf_primary', [r'ISPF\s+PRIMARY\s+OPTION\s+MENU', r'ISPF\s+MAIN\s+MENU', r'PRIMARY\s+OPTION\s+MENU']),
+    # TSO line mode waiting for Enter after a full screen of output
+    ('tso_more', [r'\*\*\*\s*\Z']),
+    ('ready', [r'\bREADY\b']),
+]
+
+_COMPILED_STATES = [(name, [re.compile(pattern, re.MULTILINE) for pattern in patterns])
+                    for name, patterns in SCREEN_STATES]
+
+# Panels where the ISPF command line accepts jumps (=3.4, =X) and PF4 is RETURN
+ISPF_STATES = ('ispf_primary', 'dslist_entry', 'dslist', 'edit', 'sysout_browse')
+
+# (source, target, actions, required params); '*' stands for every ISPF panel.
+# Cost of a transition is its number of actions (keystrokes).
+TRANSITIONS: List[Tuple[str, str, Tuple[str, ...], Tuple[str, ...]]] = [
+    ('ready', 'ispf_primary', ('String("ISPF")', 'Enter'), ()),
+    ('tso_more', 'ready', ('Enter',), ()),
+    ('ispf_primary', 'ready', ('String("=X")', 'Enter'), ()),
+    ('dslist_entry', 'ispf_primary', ('PF(4)',), ()),
+    ('dslist', 'ispf_primary', ('PF(4)',), ()),
+    ('edit', 'ispf_primary', ('PF(4)',), ()),
+    ('sysout_browse', 'ispf_primary', ('PF(4)',), ()),
+    ('dslist', 'dslist_entry', ('PF(3)',), ()),
+    ('*', 'dslist_entry', ('String("=3.4")', 'Enter'), ()),
+    ('*', 'dslist', ('String("DSLIST \'{level}\'")', 'Enter'), ('level',)),
+    ('*', 'edit', ('String("TSO ISPEXEC EDIT DATASET(\'{dataset}\')")', 'Enter'), ('dataset',)),
+    # Unrecognized screen: PF3 backs out of most dialogs; the planner re-identifies afterwards
+    (UNKNOWN_STATE, 'ready', ('PF(3)',), ()),
+]
+
+TARGET_STATES = ('ready', 'ispf_primary', 'dslist_entry', 'dslist', 'edit')
+
+# What a parameterized state shows for its parameter (the level listed, the dataset edited)
+_PARAM_SIGNATURES: Dict[Tuple[str, str], str] = {
+    ('dslist', 'level'): r"DSLIST\s+-\s+DATA\s+SETS\s+MATCHING\s+'?{value}'?(\s|$)",
+    ('edit', 'dataset'): r"^\s*EDIT\s+'?{value}'?(\s|-|$)",
+}
+
+
+def identify_screen(screen: str) -> str:
+    """Name of the known state whose signature matches the screen, else 'unknown'"""
+    text = screen.upper().rstrip()
+    for name, patterns in _COMPILED_STATES:
+        if any(pattern.search(text) for pattern in patterns):
+            return name
+    return UNKNOWN_STATE
+
+
+def _normalized(params: Optional[Dict[str, str]]) -> Dict[str, str]:
+    return {key: str(value).strip().strip("'").upper() for key, value in (params or {}).items() if value}
+
+
+def screen_matches(state: str, screen: str, params: Optional[Dict[str, str]] = None) -> bool:
+    """Whether a screen in `state` shows what the params ask for (any screen matches when none apply)"""
+    text = screen.upper()
+    for name, value in _normalized(params).items():
+        signature = _PARAM_SIGNATURES.get((state, name))
+        if signature and not re.search(signature.format(value=re.escape(value)), text, re.MULTILINE):
+            return False
+    return True
+
+
+def _edges(params: Dict[str, str]) -> Dict[str, List[Tuple[str, List[str]]]]:
+    """Adjacency list with '*' expanded and parameterized actions filled in (edges missing a param are dropped)"""
+    graph: Dict[str, List[Tuple[str, List[str]]]] = {}
+    for source, target, actions, required in TRANSITIONS:
+        if any(not params.get(name) for name in required):
+            continue
+        filled = [action.format(**params) if required else action for action in actions]
+        for origin in (ISPF_STATES if source == '*' else (source,)):
+            # Parameterized transitions also re-enter their own state with other content
+            if origin != target or required:
+                graph.setdefault(origin, []).append((target, filled))
+    return graph
+
+
+def shortest_path(source: str, target: str, params: Optional[Dict[str, str]] = None,
+                  reenter: bool = False) -> Optional[List[Dict]]:
+    """
+    Fewest-keystroke list of transitions from source to target ([] when already there,
+    None when unreachable). With reenter, a source equal to the target still needs at
+    least one transition (the screen shows the target state for other params).
+    """
+    if source == target and not reenter:
+        return []
+    graph = _edges(_normalized(params))
+
+    # Dijkstra over a handful of states; ties broken by insertion order
+    frontier: List[Tuple[int, int, str, List[Dict]]] = [(0, 0, source, [])]
+    settled = set()
+    counter = 0
+    while frontier:
+        cost, _, state, path = heapq.heappop(frontier)
+        if state == target and (path or not reenter):
+            return path
+        if state in settled:
+            continue
+        settled.add(state)
+        for following, actions in graph.get(state, []):
+            if following not in settled or (reenter and following == target):
+                counter += 1
+                step = {"from": state, "to": following, "actions": actions}
+                heapq.heappush(frontier, (cost + len(actions), counter, following, path + [step]))
+    return None
@@ -0,0 +1,329 @@
+"""
+Upload Pre-flight Validation
+Scans a local file through a memory map before an IND$FILE transfer and
+checks record lengths against LRECL/RECFM, characters against the target
+code page and numeric fields against the copybook, so a bad file is rejected
+before the transfer starts instead of failing or being truncated on the host.
+"""
+
+import codecs
+from typing import Callable, Dict, List, Optional
+
+from columnar import NUMPY_AVAILABLE, iter_column_batches, mapped_file, np
+from copybook import RecordLayout, detect_framing, record_stride
+from ebcdic import binary_columns, translate_tables
+
+# Offending record numbers listed per problem
+PREFLIGHT_SAMPLE_SIZE = 10
+
+# Largest record IND$FILE / QSAM accept
+MAX_LRECL = 32760
+
+# Bytes with no printable host equivalent in a text record (C0 controls except tab and line ends, DEL)
+_CONTROL_BYTES = bytes([byte for byte in range(0x20) if byte not in (0x09, 0x0A, 0x0D)] + [0x7F])
+
+# C1 controls of single-byte data; in UTF-8 text the same bytes are continuation bytes
+_C1_BYTES = bytes(range(0x80, 0xA0))
+
+# Read size when checking that text is valid UTF-8
+_DECODE_CHUNK = 4 * 1024 * 1024
+
+
+def code_page_sensitive(code_page: str) -> bytes:
+    """Local characters that land on different bytes in cp037 and cp1047 (e.g. [ ] ^)"""
+    cp037 = translate_tables('cp037')[1]
+    cp1047 = translate_tables('cp1047')[1]
+    translate_tables(code_page)
+    return bytes(byte for byte in range(256) if cp037[byte] != cp1047[byte])
+
+
+def _line_starts_and_lengths(data):
+    """Start offset and length (without CR/LF) of each line"""
+    if NUMPY_AVAILABLE:
+        raw = np.frombuffer(data, dtype=np.uint8)
+        if len(raw) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        ends = np.flatnonzero(raw == 0x0A)
+        if len(ends) == 0 or ends[-1] != len(raw) - 1:
+            ends = np.append(ends, len(raw))
+        starts = np.concatenate(([0], ends[:-1] + 1)).astype(np.int64)
+        lengths = ends - starts
+        has_cr = np.zeros(len(ends), dtype=bool)
+        nonempty = lengths > 0
+        has_cr[nonempty] = raw[ends[nonempty] - 1] == 0x0D
+        return starts, lengths - has_cr
+
+    starts: List[int] = []
+    lengths: List[int] = []
+    position = 0
+    while position < len(data):
+        end = data.find(b'\n', position)
+        end = len(data) if end < 0 else end
+        length = end - position
+        if length and data[end - 1:end] == b'\r':
+            length -= 1
+        starts.append(position)
+        lengths.append(length)
+        position = end + 1
+    return starts, lengths
+
+
+def _where(lengths, predicate) -> List[int]:
+    """Record indexes whose length satisfies predicate"""
+    if NUMPY_AVAILABLE:
+        return np.flatnonzero(predicate(lengths)).tolist()
+    return [index for index, length in enumerate(lengths) if predicate(length)]
+
+
+def _numbers(indexes) -> List[int]:
+    return [int(index) + 1 for index in indexes[:PREFLIGHT_SAMPLE_SIZE]]
+
+
+def validate_upload(path: str, dcb: Optional[Dict] = None, layout: Optional[RecordLayout] = None,
+                    transfer_mode: str = 'ascii', code_page: str = 'cp037', framing: str = 'auto',
+                    encoding: str = 'latin-1') -> Dict:
+    """
+    Check a local file against the DCB it is being uploaded to (and the copybook, if any).
+    Errors mean the transfer would fail or lose data; warnings mean it would change the data.
+    """
+    dcb = dcb or {}
+    errors: List[str] = []
+    warnings: List[str] = []
+    checks: Dict[str, Dict] = {}
+
+    # Attributes the caller did not send stay unknown (the host keeps or defaults them)
+    recfm = str(dcb.get('recfm') or '').upper()
+    lrecl = int(dcb['lrecl']) if dcb.get('lrecl') else None
+    blksize = int(dcb['blksize']) if dcb.get('blksize') else None
+    binary = transfer_mode.lower() == 'binary'
+
+    if layout is not None and lrecl and lrecl != layout.record_length and recfm.startswith('F'):
+        errors.append(f"LRECL {lrecl} does not match the copybook record length {layout.record_length}")
+
+    with mapped_file(path) as data:
+        size = len(data)
+        stride = None
+        with memoryview(data) as view:
+            if binary and layout is None:
+                framing = 'fixed'
+            elif framing == 'auto':
+                framing = detect_framing(view, layout.record_length) if layout else 'lines'
+            # Equal-width lines are sliced by offset so newline bytes inside COMP fields do not split records
+            if framing == 'lines' and layout is not None:
+                stride = record_stride(view, layout.record_length, 'lines')
+
+        # Record lengths against LRECL / RECFM
+        if framing == 'fixed':
+            stride = lrecl or (layout.record_length if layout else None) or size or 1
+            records = size // stride
+            starts = None
+            checks["record_length"] = {"framing": framing, "bytes": size, "min": stride, "max": stride}
+            if size % stride:
+                errors.append(f"File size {size} is not a multiple of the record length {stride} "
+                              f"({size % stride} trailing byte(s))")
+        else:
+            if stride:
+                starts = None
+                records = -(-size // stride)
+                line_length = stride - 2 if data[stride - 2:stride - 1] == b'\r' else stride - 1
+                lengths = np.full(records, line_length) if NUMPY_AVAILABLE else [line_length] * records
+            else:
+                starts, lengths = _line_starts_and_lengths(data)
+                records = len(lengths)
+            longest = int(max(lengths)) if records else 0
+            checks["record_length"] = {"framing": framing, "bytes": size, "max": longest,
+                                       "min": int(min(lengths)) if records else 0}
+            # Bytes past LRECL of a text record; dropping only blanks changes nothing that matters
+            def blank_tail(index: int) -> bool:
+                start = index * stride if stride else int(starts[index])
+                return not binary and not bytes(data[start + lrecl:start + int(lengths[index])]).strip(b' ')
+
+            _check_lengths(lengths, recfm, lrecl, blksize, checks["record_length"], errors, warnings, blank_tail)
+            if longest > MAX_LRECL:
+                errors.append(f"Longest record is {longest} bytes; the host limit is {MAX_LRECL}")
+
+        # Characters that do not survive translation to the host code page
+        if not binary or layout is not None:
+            checks["characters"] = _check_characters(data, layout, code_page, starts, stride,
+                                                     binary or layout is not None, errors, warnings)
+
+    # Numeric fields against the copybook
+    if layout is not None and records:
+        checks["numeric"] = _check_numeric(path, layout, encoding, framing, errors)
+
+    return {
+        "valid": not errors,
+        "errors": errors,
+        "warnings": warnings,
+        "records": records,
+        "record_length": lrecl,
+        "recfm": recfm or None,
+        "checks": checks
+    }
+
+
+def _check_lengths(lengths, recfm: str, lrecl: Optional[int], blksize: Optional[int],
+                   summary: Dict, errors: List[str], warnings: List[str], blank_tail: Callable[[int], bool]):
+    if NUMPY_AVAILABLE:
+        lengths = np.asarray(lengths)
+
+    if lrecl and recfm.startswith('F'):
+        too_long = _where(lengths, lambda length: length > lrecl)
+        if too_long:
+            summary["too_long"] = len(too_long)
+            lost, blanks = [], []
+            for index in too_long:
+                (blanks if blank_tail(index) else lost).append(index)
+            if lost:
+                errors.append(f"{len(lost)} record(s) longer than LRECL {lrecl} would be truncated "
+                              f"(records {_numbers(lost)})")
+            if blanks:
+                warnings.append(f"{len(blanks)} record(s) longer than LRECL {lrecl} lose only trailing blanks "
+                                f"(records {_numbers(blanks)})")
+        if recfm.startswith('F'):
+            too_short = _where(lengths, lambda length: length < lrecl)
+            if too_short:
+                summary["too_short"] = len(too_short)
+                warnings.append(f"{len(too_short)} record(s) shorter than LRECL {lrecl} will be padded with blanks "
+                                f"(records {_numbers(too_short)})")
+    elif lrecl and recfm.startswith('V'):
+        # Variable records carry a 4-byte RDW inside LRECL
+        too_long = _where(lengths, lambda length: length > lrecl - 4)
+        if too_long:
+            summary["too_long"] = len(too_long)
+            errors.append(f"{len(too_long)} record(s) exceed the {lrecl - 4}-byte data limit of RECFM {recfm} "
+                          f"LRECL {lrecl} (records {_numbers(too_long)})")
+    elif blksize and recfm == 'U':
+        too_long = _where(lengths, lambda length: length > blksize)
+        if too_long:
+            summary["too_long"] = len(too_long)
+            errors.append(f"{len(too_long)} record(s) exceed BLKSIZE {blksize} (records {_numbers(too_long)})")
+
+
+def _check_characters(data, layout: Optional[RecordLayout], code_page: str, starts,
+                      stride: Optional[int], single_byte: bool, errors: List[str], warnings: List[str]) -> Dict:
+    """
+    Control bytes in character data, and characters whose code-page position differs.
+    Record data (a copybook or binary transfer) is single-byte, so C1 bytes are controls there;
+    text that decodes as UTF-8 uses those bytes for non-ASCII characters, which translate fine.
+    """
+    utf8 = not single_byte and _is_utf8(data)
+    sensitive = code_page_sensitive(code_page)
+    if utf8:
+        sensitive = bytes(byte for byte in sensitive if byte < 0x80)
+    binary = set(binary_columns(layout)) if layout is not None else set()
+
+    if NUMPY_AVAILABLE and len(data):
+        raw = np.frombuffer(data, dtype=np.uint8)
+        control_positions = np.flatnonzero(_byte_table(_CONTROL_BYTES)[raw])
+        c1_positions = np.flatnonzero(_byte_table(_C1_BYTES)[raw]) if not utf8 else np.zeros(0, dtype=np.int64)
+        sensitive_positions = np.flatnonzero(_byte_table(sensitive)[raw]) if sensitive else np.zeros(0, dtype=np.int64)
+    else:
+        text = bytes(data)
+        control_positions = [position for position, byte in enumerate(text) if byte in _CONTROL_BYTES]
+        c1_positions = [position for position, byte in enumerate(text) if byte in _C1_BYTES] if not utf8 else []
+        sensitive_positions = [position for position, byte in enumerate(text) if byte in sensitive]
+
+    def locate(positions) -> List[int]:
+        """Record index of each position outside binary columns"""
+        if NUMPY_AVAILABLE and len(data):
+            if stride:
+                records, columns = np.divmod(positions, stride)
+            else:
+                records = np.searchsorted(starts, positions, side='right') - 1
+                columns = positions - starts[records]
+            if binary:
+                keep = ~np.isin(columns, np.fromiter(binary, dtype=np.int64))
+                records = records[keep]
+            return records.tolist()
+        located = []
+        for position in positions:
+            if stride:
+                record, column = divmod(position, stride)
+            else:
+                record = _record_of(starts, position)
+                column = position - starts[record]
+            if column not in binary:
+                located.append(record)
+        return located
+
+    controls = locate(control_positions)
+    c1 = locate(c1_positions)
+    sensitive_count = len(locate(sensitive_positions))
+
+    if single_byte:
+        controls = sorted(controls + c1)
+        c1 = []
+    if controls:
+        bad_records = sorted(set(controls))
+        errors.append(f"{len(controls)} control character(s) in character data of {len(bad_records)} record(s) "
+                      f"would be mistranslated (records {_numbers(bad_records)})")
+    if c1:
+        bad_records = sorted(set(c1))
+        warnings.append(f"{len(c1)} byte(s) in 0x80-0x9F in text that is not UTF-8 may be mistranslated "
+                        f"(records {_numbers(bad_records)})")
+    if sensitive_count:
+        warnings.append(f"{sensitive_count} character(s) such as [ ] ^ map to different bytes in cp037 and cp1047; "
+                        f"check that {code_page} is the host code page")
+    return {"code_page": code_page, "utf8": utf8, "control_bytes": len(controls), "c1_bytes": len(c1),
+            "code_page_sensitive": sensitive_count}
+
+
+def _is_utf8(data) -> bool:
+    """True when the whole buffer decodes as UTF-8 (pure ASCII included)"""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    try:
+        for offset in range(0, len(data), _DECODE_CHUNK):
+            decoder.decode(data[offset:offset + _DECODE_CHUNK])
+        decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def _byte_table(values: bytes):
+    """256-entry mask for a byte-set lookup (one gather instead of np.isin over the whole file)"""
+    table = np.zeros(256, dtype=bool)
+    table[np.frombuffer(values, dtype=np.uint8)] = True
+    return table
+
+
+def _record_of(starts: List[int], position: int) -> int:
+    low, high = 0, len(starts)
+    while low < high:
+        middle = (low + high) // 2
+        if starts[middle] <= position:
+            low = middle + 1
+        else:
+            high = middle
+    return low - 1
+
+
+def _check_numeric(path: str, layout: RecordLayout, encoding: str, framing: str, errors: List[str]) -> Dict:
+    """Count values of zoned/packed fields that do not decode under the copybook (binary and float always do)"""
+    numeric = [field for field in layout.data_fields if field.kind in ('zoned', 'packed')]
+    invalid: Dict[str, int] = {}
+    samples: Dict[str, List[int]] = {}
+
+    def note(name: str, bad: int, records: List[int]):
+        invalid[name] = invalid.get(name, 0) + bad
+        found = samples.setdefault(name, [])
+        found.extend(records[:PREFLIGHT_SAMPLE_SIZE - len(found)])
+
+    if numeric and NUMPY_AVAILABLE:
+        for batch in iter_column_batches(path, layout, encoding=encoding, framing=framing,
+                                         field_names=[field.name for field in numeric]):
+            for field in numeric:
+                bad = np.flatnonzero(batch.invalid[field.name])
+                if len(bad):
+                    note(field.name, len(bad), [batch.start + int(index) + 1 for index in bad[:PREFLIGHT_SAMPLE_SIZE]])
+    elif numeric:
+        with mapped_file(path) as data:
+            for number, row in enumerate(layout.iter_decode(memoryview(data), encoding, framing), start=1):
+                for field in numeric:
+                    if isinstance(row.get(field.name), str):
+                        note(field.name, 1, [number])
+
+    for name, bad in invalid.items():
+        errors.append(f"{bad} invalid value(s) in numeric field {name} (records {samples[name]})")
+    return {"fields": len(numeric), "invalid": invalid, "samples": samples}
@@ -0,0 +1,234 @@
+"""
+On-demand Request Profiling
+Deterministic profiling (cProfile) of the next N requests to a route and
+sampling profiling of live threads for a time window. Results come back as
+pstats text, collapsed stacks (flame graph input) or a breakdown of time spent
+in Python code, s3270 I/O waits and sleeps.
+"""
+
+import cProfile
+import io
+import linecache
+import marshal
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Dict, List, Optional
+
+# Bounds of one profiling request
+MAX_PROFILE_REQUESTS = 50
+MAX_SAMPLING_SECONDS = 300.0
+DEFAULT_SAMPLING_INTERVAL = 0.005
+
+# Profiles kept for retrieval (oldest dropped first)
+MAX_PROFILES = 20
+
+# Rows of pstats text returned
+PSTATS_LIMIT = 60
+
+# Leaf classification: built-ins seen by cProfile, and source lines seen by the sampler
+_SLEEP_BUILTINS = ('time.sleep',)
+_IO_BUILTINS = ("'readline' of", "'read' of", "'write' of", "'flush' of", 'select.', "'recv' of", 'communicate')
+_SLEEP_LINES = ('time.sleep(', '.wait(')
+_IO_LINES = ('.readline(', '.read(', 'stdin.write(', 'stdin.flush(', 'communicate(')
+
+
+def classify_line(source: str) -> str:
+    """'sleep', 'io' or 'python' for the source line a sampled thread is executing"""
+    if any(marker in source for marker in _SLEEP_LINES):
+        return 'sleep'
+    if any(marker in source for marker in _IO_LINES):
+        return 'io'
+    return 'python'
+
+
+def breakdown_from_stats(stats: pstats.Stats) -> Dict[str, float]:
+    """Seconds of own time in sleeps, I/O built-ins and everything else"""
+    totals = {"python": 0.0, "io": 0.0, "sleep": 0.0}
+    for (filename, _, name), (_, _, tottime, _, _) in stats.stats.items():
+        label = name if filename == '~' else ''
+        if any(marker in label for marker in _SLEEP_BUILTINS):
+            totals["sleep"] += tottime
+        elif any(marker in label for marker in _IO_BUILTINS):
+            totals["io"] += tottime
+        else:
+            totals["python"] += tottime
+    return {key: round(value, 4) for key, value in totals.items()}
+
+
+def collapsed_from_stats(stats: pstats.Stats) -> str:
+    """Caller;callee lines weighted by own time in microseconds (one level of call context)"""
+    lines = []
+    for (filename, line, name), (_, _, tottime, _, callers) in stats.stats.items():
+        callee = pstats.func_std_string((filename, line, name))
+        parents = callers or {(None, None, 'root'): None}
+        share = tottime / len(parents)
+        for parent in parents:
+            caller = 'root' if parent[0] is None else pstats.func_std_string(parent)
+            if share > 0:
+                lines.append(f"{caller};{callee} {int(share * 1_000_000)}")
+    return '\n'.join(sorted(lines))
+
+
+class Profile:
+    """One profiling run: deterministic over N requests of a route, or sampling over a window"""
+
+    def __init__(self, mode: str, route: Optional[str], requests: int = 0, seconds: float = 0.0,
+                 interval: float = DEFAULT_SAMPLING_INTERVAL, function: Optional[str] = None):
+        self.id = str(uuid.uuid4())
+        self.mode = mode
+        self.route = route
+        self.function = function
+        self.requests = requests
+        self.seconds = seconds
+        self.interval = interval
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.profiled = 0
+        self.request_seconds: List[float] = []
+        self.stats: Optional[pstats.Stats] = None
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self.lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self.finished_at is not None
+
+    def add_request(self, profile: cProfile.Profile, elapsed: float):
+        with self.lock:
+            if self.stats is None:
+                self.stats = pstats.Stats(profile)
+            else:
+                self.stats.add(profile)
+            self.profiled += 1
+            self.request_seconds.append(round(elapsed, 4))
+            if self.profiled >= self.requests:
+                self.finished_at = time.time()
+
+    def summary(self) -> Dict:
+        summary = {
+            "profile_id": self.id, "mode": self.mode, "route": self.route,
+            "status": 'done' if self.done else 'running',
+            "created_at": self.created_at, "finished_at": self.finished_at
+        }
+        if self.mode == 'deterministic':
+            summary.update(requests=self.requests, profiled=self.profiled, request_seconds=self.request_seconds)
+        else:
+            summary.update(seconds=self.seconds, interval_ms=int(self.interval * 1000), samples=self.sample_count)
+        return summary
+
+    def breakdown(self) -> Dict[str, float]:
+        if self.mode == 'deterministic':
+            return breakdown_from_stats(self.stats) if self.stats else {}
+        totals = Counter()
+        for stack, count in self.samples.items():
+            totals[stack.rsplit(';', 1)[-1].strip('[]') if stack.endswith(']') else 'python'] += count
+        seen = sum(totals.values()) or 1
+        return {key: round(totals.get(key, 0) / seen, 4) for key in ('python', 'io', 'sleep')}
+
+    def pstats_text(self, sort: str = 'cumulative', limit: int = PSTATS_LIMIT) -> str:
+        if self.stats is None:
+            return ''
+        stream = io.StringIO()
+        with self.lock:
+            self.stats.stream = stream
+            self.stats.sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+    def top(self, limit: int = 20):
+        """Heaviest functions (pstats text) or most frequent sampled stacks"""
+        if self.mode == 'deterministic':
+            return self.pstats_text(limit=limit)
+        with self.lock:
+            return [{"stack": stack, "samples": count} for stack, count in self.samples.most_common(limit)]
+
+    def prof_bytes(self) -> bytes:
+        """Raw stats in the .prof format read by pstats, snakeviz and similar tools"""
+        with self.lock:
+            return marshal.dumps(self.stats.stats) if self.stats else b''
+
+    def collapsed(self) -> str:
+        if self.mode == 'deterministic':
+            return collapsed_from_stats(self.stats) if self.stats else ''
+        return '\n'.join(f"{stack} {count}" for stack, count in sorted(self.samples.items()))
+
+
+class Profiler:
+    """Active and finished profiles; the Flask hooks ask it whether to profile a request"""
+
+    def __init__(self):
+        self.profiles: Dict[str, Profile] = {}
+        self._lock = threading.Lock()
+        # cProfile can only be active once per process; concurrent requests are not profiled
+        self._deterministic = threading.Lock()
+
+    def _keep(self, profile: Profile):
+        with self._lock:
+            self.profiles[profile.id] = profile
+            while len(self.profiles) > MAX_PROFILES:
+                del self.profiles[next(iter(self.profiles))]
+
+    def start_deterministic(self, route: str, requests: int) -> Profile:
+        profile = Profile('deterministic', route, requests=requests)
+        self._keep(profile)
+        return profile
+
+    def start_sampling(self, seconds: float, interval: float, route: Optional[str] = None,
+                       function: Optional[str] = None) -> Profile:
+        profile = Profile('sampling', route, seconds=seconds, interval=interval, function=function)
+        self._keep(profile)
+        threading.Thread(target=self._sample, args=(profile,), name=f"profile-{profile.id[:8]}", daemon=True).start()
+        return profile
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        with self._lock:
+            return self.profiles.get(profile_id)
+
+    def list(self) -> List[Dict]:
+        with self._lock:
+            return [profile.summary() for profile in self.profiles.values()]
+
+    def claim_request(self, path: str) -> Optional[Profile]:
+        """Profile that wants this request (taking the process-wide cProfile slot), else None"""
+        with self._lock:
+            wanted = next((profile for profile in self.profiles.values()
+                           if profile.mode == 'deterministic' and not profile.done and profile.route == path
+                           and profile.profiled < profile.requests), None)
+        if wanted is None or not self._deterministic.acquire(blocking=False):
+            return None
+        return wanted
+
+    def release_request(self):
+        self._deterministic.release()
+
+    def _sample(self, profile: Profile):
+        """Record the stack of every other thread each interval until the window closes"""
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        deadline = time.time() + profile.seconds
+        while time.time() < deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident == own or names.get(ident, '').startswith('profile-'):
+                    continue
+                stack = []
+                leaf = frame
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                if profile.function and not any(entry.startswith(profile.function + ' ') for entry in stack):
+                    continue
+                kind = classify_line(linecache.getline(leaf.f_code.co_filename, leaf.f_lineno))
+                stack.reverse()
+                if kind != 'python':
+                    stack.append(f"[{kind}]")
+                with profile.lock:
+                    profile.samples[';'.join(stack)] += 1
+                    profile.sample_count += 1
+            time.sleep(profile.interval)
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+        profile.finished_at = time.time()
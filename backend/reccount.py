@@ -0,0 +1,103 @@
+"""
+Host-side Record Counting
+Generates an IDCAMS job that REPROs each dataset to a DUMMY output and parses
+the per-dataset record counts from the job output, so nothing is downloaded
+"""
+
+import re
+from typing import Dict, List, Optional
+
+# Datasets counted by one job (DD names IN001..IN999)
+MAX_RECCOUNT_DATASETS = 100
+
+# Job card defaults; MSGCLASS must be a held class so TSO OUTPUT can read the job log
+RECCOUNT_JOB_CLASS = 'A'
+RECCOUNT_MSGCLASS = 'H'
+
+_REPRO_PATTERN = re.compile(r'REPRO\s+INFILE\s*\(\s*(IN\d{3})\s*\)', re.IGNORECASE)
+_COUNT_PATTERN = re.compile(r'IDC0005I\s+NUMBER\s+OF\s+RECORDS\s+PROCESSED\s+WAS\s+(\d+)', re.IGNORECASE)
+_IDC_ERROR_PATTERN = re.compile(r'(IDC[0-9]{4}I\s+.*)')
+# Informational IDCAMS messages: records processed, function completed, processing complete
+_IDC_INFO_IDS = ('IDC0005I', 'IDC0001I', 'IDC0002I')
+_DD_ERROR_PATTERN = re.compile(r'(IEF\d{3}I\s+\S+\s+\S+\s+(IN\d{3})\b.*)')
+_DATASET_PATTERN = re.compile(r"^[A-Z@#$][A-Z0-9@#$-]{0,7}(\.[A-Z@#$][A-Z0-9@#$-]{0,7})*(\([A-Z@#$][A-Z0-9@#$]{0,7}\))?$")
+
+
+def normalize_dataset(name: str) -> str:
+    """Upper-case a dataset name and strip surrounding quotes"""
+    return name.strip().strip("'").strip().upper()
+
+
+def invalid_datasets(datasets: List[str]) -> List[str]:
+    """Names that are not valid (optionally member-qualified) dataset names"""
+    return [name for name in datasets if len(name.split('(')[0]) > 44 or not _DATASET_PATTERN.match(name)]
+
+
+def reccount_job_name(username: str) -> str:
+    """TSO OUTPUT only reaches jobs named after the user id plus one character"""
+    return (username.upper() + 'C')[:8] if len(username) < 8 else username.upper()[:8]
+
+
+def build_reccount_jcl(
+    username: str,
+    datasets: List[str],
+    job_class: str = RECCOUNT_JOB_CLASS,
+    msgclass: str = RECCOUNT_MSGCLASS
+) -> str:
+    """IDCAMS job with one REPRO to DUMMY per dataset (IDC0005I reports the count)"""
+    lines = [
+        f"//{reccount_job_name(username)} JOB (ACCT),'RECCOUNT',CLASS={job_class},",
+        f"//             MSGCLASS={msgclass},MSGLEVEL=(1,1),NOTIFY={username.upper()}",
+        "//COUNT    EXEC PGM=IDCAMS",
+        "//SYSPRINT DD SYSOUT=*",
+    ]
+    for index, dataset in enumerate(datasets, start=1):
+        # DUMMY output modelled on the input's DCB (DSCB of the dataset, without member)
+        # DSN=name(member) reaches column 70 at most; DISP goes on a continuation line
+        lines.append(f"//IN{index:03d} DD DSN={dataset},")
+        lines.append("//             DISP=SHR")
+        lines.append(f"//OUT{index:03d}   DD DUMMY,DCB={dataset.split('(')[0]}")
+    lines.append("//SYSIN    DD *")
+    for index in range(1, len(datasets) + 1):
+        lines.append(f"  REPRO INFILE(IN{index:03d}) OUTFILE(OUT{index:03d})")
+    lines.append("/*")
+    lines.append("//")
+    # Column 72 marks a continuation and 73-80 are ignored, so a longer line would be misread
+    too_long = [line for line in lines if len(line) > 71]
+    if too_long:
+        raise ValueError(f"JCL line longer than 71 columns: {too_long[0]}")
+    return '\n'.join(line.ljust(80) for line in lines) + '\n'
+
+
+def parse_reccount_output(output: str, datasets: List[str]) -> List[Dict]:
+    """Per-dataset counts, in request order, from the IDCAMS job output"""
+    results: Dict[str, Dict] = {}
+
+    # JCL errors (e.g. IEF212I ... IN003 - DATA SET NOT FOUND) stop the whole step
+    for match in _DD_ERROR_PATTERN.finditer(output):
+        results.setdefault(match.group(2).upper(), {"records": None, "message": match.group(1).strip()})
+
+    positions = [(match.start(), match.group(1).upper()) for match in _REPRO_PATTERN.finditer(output)]
+    for index, (start, dd_name) in enumerate(positions):
+        end = positions[index + 1][0] if index + 1 < len(positions) else len(output)
+        segment = output[start:end]
+        count = _COUNT_PATTERN.search(segment)
+        errors = [line.strip() for line in _IDC_ERROR_PATTERN.findall(segment) if not line.startswith(_IDC_INFO_IDS)]
+        if count:
+            results[dd_name] = {"records": int(count.group(1)), "message": errors[0] if errors else None,
+                                "failed": bool(errors)}
+        elif dd_name not in results:
+            results[dd_name] = {"records": None, "message": errors[0] if errors else "No record count reported"}
+
+    counts = []
+    for index, dataset in enumerate(datasets, start=1):
+        entry: Optional[Dict] = results.get(f"IN{index:03d}")
+        if entry is None:
+            entry = {"records": None, "message": "Not found in job output"}
+        counts.append({
+            "dataset": dataset,
+            "success": entry["records"] is not None and not entry.get("failed"),
+            "records": entry["records"],
+            "message": entry["message"] or f"{entry['records']} record(s)"
+        })
+    return counts
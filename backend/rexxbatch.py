@@ -0,0 +1,251 @@
+"""
+Host-side REXX Batch Runner
+A parameterized REXX exec that performs a list of dataset and job operations
+on the host in one TSO EXEC. Operations are passed as a request dataset and
+their results come back as one result dataset, replacing a screen exchange
+per operation with an upload, one command and a download.
+"""
+
+import hashlib
+import re
+import uuid
+from typing import Dict, List
+
+from reccount import invalid_datasets, normalize_dataset
+
+# Operations per batch (one request line each)
+MAX_BATCH_OPERATIONS = 200
+
+# Longest request line the exec reads (request dataset is RECFM=VB,LRECL=255)
+MAX_REQUEST_LINE = 251
+
+# Dataset attributes of the uploaded exec and request datasets
+BATCH_DCB = {"recfm": "VB", "lrecl": 255, "blksize": 3120}
+
+# Printed by the exec once the result dataset is written, or when it cannot read or write its datasets
+BATCH_COMPLETE_MARKER = 'MFBATCH COMPLETE'
+BATCH_FAILED_MARKER = 'MFBATCH FAILED'
+
+BATCH_EXEC = r"""/* REXX - MFBATCH: run request operations, write one result dataset */
+PARSE ARG reqdsn resdsn .
+ADDRESS TSO
+CALL MSG 'OFF'
+"ALLOC F(MFBREQ) DA('"reqdsn"') SHR REUSE"
+IF rc <> 0 THEN DO
+  SAY 'MFBATCH FAILED CANNOT READ' reqdsn
+  EXIT 12
+END
+"EXECIO * DISKR MFBREQ (STEM req. FINIS"
+"FREE F(MFBREQ)"
+out.0 = 0
+DO i = 1 TO req.0
+  PARSE VAR req.i op rest
+  op = TRANSLATE(op)
+  PARSE VAR rest dsn .
+  crc = 0
+  line.0 = 0
+  x = OUTTRAP('line.')
+  SELECT
+    WHEN op = 'ALLOC' THEN DO
+      PARSE VAR rest dsn recfm lrecl blksize prim sec .
+      spaced = ''
+      DO j = 1 TO LENGTH(recfm)
+        spaced = spaced SUBSTR(recfm, j, 1)
+      END
+      "ALLOC F(MFBNEW) DA('"dsn"') NEW CATALOG DSORG(PS) RECFM("spaced")",
+        "LRECL("lrecl") BLKSIZE("blksize") SPACE("prim","sec") TRACKS REUSE"
+      crc = rc
+      "FREE F(MFBNEW)"
+    END
+    WHEN op = 'DELETE' THEN DO
+      "DELETE '"dsn"'"
+      crc = rc
+    END
+    WHEN op = 'EXISTS' THEN DO
+      state = SYSDSN("'"dsn"'")
+      IF state <> 'OK' THEN crc = 4
+      CALL EMIT 'V' i 'STATE='state
+    END
+    WHEN op = 'LISTDS' THEN DO
+      crc = LISTDSI("'"dsn"'")
+      IF crc = 0 THEN DO
+        CALL EMIT 'V' i 'DSORG='sysdsorg
+        CALL EMIT 'V' i 'RECFM='sysrecfm
+        CALL EMIT 'V' i 'LRECL='syslrecl
+        CALL EMIT 'V' i 'BLKSIZE='sysblksize
+        CALL EMIT 'V' i 'UNITS='sysunits
+        CALL EMIT 'V' i 'PRIMARY='sysprimary
+        CALL EMIT 'V' i 'SECONDS='sysseconds
+        CALL EMIT 'V' i 'USED='sysused
+        CALL EMIT 'V' i 'CREATED='syscreate
+        CALL EMIT 'V' i 'VOLUME='sysvolume
+      END
+      ELSE CALL EMIT 'V' i 'REASON='sysreason
+    END
+    WHEN op = 'COUNT' THEN DO
+      "ALLOC F(MFBCNT) DA('"dsn"') SHR REUSE"
+      crc = rc
+      IF crc = 0 THEN DO
+        total = 0
+        DO UNTIL eof
+          "EXECIO 1000 DISKR MFBCNT (STEM rec."
+          eof = (rc = 2)
+          IF rc > 2 THEN LEAVE
+          total = total + rec.0
+        END
+        IF rc > 2 THEN crc = rc
+        "EXECIO 0 DISKR MFBCNT (FINIS"
+        "FREE F(MFBCNT)"
+        CALL EMIT 'V' i 'RECORDS='total
+      END
+    END
+    WHEN op = 'SUBMIT' THEN DO
+      "SUBMIT '"dsn"'"
+      crc = rc
+    END
+    WHEN op = 'STATUS' THEN DO
+      "STATUS" STRIP(rest)
+      crc = rc
+    END
+    WHEN op = 'TSO' THEN DO
+      STRIP(rest)
+      crc = rc
+    END
+    OTHERWISE crc = 20
+  END
+  x = OUTTRAP('OFF')
+  CALL EMIT 'R' i crc op
+  DO j = 1 TO line.0
+    CALL EMIT 'D' i line.j
+  END
+END
+x = OUTTRAP('gone.')
+"DELETE '"resdsn"'"
+x = OUTTRAP('OFF')
+"ALLOC F(MFBRES) DA('"resdsn"') NEW CATALOG DSORG(PS) RECFM(V B) LRECL(1024)",
+  "BLKSIZE(6144) SPACE(5,15) TRACKS REUSE"
+IF rc <> 0 THEN DO
+  SAY 'MFBATCH FAILED CANNOT WRITE' resdsn
+  EXIT 12
+END
+"EXECIO" out.0 "DISKW MFBRES (STEM out. FINIS"
+"FREE F(MFBRES)"
+SAY 'MFBATCH COMPLETE' req.0
+EXIT 0
+
+EMIT:
+  PARSE ARG text
+  n = out.0 + 1
+  out.n = text
+  out.0 = n
+  RETURN
+"""
+
+# Request fields per operation, in the order the exec parses them (None means required)
+OPERATIONS: Dict[str, List] = {
+    'alloc': [('dataset', None), ('recfm', 'FB'), ('lrecl', 80), ('blksize', 27920), ('primary', 5), ('secondary', 5)],
+    'delete': [('dataset', None)],
+    'exists': [('dataset', None)],
+    'listds': [('dataset', None)],
+    'count': [('dataset', None)],
+    'submit': [('dataset', None)],
+    'status': [('job', '')],
+    'tso': [('command', None)],
+}
+
+_JOB_SUBMITTED = re.compile(r'JOB\s+(\S+)\s+SUBMITTED', re.IGNORECASE)
+_RESULT_LINE = re.compile(r'^([RDV])\s+(\d+)\s?(.*)$')
+_TOKEN = re.compile(r'^[A-Z0-9@#$.()*]+$')
+
+
+class BatchError(ValueError):
+    """Raised when a batch request cannot be encoded"""
+
+
+def exec_hash() -> str:
+    """Content hash of the exec; a changed exec gets a new host dataset"""
+    return hashlib.sha256(BATCH_EXEC.encode('ascii')).hexdigest()
+
+
+def exec_dataset(username: str) -> str:
+    """Host dataset holding this version of the exec, e.g. HERC01.MFBATCH.H1A2B3C4"""
+    return f"{username.upper()}.MFBATCH.H{exec_hash()[:7].upper()}"
+
+
+def request_datasets(username: str) -> Dict[str, str]:
+    """Request and result datasets of one run, e.g. HERC01.MFBATCH.R1A2B3C4.REQ (unique per run)"""
+    prefix = f"{username.upper()}.MFBATCH.R{uuid.uuid4().hex[:7].upper()}"
+    return {"request": f"{prefix}.REQ", "result": f"{prefix}.RES"}
+
+
+def encode_operations(operations: List[Dict]) -> str:
+    """Request dataset text: one 'OP arg ...' line per operation"""
+    if not operations:
+        raise BatchError("operations must list at least one operation")
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        raise BatchError(f"At most {MAX_BATCH_OPERATIONS} operations can run in one batch")
+
+    lines = []
+    for number, operation in enumerate(operations, start=1):
+        op = str(operation.get('op') or '').lower()
+        if op not in OPERATIONS:
+            raise BatchError(f"Operation {number}: unknown op '{op}' (expected one of {', '.join(OPERATIONS)})")
+
+        values = []
+        for name, default in OPERATIONS[op]:
+            value = operation.get(name, default)
+            if value is None or str(value).strip() == '':
+                if default is None:
+                    raise BatchError(f"Operation {number} ({op}) needs {name}")
+                continue
+            text = str(value).strip()
+            if name == 'dataset':
+                text = normalize_dataset(text)
+                if invalid_datasets([text]):
+                    raise BatchError(f"Operation {number} ({op}): invalid dataset name {text}")
+            elif name == 'command':
+                if '\n' in text or '\r' in text or '"' in text:
+                    raise BatchError(f"Operation {number} ({op}): command must be a single line without double quotes")
+            else:
+                text = text.upper()
+                if not _TOKEN.match(text):
+                    raise BatchError(f"Operation {number} ({op}): invalid {name} '{text}'")
+            values.append(text)
+
+        line = ' '.join([op.upper()] + values)
+        if len(line) > MAX_REQUEST_LINE:
+            raise BatchError(f"Operation {number} ({op}) is longer than {MAX_REQUEST_LINE} characters")
+        lines.append(line)
+    return '\n'.join(lines) + '\n'
+
+
+def parse_batch_result(text: str, operations: List[Dict]) -> List[Dict]:
+    """Per-operation results, in request order, from the result dataset"""
+    results = [{"index": number, "op": str(operation.get('op')).lower(), "rc": None, "success": False,
+                "output": [], "values": {}} for number, operation in enumerate(operations, start=1)]
+
+    for line in text.splitlines():
+        match = _RESULT_LINE.match(line.rstrip())
+        if not match or not 1 <= int(match.group(2)) <= len(results):
+            continue
+        kind, entry, rest = match.group(1), results[int(match.group(2)) - 1], match.group(3)
+        if kind == 'R':
+            code = rest.split()[0] if rest.split() else ''
+            entry["rc"] = int(code) if code.lstrip('-').isdigit() else None
+            entry["success"] = entry["rc"] == 0
+        elif kind == 'V' and '=' in rest:
+            key, value = rest.split('=', 1)
+            entry["values"][key.strip().lower()] = value.strip()
+        elif kind == 'D':
+            entry["output"].append(rest.rstrip())
+
+    for entry in results:
+        if entry["rc"] is None:
+            entry["message"] = "Not reported by the exec"
+        if entry["op"] == 'submit':
+            job = next((match.group(1) for match in map(_JOB_SUBMITTED.search, entry["output"]) if match), None)
+            if job:
+                entry["values"]["job_id"] = job
+        if entry["op"] == 'count' and 'records' in entry["values"]:
+            entry["values"]["records"] = int(entry["values"]["records"])
+    return results
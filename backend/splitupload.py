@@ -0,0 +1,191 @@
+"""
+Split-and-parallel Upload
+Splits a large local file on record boundaries, names the temporary part
+datasets and generates the IEBGENER job that concatenates the parts into the
+target dataset (deleting the parts once the copy succeeded)
+"""
+
+import hashlib
+import os
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+from columnar import mapped_file
+from copybook import RecordLayout, detect_framing, record_stride
+
+# Target size of one part; keeps each IND$FILE transfer well inside its 300 s timeout
+SPLIT_PART_BYTES = 64 * 1024 * 1024
+
+# Parts per upload (the P001..P999 qualifier and the SYSUT1 concatenation limit stay far away)
+MAX_SPLIT_PARTS = 64
+
+# Transfers of one part before the upload is abandoned
+SPLIT_PART_ATTEMPTS = 3
+
+# Job card defaults; MSGCLASS must be a held class so TSO OUTPUT can read the job log
+CONCAT_JOB_CLASS = 'A'
+CONCAT_MSGCLASS = 'H'
+
+# 3390 geometry used to size the part and target allocations
+TRACK_BYTES = 56664
+CYLINDER_BYTES = 15 * TRACK_BYTES
+
+# Copy buffer when writing part files
+_COPY_CHUNK = 8 * 1024 * 1024
+
+_STEP_CODE_PATTERN = re.compile(r'IEF142I\s+\S+\s+COPY\s+-\s+STEP\s+WAS\s+EXECUTED\s+-\s+COND\s+CODE\s+(\d{4})', re.IGNORECASE)
+_SEVERITY_PATTERN = re.compile(r'IEB147I\s+END\s+OF\s+JOB\s+-\s+(\d+)\s+WAS\s+HIGHEST\s+SEVERITY\s+CODE', re.IGNORECASE)
+_FAILURE_PATTERN = re.compile(r'(JCL\s+ERROR|ABEND\s*=?\s*[SU]?[0-9A-F]{3,4}|IEC\d{3}I\s+.*|NOT\s+CATLGD.*)', re.IGNORECASE)
+
+
+class SplitUploadError(ValueError):
+    """Raised when a file cannot be split for a parallel upload"""
+
+
+def part_count(size: int, sessions: int, requested: Optional[int] = None) -> int:
+    """Number of parts: as requested, else enough for every session and no part above SPLIT_PART_BYTES"""
+    if requested:
+        count = int(requested)
+    else:
+        count = max(sessions, -(-size // SPLIT_PART_BYTES))
+    return max(1, min(count, MAX_SPLIT_PARTS))
+
+
+def split_ranges(path: str, parts: int, record_length: Optional[int] = None, framing: str = 'auto',
+                 layout: Optional[RecordLayout] = None) -> Tuple[List[Tuple[int, int]], str]:
+    """
+    Byte ranges of up to `parts` pieces that each end on a record boundary, and the framing used.
+    Fixed records (or equal-width lines) are cut by offset, other lines after the nearest newline.
+    """
+    record_length = record_length or (layout.record_length if layout else None)
+    size = os.path.getsize(path)
+    if size == 0:
+        return [], framing if framing != 'auto' else 'lines'
+
+    with mapped_file(path) as data:
+        with memoryview(data) as view:
+            if framing == 'auto':
+                framing = detect_framing(view, record_length or 0) if record_length else 'lines'
+            if framing == 'fixed' and not record_length:
+                raise SplitUploadError("A record length (LRECL or copybook) is needed to split fixed-length records")
+            stride = record_stride(view, record_length or 0, framing) if record_length else None
+
+        if framing == 'fixed' and size % record_length:
+            raise SplitUploadError(f"File size {size} is not a multiple of the record length {record_length}")
+
+        if stride:
+            records = -(-size // stride)
+            per_part = -(-records // parts)
+            cuts = [min(index * per_part * stride, size) for index in range(parts + 1)]
+        else:
+            cuts = [0]
+            for index in range(1, parts):
+                target = max(size * index // parts, cuts[-1])
+                newline = data.find(b'\n', target)
+                cuts.append(size if newline < 0 else newline + 1)
+            cuts.append(size)
+
+    ranges = [(start, end) for start, end in zip(cuts, cuts[1:]) if end > start]
+    return ranges, framing
+
+
+def write_parts(path: str, ranges: List[Tuple[int, int]], directory: str) -> List[str]:
+    """Copy each byte range of the file to its own part file"""
+    part_paths = []
+    with open(path, 'rb') as source:
+        for index, (start, end) in enumerate(ranges, start=1):
+            part_path = os.path.join(directory, f"part{index:03d}{os.path.splitext(path)[1]}")
+            source.seek(start)
+            remaining = end - start
+            with open(part_path, 'wb') as part_file:
+                while remaining:
+                    chunk = source.read(min(_COPY_CHUNK, remaining))
+                    if not chunk:
+                        break
+                    part_file.write(chunk)
+                    remaining -= len(chunk)
+            part_paths.append(part_path)
+    return part_paths
+
+
+def part_datasets(username: str, target: str, count: int) -> List[str]:
+    """Temporary datasets HLQ.SPLIT.Tnnnnnnn.Pnnn, unique per upload"""
+    token = hashlib.blake2b(f"{target}:{time.time()}".encode('ascii', errors='replace'), digest_size=4).hexdigest()
+    return [f"{username.upper()}.SPLIT.T{token[:7].upper()}.P{index:03d}" for index in range(1, count + 1)]
+
+
+def space_cylinders(size: int) -> Tuple[int, int]:
+    """Primary and secondary cylinders for a dataset holding `size` bytes (10% block overhead)"""
+    primary = max(1, -(-size * 11 // (10 * CYLINDER_BYTES)))
+    return primary, max(1, primary // 10)
+
+
+def concat_job_name(username: str) -> str:
+    """TSO OUTPUT only reaches jobs named after the user id plus one character"""
+    return (username.upper() + 'G')[:8] if len(username) < 8 else username.upper()[:8]
+
+
+def build_concat_jcl(
+    username: str,
+    parts: List[str],
+    target: str,
+    size: int,
+    dcb: Optional[Dict] = None,
+    job_class: str = CONCAT_JOB_CLASS,
+    msgclass: str = CONCAT_MSGCLASS
+) -> str:
+    """
+    IEFBR14 step that deletes an existing target, IEBGENER copying the concatenated
+    parts into a new target, and an IEFBR14 step deleting the parts that runs only when
+    the copy ended with condition code 0 (a DD disposition would apply on any return code)
+    """
+    primary, secondary = space_cylinders(size)
+    dcb = dcb or {}
+    attributes = [f"{key.upper()}={int(dcb[key]) if key != 'recfm' else str(dcb[key]).upper()}"
+                  for key in ('recfm', 'lrecl', 'blksize') if dcb.get(key)]
+
+    lines = [
+        f"//{concat_job_name(username)} JOB (ACCT),'SPLITUPL',CLASS={job_class},",
+        f"//             MSGCLASS={msgclass},MSGLEVEL=(1,1),NOTIFY={username.upper()}",
+        "//DELETE   EXEC PGM=IEFBR14",
+        f"//OLD      DD DSN={target},",
+        "//            DISP=(MOD,DELETE,DELETE),",
+        "//            UNIT=SYSDA,SPACE=(TRK,(0))",
+        "//COPY     EXEC PGM=IEBGENER",
+        "//SYSPRINT DD SYSOUT=*",
+        "//SYSIN    DD DUMMY",
+    ]
+    for index, part in enumerate(parts):
+        label = "//SYSUT1  " if index == 0 else "//        "
+        lines.append(f"{label} DD DSN={part},DISP=SHR")
+    lines.append(f"//SYSUT2   DD DSN={target},")
+    lines.append("//            DISP=(NEW,CATLG,DELETE),")
+    if attributes:
+        lines.append(f"//            UNIT=SYSDA,SPACE=(CYL,({primary},{secondary}),RLSE),")
+        lines.append(f"//            DCB=({','.join(attributes)})")
+    else:
+        # Without a DCB, IEBGENER gives the new dataset the attributes of SYSUT1
+        lines.append(f"//            UNIT=SYSDA,SPACE=(CYL,({primary},{secondary}),RLSE)")
+    lines.append("//CLEANUP  EXEC PGM=IEFBR14,COND=(0,NE,COPY)")
+    for index, part in enumerate(parts):
+        lines.append(f"//{f'PART{index + 1:03d}':<8} DD DSN={part},DISP=(OLD,DELETE,KEEP)")
+    lines.append("//")
+    return '\n'.join(line.ljust(80)[:80] for line in lines) + '\n'
+
+
+def parse_concat_output(output: str) -> Dict:
+    """Outcome of the concatenation job from its output (COPY step code, IEBGENER severity, JCL errors)"""
+    step = _STEP_CODE_PATTERN.search(output)
+    severity = _SEVERITY_PATTERN.search(output)
+    failure = _FAILURE_PATTERN.search(output)
+
+    if failure:
+        return {"success": False, "cond_code": step.group(1) if step else None, "message": failure.group(1).strip()}
+    if step:
+        return {"success": int(step.group(1)) == 0, "cond_code": step.group(1),
+                "message": f"COPY step ended with condition code {step.group(1)}"}
+    if severity:
+        return {"success": int(severity.group(1)) == 0, "cond_code": None,
+                "message": f"IEBGENER highest severity code {severity.group(1)}"}
+    return {"success": False, "cond_code": None, "message": "No COPY step result found in job output"}
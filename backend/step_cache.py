@@ -0,0 +1,168 @@
+"""
+Step Result Cache
+Memoizes results of idempotent steps (file conversions, output of finished
+jobs, record counts of unchanged datasets) keyed by step type, normalized
+inputs, content hashes of input files and, for host-dependent steps, the host
+state generation. Bounded by entry count and result size, least recently used
+entries evicted first.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, NamedTuple, Optional, Tuple
+
+# Upper bound on cached step results
+STEP_CACHE_SIZE = 500
+
+# Upper bound on the serialized size of all cached results
+STEP_CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+# Read size when hashing input and output files
+_HASH_CHUNK = 4 * 1024 * 1024
+
+
+class StepPolicy(NamedTuple):
+    """How a step may be cached; steps without a policy always run"""
+    # Params naming files whose content the result depends on
+    input_files: Tuple[str, ...] = ()
+    # Result keys naming files the step produced (a hit requires them unchanged)
+    output_files: Tuple[str, ...] = ()
+    # Result depends on host datasets: key includes the host state generation
+    host_state: bool = False
+    # Seconds a result stays valid (None: until evicted)
+    ttl: Optional[float] = None
+    # Extra condition on the result (e.g. job output only once the job finished)
+    cache_if: Optional[Callable[[Dict], bool]] = None
+    # Condition on the params (e.g. job output only for a JES job id, not a reusable job name)
+    params_if: Optional[Callable[[Dict], bool]] = None
+
+
+class _Digests:
+    """Content hashes of files, recomputed only when size or mtime changes"""
+
+    def __init__(self):
+        self._known: Dict[str, Tuple[int, int, str]] = {}
+        self._lock = threading.Lock()
+
+    def of(self, path: str) -> Optional[str]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            known = self._known.get(path)
+        if known and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+            return known[2]
+
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as handle:
+            for chunk in iter(lambda: handle.read(_HASH_CHUNK), b''):
+                digest.update(chunk)
+        value = digest.hexdigest()
+        with self._lock:
+            self._known[path] = (stat.st_size, stat.st_mtime_ns, value)
+        return value
+
+
+class StepResultCache:
+    """LRU map from step keys to results plus the digests of the files those results produced"""
+
+    def __init__(self, max_entries: int = STEP_CACHE_SIZE, max_bytes: int = STEP_CACHE_MAX_BYTES,
+                 resolve_path: Callable[[str], str] = os.path.abspath):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.resolve_path = resolve_path
+        self.digests = _Digests()
+        self._entries: "OrderedDict[Hashable, Tuple[Dict, Dict[str, str], float, Optional[float], int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, step: str, params: Dict, policy: StepPolicy, host: Optional[str] = None,
+            generation: Optional[int] = None) -> Optional[str]:
+        """Cache key, or None when an input file is missing (the step must run and report it)"""
+        files = {}
+        for name in policy.input_files:
+            if params.get(name):
+                digest = self.digests.of(self.resolve_path(str(params[name])))
+                if digest is None:
+                    return None
+                files[name] = digest
+        material = json.dumps({"step": step, "params": params, "files": files, "host": host,
+                               "generation": generation if policy.host_state else None},
+                              sort_keys=True, default=str)
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def get(self, key: Optional[str]) -> Optional[Dict]:
+        if key is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                result, outputs, stored_at, ttl, _ = entry
+                if ttl is not None and time.time() - stored_at >= ttl:
+                    entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+
+        # Produced files must still be there with the same content
+        if any(self.digests.of(path) != digest for path, digest in outputs.items()):
+            with self._lock:
+                self._drop(key)
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return result
+
+    def put(self, key: Optional[str], result: Dict, policy: StepPolicy):
+        """Store a successful result (and the digests of its output files) if the policy allows"""
+        if key is None or not result.get("success"):
+            return
+        if policy.cache_if is not None and not policy.cache_if(result):
+            return
+        outputs = {}
+        for name in policy.output_files:
+            if result.get(name):
+                path = self.resolve_path(str(result[name]))
+                digest = self.digests.of(path)
+                if digest is None:
+                    return
+                outputs[path] = digest
+
+        size = len(json.dumps(result, default=str))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = (result, outputs, time.time(), policy.ttl, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: Hashable):
+        """Remove an entry (caller holds the lock)"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[4]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses
+            }
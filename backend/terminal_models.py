@@ -0,0 +1,129 @@
+"""
+Terminal Model Selection
+Candidate 3270 models from largest to smallest, parsing of the screen size
+s3270 reports, and a per-host SQLite record of the model each host accepted
+so later sessions connect with the largest working geometry straight away
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+# (model, rows, columns), largest screen first; the family prefix is 3279 (color) or 3278
+MODEL_CANDIDATES: List[Tuple[str, int, int]] = [
+    ('5', 27, 132),
+    ('4', 43, 80),
+    ('3', 32, 80),
+    ('2', 24, 80),
+]
+
+# Optional custom screen (e.g. "62x160") tried before the standard models; sent as -oversize on model 4/5
+OVERSIZE_ENV = 'TERMINAL_OVERSIZE'
+
+# Seconds a freshly started s3270 may run before a host that rejects the terminal type drops it
+MODEL_PROBE_SECONDS = 3.0
+
+# Seconds before a host is offered a model it once rejected again (hosts get upgraded)
+REJECTION_TTL = 7 * 24 * 3600.0
+
+# Lines one page of TSO line-mode output held on the original 24-row screen (prompt line excluded)
+BASE_PAGE_LINES = 22
+
+_SIZE_PATTERN = re.compile(r'(?:rows\s+)?(\d+)\s+(?:columns\s+)?(\d+)', re.IGNORECASE)
+_OVERSIZE_PATTERN = re.compile(r'^\s*(\d+)\s*x\s*(\d+)\s*$', re.IGNORECASE)
+
+
+def parse_oversize(value: Optional[str]) -> Optional[Tuple[int, int]]:
+    """'62x160' -> (62, 160); None when unset or malformed (must exceed 27x132 in one dimension)"""
+    match = _OVERSIZE_PATTERN.match(value or '')
+    if not match:
+        return None
+    rows, columns = int(match.group(1)), int(match.group(2))
+    if rows < 24 or columns < 80 or rows * columns > 16383 or (rows <= 27 and columns <= 132):
+        return None
+    return rows, columns
+
+
+def model_name(family: str, model: str) -> str:
+    return f"{family}-{model}"
+
+
+def candidate_models(family: str, oversize: Optional[Tuple[int, int]] = None) -> List[Dict]:
+    """s3270 options for every model to try, largest first"""
+    candidates = []
+    if oversize:
+        rows, columns = oversize
+        base = '5' if columns > 80 else '4'
+        candidates.append({"model": f"{model_name(family, base)} ({columns}x{rows})", "rows": rows, "columns": columns,
+                           "options": ['-model', model_name(family, base), '-oversize', f"{columns}x{rows}"]})
+    for model, rows, columns in MODEL_CANDIDATES:
+        candidates.append({"model": model_name(family, model), "rows": rows, "columns": columns,
+                           "options": ['-model', model_name(family, model)]})
+    return candidates
+
+
+def parse_screen_size(output: str) -> Optional[Tuple[int, int]]:
+    """(rows, columns) from Query(ScreenCurSize) output ('rows 43 columns 80' or '43 80')"""
+    for line in output.splitlines():
+        match = _SIZE_PATTERN.search(line)
+        if match:
+            return int(match.group(1)), int(match.group(2))
+    return None
+
+
+def page_budget(lines: int, rows: Optional[int]) -> int:
+    """Screens needed for `lines` lines of line-mode output on a screen with `rows` rows"""
+    per_page = max(1, (rows or 24) - (24 - BASE_PAGE_LINES))
+    return max(1, -(-lines // per_page))
+
+
+class TerminalModelRegistry:
+    """SQLite-backed per-host record of the terminal model a host accepted and the models it rejected"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS terminal_models ("
+                " host TEXT NOT NULL, model TEXT NOT NULL, rows INTEGER, columns INTEGER,"
+                " accepted INTEGER NOT NULL, recorded_at REAL NOT NULL, PRIMARY KEY (host, model))"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def ordered_candidates(self, host: str, candidates: List[Dict]) -> List[Dict]:
+        """Candidates (largest first) without the models this host rejected recently; never empty"""
+        with self._lock, self._connect() as conn:
+            rejected = {row[0] for row in conn.execute(
+                "SELECT model FROM terminal_models WHERE host = ? AND accepted = 0 AND recorded_at > ?",
+                (host, time.time() - REJECTION_TTL)
+            )}
+        return [candidate for candidate in candidates if candidate["model"] not in rejected] or candidates[-1:]
+
+    def accept(self, host: str, model: str, rows: Optional[int], columns: Optional[int]):
+        with self._lock, self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO terminal_models VALUES (?, ?, ?, ?, 1, ?)",
+                         (host, model, rows, columns, time.time()))
+
+    def reject(self, host: str, model: str):
+        with self._lock, self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO terminal_models VALUES (?, ?, NULL, NULL, 0, ?)",
+                         (host, model, time.time()))
+
+    def forget(self, host: str):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM terminal_models WHERE host = ?", (host,))
+
+    def accepted(self, host: str) -> Optional[Dict]:
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT model, rows, columns FROM terminal_models WHERE host = ? AND accepted = 1"
+                " ORDER BY recorded_at DESC LIMIT 1", (host,)
+            ).fetchone()
+        return {"model": row[0], "rows": row[1], "columns": row[2]} if row else None
@@ -0,0 +1,130 @@
+"""
+Workflow Checkpoints
+Per-step checkpoints of workflow runs (result, job id, transferred files and
+the session that ran the step) so a failed run resumes from the failed step
+instead of redoing uploads and submits, and references that let a step use
+values produced by an earlier one (e.g. "${2.job_id}")
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+# Result fields kept as artifacts of a step (what later steps and a resume reuse)
+ARTIFACT_KEYS = ('job_id', 'job_ids', 'job_identifier', 'output_path', 'local_path', 'mainframe_dataset',
+                 'target', 'datasets', 'cond_code', 'job_state')
+
+# Params naming files or datasets a step transferred
+TRANSFER_PARAMS = ('local_path', 'mainframe_dataset')
+
+_REFERENCE = re.compile(r'\$\{(\d+)\.(\w+)\}')
+
+
+def step_artifacts(params: Dict, result: Dict) -> Dict:
+    """Artifacts of a finished step: transfer endpoints from its params, ids and paths from its result"""
+    artifacts = {key: params[key] for key in TRANSFER_PARAMS if params.get(key)}
+    artifacts.update({key: result[key] for key in ARTIFACT_KEYS if result.get(key) is not None})
+    return artifacts
+
+
+def has_references(value) -> bool:
+    """True when a param value (or anything nested in it) still holds a "${n.key}" reference"""
+    if isinstance(value, str):
+        return bool(_REFERENCE.search(value))
+    if isinstance(value, list):
+        return any(has_references(entry) for entry in value)
+    if isinstance(value, dict):
+        return any(has_references(entry) for entry in value.values())
+    return False
+
+
+def resolve_references(params: Dict, artifacts: Dict[int, Dict]) -> Dict:
+    """
+    Replace "${n.key}" in string params with artifact `key` of step n (1-based).
+    A param that is exactly one reference takes the artifact's value as is (lists stay lists).
+    """
+    def substitute(value):
+        if isinstance(value, str):
+            whole = _REFERENCE.fullmatch(value)
+            if whole:
+                return lookup(whole)
+            return _REFERENCE.sub(lambda match: str(lookup(match)), value)
+        if isinstance(value, list):
+            return [substitute(entry) for entry in value]
+        if isinstance(value, dict):
+            return {key: substitute(entry) for key, entry in value.items()}
+        return value
+
+    def lookup(match):
+        step, key = int(match.group(1)), match.group(2)
+        if key not in artifacts.get(step, {}):
+            raise ValueError(f"${{{step}.{key}}} is not available (step {step} has no {key})")
+        return artifacts[step][key]
+
+    return substitute(params)
+
+
+class WorkflowCheckpoints:
+    """SQLite-backed step checkpoints keyed by (run id, step number)"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS workflow_steps ("
+                " run_id TEXT NOT NULL, step INTEGER NOT NULL, op TEXT NOT NULL, success INTEGER NOT NULL,"
+                " message TEXT, result TEXT, artifacts TEXT, session_id TEXT, started_at REAL, finished_at REAL,"
+                " PRIMARY KEY (run_id, step))"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Connection that commits on success and is always closed"""
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def record(self, run_id: str, step: int, op: str, params: Dict, result: Dict, session_id: str, started_at: float):
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO workflow_steps VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (run_id, step, op, 1 if result.get("success") else 0, result.get("message"),
+                 json.dumps(result, default=str), json.dumps(step_artifacts(params, result), default=str),
+                 session_id, started_at, time.time())
+            )
+
+    def steps(self, run_id: str) -> List[Dict]:
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT step, op, success, message, result, artifacts, session_id, started_at, finished_at"
+                " FROM workflow_steps WHERE run_id = ? ORDER BY step", (run_id,)
+            ).fetchall()
+        return [{
+            "step": row[0], "op": row[1], "success": bool(row[2]), "message": row[3],
+            "result": json.loads(row[4]) if row[4] else None,
+            "artifacts": json.loads(row[5]) if row[5] else {},
+            "session_id": row[6], "started_at": row[7], "finished_at": row[8]
+        } for row in rows]
+
+    def completed(self, run_id: str) -> Dict[int, Dict]:
+        """Successful checkpoints by step number (the steps a resume skips)"""
+        return {entry["step"]: entry for entry in self.steps(run_id) if entry["success"]}
+
+    def first_incomplete(self, run_id: str, total_steps: int) -> Optional[int]:
+        done = self.completed(run_id)
+        return next((step for step in range(1, total_steps + 1) if step not in done), None)
+
+    def discard_from(self, run_id: str, step: int):
+        """Forget checkpoints of this step and later ones so they run again"""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM workflow_steps WHERE run_id = ? AND step >= ?", (run_id, step))
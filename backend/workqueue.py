@@ -0,0 +1,280 @@
+"""
+Durable Work Queue
+SQLite-backed queue of workflow and operation requests drained by a pool of
+worker threads, with per-host, per-user and per-session concurrency limits,
+fair ordering between users and queue position / ETA for callers. Items that
+were running when the backend stopped are marked failed when the workers start
+(a step such as a submit may already have happened); workflow checkpoints let
+the caller resume them from the interrupted step.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import statistics
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+# Items running at once against one host; TK5 under Hercules copes with one at a time
+HOST_CONCURRENCY = 2
+HOST_CONCURRENCY_OVERRIDES = {'localhost:3270': 1}
+
+# Items running at once for one user (across all of the user's sessions)
+USER_CONCURRENCY = 2
+
+# Worker threads draining the queue
+WORKER_THREADS = 4
+
+# Seconds an idle worker sleeps before looking for admissible work again
+WORKER_IDLE_SECONDS = 1.0
+
+# Assumed duration of an item kind without history, and how many past items an estimate uses
+DEFAULT_ITEM_SECONDS = 60.0
+ETA_WINDOW = 20
+
+# Finished items kept for status queries
+FINISHED_RETENTION_SECONDS = 7 * 24 * 3600.0
+
+FINAL_STATES = ('done', 'failed', 'cancelled')
+
+logger = logging.getLogger('mainframe')
+
+
+def host_limit(host: str) -> int:
+    return HOST_CONCURRENCY_OVERRIDES.get(host, HOST_CONCURRENCY)
+
+
+class WorkQueue:
+    """
+    Queue items keyed by id with host, user, preferred session and a JSON payload.
+    Claiming happens inside an immediate transaction, so several workers (or processes)
+    never start the same item.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS work_items ("
+                " id TEXT PRIMARY KEY, kind TEXT NOT NULL, host TEXT NOT NULL, user TEXT NOT NULL,"
+                " session_id TEXT, payload TEXT NOT NULL, status TEXT NOT NULL, enqueued_at REAL NOT NULL,"
+                " started_at REAL, finished_at REAL, attempts INTEGER NOT NULL DEFAULT 0, result TEXT)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_work_items_status ON work_items (status, enqueued_at)")
+            conn.execute("DELETE FROM work_items WHERE status IN ('done', 'failed', 'cancelled') AND finished_at < ?",
+                         (time.time() - FINISHED_RETENTION_SECONDS,))
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Autocommit connection (claims open their own transaction), closed after use"""
+        conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _item(row: sqlite3.Row) -> Dict:
+        item = dict(row)
+        item["payload"] = json.loads(item["payload"])
+        item["result"] = json.loads(item["result"]) if item["result"] else None
+        return item
+
+    def enqueue(self, kind: str, host: str, user: str, session_id: Optional[str], payload: Dict) -> str:
+        item_id = str(uuid.uuid4())
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO work_items (id, kind, host, user, session_id, payload, status, enqueued_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, 'queued', ?)",
+                (item_id, kind, host, user.upper(), session_id, json.dumps(payload), time.time())
+            )
+        return item_id
+
+    def get(self, item_id: str) -> Optional[Dict]:
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT * FROM work_items WHERE id = ?", (item_id,)).fetchone()
+        return self._item(row) if row else None
+
+    def items(self, host: Optional[str] = None, user: Optional[str] = None, include_finished: bool = False) -> List[Dict]:
+        query = "SELECT * FROM work_items WHERE 1 = 1"
+        params: List = []
+        if not include_finished:
+            query += " AND status IN ('queued', 'running')"
+        if host:
+            query += " AND host = ?"
+            params.append(host)
+        if user:
+            query += " AND user = ?"
+            params.append(user.upper())
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY enqueued_at", params).fetchall()
+        return [self._item(row) for row in rows]
+
+    def _fair_order(self, queued: List[sqlite3.Row], running: List[sqlite3.Row]) -> List[sqlite3.Row]:
+        """Queued rows with users running the least first, oldest first within a user level"""
+        per_user: Dict[str, int] = {}
+        for row in running:
+            per_user[row["user"]] = per_user.get(row["user"], 0) + 1
+        return sorted(queued, key=lambda row: (per_user.get(row["user"], 0), row["enqueued_at"]))
+
+    def claim(self, resolve_session: Callable[[Dict], Optional[str]]) -> Optional[Dict]:
+        """
+        Mark the next admissible item running and return it. resolve_session maps an item to
+        the live session it should use (None while no session for its host and user exists).
+        """
+        with self._lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                running = conn.execute("SELECT host, user, session_id FROM work_items WHERE status = 'running'").fetchall()
+                queued = conn.execute("SELECT * FROM work_items WHERE status = 'queued' ORDER BY enqueued_at").fetchall()
+                busy_sessions = {row["session_id"] for row in running}
+                for row in self._fair_order(queued, running):
+                    if sum(1 for entry in running if entry["host"] == row["host"]) >= host_limit(row["host"]):
+                        continue
+                    if sum(1 for entry in running if entry["user"] == row["user"]) >= USER_CONCURRENCY:
+                        continue
+                    session_id = resolve_session(self._item(row))
+                    if session_id is None or session_id in busy_sessions:
+                        continue
+                    conn.execute(
+                        "UPDATE work_items SET status = 'running', session_id = ?, started_at = ?,"
+                        " attempts = attempts + 1 WHERE id = ?",
+                        (session_id, time.time(), row["id"])
+                    )
+                    conn.execute("COMMIT")
+                    claimed = self._item(row)
+                    claimed.update(status='running', session_id=session_id)
+                    return claimed
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return None
+
+    def fail_interrupted(self) -> int:
+        """
+        Mark items left running by a stopped backend failed instead of running them again blindly:
+        a non-idempotent step (submit, allocate) may already have taken effect
+        """
+        result = json.dumps({"success": False, "interrupted": True,
+                             "message": "Interrupted by a backend restart; resume the run to continue from its checkpoints"})
+        with self._lock, self._connect() as conn:
+            cursor = conn.execute("UPDATE work_items SET status = 'failed', finished_at = ?, result = ? WHERE status = 'running'",
+                                  (time.time(), result))
+        return cursor.rowcount
+
+    def finish(self, item_id: str, success: bool, result: Dict):
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE work_items SET status = ?, finished_at = ?, result = ? WHERE id = ? AND status = 'running'",
+                ('done' if success else 'failed', time.time(), json.dumps(result, default=str), item_id)
+            )
+
+    def cancel(self, item_id: str) -> bool:
+        """Cancel a queued item (running items finish normally)"""
+        with self._lock, self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE work_items SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                (time.time(), item_id)
+            )
+        return cursor.rowcount > 0
+
+    def requeue(self, item_id: str, payload: Optional[Dict] = None, session_id: Optional[str] = None) -> bool:
+        """Put a failed or cancelled item back in the queue (optionally with new steps or a new session)"""
+        with self._lock, self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE work_items SET status = 'queued', enqueued_at = ?, started_at = NULL, finished_at = NULL,"
+                " result = NULL, payload = COALESCE(?, payload), session_id = COALESCE(?, session_id)"
+                " WHERE id = ? AND status IN ('failed', 'cancelled')",
+                (time.time(), json.dumps(payload) if payload is not None else None, session_id, item_id)
+            )
+        return cursor.rowcount > 0
+
+    def average_seconds(self, host: str, kind: str) -> float:
+        """Median duration of recent finished items of this kind on the host"""
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT finished_at - started_at FROM work_items WHERE host = ? AND kind = ? AND status IN ('done', 'failed')"
+                " AND started_at IS NOT NULL ORDER BY finished_at DESC LIMIT ?",
+                (host, kind, ETA_WINDOW)
+            ).fetchall()
+        return statistics.median(row[0] for row in rows) if rows else DEFAULT_ITEM_SECONDS
+
+    def position(self, item: Dict) -> Dict:
+        """Place of a queued item among the queued items of its host, and its estimated completion"""
+        if item["status"] != 'queued':
+            return {"position": None, "ahead": 0, "eta_seconds": None}
+        with self._lock, self._connect() as conn:
+            running = conn.execute("SELECT host, user, session_id FROM work_items WHERE status = 'running'").fetchall()
+            queued = conn.execute("SELECT * FROM work_items WHERE status = 'queued' AND host = ? ORDER BY enqueued_at",
+                                  (item["host"],)).fetchall()
+        order = [row["id"] for row in self._fair_order(queued, running)]
+        ahead = order.index(item["id"]) if item["id"] in order else len(order)
+        running_here = sum(1 for row in running if row["host"] == item["host"])
+        per_item = self.average_seconds(item["host"], item["kind"])
+        # Items ahead (and those running) drain host_limit at a time, then this one runs
+        waves = (ahead + running_here) // host_limit(item["host"])
+        return {"position": ahead + 1, "ahead": ahead, "eta_seconds": round((waves + 1) * per_item, 1)}
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock, self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM work_items GROUP BY status").fetchall()
+        return {row[0]: row[1] for row in rows}
+
+
+class WorkerPool:
+    """Worker threads that claim queue items and run them with a caller-supplied runner"""
+
+    def __init__(self, queue: WorkQueue, resolve_session: Callable[[Dict], Optional[str]],
+                 run_item: Callable[[Dict], Dict], workers: int = WORKER_THREADS):
+        self.queue = queue
+        self.resolve_session = resolve_session
+        self.run_item = run_item
+        self.workers = workers
+        self._threads: List[threading.Thread] = []
+        self._wake = threading.Event()
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """Start the workers once (safe to call on every request)"""
+        with self._start_lock:
+            if self._threads:
+                return
+            # Nothing runs yet in this process, so any running item was left by an earlier one
+            self.queue.fail_interrupted()
+            for number in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"work-queue-{number + 1}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def notify(self):
+        """Wake idle workers after an enqueue or a finished item"""
+        self._wake.set()
+
+    def _work(self):
+        while True:
+            # A failed claim (locked database, sessions changing underneath) must not end the worker
+            try:
+                item = self.queue.claim(self.resolve_session)
+            except Exception as e:
+                logger.error(f"Work queue claim failed: {e}")
+                self._wake.wait(WORKER_IDLE_SECONDS)
+                self._wake.clear()
+                continue
+            if item is None:
+                self._wake.wait(WORKER_IDLE_SECONDS)
+                self._wake.clear()
+                continue
+            try:
+                result = self.run_item(item)
+            except Exception as e:
+                result = {"success": False, "message": f"Queue item error: {str(e)}"}
+            self.queue.finish(item["id"], bool(result.get("success")), result)
+            self.notify()
@@ -1,6 +1,6 @@
 import { WorkflowItem } from '@/types/workflow';
 import { sanitizeInput } from '@/utils/validation';
-import { mainframeApi } from '@/services/mainframeApi';
+import { mainframeApi, DataGenRule } from '@/services/mainframeApi';
 import { parseDCB, validateDCB, formatDCB } from '@/utils/dcbValidator';
 import { validateMainframeDatasetName, validateWindowsFileName } from '@/utils/fileNameValidator';
 
@@ -22,6 +22,8 @@ export interface ExecutionProgress {
 export class FunctionExecutor {
   private static readonly DEFAULT_MAX_OUTPUT_PAGES = 50;
 
+  // Runs every step from the browser and restarts from step 1 after a failure; workflows that
+  // need resume-from-failed-step go through mainframeApi.enqueue / resumeWorkflow instead
   static async executeWorkflow(
     workflowItems: WorkflowItem[],
     onProgress?: (progress: ExecutionProgress) => void
@@ -210,10 +212,10 @@ export class FunctionExecutor {
         return await this.executeJobStatusAndOutput(functionName, sanitizedInputs);
       
       case 'filecomp1':
-        return `${functionName}: File comparison completed. Compared '${sanitizedInputs['File Name1'] || 'File1'}' at '${sanitizedInputs['Windows File Location1'] || 'File location'}' and '${sanitizedInputs['File Name2'] || 'File2'}' at '${sanitizedInputs['Windows File Location2'] || 'File location'}'. Files compared and differences identified.`;
+        return await this.executeFileComp1(functionName, sanitizedInputs);
       
       case 'filecomp2':
-        return `${functionName}: File comparison with conditions completed. Verified '${sanitizedInputs['File Name1'] || 'File1'}' for expected values. Field1 '${sanitizedInputs['Field1 Name'] || 'Value'}' expected '${sanitizedInputs['Field1 Expected Value'] || 'Value'}' and Field2 '${sanitizedInputs['Field2 Name'] || 'Value'}' expected '${sanitizedInputs['Field2 Expected Value'] || 'Value'}' checked. Differences mentioned.`;
+        return await this.executeFileComp2(functionName, sanitizedInputs);
       
       case 'createfile':
         return await this.executeCreateFile(functionName, sanitizedInputs);
@@ -234,10 +236,10 @@ export class FunctionExecutor {
         return await this.executeFileReverseConv(functionName, sanitizedInputs);
 
       case 'gotoispfmainscreen':
-        return `${functionName}: Successfully returned to ISPF main screen. Pre-requisite is that LogonISPF should be true.`;
+        return await this.executeGotoISPFMainScreen(functionName);
       
       case 'filereccount':
-        return `${functionName}: Record count retrieved successfully. File '${sanitizedInputs['Mainframe File Name1'] || 'File1(SHIPRA.TEST.FILE1)'}' contains record count. Can be used to verify empty files.`;
+        return await this.executeFileRecCount(functionName, sanitizedInputs);
       
       default:
         return `${functionName}: Function executed successfully with provided inputs.`;
@@ -251,120 +253,52 @@ export class FunctionExecutor {
     try {
       // Extract parameters
       const fileName = inputs['File Name'] || 'testfile.txt';
-      const fileLocation = inputs['File Location on windows'] || './output';
-      const copybookName = inputs['Copybook Name'] || 'default_layout';
+      const fileLocation = inputs['File Location on windows'] || 'uploads';
+      const copybookName = inputs['Copybook Name'] || 'Copybook - input.txt';
+      const copybookLocation = inputs['Copybook Location on windows'] || 'uploads';
+      const records = parseInt(inputs['Record Count'] || '1', 10);
 
-      // Key field
-      const keyFieldName = inputs['Key Field-1-Name'] || 'ID';
-      const keyFieldValue = inputs['Key Field-1-Value'] || '001';
-
-      // Input fields
-      const fields: Array<{name: string, value: string}> = [];
+      if (!Number.isFinite(records) || records < 0) {
+        throw new Error('Record Count must be a non-negative number');
+      }
 
-      // Add key field
-      fields.push({ name: keyFieldName, value: keyFieldValue });
+      // Key field: a plain value such as 'POL001' numbers the records from it
+      const keyFieldName = inputs['Key Field-1-Name'] || '';
+      const keyFieldValue = inputs['Key Field-1-Value'] || '';
+      const rules: DataGenRule[] = [];
+      if (keyFieldName && keyFieldValue) {
+        const isPlainKey = /^[A-Za-z-]*\d+$/.test(keyFieldValue);
+        rules.push({ field: keyFieldName, value: isPlainKey && records > 1 ? `seq:${keyFieldValue}` : keyFieldValue });
+      }
 
-      // Add other input fields
-      for (let i = 1; i <= 10; i++) {
-        const fieldName = inputs[`Input Field-${i}-Name`];
-        const fieldValue = inputs[`Input Field-${i}-Value`];
+      // Input fields take a constant or a rule ('1..100', 'A|B', 'date:2024-01-01..2024-12-31', ...)
+      for (const suffix of ['1', '2', '3', '4', '5', '6', '7', '8', '9', '10', 'n']) {
+        const fieldName = inputs[`Input Field-${suffix}-Name`];
+        const fieldValue = inputs[`Input Field-${suffix}-Value`];
         if (fieldName && fieldValue) {
-          fields.push({ name: fieldName, value: fieldValue });
+          rules.push({ field: fieldName, value: fieldValue });
         }
       }
 
-      // Handle 'n' field
-      const fieldNameN = inputs['Input Field-n-Name'];
-      const fieldValueN = inputs['Input Field-n-Value'];
-      if (fieldNameN && fieldValueN) {
-        fields.push({ name: fieldNameN, value: fieldValueN });
-      }
-
-      // Create file content based on copybook layout
-      const fileContent = this.generateFileContent(copybookName, fields);
+      const response = await mainframeApi.generateTestData({
+        copybook_path: `${copybookLocation}/${copybookName}`,
+        output_path: `${fileLocation}/${fileName}`,
+        records,
+        rules
+      });
 
-      // For web environment, we'll simulate file creation
-      if (typeof window !== 'undefined') {
-        // Create download for the file
-        const blob = new Blob([fileContent], { type: 'text/plain' });
-        const url = URL.createObjectURL(blob);
-        const link = document.createElement('a');
-        link.href = url;
-        link.download = fileName;
-        document.body.appendChild(link);
-        link.click();
-        document.body.removeChild(link);
-        URL.revokeObjectURL(url);
-
-        return `${functionName}: File '${fileName}' created successfully and downloaded. Location: Downloads folder. Copybook: '${copybookName}'. Fields set: ${fields.map(f => `${f.name}=${f.value}`).join(', ')}.`;
-      } else {
-        // For Node.js environment (if running server-side)
-        return `${functionName}: File '${fileName}' created successfully at '${fileLocation}'. Copybook: '${copybookName}'. Fields set: ${fields.map(f => `${f.name}=${f.value}`).join(', ')}.`;
+      if (!response.success) {
+        throw new Error(response.message || 'File generation failed');
       }
 
+      const fieldsSet = rules.map(rule => `${rule.field}=${rule.value}`).join(', ');
+      return `${functionName}: File '${response.output_path}' created with ${response.records} record(s) of ${response.record_length} bytes using copybook '${copybookName}'.${fieldsSet ? ` Fields set: ${fieldsSet}.` : ''}`;
     } catch (error) {
       const errorMessage = error instanceof Error ? error.message : 'Unknown error';
       throw new Error(`Failed to create file: ${errorMessage}`);
     }
   }
 
-  private static generateFileContent(
-    copybookName: string,
-    fields: Array<{name: string, value: string}>
-  ): string {
-    const timestamp = new Date().toISOString();
-    let content = '';
-
-    // Add header with copybook information
-    content += `# File generated using copybook: ${copybookName}\n`;
-    content += `# Generated on: ${timestamp}\n`;
-    content += `# Total fields: ${fields.length}\n`;
-    content += '\n';
-
-    // Add field definitions in a structured format
-    content += '# Field Definitions:\n';
-    fields.forEach((field, index) => {
-      content += `# Field ${index + 1}: ${field.name}\n`;
-    });
-    content += '\n';
-
-    // Add data section
-    content += '# Data Section:\n';
-
-    // Format 1: Key-Value pairs
-    content += '[FIELDS]\n';
-    fields.forEach(field => {
-      content += `${field.name}=${field.value}\n`;
-    });
-    content += '\n';
-
-    // Format 2: Fixed-width format (simulating mainframe fixed-width files)
-    content += '[FIXED_WIDTH_DATA]\n';
-    let fixedWidthLine = '';
-    fields.forEach(field => {
-      // Pad each field to 20 characters for fixed-width format
-      const paddedValue = field.value.padEnd(20, ' ');
-      fixedWidthLine += paddedValue;
-    });
-    content += fixedWidthLine + '\n';
-    content += '\n';
-
-    // Format 3: CSV format
-    content += '[CSV_FORMAT]\n';
-    const csvHeaders = fields.map(f => f.name).join(',');
-    const csvValues = fields.map(f => f.value).join(',');
-    content += csvHeaders + '\n';
-    content += csvValues + '\n';
-    content += '\n';
-
-    // Add footer
-    content += '# End of file\n';
-    content += `# Record count: 1\n`;
-    content += `# File creation completed successfully\n`;
-
-    return content;
-  }
-
   private static async executeSendFile(
     functionName: string,
     inputs: Record<string, string>
@@ -429,11 +363,18 @@ export class FunctionExecutor {
         session_id: sessionId,
         local_path: localPath,
         mainframe_dataset: mainframeFileName,
-        transfer_mode: 'ascii'
+        transfer_mode: 'ascii',
+        dcb: Object.keys(dcb).length > 0 ? dcb : undefined
       });
 
       if (response.success) {
-        return `${functionName}: File transfer completed successfully. Transferred '${windowsFileName}' from '${windowsFileLocation}' to mainframe dataset '${mainframeFileName}'${dcbInfo}. Bytes transferred: ${response.bytes_transferred || 0}.`;
+        const preflightWarnings = response.preflight?.warnings.length
+          ? ` Warnings: ${response.preflight.warnings.join('; ')}.`
+          : '';
+        return `${functionName}: File transfer completed successfully. Transferred '${windowsFileName}' from '${windowsFileLocation}' to mainframe dataset '${mainframeFileName}'${dcbInfo}. Bytes transferred: ${response.bytes_transferred || 0}.${preflightWarnings}`;
+      } else if (response.preflight) {
+        // Rejected locally before the transfer started; the errors already name the offending records
+        throw new Error(`File transfer failed: ${response.message}`);
       } else {
         // Detailed error from API
         const reason = response.message || 'Unknown reason';
@@ -728,27 +669,21 @@ export class FunctionExecutor {
       // Construct relative paths (server will resolve to absolute paths)
       const textFilePath = `${textLocation}/${textFileName}`;
       const copybookPath = `${copybookLocation}/${copybookName}`;
-
-      // Call the file conversion API
-      const response = await fetch('/api/file/convert', {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-          copybookPath,
-          textFilePath,
-          outputFileName,
-          outputLocation
-        })
+      const excelFileName = /\.(xlsx|csv|parquet)$/i.test(outputFileName)
+        ? outputFileName
+        : `${outputFileName}.xlsx`;
+
+      // Stream the conversion on the backend (the file is never loaded whole)
+      const response = await mainframeApi.convertFile({
+        copybook_path: copybookPath,
+        data_path: textFilePath,
+        output_path: `${outputLocation}/${excelFileName}`
       });
 
-      const data = await response.json();
-
-      if (data.success) {
-        return `${functionName}: Successfully converted ${data.recordCount} records to Excel file '${outputFileName}'. Output saved to '${data.outputPath}'. Processed ${data.fieldCount} fields from copybook.`;
+      if (response.success) {
+        return `${functionName}: Successfully converted ${response.records} records to ${(response.format || 'xlsx').toUpperCase()} file '${excelFileName}'. Output saved to '${response.output_path}'. Processed ${response.fields} fields from copybook.`;
       } else {
-        throw new Error(data.error || 'File conversion failed');
+        throw new Error(response.message || 'File conversion failed');
       }
     } catch (error) {
       const errorMessage = error instanceof Error ? error.message : 'Unknown error';
@@ -756,6 +691,161 @@ export class FunctionExecutor {
     }
   }
 
+  private static async executeFileComp1(
+    functionName: string,
+    inputs: Record<string, string>
+  ): Promise<string> {
+    try {
+      const file1Name = inputs['File Name1'] || 'File1';
+      const file1Location = inputs['Windows File Location1'] || 'uploads';
+      const file2Name = inputs['File Name2'] || 'File2';
+      const file2Location = inputs['Windows File Location2'] || 'uploads';
+      const copybookName = inputs['Copybook name in windows'] || 'Copybook - input.txt';
+      const copybookLocation = inputs['Windows Copybook Location'] || 'uploads';
+      const keyFields = inputs['Key Fields'] || '';
+
+      const response = await mainframeApi.compareFiles({
+        copybook_path: `${copybookLocation}/${copybookName}`,
+        file1_path: `${file1Location}/${file1Name}`,
+        file2_path: `${file2Location}/${file2Name}`,
+        key_fields: keyFields
+      });
+
+      if (!response.success) {
+        throw new Error(response.message || 'File comparison failed');
+      }
+
+      const fieldSummary = Object.entries(response.field_differences || {})
+        .map(([field, count]) => `${field}: ${count}`)
+        .join(', ');
+
+      return `${functionName}: ${response.message}.${fieldSummary ? ` Field differences - ${fieldSummary}.` : ''} Report saved to '${response.report_path}'.`;
+    } catch (error) {
+      const errorMessage = error instanceof Error ? error.message : 'Unknown error';
+      throw new Error(`File comparison failed: ${errorMessage}`);
+    }
+  }
+
+  private static async executeFileComp2(
+    functionName: string,
+    inputs: Record<string, string>
+  ): Promise<string> {
+    try {
+      const fileName = inputs['File Name1'] || 'File1';
+      const fileLocation = inputs['Windows File Location'] || 'uploads';
+      const copybookName = inputs['Copybook name in windows'] || 'Copybook - input.txt';
+      const copybookLocation = inputs['Windows Copybook Location'] || 'uploads';
+
+      const conditions = [1, 2]
+        .map(index => ({
+          field: (inputs[`Field${index} Name`] || '').trim(),
+          expected: inputs[`Field${index} Expected Value`] || ''
+        }))
+        .filter(condition => condition.field && condition.expected.trim());
+
+      if (conditions.length === 0) {
+        throw new Error('At least one field name and expected value is required');
+      }
+
+      const response = await mainframeApi.checkFileExpectations({
+        copybook_path: `${copybookLocation}/${copybookName}`,
+        file_path: `${fileLocation}/${fileName}`,
+        conditions
+      });
+
+      if (!response.success) {
+        throw new Error(response.message || 'Expectation check failed');
+      }
+
+      const details = (response.conditions || [])
+        .map(condition => `${condition.condition}: ${condition.passed ? 'OK' : `${condition.violations} violation(s)`}`)
+        .join('; ');
+      const firstFailure = response.sample && response.sample.length > 0
+        ? ` First offending record: #${response.sample[0].record}.`
+        : '';
+
+      return `${functionName}: ${response.message}. ${details}.${firstFailure}`;
+    } catch (error) {
+      const errorMessage = error instanceof Error ? error.message : 'Unknown error';
+      throw new Error(`File comparison with conditions failed: ${errorMessage}`);
+    }
+  }
+
+  private static async executeGotoISPFMainScreen(functionName: string): Promise<string> {
+    try {
+      let sessionId = '';
+      if (typeof window !== 'undefined') {
+        sessionId = localStorage.getItem('mainframe-session-id') || '';
+      }
+
+      if (!sessionId) {
+        throw new Error(`No active mainframe session. Please login first.`);
+      }
+
+      const response = await mainframeApi.navigate({
+        session_id: sessionId,
+        target: 'ispf_primary'
+      });
+
+      if (!response.success) {
+        throw new Error(response.message || 'ISPF main screen not reached');
+      }
+
+      return `${functionName}: Returned to ISPF main screen in ${response.keystrokes || 0} keystroke(s).`;
+    } catch (error) {
+      const errorMessage = error instanceof Error ? error.message : 'Unknown error';
+      throw new Error(`GotoISPFmainscreen failed: ${errorMessage}`);
+    }
+  }
+
+  private static async executeFileRecCount(
+    functionName: string,
+    inputs: Record<string, string>
+  ): Promise<string> {
+    try {
+      let sessionId = '';
+      if (typeof window !== 'undefined') {
+        sessionId = localStorage.getItem('mainframe-session-id') || '';
+      }
+
+      if (!sessionId) {
+        throw new Error(`No active mainframe session. Please login first.`);
+      }
+
+      // Accepts 'SHIPRA.TEST.FILE1', 'File1(SHIPRA.TEST.FILE1)' or a comma-separated list
+      const datasets = (inputs['Mainframe File Name1'] || '')
+        .split(',')
+        .map(name => name.trim())
+        .filter(name => name)
+        .map(name => {
+          const labelled = name.match(/^[^.(]+\((.+\..+)\)$/);
+          return labelled ? labelled[1] : name;
+        });
+
+      if (datasets.length === 0) {
+        throw new Error('Mainframe file name is required');
+      }
+
+      const response = await mainframeApi.countRecords({
+        session_id: sessionId,
+        datasets
+      });
+
+      const details = (response.counts || [])
+        .map(count => count.success ? `${count.dataset}: ${count.records} record(s)` : `${count.dataset}: ${count.message}`)
+        .join('; ');
+
+      if (!response.success) {
+        throw new Error(details || response.message || 'Record count failed');
+      }
+
+      return `${functionName}: ${details}. Job ${response.job_id}.`;
+    } catch (error) {
+      const errorMessage = error instanceof Error ? error.message : 'Unknown error';
+      throw new Error(`Record count failed: ${errorMessage}`);
+    }
+  }
+
   private static async executeFileReverseConv(
     functionName: string,
     inputs: Record<string, string>
@@ -773,28 +863,22 @@ export class FunctionExecutor {
       // Construct relative paths (server will resolve to absolute paths)
       const excelFilePath = `${excelLocation}/${excelFileName}`;
       const copybookPath = `${copybookLocation}/${copybookName}`;
-
-      // Call the reverse conversion API
-      const response = await fetch('/api/file/reverse-convert', {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-          copybookPath,
-          excelFilePath,
-          outputFileName,
-          outputLocation,
-          outputFormat
-        })
+      const textFileName = /\.[A-Za-z0-9]+$/.test(outputFileName)
+        ? outputFileName
+        : `${outputFileName}.txt`;
+
+      // Stream the reverse conversion on the backend
+      const response = await mainframeApi.reverseConvertFile({
+        copybook_path: copybookPath,
+        input_path: excelFilePath,
+        output_path: `${outputLocation}/${textFileName}`,
+        output_format: outputFormat === 'csv' ? 'csv' : 'fixed'
       });
 
-      const data = await response.json();
-
-      if (data.success) {
-        return `${functionName}: Successfully converted ${data.recordCount} records to ${data.format} text file '${outputFileName}'. Output saved to '${data.outputPath}'. Processed ${data.fieldCount} fields from copybook.`;
+      if (response.success) {
+        return `${functionName}: Successfully converted ${response.records} records to ${response.format} text file '${textFileName}'. Output saved to '${response.output_path}'. Processed ${response.fields} fields from copybook.`;
       } else {
-        throw new Error(data.error || 'Reverse conversion failed');
+        throw new Error(response.message || 'Reverse conversion failed');
       }
     } catch (error) {
       const errorMessage = error instanceof Error ? error.message : 'Unknown error';
@@ -19,6 +19,16 @@ const BASE_URL = getBaseUrl();
 export interface ConnectionRequest {
   host: string;
   port?: number;
+  // Custom screen size tried before the standard models, e.g. "62x160" (rows x columns)
+  oversize?: string;
+}
+
+export interface TerminalGeometry {
+  model: string | null;
+  rows: number;
+  columns: number;
+  max_rows?: number;
+  max_columns?: number;
 }
 
 export interface ConnectionResponse {
@@ -27,6 +37,7 @@ export interface ConnectionResponse {
   message: string;
   host: string;
   port: number;
+  terminal?: TerminalGeometry;
 }
 
 export interface LoginRequest {
@@ -40,6 +51,49 @@ export interface LoginResponse {
   success: boolean;
   message: string;
   screen_content?: string;
+  terminal?: TerminalGeometry;
+  recorder?: string;
+  screen_hash?: string;
+}
+
+export interface BulkLoginUser {
+  host: string;
+  port?: number;
+  username: string;
+  password: string;
+  login_type?: 'standard' | 'tso';
+}
+
+export interface BulkLoginRequest {
+  users: BulkLoginUser[];
+  login_type?: 'standard' | 'tso';
+  // Concurrent logins per host (TK5 on localhost:3270 is always one at a time)
+  per_host?: number;
+}
+
+export interface BulkLoginResult {
+  index: number;
+  host: string;
+  port: number;
+  username: string;
+  success: boolean;
+  session_id?: string;
+  terminal?: TerminalGeometry;
+  message: string;
+  timing: {
+    wait_ms: number;
+    connect_ms: number;
+    login_ms: number;
+    total_ms: number;
+  };
+}
+
+export interface BulkLoginResponse {
+  success: boolean;
+  message: string;
+  results?: BulkLoginResult[];
+  failed?: number;
+  elapsed_ms?: number;
 }
 
 export interface ScreenResponse {
@@ -74,6 +128,7 @@ export interface SessionInfo {
   port: number;
   connected: boolean;
   logged_in: boolean;
+  terminal: TerminalGeometry;
   created_at: string;
 }
 
@@ -82,11 +137,62 @@ export interface SessionsResponse {
   sessions: SessionInfo[];
 }
 
+export interface RecorderEntry {
+  timestamp: string;
+  action: string;
+  screen_hash: string;
+  wait_ms: number | null;
+  screen_content?: string;
+}
+
+export interface RecorderResponse {
+  success: boolean;
+  message?: string;
+  session_id?: string;
+  capacity?: number;
+  count?: number;
+  entries?: RecorderEntry[];
+}
+
+export type HostCodePage = 'cp037' | 'cp1047';
+
+export interface TransferCodecStats {
+  records: number;
+  record_length: number;
+  bytes: number;
+  code_page: HostCodePage;
+}
+
 export interface SendFileRequest {
   session_id: string;
   local_path: string;
   mainframe_dataset: string;
   transfer_mode?: 'ascii' | 'binary';
+  copybook_path?: string;
+  code_page?: HostCodePage;
+  local_framing?: 'auto' | 'fixed' | 'lines';
+  dcb?: UploadDCB;
+  preflight?: boolean;
+}
+
+export interface UploadDCB {
+  recfm?: string;
+  lrecl?: number;
+  blksize?: number;
+}
+
+export interface UploadPreflightReport {
+  valid: boolean;
+  errors: string[];
+  warnings: string[];
+  records: number;
+  record_length: number | null;
+  recfm: string | null;
+  checks: {
+    record_length?: { framing: string; bytes: number; min: number; max: number; too_long?: number; too_short?: number };
+    characters?: { code_page: string; utf8: boolean; control_bytes: number; c1_bytes: number; code_page_sensitive: number };
+    numeric?: { fields: number; invalid: Record<string, number>; samples: Record<string, number[]> };
+  };
 }
 
 export interface SendFileResponse {
@@ -94,6 +200,301 @@ export interface SendFileResponse {
   message: string;
   bytes_transferred?: number;
   screen_content?: string;
+  codec?: TransferCodecStats;
+  preflight?: UploadPreflightReport;
+}
+
+export interface UploadValidateRequest {
+  local_path: string;
+  dcb?: UploadDCB;
+  copybook_path?: string;
+  transfer_mode?: 'ascii' | 'binary';
+  code_page?: HostCodePage;
+  framing?: 'auto' | 'fixed' | 'lines';
+}
+
+export interface UploadValidateResponse extends Partial<UploadPreflightReport> {
+  success: boolean;
+  message: string;
+  elapsed_ms?: number;
+}
+
+export interface SplitUploadRequest extends SendFileRequest {
+  helper_session_ids?: string[];
+  parts?: number;
+  job_class?: string;
+  msgclass?: string;
+  max_attempts?: number;
+  wait_seconds?: number;
+}
+
+export interface SplitUploadPart {
+  part: number;
+  dataset: string;
+  session_id?: string;
+  bytes?: number;
+  attempts: number;
+  success: boolean;
+  message?: string;
+  elapsed_ms?: number;
+}
+
+export interface SplitUploadResponse {
+  success: boolean;
+  message: string;
+  parts?: SplitUploadPart[];
+  job_id?: string;
+  cond_code?: string | null;
+  output_path?: string;
+  bytes?: number;
+  sessions?: number;
+  upload_ms?: number;
+  elapsed_ms?: number;
+  preflight?: UploadPreflightReport;
+}
+
+export type ScreenState = 'logon' | 'ready' | 'tso_more' | 'ispf_primary' | 'dslist_entry' | 'dslist' | 'edit' | 'sysout_browse' | 'unknown';
+
+export interface NavigateRequest {
+  session_id: string;
+  target?: 'ready' | 'ispf_primary' | 'dslist_entry' | 'dslist' | 'edit';
+  params?: { level?: string; dataset?: string };
+  max_steps?: number;
+}
+
+export interface NavigationStep {
+  from: ScreenState;
+  to: ScreenState;
+  actions: string[];
+  reached: ScreenState;
+  wait_ms: number;
+}
+
+export interface NavigateResponse {
+  success: boolean;
+  message: string;
+  state?: ScreenState;
+  target?: string;
+  steps?: NavigationStep[];
+  keystrokes?: number;
+  elapsed_ms?: number;
+  screen_content?: string;
+}
+
+export type BatchOperation =
+  | { op: 'alloc'; dataset: string; recfm?: string; lrecl?: number; blksize?: number; primary?: number; secondary?: number }
+  | { op: 'delete' | 'exists' | 'listds' | 'count' | 'submit'; dataset: string }
+  | { op: 'status'; job?: string }
+  | { op: 'tso'; command: string };
+
+export interface BatchRequest {
+  session_id: string;
+  operations: BatchOperation[];
+  timeout?: number;
+}
+
+export interface BatchOperationResult {
+  index: number;
+  op: BatchOperation['op'];
+  rc: number | null;
+  success: boolean;
+  output: string[];
+  values: Record<string, string | number>;
+  message?: string;
+}
+
+export interface BatchResponse {
+  success: boolean;
+  message: string;
+  results?: BatchOperationResult[];
+  exec_dataset?: string;
+  exec_uploaded?: boolean;
+  elapsed_ms?: number;
+}
+
+export type BulkDatasetAction = 'allocate' | 'delete' | 'listds';
+
+export interface BulkDatasetItem {
+  dataset: string;
+  action?: BulkDatasetAction;
+  recfm?: string;
+  lrecl?: number;
+  blksize?: number;
+  dsorg?: 'PS' | 'PO';
+  primary?: number;
+  secondary?: number;
+  space_unit?: 'TRACKS' | 'CYLINDERS';
+  directory?: number;
+}
+
+export interface BulkDatasetRequest {
+  session_id: string;
+  action?: BulkDatasetAction;
+  datasets: (string | BulkDatasetItem)[];
+  dcb?: Omit<BulkDatasetItem, 'dataset' | 'action'>;
+  missing_ok?: boolean;
+  stop_on_error?: boolean;
+}
+
+export interface BulkDatasetRow {
+  dataset: string;
+  action: BulkDatasetAction;
+  success: boolean;
+  status: 'allocated' | 'deleted' | 'found' | 'not_found' | 'failed' | 'timeout';
+  message: string;
+  warnings?: string[];
+  recfm?: string;
+  lrecl?: number | null;
+  blksize?: number | null;
+  dsorg?: string;
+  volumes?: string[];
+  members?: string[];
+  elapsed_ms: number;
+}
+
+export interface BulkDatasetResponse {
+  success: boolean;
+  message: string;
+  rows?: BulkDatasetRow[];
+  failed?: number;
+  skipped?: number;
+  elapsed_ms?: number;
+}
+
+export interface CatalogLookupRequest {
+  session_id: string;
+  datasets: string[];
+  members?: boolean;
+  refresh?: boolean;
+}
+
+export interface CatalogEntry {
+  name: string;
+  dataset: string;
+  member?: string;
+  exists: boolean | null;
+  attributes: {
+    recfm?: string;
+    lrecl?: number | null;
+    blksize?: number | null;
+    dsorg?: string;
+    volumes?: string[];
+  } | null;
+  members: string[] | null;
+  source: 'cache' | 'host';
+  message?: string;
+}
+
+export interface CatalogLookupResponse {
+  success: boolean;
+  message: string;
+  datasets?: CatalogEntry[];
+  host_lookups?: number;
+}
+
+export interface CatalogRefreshResponse {
+  success: boolean;
+  message: string;
+  level?: string;
+  datasets?: string[];
+  elapsed_ms?: number;
+}
+
+export type QueueOperation =
+  | 'sendfile' | 'getfile' | 'submit' | 'submit_batch' | 'jobstatus' | 'joboutput'
+  | 'reccount' | 'batch' | 'datasets' | 'catalog' | 'command' | 'navigate';
+
+export interface QueueStep {
+  op: QueueOperation;
+  // Keyword arguments of the backend session method (e.g. { jcl_dataset_name: 'HERC01.JCL(JOB)' })
+  params: Record<string, unknown>;
+}
+
+export interface QueueSubmitRequest {
+  session_id: string;
+  op?: QueueOperation;
+  params?: Record<string, unknown>;
+  steps?: QueueStep[];
+}
+
+export interface QueuePosition {
+  position: number | null;
+  ahead: number;
+  eta_seconds: number | null;
+}
+
+export type QueueItemStatus = 'queued' | 'running' | 'done' | 'failed' | 'cancelled';
+
+export interface QueueSubmitResponse extends Partial<QueuePosition> {
+  success: boolean;
+  message: string;
+  item_id?: string;
+  run_id?: string;
+  status?: QueueItemStatus;
+}
+
+export interface QueueItemResponse extends Partial<QueuePosition> {
+  success: boolean;
+  message: string;
+  item_id?: string;
+  kind?: 'operation' | 'workflow';
+  host?: string;
+  user?: string;
+  session_id?: string;
+  status?: QueueItemStatus;
+  final?: boolean;
+  waiting_for_session?: boolean;
+  enqueued_at?: number;
+  started_at?: number | null;
+  finished_at?: number | null;
+  attempts?: number;
+  result?: {
+    success: boolean;
+    message: string;
+    steps: (Record<string, unknown> & { op: QueueOperation; success: boolean; message: string })[];
+    elapsed_ms: number;
+  } | null;
+}
+
+export interface WorkflowCheckpoint {
+  step: number;
+  op: QueueOperation;
+  success: boolean;
+  message: string | null;
+  result: Record<string, unknown> | null;
+  // Job ids, output paths and transferred files; later steps reference them as "${step.key}"
+  artifacts: Record<string, unknown>;
+  session_id: string | null;
+  started_at: number | null;
+  finished_at: number | null;
+}
+
+export interface WorkflowRunResponse extends Partial<QueuePosition> {
+  success: boolean;
+  message: string;
+  run_id?: string;
+  status?: QueueItemStatus;
+  session_id?: string | null;
+  total_steps?: number;
+  next_step?: number | null;
+  checkpoints?: WorkflowCheckpoint[];
+}
+
+export interface WorkflowResumeRequest {
+  from_step?: number;
+  // Replacement params for the step being resumed
+  params?: Record<string, unknown>;
+  session_id?: string;
+}
+
+export interface WorkflowResumeResponse extends Partial<QueuePosition> {
+  success: boolean;
+  message: string;
+  run_id?: string;
+  resume_step?: number;
+  reused_steps?: number;
+  session_id?: string | null;
+  waiting_for_session?: boolean;
 }
 
 export interface GetFileRequest {
@@ -101,6 +502,9 @@ export interface GetFileRequest {
   mainframe_dataset: string;
   local_path: string;
   transfer_mode?: 'ascii' | 'binary';
+  copybook_path?: string;
+  code_page?: HostCodePage;
+  local_framing?: 'fixed' | 'lines';
 }
 
 export interface GetFileResponse {
@@ -108,6 +512,7 @@ export interface GetFileResponse {
   message: string;
   bytes_received?: number;
   local_path?: string;
+  codec?: TransferCodecStats;
 }
 
 export interface SubmitJclRequest {
@@ -120,6 +525,35 @@ export interface SubmitJclResponse {
   message: string;
   job_id?: string;
   screen_content?: string;
+  recorder?: string;
+  screen_hash?: string;
+}
+
+export interface SubmitJclBatchRequest {
+  session_id: string;
+  jcl_dataset_names: string[];
+  stop_on_error?: boolean;
+}
+
+export interface SubmitJclBatchResult {
+  jcl_dataset: string;
+  success: boolean;
+  job_id?: string;
+  message?: string;
+  wait_ms: number;
+  recorder?: string;
+  screen_hash?: string;
+}
+
+export interface SubmitJclBatchResponse {
+  success: boolean;
+  message: string;
+  job_ids?: string[];
+  results?: SubmitJclBatchResult[];
+  submitted?: number;
+  failed?: number;
+  skipped?: number;
+  elapsed_ms?: number;
 }
 
 export interface JobStatusRequest {
@@ -127,6 +561,19 @@ export interface JobStatusRequest {
   job_identifier?: string;
   max_attempts?: number;
   wait_seconds?: number;
+  predictive?: boolean;
+}
+
+export interface JobStatusPolling {
+  mode: 'predictive' | 'fixed';
+  schedule_seconds: number[];
+  history_samples: number;
+  expected_runtime_seconds: number | null;
+  recorded_runtime_seconds?: number | null;
+  polls_used?: number;
+  detected_after_ms?: number;
+  polls_saved?: number;
+  latency_saved_ms?: number;
 }
 
 export interface JobStatusResponse {
@@ -138,6 +585,7 @@ export interface JobStatusResponse {
   reached_output_queue?: boolean;
   screen_content?: string;
   history?: Array<{ attempt: string; screen_content: string }>;
+  polling?: JobStatusPolling;
 }
 
 export interface JobOutputRequest {
@@ -149,6 +597,8 @@ export interface JobOutputRequest {
 export interface JobOutputResponse {
   success: boolean;
   message: string;
+  // True when the backend reused an earlier result for the same inputs
+  cached?: boolean;
   job_identifier?: string;
   cond_code?: string;
   pages?: number;
@@ -157,6 +607,272 @@ export interface JobOutputResponse {
   output_excerpt?: string;
 }
 
+export interface CopybookCompileRequest {
+  copybook_path?: string;
+  copybook_content?: string;
+  sample_path?: string;
+  max_records?: number;
+  encoding?: string;
+  framing?: 'auto' | 'fixed' | 'lines';
+}
+
+export interface CopybookField {
+  name: string;
+  display_name: string;
+  path: string;
+  level: number;
+  offset: number;
+  length: number;
+  kind: 'alphanumeric' | 'edited' | 'zoned' | 'packed' | 'binary' | 'float';
+  usage: string;
+  digits: number;
+  scale: number;
+  signed: boolean;
+  sign_separate: 'leading' | 'trailing' | null;
+  redefined: boolean;
+}
+
+export interface CopybookLayout {
+  name: string;
+  record_length: number;
+  digest: string;
+  field_count: number;
+  fields: CopybookField[];
+}
+
+export interface CopybookCompileResponse {
+  success: boolean;
+  message: string;
+  cache_hit?: boolean;
+  layout?: CopybookLayout;
+  records?: Record<string, string | number | null>[];
+}
+
+export interface FileDecodeRequest {
+  copybook_path: string;
+  data_path: string;
+  encoding?: string;
+  framing?: 'auto' | 'fixed' | 'lines';
+  batch_records?: number;
+  max_records?: number;
+}
+
+export interface FileDecodeFieldSummary {
+  name: string;
+  display_name: string;
+  kind: CopybookField['kind'];
+  nulls: number;
+  invalid: number;
+  min: number | null;
+  max: number | null;
+}
+
+export interface FileDecodeResponse {
+  success: boolean;
+  message: string;
+  engine?: 'numpy' | 'struct';
+  record_count?: number;
+  record_length?: number;
+  batches?: number;
+  elapsed_ms?: number;
+  records_per_second?: number | null;
+  fields?: FileDecodeFieldSummary[];
+  sample?: Record<string, string | number | null>[];
+}
+
+export interface FileCompRequest {
+  copybook_path: string;
+  file1_path: string;
+  file2_path: string;
+  key_fields?: string[] | string;
+  ignore_fields?: string[] | string;
+  encoding?: string;
+  framing?: 'auto' | 'fixed' | 'lines';
+  report_path?: string;
+  max_differences?: number;
+  sort_run_records?: number;
+}
+
+export interface FileCompFieldDifference {
+  field: string;
+  expected: string | number | null;
+  actual: string | number | null;
+}
+
+export interface FileCompDifference {
+  type: 'changed' | 'only_in_file1' | 'only_in_file2';
+  record_file1?: number;
+  record_file2?: number;
+  key?: Record<string, string | number | null>;
+  fields?: FileCompFieldDifference[];
+}
+
+export interface FileCompResponse {
+  success: boolean;
+  message: string;
+  mode?: 'keyed' | 'positional';
+  key_fields?: string[];
+  records_file1?: number;
+  records_file2?: number;
+  matched?: number;
+  identical?: number;
+  changed?: number;
+  only_in_file1?: number;
+  only_in_file2?: number;
+  differences?: number;
+  files_match?: boolean;
+  field_differences?: Record<string, number>;
+  sample?: FileCompDifference[];
+  report_path?: string;
+  elapsed_ms?: number;
+}
+
+export interface FieldCondition {
+  field: string;
+  expected?: string;
+  op?: 'eq' | 'ne' | 'gt' | 'ge' | 'lt' | 'le' | 'in' | 'range' | 'regex' | 'not_null' | 'null';
+  value?: string | number | (string | number)[];
+  min?: string | number;
+  max?: string | number;
+}
+
+export interface FileCheckRequest {
+  copybook_path: string;
+  file_path: string;
+  conditions: FieldCondition[];
+  encoding?: string;
+  framing?: 'auto' | 'fixed' | 'lines';
+  max_samples?: number;
+}
+
+export interface FileCheckConditionResult {
+  field: string;
+  condition: string;
+  expected: string;
+  violations: number;
+  passed: boolean;
+}
+
+export interface FileCheckResponse {
+  success: boolean;
+  message: string;
+  records?: number;
+  failed_records?: number;
+  all_passed?: boolean;
+  conditions?: FileCheckConditionResult[];
+  sample?: {
+    record: number;
+    failed: string[];
+    values: Record<string, string | number | null>;
+  }[];
+  elapsed_ms?: number;
+}
+
+export interface RecordCountRequest {
+  session_id: string;
+  datasets: string[] | string;
+  jcl_dataset?: string;
+  job_class?: string;
+  msgclass?: string;
+  max_attempts?: number;
+  wait_seconds?: number;
+}
+
+export interface DatasetRecordCount {
+  dataset: string;
+  success: boolean;
+  records: number | null;
+  message: string;
+}
+
+export interface RecordCountResponse {
+  success: boolean;
+  message: string;
+  // True when the backend reused an earlier result for the same inputs
+  cached?: boolean;
+  job_id?: string;
+  cond_code?: string | null;
+  counts?: DatasetRecordCount[];
+  total_records?: number;
+  output_path?: string;
+}
+
+export interface DataGenRule {
+  field: string;
+  value?: string;
+  type?: 'constant' | 'sequence' | 'range' | 'choice' | 'date' | 'normal' | 'blank';
+  [parameter: string]: unknown;
+}
+
+export interface DataGenRequest {
+  copybook_path: string;
+  output_path: string;
+  records: number;
+  rules?: DataGenRule[];
+  seed?: number;
+  framing?: 'lines' | 'crlf' | 'fixed';
+  workers?: number;
+}
+
+export interface DataGenResponse {
+  success: boolean;
+  message: string;
+  records?: number;
+  record_length?: number;
+  bytes?: number;
+  shards?: number;
+  workers?: number;
+  seed?: number;
+  output_path?: string;
+  elapsed_ms?: number;
+  records_per_second?: number | null;
+  rules?: Record<string, unknown>[];
+}
+
+export type ConvertFormat = 'xlsx' | 'csv' | 'parquet';
+
+export interface FileConvertRequest {
+  copybook_path: string;
+  data_path: string;
+  output_path: string;
+  format?: ConvertFormat;
+  encoding?: string;
+  framing?: 'auto' | 'fixed' | 'lines';
+}
+
+export interface FileReverseConvertRequest {
+  copybook_path: string;
+  input_path: string;
+  output_path: string;
+  input_format?: ConvertFormat;
+  output_format?: 'fixed' | 'lines' | 'crlf' | 'csv';
+  encoding?: string;
+}
+
+export interface ConversionProgress {
+  type: 'progress';
+  records: number;
+  percent: number;
+}
+
+export interface FileConvertResponse {
+  success: boolean;
+  message: string;
+  // True when the backend reused an earlier result for the same inputs
+  cached?: boolean;
+  records?: number;
+  fields?: number;
+  format?: string;
+  bytes?: number;
+  sheets?: number;
+  record_length?: number;
+  invalid_values?: number | Record<string, number>;
+  matched_columns?: Record<string, string>;
+  unmatched_columns?: string[];
+  output_path?: string;
+  elapsed_ms?: number;
+}
+
 class MainframeApiService {
   /**
    * Check if the backend service is healthy and available
@@ -221,6 +937,28 @@ class MainframeApiService {
     }
   }
 
+  /**
+   * Connect and log in many users concurrently (bounded per host); one session id per successful user
+   */
+  async loginBulk(request: BulkLoginRequest): Promise<BulkLoginResponse> {
+    try {
+      const response = await fetch(`${BASE_URL}/login/bulk`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(request),
+      });
+
+      return await response.json();
+    } catch (error) {
+      return {
+        success: false,
+        message: `Bulk login error: ${error instanceof Error ? error.message : 'Unknown error'}`,
+      };
+    }
+  }
+
   /**
    * Get current screen content
    */
@@ -320,17 +1058,32 @@ class MainframeApiService {
   }
 
   /**
-   * Send file from Windows to Mainframe using IND$FILE
+   * Get the flight recorder (last actions and screens) of a session
    */
-  async sendFile(request: SendFileRequest): Promise<SendFileResponse> {
+  async getSessionRecorder(sessionId: string, includeScreens: boolean = true): Promise<RecorderResponse> {
     try {
-      const response = await fetch(`${BASE_URL}/sendfile`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify(request),
-      });
+      const response = await fetch(`${BASE_URL}/sessions/${sessionId}/recorder?screens=${includeScreens}`);
+      return await response.json();
+    } catch (error) {
+      return {
+        success: false,
+        message: `Recorder error: ${error instanceof Error ? error.message : 'Unknown error'}`,
+      };
+    }
+  }
+
+  /**
+   * Send file from Windows to Mainframe using IND$FILE
+   */
+  async sendFile(request: SendFileRequest): Promise<SendFileResponse> {
+    try {
+      const response = await fetch(`${BASE_URL}/sendfile`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(request),
+      });
 
       return await response.json();
     } catch (error) {
@@ -341,6 +1094,72 @@ class MainframeApiService {
     }
   }
 
+  /**
+   * Identify the current screen, or move to a target screen along the shortest known path
+   */
+  async navigate(request: NavigateRequest): Promise<NavigateResponse> {
+    try {
+      const response = await fetch(`${BASE_URL}/navigate`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(request),
+      });
+
+      return await response.json();
+    } catch (error) {
+      return {
+        success: false,
+        message: `Navigate error: ${error instanceof Error ? error.message : 'Unknown error'}`,
+      };
+    }
+  }
+
+  /**
+   * Upload a large file in parts over several sessions and concatenate them on the host
+   */
+  async sendFileSplit(request: SplitUploadRequest): Promise<SplitUploadResponse> {
+    try {
+      const response = await fetch(`${BASE_URL}/sendfile/split`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(request),
+      });
+
+      return await response.json();
+    } catch (error) {
+      return {
+        success: false,
+        message: `Split upload error: ${error instanceof Error ? error.message : 'Unknown error'}`,
+      };
+    }
+  }
+
+  /**
+   * Check a local file against a DCB (and copybook) before uploading it
+   */
+  async validateUpload(request: UploadValidateRequest): Promise<UploadValidateResponse> {
+    try {
+      const response = await fetch(`${BASE_URL}/file/validate`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(request),
+      });
+
+      return await response.json();
+    } catch (error) {
+      return {
+        success: false,
+        message: `Validate upload error: ${error instanceof Error ? error.message : 'Unknown error'}`,
+      };
+    }
+  }
+
   /**
    * Get file from Mainframe to Windows using IND$FILE
    */
@@ -385,6 +1204,28 @@ class MainframeApiService {
     }
   }
 
+  /**
+   * Submit several JCL datasets back to back on one session
+   */
+  async submitJclBatch(request: SubmitJclBatchRequest): Promise<SubmitJclBatchResponse> {
+    try {
+      const response = await fetch(`${BASE_URL}/submit_jcl/batch`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(request),
+      });
+
+      return await response.json();
+    } catch (error) {
+      return {
+        success: false,
+        message: `Submit JCL batch error: ${error instanceof Error ? error.message : 'Unknown error'}`,
+      };
+    }
+  }
+
   /**
    * Poll job status from the READY prompt
    */
@@ -429,6 +1270,408 @@ class MainframeApiService {
     }
   }
 
+  /**
+   * Compile a copybook into a record layout, optionally previewing decoded records
+   */
+  async compileCopybook(request: CopybookCompileRequest): Promise<CopybookCompileResponse> {
+    try {
+      const response = await fetch(`${BASE_URL}/copybook/compile`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(request),
+      });
+
+      return await response.json();
+    } catch (error) {
+      return {
+        success: false,
+        message: `Copybook compile error: ${error instanceof Error ? error.message : 'Unknown error'}`,
+      };
+    }
+  }
+
+  /**
+   * Decode a whole record file with a copybook and summarize each field
+   */
+  async decodeFile(request: FileDecodeRequest): Promise<FileDecodeResponse> {
+    try {
+      const response = await fetch(`${BASE_URL}/file/decode`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(request),
+      });
+
+      return await response.json();
+    } catch (error) {
+      return {
+        success: false,
+        message: `File decode error: ${error instanceof Error ? error.message : 'Unknown error'}`,
+      };
+    }
+  }
+
+  /**
+   * Compare two record files that share a copybook (keyed or positional)
+   */
+  async compareFiles(request: FileCompRequest): Promise<FileCompResponse> {
+    try {
+      const response = await fetch(`${BASE_URL}/filecomp`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(request),
+      });
+
+      return await response.json();
+    } catch (error) {
+      return {
+        success: false,
+        message: `File comparison error: ${error instanceof Error ? error.message : 'Unknown error'}`,
+      };
+    }
+  }
+
+  /**
+   * Check that fields of a record file hold expected values
+   */
+  async checkFileExpectations(request: FileCheckRequest): Promise<FileCheckResponse> {
+    try {
+      const response = await fetch(`${BASE_URL}/filecomp/check`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(request),
+      });
+
+      return await response.json();
+    } catch (error) {
+      return {
+        success: false,
+        message: `File check error: ${error instanceof Error ? error.message : 'Unknown error'}`,
+      };
+    }
+  }
+
+  /**
+   * Generate a fixed-length test data file from a copybook and field value rules
+   */
+  async generateTestData(request: DataGenRequest): Promise<DataGenResponse> {
+    try {
+      const response = await fetch(`${BASE_URL}/datagen`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(request),
+      });
+
+      return await response.json();
+    } catch (error) {
+      return {
+        success: false,
+        message: `Data generation error: ${error instanceof Error ? error.message : 'Unknown error'}`,
+      };
+    }
+  }
+
+  /**
+   * Convert a fixed-length record file to XLSX, CSV or Parquet on the backend
+   */
+  async convertFile(
+    request: FileConvertRequest,
+    onProgress?: (progress: ConversionProgress) => void
+  ): Promise<FileConvertResponse> {
+    return this.runConversion('file/convert', request, onProgress, 'File conversion');
+  }
+
+  /**
+   * Convert an XLSX, CSV or Parquet file back to fixed-length records on the backend
+   */
+  async reverseConvertFile(
+    request: FileReverseConvertRequest,
+    onProgress?: (progress: ConversionProgress) => void
+  ): Promise<FileConvertResponse> {
+    return this.runConversion('file/reverse-convert', request, onProgress, 'Reverse conversion');
+  }
+
+  private async runConversion(
+    endpoint: string,
+    request: FileConvertRequest | FileReverseConvertRequest,
+    onProgress: ((progress: ConversionProgress) => void) | undefined,
+    label: string
+  ): Promise<FileConvertResponse> {
+    try {
+      const response = await fetch(`${BASE_URL}/${endpoint}`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ ...request, stream: Boolean(onProgress) }),
+      });
+
+      if (!onProgress || !response.body || !response.ok) {
+        return await response.json();
+      }
+
+      // NDJSON stream: progress events followed by one result (or error) event
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffered = '';
+      let result: FileConvertResponse = { success: false, message: `${label} ended without a result` };
+      for (;;) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffered += decoder.decode(value, { stream: true });
+        const lines = buffered.split('\n');
+        buffered = lines.pop() || '';
+        for (const line of lines.filter(item => item.trim())) {
+          const event = JSON.parse(line);
+          if (event.type === 'progress') {
+            onProgress(event as ConversionProgress);
+          } else {
+            result = event as FileConvertResponse;
+          }
+        }
+      }
+      return result;
+    } catch (error) {
+      return {
+        success: false,
+        message: `${label} error: ${error instanceof Error ? error.message : 'Unknown error'}`,
+      };
+    }
+  }
+
+  /**
+   * Allocate, delete or list many datasets in one call
+   */
+  async bulkDatasets(request: BulkDatasetRequest): Promise<BulkDatasetResponse> {
+    try {
+      const response = await fetch(`${BASE_URL}/datasets/bulk`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(request),
+      });
+
+      return await response.json();
+    } catch (error) {
+      return {
+        success: false,
+        message: `Bulk dataset error: ${error instanceof Error ? error.message : 'Unknown error'}`,
+      };
+    }
+  }
+
+  /**
+   * Existence, attributes and members of datasets, answered from the backend catalog cache when fresh
+   */
+  async lookupDatasets(request: CatalogLookupRequest): Promise<CatalogLookupResponse> {
+    try {
+      const response = await fetch(`${BASE_URL}/catalog/lookup`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(request),
+      });
+
+      return await response.json();
+    } catch (error) {
+      return {
+        success: false,
+        message: `Catalog lookup error: ${error instanceof Error ? error.message : 'Unknown error'}`,
+      };
+    }
+  }
+
+  /**
+   * Cache every dataset name under a high-level qualifier (LISTCAT LEVEL)
+   */
+  async refreshCatalog(sessionId: string, level: string): Promise<CatalogRefreshResponse> {
+    try {
+      const response = await fetch(`${BASE_URL}/catalog/refresh`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ session_id: sessionId, level }),
+      });
+
+      return await response.json();
+    } catch (error) {
+      return {
+        success: false,
+        message: `Catalog refresh error: ${error instanceof Error ? error.message : 'Unknown error'}`,
+      };
+    }
+  }
+
+  /**
+   * Drop cached catalog entries for some datasets, or all of the session's host when none are given
+   */
+  async invalidateCatalog(sessionId: string, datasets?: string[]): Promise<{ success: boolean; message: string }> {
+    try {
+      const response = await fetch(`${BASE_URL}/catalog/invalidate`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ session_id: sessionId, datasets }),
+      });
+
+      return await response.json();
+    } catch (error) {
+      return {
+        success: false,
+        message: `Catalog invalidate error: ${error instanceof Error ? error.message : 'Unknown error'}`,
+      };
+    }
+  }
+
+  /**
+   * Queue an operation or a workflow; the backend runs it under per-host and per-user limits
+   */
+  async enqueue(request: QueueSubmitRequest): Promise<QueueSubmitResponse> {
+    try {
+      const response = await fetch(`${BASE_URL}/queue`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(request),
+      });
+
+      return await response.json();
+    } catch (error) {
+      return {
+        success: false,
+        message: `Queue error: ${error instanceof Error ? error.message : 'Unknown error'}`,
+      };
+    }
+  }
+
+  /**
+   * Status, position, ETA and result of a queued item
+   */
+  async getQueueItem(itemId: string): Promise<QueueItemResponse> {
+    try {
+      const response = await fetch(`${BASE_URL}/queue/${encodeURIComponent(itemId)}`);
+      return await response.json();
+    } catch (error) {
+      return {
+        success: false,
+        message: `Queue status error: ${error instanceof Error ? error.message : 'Unknown error'}`,
+      };
+    }
+  }
+
+  /**
+   * Cancel a queued item that has not started yet
+   */
+  async cancelQueueItem(itemId: string): Promise<{ success: boolean; message: string }> {
+    try {
+      const response = await fetch(`${BASE_URL}/queue/${encodeURIComponent(itemId)}/cancel`, {
+        method: 'POST',
+      });
+      return await response.json();
+    } catch (error) {
+      return {
+        success: false,
+        message: `Queue cancel error: ${error instanceof Error ? error.message : 'Unknown error'}`,
+      };
+    }
+  }
+
+  /**
+   * Checkpoints of a queued workflow run
+   */
+  async getWorkflowRun(runId: string): Promise<WorkflowRunResponse> {
+    try {
+      const response = await fetch(`${BASE_URL}/workflow/${encodeURIComponent(runId)}`);
+      return await response.json();
+    } catch (error) {
+      return {
+        success: false,
+        message: `Workflow run error: ${error instanceof Error ? error.message : 'Unknown error'}`,
+      };
+    }
+  }
+
+  /**
+   * Resume a failed workflow run from its failed step, reusing earlier step results and the session.
+   * Only runs queued with enqueue are checkpointed; FunctionExecutor.executeWorkflow is not.
+   */
+  async resumeWorkflow(runId: string, request: WorkflowResumeRequest = {}): Promise<WorkflowResumeResponse> {
+    try {
+      const response = await fetch(`${BASE_URL}/workflow/${encodeURIComponent(runId)}/resume`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(request),
+      });
+
+      return await response.json();
+    } catch (error) {
+      return {
+        success: false,
+        message: `Workflow resume error: ${error instanceof Error ? error.message : 'Unknown error'}`,
+      };
+    }
+  }
+
+  /**
+   * Run several host operations with one TSO EXEC of the batch REXX exec
+   */
+  async runBatch(request: BatchRequest): Promise<BatchResponse> {
+    try {
+      const response = await fetch(`${BASE_URL}/batch`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(request),
+      });
+
+      return await response.json();
+    } catch (error) {
+      return {
+        success: false,
+        message: `Batch error: ${error instanceof Error ? error.message : 'Unknown error'}`,
+      };
+    }
+  }
+
+  /**
+   * Count records of host datasets with an IDCAMS job (nothing is downloaded)
+   */
+  async countRecords(request: RecordCountRequest): Promise<RecordCountResponse> {
+    try {
+      const response = await fetch(`${BASE_URL}/reccount`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(request),
+      });
+
+      return await response.json();
+    } catch (error) {
+      return {
+        success: false,
+        message: `Record count error: ${error instanceof Error ? error.message : 'Unknown error'}`,
+      };
+    }
+  }
+
   /**
    * Cleanup all active sessions - useful for debugging and preventing connection leaks
    */